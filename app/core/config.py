@@ -141,6 +141,29 @@ class Settings(BaseSettings):
     METRICS_ENABLED: bool = Field(default=True)
     HEALTH_CHECK_INTERVAL: int = Field(default=60)  # 60秒
 
+    # 操作日志批量写入配置
+    OPLOG_BUFFER_MAX_SIZE: int = Field(default=5000)  # 缓冲区上限，满后丢弃
+    OPLOG_BATCH_SIZE: int = Field(default=200)  # 单批 insert_many 条数
+    OPLOG_FLUSH_INTERVAL_SECONDS: float = Field(default=1.0)
+    OPLOG_SAMPLE_WATERMARK: float = Field(default=0.8, ge=0.0, le=1.0)  # 超过该比例后对成功操作抽样
+    OPLOG_SAMPLE_RATE: int = Field(default=10, ge=1)  # 抽样时每 N 条保留 1 条
+
+    # 分析进度合并写入窗口（同一任务窗口内只写最新进度）
+    PROGRESS_COALESCE_WINDOW_SECONDS: float = Field(default=0.25, ge=0.0)
+
+    # 分析执行器：thread（进程内线程池）| process（常驻子进程池，进程隔离）
+    ANALYSIS_EXECUTOR_MODE: str = Field(default="thread")
+    ANALYSIS_MAX_WORKERS: int = Field(default=3, ge=1)  # 最大并发分析数
+    ANALYSIS_WORKER_MEMORY_LIMIT_MB: int = Field(default=0, ge=0)  # 单个分析进程内存上限，0 表示不限制
+    ANALYSIS_WORKER_MAX_TASKS: int = Field(default=50, ge=0)  # 分析进程执行多少个任务后重建，0 表示不重建
+    ANALYSIS_CANCEL_GRACE_SECONDS: float = Field(default=30.0, ge=0.0)  # 取消后等待优雅退出的时间
+
+    # 报告导出（Word/PDF）渲染缓存
+    REPORT_EXPORT_CACHE_DIR: str = Field(default="./data/report_exports")
+    REPORT_EXPORT_WORKERS: int = Field(default=2, ge=1)  # 同时渲染的最大数量
+    REPORT_EXPORT_CACHE_MAX_MB: int = Field(default=512, ge=1)
+    REPORT_EXPORT_PRERENDER_FORMATS: str = Field(default="")  # 分析完成后预渲染的格式，如 "docx,pdf"
+
 
     # 配置真相来源（方案A）：file|db|hybrid
     # - file：以文件/env 为准（推荐，生产缺省）
@@ -182,6 +205,17 @@ class Settings(BaseSettings):
         description="自动检测Tushare rt_k接口权限，付费用户自动切换到高频模式（5秒）"
     )
 
+    # 数据源对冲请求（实时行情/K线：主数据源超过自身延迟分位数后并发请求备用数据源）
+    DATA_SOURCE_HEDGE_ENABLED: bool = Field(default=False, description="默认对实时行情和K线启用对冲请求")
+    DATA_SOURCE_HEDGE_PERCENTILE: float = Field(default=0.95, gt=0.0, lt=1.0, description="触发对冲的主数据源延迟分位数")
+    DATA_SOURCE_HEDGE_BUDGET_RATIO: float = Field(default=0.1, ge=0.0, le=1.0, description="对冲产生的额外调用占请求数的比例上限")
+    DATA_SOURCE_HEDGE_PRIMARY_WORKERS: int = Field(default=16, ge=1, le=128, description="执行主数据源请求的线程数")
+    DATA_SOURCE_HEDGE_MAX_WORKERS: int = Field(default=4, ge=1, le=64, description="执行对冲请求的线程数（全部占用时不再对冲）")
+
+    # 多周期同步：周线/月线由已存储的日线本地重采样，不再逐只从数据源下载
+    MULTI_PERIOD_DERIVE_FROM_DAILY: bool = Field(default=True, description="周线/月线由日线本地聚合生成")
+    MULTI_PERIOD_ADJUST: str = Field(default="none", description="本地聚合的复权方式：none（按日线存储价格）/qfq/hfq")
+
     # Tushare基础配置
     TUSHARE_TOKEN: str = Field(default="", description="Tushare API Token")
     TUSHARE_ENABLED: bool = Field(default=True, description="启用Tushare数据源")
@@ -276,6 +310,12 @@ class Settings(BaseSettings):
     NEWS_SYNC_HOURS_BACK: int = Field(default=24)
     NEWS_SYNC_MAX_PER_SOURCE: int = Field(default=50)
 
+    # 新闻检索：进程内倒排索引 + 短 TTL 结果缓存（关闭后回退到 MongoDB 查询）
+    NEWS_SEARCH_INDEX_ENABLED: bool = Field(default=False, description="search_news/query_news 使用本地倒排索引（每个 API 进程各自在内存中构建）")
+    NEWS_SEARCH_INDEX_MAX_DOCS: int = Field(default=5000, ge=100, le=50000, description="倒排索引保留的最大新闻数（每条常驻数 KB 内存），更早的新闻回退到 MongoDB 查询")
+    NEWS_SEARCH_INDEX_REFRESH_SECONDS: int = Field(default=60, ge=0, description="从 MongoDB 补齐其他进程写入新闻的间隔（秒）")
+    NEWS_SEARCH_CACHE_TTL_SECONDS: float = Field(default=30.0, ge=0.0, description="查询结果缓存的有效期（秒），0 表示不缓存")
+
     @property
     def is_production(self) -> bool:
         """是否为生产环境"""
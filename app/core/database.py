@@ -216,8 +216,10 @@ async def init_database_views_and_indexes():
     try:
         db = get_mongo_db()
 
-        # 1. 创建股票筛选视图
+        # 1. 创建股票筛选视图，并初始化物化筛选集合
         await create_stock_screening_view(db)
+        from app.services.screening_table_service import get_screening_table_service
+        await get_screening_table_service().ensure_table(db)
 
         # 2. 创建必要的索引
         await create_database_indexes(db)
@@ -232,6 +234,108 @@ async def init_database_views_and_indexes():
         # 不抛出异常，允许应用继续启动
 
 
+def build_stock_screening_pipeline(codes=None):
+    """构建股票筛选关联管道（stock_basic_info + market_quotes + 最新一期 stock_financial_data）
+
+    视图 stock_screening_view 与物化集合 stock_screening 共用该管道；
+    传入 codes 时只处理这些股票（用于增量刷新）。
+    """
+    pipeline = [
+        # 第一步：关联实时行情数据 (market_quotes)
+        {
+            "$lookup": {
+                "from": "market_quotes",
+                "localField": "code",
+                "foreignField": "code",
+                "as": "quote_data"
+            }
+        },
+        # 第二步：展开 quote_data 数组
+        {
+            "$unwind": {
+                "path": "$quote_data",
+                "preserveNullAndEmptyArrays": True
+            }
+        },
+        # 第三步：关联财务数据 (stock_financial_data)
+        {
+            "$lookup": {
+                "from": "stock_financial_data",
+                "let": {"stock_code": "$code", "stock_source": "$source"},
+                "pipeline": [
+                    {
+                        "$match": {
+                            "$expr": {
+                                "$and": [
+                                    {"$eq": ["$code", "$$stock_code"]},
+                                    {"$eq": ["$data_source", "$$stock_source"]}
+                                ]
+                            }
+                        }
+                    },
+                    {"$sort": {"report_period": -1}},
+                    {"$limit": 1}
+                ],
+                "as": "financial_data"
+            }
+        },
+        # 第四步：展开 financial_data 数组
+        {
+            "$unwind": {
+                "path": "$financial_data",
+                "preserveNullAndEmptyArrays": True
+            }
+        },
+        # 第五步：重新组织字段结构
+        {
+            "$project": {
+                # 基础信息字段
+                "code": 1,
+                "name": 1,
+                "industry": 1,
+                "area": 1,
+                "market": 1,
+                "list_date": 1,
+                "source": 1,
+                # 市值信息
+                "total_mv": 1,
+                "circ_mv": 1,
+                # 估值指标
+                "pe": 1,
+                "pb": 1,
+                "pe_ttm": 1,
+                "pb_mrq": 1,
+                # 财务指标
+                "roe": "$financial_data.roe",
+                "roa": "$financial_data.roa",
+                "netprofit_margin": "$financial_data.netprofit_margin",
+                "gross_margin": "$financial_data.gross_margin",
+                "report_period": "$financial_data.report_period",
+                # 交易指标
+                "turnover_rate": 1,
+                "volume_ratio": 1,
+                # 实时行情数据
+                "close": "$quote_data.close",
+                "open": "$quote_data.open",
+                "high": "$quote_data.high",
+                "low": "$quote_data.low",
+                "pre_close": "$quote_data.pre_close",
+                "pct_chg": "$quote_data.pct_chg",
+                "amount": "$quote_data.amount",
+                "volume": "$quote_data.volume",
+                "trade_date": "$quote_data.trade_date",
+                # 时间戳
+                "updated_at": 1,
+                "quote_updated_at": "$quote_data.updated_at",
+                "financial_updated_at": "$financial_data.updated_at"
+            }
+        }
+    ]
+    if codes is not None:
+        pipeline.insert(0, {"$match": {"code": {"$in": list(codes)}}})
+    return pipeline
+
+
 async def create_stock_screening_view(db):
     """创建股票筛选视图"""
     try:
@@ -242,97 +346,7 @@ async def create_stock_screening_view(db):
             return
 
         # 创建视图：将 stock_basic_info、market_quotes 和 stock_financial_data 关联
-        pipeline = [
-            # 第一步：关联实时行情数据 (market_quotes)
-            {
-                "$lookup": {
-                    "from": "market_quotes",
-                    "localField": "code",
-                    "foreignField": "code",
-                    "as": "quote_data"
-                }
-            },
-            # 第二步：展开 quote_data 数组
-            {
-                "$unwind": {
-                    "path": "$quote_data",
-                    "preserveNullAndEmptyArrays": True
-                }
-            },
-            # 第三步：关联财务数据 (stock_financial_data)
-            {
-                "$lookup": {
-                    "from": "stock_financial_data",
-                    "let": {"stock_code": "$code", "stock_source": "$source"},
-                    "pipeline": [
-                        {
-                            "$match": {
-                                "$expr": {
-                                    "$and": [
-                                        {"$eq": ["$code", "$$stock_code"]},
-                                        {"$eq": ["$data_source", "$$stock_source"]}
-                                    ]
-                                }
-                            }
-                        },
-                        {"$sort": {"report_period": -1}},
-                        {"$limit": 1}
-                    ],
-                    "as": "financial_data"
-                }
-            },
-            # 第四步：展开 financial_data 数组
-            {
-                "$unwind": {
-                    "path": "$financial_data",
-                    "preserveNullAndEmptyArrays": True
-                }
-            },
-            # 第五步：重新组织字段结构
-            {
-                "$project": {
-                    # 基础信息字段
-                    "code": 1,
-                    "name": 1,
-                    "industry": 1,
-                    "area": 1,
-                    "market": 1,
-                    "list_date": 1,
-                    "source": 1,
-                    # 市值信息
-                    "total_mv": 1,
-                    "circ_mv": 1,
-                    # 估值指标
-                    "pe": 1,
-                    "pb": 1,
-                    "pe_ttm": 1,
-                    "pb_mrq": 1,
-                    # 财务指标
-                    "roe": "$financial_data.roe",
-                    "roa": "$financial_data.roa",
-                    "netprofit_margin": "$financial_data.netprofit_margin",
-                    "gross_margin": "$financial_data.gross_margin",
-                    "report_period": "$financial_data.report_period",
-                    # 交易指标
-                    "turnover_rate": 1,
-                    "volume_ratio": 1,
-                    # 实时行情数据
-                    "close": "$quote_data.close",
-                    "open": "$quote_data.open",
-                    "high": "$quote_data.high",
-                    "low": "$quote_data.low",
-                    "pre_close": "$quote_data.pre_close",
-                    "pct_chg": "$quote_data.pct_chg",
-                    "amount": "$quote_data.amount",
-                    "volume": "$quote_data.volume",
-                    "trade_date": "$quote_data.trade_date",
-                    # 时间戳
-                    "updated_at": 1,
-                    "quote_updated_at": "$quote_data.updated_at",
-                    "financial_updated_at": "$financial_data.updated_at"
-                }
-            }
-        ]
+        pipeline = build_stock_screening_pipeline()
 
         # 创建视图
         await db.command({
@@ -366,6 +380,18 @@ async def create_database_indexes(db):
         await market_quotes.create_index([("amount", -1)])
         await market_quotes.create_index([("updated_at", -1)])
 
+        # analysis_reports 的索引：列表按 (created_at, _id) 游标分页，关键词走 n-gram 搜索词
+        analysis_reports = db["analysis_reports"]
+        await analysis_reports.create_index([("created_at", -1), ("_id", -1)])
+        await analysis_reports.create_index([("search_terms", 1)])
+        await analysis_reports.create_index([("search_terms_version", 1)])
+        await analysis_reports.create_index([("stock_symbol", 1), ("created_at", -1)])
+        await analysis_reports.create_index([("market_type", 1), ("created_at", -1)])
+
+        # 旧报告在后台补充/重新生成搜索词
+        from app.utils.report_search import backfill_report_search_terms
+        asyncio.create_task(backfill_report_search_terms(db))
+
         # workflow_configs 的索引
         workflow_configs = db["workflow_configs"]
         try:
@@ -3,6 +3,7 @@
 用于控制API调用频率，避免超过数据源的限流限制
 """
 import asyncio
+import threading
 import time
 import logging
 from collections import deque
@@ -30,8 +31,11 @@ class RateLimiter:
         self.max_calls = max_calls
         self.time_window = time_window
         self.name = name
-        self.calls = deque()  # 存储调用时间戳
-        self.lock = asyncio.Lock()  # 确保线程安全
+        self.calls = deque()  # 存储调用时间戳（含已预约的未来时间点）
+        # 线程锁只保护调用记录的读写，不跨 await 持有：
+        # 同一个限制器会被 API 事件循环、Worker 线程中的事件循环和 asyncio.run 共用，
+        # asyncio.Lock 绑定到首次使用的事件循环，跨循环使用会报错
+        self.lock = threading.Lock()
         
         # 统计信息
         self.total_calls = 0
@@ -39,42 +43,42 @@ class RateLimiter:
         self.total_wait_time = 0.0
         
         logger.info(f"🔧 {self.name} 初始化: {max_calls}次/{time_window}秒")
-    
-    async def acquire(self):
-        """
-        获取调用许可
-        如果超过速率限制，会等待直到可以调用
+
+    def _reserve(self) -> float:
+        """预约一个调用时间点，返回需要等待的秒数
+
+        窗口已满时预约时间点为"倒数第 max_calls 次调用 + 时间窗口"，
+        预约的时间点按顺序追加，任意时间窗口内的调用都不超过 max_calls。
         """
-        async with self.lock:
+        with self.lock:
             now = time.time()
-            
+
             # 移除时间窗口外的旧调用记录
             while self.calls and self.calls[0] <= now - self.time_window:
                 self.calls.popleft()
-            
-            # 如果当前窗口内调用次数已达上限，需要等待
+
+            slot = now
             if len(self.calls) >= self.max_calls:
-                # 计算需要等待的时间
-                oldest_call = self.calls[0]
-                wait_time = oldest_call + self.time_window - now + 0.01  # 加一点缓冲
-                
-                if wait_time > 0:
-                    self.total_waits += 1
-                    self.total_wait_time += wait_time
-                    
-                    logger.debug(f"⏳ {self.name} 达到速率限制，等待 {wait_time:.2f}秒")
-                    await asyncio.sleep(wait_time)
-                    
-                    # 重新获取当前时间
-                    now = time.time()
-                    
-                    # 再次清理旧记录
-                    while self.calls and self.calls[0] <= now - self.time_window:
-                        self.calls.popleft()
-            
+                slot = max(now, self.calls[-self.max_calls] + self.time_window + 0.01)  # 加一点缓冲
+
             # 记录本次调用
-            self.calls.append(now)
+            self.calls.append(slot)
             self.total_calls += 1
+            wait_time = slot - now
+            if wait_time > 0:
+                self.total_waits += 1
+                self.total_wait_time += wait_time
+            return wait_time
+    
+    async def acquire(self):
+        """
+        获取调用许可
+        如果超过速率限制，会等待直到可以调用（可在任意事件循环中调用）
+        """
+        wait_time = self._reserve()
+        if wait_time > 0:
+            logger.debug(f"⏳ {self.name} 达到速率限制，等待 {wait_time:.2f}秒")
+            await asyncio.sleep(wait_time)
     
     def get_stats(self) -> dict:
         """获取统计信息"""
@@ -192,6 +196,7 @@ class BaoStockRateLimiter(RateLimiter):
 _tushare_limiter: Optional[TushareRateLimiter] = None
 _akshare_limiter: Optional[AKShareRateLimiter] = None
 _baostock_limiter: Optional[BaoStockRateLimiter] = None
+_limiter_init_lock = threading.Lock()
 
 
 def get_tushare_rate_limiter(tier: str = "standard", safety_margin: float = 0.8) -> TushareRateLimiter:
@@ -203,10 +208,12 @@ def get_tushare_rate_limiter(tier: str = "standard", safety_margin: float = 0.8)
 
 
 def get_akshare_rate_limiter() -> AKShareRateLimiter:
-    """获取AKShare速率限制器（单例）"""
+    """获取AKShare速率限制器（单例，跨线程/事件循环共享同一限流窗口）"""
     global _akshare_limiter
     if _akshare_limiter is None:
-        _akshare_limiter = AKShareRateLimiter()
+        with _limiter_init_lock:
+            if _akshare_limiter is None:
+                _akshare_limiter = AKShareRateLimiter()
     return _akshare_limiter
 
 
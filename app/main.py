@@ -267,6 +267,14 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"Startup backfill failed (ignored): {e}")
 
+    # 新闻倒排索引在后台构建，构建完成前新闻查询直接走 MongoDB
+    if settings.NEWS_SEARCH_INDEX_ENABLED:
+        try:
+            from app.services.news_data_service import get_news_data_service
+            (await get_news_data_service()).start_search_index_build()
+        except Exception as e:
+            logger.warning(f"News search index build not started (ignored): {e}")
+
     # 启动每日定时任务：可配置
     scheduler: AsyncIOScheduler | None = None
     try:
@@ -578,6 +586,14 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ 调度器启动失败: {e}", exc_info=True)
         raise  # 抛出异常，阻止应用启动
 
+    # 进程池模式下预热分析进程（预先导入分析引擎）
+    if settings.ANALYSIS_EXECUTOR_MODE.lower() == "process":
+        try:
+            from app.services.simple_analysis_service import get_simple_analysis_service
+            await get_simple_analysis_service().warm_up_executor()
+        except Exception as e:
+            logger.warning(f"⚠️ 分析进程池预热失败，将在首次分析时重试: {e}")
+
     try:
         yield
     finally:
@@ -589,6 +605,36 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.warning(f"Scheduler shutdown error: {e}")
 
+        # 刷写缓冲中的操作日志
+        try:
+            from app.services.operation_log_service import get_operation_log_writer
+            await get_operation_log_writer().stop()
+        except Exception as e:
+            logger.warning(f"Operation log writer shutdown error: {e}")
+
+        # 写出尚未落库的分析进度
+        try:
+            from app.services.progress.pipeline import get_progress_pipeline
+            await get_progress_pipeline().stop()
+        except Exception as e:
+            logger.warning(f"Progress pipeline shutdown error: {e}")
+
+        # 停止分析进程池
+        try:
+            from app.services import simple_analysis_service
+            if simple_analysis_service._analysis_service is not None:
+                await simple_analysis_service._analysis_service.shutdown_executors()
+        except Exception as e:
+            logger.warning(f"Analysis executor shutdown error: {e}")
+
+        # 停止报告导出线程池
+        try:
+            from app.services import report_export_service
+            if report_export_service._report_export_service is not None:
+                report_export_service._report_export_service.shutdown()
+        except Exception as e:
+            logger.warning(f"Report export service shutdown error: {e}")
+
         # 关闭 UserService MongoDB 连接
         try:
             from app.services.user_service import user_service
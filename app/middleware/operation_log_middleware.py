@@ -10,7 +10,7 @@ from typing import Optional, Dict, Any
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from app.services.operation_log_service import log_operation
+from app.services.operation_log_service import log_operation, enqueue_operation_log
 from app.models.operation_log import ActionType
 
 logger = logging.getLogger("webapi")
@@ -77,7 +77,7 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
         # 计算耗时
         duration_ms = int((time.time() - start_time) * 1000)
 
-        # 异步记录操作日志
+        # 记录操作日志（放入批量写入缓冲区，不阻塞响应）
         if user_info:
             try:
                 await self._log_operation(
@@ -260,8 +260,8 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
             if not success:
                 error_message = f"HTTP {response.status_code}"
 
-            # 记录操作日志
-            await log_operation(
+            # 放入批量写入缓冲区，由后台任务 insert_many
+            enqueue_operation_log(
                 user_id=user_info.get("id", ""),
                 username=user_info.get("username", "unknown"),
                 action_type=action_type,
@@ -959,6 +959,9 @@ async def cancel_task(
             raise HTTPException(status_code=404, detail="任务不存在")
 
         success = await svc.cancel_task(task_id)
+        # 正在分析进程中执行的任务同时发送取消信号
+        if get_simple_analysis_service().cancel_running_analysis(task_id):
+            success = True
         if success:
             return {"success": True, "message": "任务已取消"}
         else:
@@ -1178,6 +1181,9 @@ async def mark_task_as_failed(
     try:
         svc = get_simple_analysis_service()
 
+        # 仍在分析进程中执行时，请求终止该分析
+        svc.cancel_running_analysis(task_id)
+
         # 更新内存中的任务状态
         from app.services.memory_state_manager import TaskStatus
         await svc.memory_manager.update_task_status(
@@ -24,6 +24,11 @@ class BackupRequest(BaseModel):
     name: str
     collections: List[str] = []  # 空列表表示备份所有集合
 
+class RestoreRequest(BaseModel):
+    """恢复备份请求"""
+    collections: List[str] = []  # 空列表表示恢复所有集合
+    overwrite: bool = False  # 恢复前清空目标集合；否则按 _id 覆盖写入
+
 class ImportRequest(BaseModel):
     """导入请求"""
     collection: str
@@ -164,6 +169,32 @@ async def list_backups(
             detail=f"获取备份列表失败: {str(e)}"
         )
 
+@router.post("/backups/{backup_id}/restore")
+async def restore_backup(
+    backup_id: str,
+    request: RestoreRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """从备份恢复数据"""
+    try:
+        logger.info(f"🔄 用户 {current_user['username']} 恢复备份: {backup_id} (覆盖模式: {request.overwrite})")
+        result = await database_service.restore_backup(
+            backup_id,
+            collections=request.collections,
+            overwrite=request.overwrite
+        )
+        return {
+            "success": True,
+            "message": "备份恢复成功",
+            "data": result
+        }
+    except Exception as e:
+        logger.error(f"恢复备份失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"恢复备份失败: {str(e)}"
+        )
+
 @router.post("/import")
 async def import_data(
     file: UploadFile = File(...),
@@ -179,12 +210,11 @@ async def import_data(
         logger.info(f"   格式: {format}")
         logger.info(f"   覆盖模式: {overwrite}")
 
-        # 读取文件内容
-        content = await file.read()
-        logger.info(f"   文件大小: {len(content)} 字节")
+        # 上传内容已由框架缓存到临时文件，直接按流读取，不整体读入内存
+        logger.info(f"   文件大小: {file.size} 字节")
 
         result = await database_service.import_data(
-            content=content,
+            content=file.file,
             collection=collection,
             format=format,
             overwrite=overwrite,
@@ -10,6 +10,8 @@ from pydantic import BaseModel
 
 from app.services.multi_source_basics_sync_service import get_multi_source_sync_service
 from app.services.data_sources.manager import DataSourceManager
+from app.services.data_sources.health import get_source_health_tracker
+from app.services.data_sources.hedging import get_request_hedger
 
 logger = logging.getLogger(__name__)
 
@@ -138,6 +140,20 @@ async def get_current_data_source():
         raise HTTPException(status_code=500, detail=f"Failed to get current data source: {str(e)}")
 
 
+@router.get("/sources/health")
+async def get_data_sources_health():
+    """获取各数据源的实时健康度（EWMA 延迟、失败率、熔断状态）及对冲请求统计"""
+    try:
+        stats = get_source_health_tracker().get_stats()
+        return SyncResponse(
+            success=True,
+            message=f"Health of {len(stats)} source methods retrieved successfully",
+            data={"sources": stats, "hedging": get_request_hedger().get_stats()}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get data sources health: {str(e)}")
+
+
 @router.get("/status")
 async def get_sync_status():
     """获取多数据源同步状态"""
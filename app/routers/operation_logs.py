@@ -8,7 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from fastapi.responses import StreamingResponse
 
 from app.routers.auth_db import get_current_user
-from app.services.operation_log_service import get_operation_log_service
+from app.services.operation_log_service import get_operation_log_service, get_operation_log_writer
 from app.models.operation_log import (
     OperationLogQuery,
     OperationLogListResponse,
@@ -96,6 +96,18 @@ async def get_operation_log_stats(
         )
 
 
+@router.get("/writer/stats")
+async def get_operation_log_writer_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """获取操作日志批量写入器计数（排队/写入/丢弃）"""
+    return {
+        "success": True,
+        "data": get_operation_log_writer().get_stats(),
+        "message": "获取操作日志写入统计成功"
+    }
+
+
 @router.get("/{log_id}")
 async def get_operation_log_detail(
     log_id: str,
@@ -14,6 +14,14 @@ from pydantic import BaseModel
 from .auth_db import get_current_user
 from ..core.database import get_mongo_db
 from ..utils.timezone import to_config_tz
+from ..utils.report_search import (
+    build_keyword_query,
+    build_keyset_query,
+    count_reports,
+    decode_cursor,
+    encode_cursor,
+    invalidate_report_list_cache,
+)
 import logging
 
 logger = logging.getLogger("webapi")
@@ -125,9 +133,14 @@ async def get_reports_list(
     start_date: Optional[str] = Query(None, description="开始日期"),
     end_date: Optional[str] = Query(None, description="结束日期"),
     stock_code: Optional[str] = Query(None, description="股票代码"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一次返回的 next_cursor），传入时忽略 page"),
     user: dict = Depends(get_current_user)
 ):
-    """获取分析报告列表"""
+    """获取分析报告列表
+
+    按 (created_at, _id) 倒序分页：客户端传入 cursor（上一页返回的 next_cursor）时
+    使用游标条件走索引，不再 skip 前面的所有文档；只传 page 时按 skip/limit 分页。
+    """
     try:
         logger.info(f"🔍 获取报告列表: 用户={user['id']}, 页码={page}, 每页={page_size}, 市场={market_filter}")
 
@@ -136,13 +149,9 @@ async def get_reports_list(
         # 构建查询条件
         query = {}
 
-        # 搜索关键词
+        # 搜索关键词（n-gram 索引预筛 + 正则校验）
         if search_keyword:
-            query["$or"] = [
-                {"stock_symbol": {"$regex": search_keyword, "$options": "i"}},
-                {"analysis_id": {"$regex": search_keyword, "$options": "i"}},
-                {"summary": {"$regex": search_keyword, "$options": "i"}}
-            ]
+            query.update(build_keyword_query(search_keyword))
 
         # 市场筛选
         if market_filter:
@@ -163,15 +172,32 @@ async def get_reports_list(
 
         logger.info(f"📊 查询条件: {query}")
 
-        # 计算总数
-        total = await db.analysis_reports.count_documents(query)
+        # 计算总数（估算/缓存）
+        total = await count_reports(db, query)
+
+        # 分页查询：显式传入游标时走 keyset 条件，否则按页码 skip
+        find_query = query
+        skip = 0
+        if cursor:
+            try:
+                keyset = build_keyset_query(*decode_cursor(cursor))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            find_query = {"$and": [query, keyset]} if query else keyset
+        else:
+            skip = (page - 1) * page_size
 
-        # 分页查询
-        skip = (page - 1) * page_size
-        cursor = db.analysis_reports.find(query).sort("created_at", -1).skip(skip).limit(page_size)
+        docs_cursor = (
+            db.analysis_reports.find(find_query, {"search_terms": 0})
+            .sort([("created_at", -1), ("_id", -1)])
+            .skip(skip)
+            .limit(page_size)
+        )
 
         reports = []
-        async for doc in cursor:
+        last_doc = None
+        async for doc in docs_cursor:
+            last_doc = doc
             # 转换为前端需要的格式
             stock_code = doc.get("stock_symbol", "")
             # 🔥 优先使用MongoDB中保存的股票名称，如果没有则查询
@@ -218,6 +244,10 @@ async def get_reports_list(
             }
             reports.append(report)
 
+        next_cursor = None
+        if last_doc is not None and len(reports) == page_size:
+            next_cursor = encode_cursor(last_doc.get("created_at"), last_doc["_id"])
+
         logger.info(f"✅ 查询完成: 总数={total}, 返回={len(reports)}")
 
         return {
@@ -226,11 +256,14 @@ async def get_reports_list(
                 "reports": reports,
                 "total": total,
                 "page": page,
-                "page_size": page_size
+                "page_size": page_size,
+                "next_cursor": next_cursor
             },
             "message": "报告列表获取成功"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ 获取报告列表失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -412,6 +445,7 @@ async def delete_report(
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="报告不存在")
 
+        invalidate_report_list_cache()
         logger.info(f"✅ 报告删除成功: {report_id}")
 
         return {
@@ -425,6 +459,17 @@ async def delete_report(
         logger.error(f"❌ 删除报告失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export/stats")
+async def get_report_export_stats(user: dict = Depends(get_current_user)):
+    """获取报告导出缓存统计（命中率、渲染耗时）"""
+    from app.services.report_export_service import get_report_export_service
+    return {
+        "success": True,
+        "data": get_report_export_service().get_stats(),
+        "message": "获取导出统计成功"
+    }
+
+
 @router.get("/{report_id}/download")
 async def download_report(
     report_id: str,
@@ -509,61 +554,34 @@ async def download_report(
                 headers={"Content-Disposition": f"attachment; filename={filename}"}
             )
 
-        elif format == "docx":
-            # Word 文档格式下载
+        elif format in ("docx", "pdf"):
+            # Word / PDF 格式下载：按内容哈希缓存渲染结果，在导出线程池中渲染，直接流式返回缓存文件
             from app.utils.report_exporter import report_exporter
+            from app.services.report_export_service import EXPORT_FORMATS, get_report_export_service
 
-            if not report_exporter.pandoc_available:
+            if format == "docx" and not report_exporter.pandoc_available:
                 raise HTTPException(
                     status_code=400,
                     detail="Word 导出功能不可用。请安装 pandoc: pip install pypandoc"
                 )
-
-            try:
-                # 生成 Word 文档
-                docx_content = report_exporter.generate_docx_report(doc)
-                filename = f"{stock_symbol}_{analysis_date}_report.docx"
-
-                # 返回文件流
-                def generate():
-                    yield docx_content
-
-                return StreamingResponse(
-                    generate(),
-                    media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    headers={"Content-Disposition": f"attachment; filename={filename}"}
-                )
-            except Exception as e:
-                logger.error(f"❌ Word 文档生成失败: {e}")
-                raise HTTPException(status_code=500, detail=f"Word 文档生成失败: {str(e)}")
-
-        elif format == "pdf":
-            # PDF 格式下载
-            from app.utils.report_exporter import report_exporter
-
-            if not report_exporter.pandoc_available:
+            if format == "pdf" and not report_exporter.pandoc_available:
                 raise HTTPException(
                     status_code=400,
                     detail="PDF 导出功能不可用。请安装 pandoc 和 PDF 引擎（wkhtmltopdf 或 LaTeX）"
                 )
 
+            label = "Word 文档" if format == "docx" else "PDF 文档"
             try:
-                # 生成 PDF 文档
-                pdf_content = report_exporter.generate_pdf_report(doc)
-                filename = f"{stock_symbol}_{analysis_date}_report.pdf"
-
-                # 返回文件流
-                def generate():
-                    yield pdf_content
-
-                return StreamingResponse(
-                    generate(),
-                    media_type="application/pdf",
-                    headers={"Content-Disposition": f"attachment; filename={filename}"}
-                )
+                artifact_path = await get_report_export_service().get_artifact(doc, format)
             except Exception as e:
-                logger.error(f"❌ PDF 文档生成失败: {e}")
-                raise HTTPException(status_code=500, detail=f"PDF 文档生成失败: {str(e)}")
+                logger.error(f"❌ {label}生成失败: {e}")
+                raise HTTPException(status_code=500, detail=f"{label}生成失败: {str(e)}")
+
+            return FileResponse(
+                artifact_path,
+                media_type=EXPORT_FORMATS[format].media_type,
+                filename=f"{stock_symbol}_{analysis_date}_report.{EXPORT_FORMATS[format].extension}"
+            )
 
         else:
             raise HTTPException(status_code=400, detail=f"不支持的下载格式: {format}")
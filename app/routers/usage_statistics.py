@@ -153,3 +153,21 @@ async def delete_old_records(
         logger.error(f"删除旧记录失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/rollups/rebuild", summary="重建使用统计汇总")
+async def rebuild_usage_rollups(
+    days: Optional[int] = Query(None, ge=1, le=3650, description="只重建最近N天（为空则全部重建）"),
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """从原始使用记录重建日汇总"""
+    try:
+        rollup_count = await usage_statistics_service.rebuild_rollups(days=days)
+
+        return {
+            "success": True,
+            "message": "重建使用统计汇总成功",
+            "data": {"rollup_count": rollup_count}
+        }
+    except Exception as e:
+        logger.error(f"重建使用统计汇总失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,470 @@
+"""
+分析进程池执行器
+
+在预热的常驻子进程中执行分析：子进程启动时预先导入分析引擎，进程内复用
+TradingAgentsGraph；每个子进程通过独立的双向管道接收任务、回传进度和结果，
+进度在主进程转交进度管道合并写出。取消时先发送取消信号，由子进程在下一次
+进度回调处优雅退出，超过宽限期仍未结束则只终止该子进程并补充新进程，
+不影响其他正在执行的分析。可按进程设置内存上限（RLIMIT_AS）。
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 子进程启动时预先导入的模块（首次分析不再承担导入开销）
+PRELOAD_MODULES = (
+    "tradingagents.graph.trading_graph",
+    "app.services.simple_analysis_service",
+)
+
+
+class AnalysisCancelledError(Exception):
+    """分析任务已被取消"""
+
+
+class AnalysisWorkerError(Exception):
+    """分析子进程异常退出（如超出内存上限被系统终止）"""
+
+
+class _CancelSignal(BaseException):
+    """子进程内部的取消信号
+
+    继承 BaseException，避免被分析代码中的 ``except Exception`` 吞掉。
+    """
+
+
+# ---------------------------------------------------------------------------
+# 子进程侧
+# ---------------------------------------------------------------------------
+
+class _ForwardingPipeline:
+    """子进程中替代 ProgressPipeline：把进度经管道发回主进程，并检查取消标记"""
+
+    running = True
+
+    def __init__(self, send: Callable[[tuple], None], cancelled: set):
+        self._send = send
+        self._cancelled = cancelled
+
+    def submit(
+        self,
+        task_id: str,
+        progress: Optional[int] = None,
+        message: Optional[str] = None,
+        step: Optional[str] = None,
+        tracker_payload: Optional[str] = None
+    ) -> bool:
+        if task_id in self._cancelled:
+            raise _CancelSignal(task_id)
+        self._send(("progress", task_id, progress, message, step, tracker_payload))
+        return True
+
+    def redis_available(self) -> bool:
+        return False
+
+    async def start(self) -> None:
+        return None
+
+    async def flush(self, task_id: Optional[str] = None) -> int:
+        return 0
+
+
+def _apply_memory_limit(memory_limit_mb: int) -> None:
+    try:
+        import resource
+    except ImportError:
+        logger.warning("⚠️ [分析进程] 当前平台不支持 resource 模块，忽略内存上限")
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(conn, memory_limit_mb: int, preload: bool, runner: Optional[Callable] = None) -> None:
+    """子进程入口
+
+    runner 为 None 时使用进程内的 SimpleAnalysisService 执行分析。
+    """
+    send_lock = threading.Lock()
+
+    def send(message: tuple) -> None:
+        # 分析线程和模拟进度线程都会回传进度，管道发送需串行
+        with send_lock:
+            conn.send(message)
+
+    if memory_limit_mb > 0:
+        _apply_memory_limit(memory_limit_mb)
+
+    cancelled: set = set()
+    from app.services.progress import pipeline as pipeline_module
+    pipeline_module._progress_pipeline = _ForwardingPipeline(send, cancelled)
+
+    if preload:
+        import importlib
+        for name in PRELOAD_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logger.warning(f"⚠️ [分析进程] 预加载模块失败: {name} - {e}")
+
+    jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+
+    def control_loop() -> None:
+        # 执行分析期间仍需接收取消信号，控制消息在独立线程中读取
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                jobs.put(None)
+                return
+            kind = message[0]
+            if kind == "cancel":
+                cancelled.add(message[1])
+            elif kind == "run":
+                jobs.put(message)
+            elif kind == "stop":
+                jobs.put(None)
+                return
+
+    threading.Thread(target=control_loop, name="analysis-worker-control", daemon=True).start()
+    send(("ready", os.getpid()))
+
+    service = None
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        _, task_id, user_id, request, progress_tracker, forward_tracker = job
+        try:
+            if runner is None and service is None:
+                from app.services.simple_analysis_service import SimpleAnalysisService
+                service = SimpleAnalysisService()
+                # 每个子进程同一时间只执行一个分析，可安全复用分析引擎
+                service._reuse_trading_graphs = True
+            if progress_tracker is not None and forward_tracker:
+                progress_tracker.save_hook = (
+                    lambda payload, tid=task_id: pipeline_module._progress_pipeline.submit(tid, tracker_payload=payload)
+                )
+            run = runner or service._run_analysis_sync
+            result = run(task_id, user_id, request, progress_tracker)
+            if task_id in cancelled:
+                raise _CancelSignal(task_id)
+            send(("result", task_id, "ok", _picklable(result)))
+        except _CancelSignal:
+            send(("result", task_id, "cancelled", "分析已取消"))
+        except BaseException as e:
+            send(("result", task_id, "error", f"{type(e).__name__}: {e}"))
+        finally:
+            cancelled.discard(task_id)
+
+
+def _picklable(result: Any) -> Any:
+    import pickle
+    try:
+        pickle.dumps(result)
+        return result
+    except Exception:
+        from app.services.progress.tracker import safe_serialize
+        return safe_serialize(result)
+
+
+# ---------------------------------------------------------------------------
+# 主进程侧
+# ---------------------------------------------------------------------------
+
+class _Worker:
+    """一个常驻分析子进程及其管道"""
+
+    def __init__(self, ctx, memory_limit_mb: int, preload: bool, runner: Optional[Callable],
+                 on_progress: Callable[[tuple], None]):
+        self.conn, child_conn = ctx.Pipe(duplex=True)
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, memory_limit_mb, preload, runner),
+            name="analysis-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.pid: Optional[int] = self.process.pid
+        self.tasks_done = 0
+        self.task_id: Optional[str] = None
+        self.cancel_requested = False
+        self._future: Optional[asyncio.Future] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._on_progress = on_progress
+        self._send_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_loop, name="analysis-worker-reader", daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def send(self, message: tuple) -> None:
+        with self._send_lock:
+            self.conn.send(message)
+
+    def assign(self, task_id: str, future: asyncio.Future) -> None:
+        self.task_id = task_id
+        self.cancel_requested = False
+        self._future = future
+        self._loop = future.get_loop()
+
+    def release(self) -> None:
+        self.task_id = None
+        self._future = None
+        self._loop = None
+        self.cancel_requested = False
+
+    def _resolve(self, task_id: Optional[str], outcome: str, payload: Any) -> None:
+        future, loop = self._future, self._loop
+        if future is None or loop is None or (task_id is not None and task_id != self.task_id):
+            return
+
+        def _set() -> None:
+            if future.done():
+                return
+            if outcome == "ok":
+                future.set_result(payload)
+            elif outcome == "cancelled":
+                future.set_exception(AnalysisCancelledError(payload))
+            elif outcome == "error":
+                future.set_exception(Exception(payload))
+            else:
+                future.set_exception(AnalysisWorkerError(payload))
+
+        try:
+            loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            pass
+
+    def _read_loop(self) -> None:
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == "progress":
+                self._on_progress(message)
+            elif kind == "result":
+                self._resolve(message[1], message[2], message[3])
+            elif kind == "ready":
+                self.pid = message[1]
+
+        # 管道断开：子进程已退出
+        if self.cancel_requested:
+            self._resolve(None, "cancelled", "分析已取消（分析进程已终止）")
+        else:
+            exitcode = self.process.exitcode
+            self._resolve(None, "died", f"分析进程异常退出 (pid={self.pid}, exitcode={exitcode})")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        try:
+            self.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+
+
+class ProcessAnalysisExecutor:
+    """常驻子进程分析执行器"""
+
+    def __init__(
+        self,
+        max_workers: int = 3,
+        memory_limit_mb: int = 0,
+        max_tasks_per_worker: int = 0,
+        cancel_grace_seconds: float = 30.0,
+        preload: bool = True,
+        runner: Optional[Callable] = None
+    ):
+        """
+        Args:
+            max_workers: 子进程数（即最大并发分析数）
+            memory_limit_mb: 单个子进程的内存上限（MB），0 表示不限制
+            max_tasks_per_worker: 子进程执行多少个分析后回收重建，0 表示不回收
+            cancel_grace_seconds: 取消后等待优雅退出的时间，超时则终止子进程
+            preload: 子进程启动时是否预先导入分析引擎
+            runner: 子进程中执行分析的模块级函数，签名同 ``_run_analysis_sync``，
+                默认使用 SimpleAnalysisService
+        """
+        import multiprocessing
+
+        self.max_workers = max(1, max_workers)
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.cancel_grace_seconds = cancel_grace_seconds
+        self.preload = preload
+        self.runner = runner
+
+        # spawn：子进程不继承主进程的事件循环、数据库连接和线程
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._running: Dict[str, _Worker] = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.killed = 0
+        self.respawned = 0
+
+    @staticmethod
+    def _forward_progress(message: tuple) -> None:
+        _, task_id, progress, msg, step, tracker_payload = message
+        from app.services.progress.pipeline import get_progress_pipeline
+        get_progress_pipeline().submit(task_id, progress=progress, message=msg, step=step,
+                                       tracker_payload=tracker_payload)
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.memory_limit_mb, self.preload, self.runner, self._forward_progress)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _retire(self, worker: _Worker) -> None:
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        worker.stop()
+
+    async def start(self) -> None:
+        """启动（预热）全部子进程"""
+        if self._started:
+            return
+        self._started = True
+        self._closed = False
+        self._idle = asyncio.Queue()
+        workers = await asyncio.gather(*[asyncio.to_thread(self._spawn) for _ in range(self.max_workers)])
+        for worker in workers:
+            self._idle.put_nowait(worker)
+        logger.info(f"🚀 [分析进程池] 已启动 {len(workers)} 个分析进程"
+                    f"（内存上限: {self.memory_limit_mb or '不限'} MB）")
+
+    async def run(
+        self,
+        task_id: str,
+        user_id: str,
+        request: Any,
+        progress_tracker: Any = None,
+        forward_tracker: bool = False
+    ) -> Dict[str, Any]:
+        """在空闲子进程中执行分析，返回分析结果
+
+        Args:
+            forward_tracker: 子进程中的 RedisProgressTracker 快照是否经主进程进度管道写出
+        """
+        if self._closed:
+            raise RuntimeError("分析进程池已关闭")
+        await self.start()
+
+        worker = await self._idle.get()
+        if not worker.alive:
+            await asyncio.to_thread(self._retire, worker)
+            worker = await asyncio.to_thread(self._spawn)
+            self.respawned += 1
+
+        future = asyncio.get_running_loop().create_future()
+        worker.assign(task_id, future)
+        with self._lock:
+            self._running[task_id] = worker
+        logger.info(f"🚀 [分析进程池] 提交分析任务: {task_id} -> pid={worker.pid}")
+
+        try:
+            worker.send(("run", task_id, user_id, request, progress_tracker, forward_tracker))
+            result = await future
+            self.completed += 1
+            return result
+        except AnalysisCancelledError:
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._running.pop(task_id, None)
+            worker.release()
+            worker.tasks_done += 1
+            recycle = (
+                not worker.alive
+                or (self.max_tasks_per_worker and worker.tasks_done >= self.max_tasks_per_worker)
+            )
+            if recycle and not self._closed:
+                await asyncio.to_thread(self._retire, worker)
+                worker = await asyncio.to_thread(self._spawn)
+                self.respawned += 1
+            if not self._closed:
+                self._idle.put_nowait(worker)
+
+    def cancel(self, task_id: str) -> bool:
+        """请求取消正在子进程中执行的分析，返回任务是否在执行中"""
+        with self._lock:
+            worker = self._running.get(task_id)
+        if worker is None:
+            return False
+
+        worker.cancel_requested = True
+        try:
+            worker.send(("cancel", task_id))
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ [分析进程池] 发送取消信号失败: {task_id} - {e}")
+
+        timer = threading.Timer(self.cancel_grace_seconds, self._kill_if_running, args=(task_id, worker))
+        timer.daemon = True
+        timer.start()
+        logger.info(f"🛑 [分析进程池] 已请求取消: {task_id}（宽限 {self.cancel_grace_seconds}s）")
+        return True
+
+    def _kill_if_running(self, task_id: str, worker: _Worker) -> None:
+        if worker.task_id != task_id or not worker.alive:
+            return
+        logger.warning(f"🛑 [分析进程池] 任务未在宽限期内退出，终止进程: {task_id} (pid={worker.pid})")
+        worker.process.terminate()
+        self.killed += 1
+
+    async def warm_up(self) -> None:
+        """预热子进程（启动并完成模块预加载）"""
+        await self.start()
+
+    async def shutdown(self, timeout: float = 5.0) -> None:
+        """停止全部子进程"""
+        self._closed = True
+        self._started = False
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        await asyncio.gather(*[asyncio.to_thread(w.stop, timeout) for w in workers], return_exceptions=True)
+        if workers:
+            logger.info(f"🛑 [分析进程池] 已停止 {len(workers)} 个分析进程")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取执行器统计"""
+        with self._lock:
+            workers = list(self._workers)
+            running = list(self._running)
+        return {
+            "workers": len(workers),
+            "alive": sum(1 for w in workers if w.alive),
+            "running_tasks": running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "killed": self.killed,
+            "respawned": self.respawned,
+        }
@@ -344,6 +344,13 @@ class BasicsSyncService:
             logger.info(
                 f"Stock basics sync finished: total={stats.total} inserted={inserted} updated={updated} errors={errors} trade_date={latest_trade_date}"
             )
+
+            # 基础信息（市值、估值等）全市场更新，全量刷新筛选物化集合
+            try:
+                from app.services.screening_table_service import get_screening_table_service
+                await get_screening_table_service().refresh()
+            except Exception as e:
+                logger.warning(f"Screening table refresh failed: {e}")
             return stats.__dict__
 
         except Exception as e:
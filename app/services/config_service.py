@@ -40,6 +40,15 @@ class ConfigService:
                 self.db = get_mongo_db()
         return self.db
 
+    @staticmethod
+    def _notify_config_version(version: int) -> None:
+        """system_configs 版本变化后通知 tradingagents 配置快照立即刷新，无需等待节流轮询"""
+        try:
+            from tradingagents.config.config_manager import config_manager
+            config_manager.notify_mongo_config_version(version)
+        except Exception as e:
+            logger.debug(f"通知配置版本变更失败(忽略): {e}")
+
     # ==================== 市场分类管理 ====================
 
     async def get_market_categories(self) -> List[MarketCategory]:
@@ -278,6 +287,7 @@ class ConfigService:
                             }
                         )
                         logger.info(f"✅ [优先级同步] system_configs 版本更新: {version} -> {version + 1}")
+                        self._notify_config_version(version + 1)
                     else:
                         logger.warning(f"⚠️ [优先级同步] 未找到匹配的数据源配置: {data_source_name}")
 
@@ -348,6 +358,7 @@ class ConfigService:
                         }
                     )
                     print(f"✅ [优先级同步] 已同步更新 system_configs 集合，新版本: {config_data.get('version', 0) + 1}")
+                    self._notify_config_version(config_data.get("version", 0) + 1)
                 else:
                     print(f"⚠️ [优先级同步] 没有找到需要更新的数据源配置")
             else:
@@ -567,6 +578,7 @@ class ConfigService:
             saved_config = await config_collection.find_one({"_id": insert_result.inserted_id})
             if saved_config:
                 print(f"✅ 配置保存成功，验证LLM配置数量: {len(saved_config.get('llm_configs', []))}")
+                self._notify_config_version(config.version)
 
                 # 暂时跳过统一配置同步，避免冲突
                 # unified_config.sync_to_legacy_format(config)
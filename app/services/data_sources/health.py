@@ -0,0 +1,223 @@
+"""
+Data source health tracking with EWMA scoring and circuit breakers
+
+按 (数据源, 方法) 统计调用延迟和失败率（指数加权移动平均），并为每个组合维护熔断器：
+- closed: 正常调用；连续失败达到阈值后打开
+- open: 冷却期内跳过该数据源，避免慢/故障源在每次调用中耗尽超时
+- half_open: 冷却期结束后放行一次探测调用，成功则关闭，失败则重新打开
+
+fallback 链按健康度动态排序：正常源保持静态优先级，明显变慢的源后移，失败率高的源再后移，熔断中的源排在最后。
+DataSourceManager 在各处按需创建，健康状态保存在进程级的全局实例中。
+"""
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+LATENCY_SAMPLES = 200
+
+
+@dataclass
+class SourceHealth:
+    """单个 (数据源, 方法) 的健康状态"""
+    source: str
+    method: str
+    state: str = CLOSED
+    ewma_latency: Optional[float] = None  # 秒
+    ewma_error: float = 0.0
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    probe_in_flight: bool = False
+    calls: int = 0
+    failures: int = 0
+    short_circuited: int = 0
+    last_error: Optional[str] = None
+    # 最近成功调用的延迟样本，用于计算延迟分位数（对冲请求的触发时机）
+    latency_samples: deque = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+
+class SourceHealthTracker:
+    """数据源健康度跟踪与熔断"""
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        failure_threshold: int = 3,
+        open_seconds: float = 30.0,
+        degraded_error_rate: float = 0.5,
+        slow_threshold: float = 2.0,
+    ):
+        """
+        Args:
+            alpha: EWMA 平滑系数，越大越重视最近的调用
+            failure_threshold: 连续失败多少次后打开熔断器
+            open_seconds: 熔断冷却时间（秒），到期后放行一次探测调用
+            degraded_error_rate: EWMA 失败率超过该值视为降级，排在正常源之后
+            slow_threshold: EWMA 延迟超过该值（秒）后按倍数分档后移
+        """
+        self.alpha = alpha
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.degraded_error_rate = degraded_error_rate
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self._health: Dict[Tuple[str, str], SourceHealth] = {}
+
+    def _get(self, source: str, method: str) -> SourceHealth:
+        key = (source, method)
+        health = self._health.get(key)
+        if health is None:
+            health = self._health[key] = SourceHealth(source=source, method=method)
+        return health
+
+    def _probe_due(self, health: SourceHealth, now: float) -> bool:
+        return health.state == OPEN and now - health.opened_at >= self.open_seconds
+
+    def _rank(self, health: Optional[SourceHealth], now: float) -> Tuple[int, int]:
+        """排序键: (档位, 延迟档)，档位 0 正常/待探测，1 降级，2 熔断中"""
+        if health is None:
+            return 0, 0
+        if health.state == OPEN:
+            # 冷却期满的源回到原有位置接受一次探测，否则排在最后
+            tier = 0 if self._probe_due(health, now) else 2
+        elif health.state == HALF_OPEN or health.ewma_error >= self.degraded_error_rate:
+            tier = 1
+        else:
+            tier = 0
+        latency_class = 0
+        if health.ewma_latency is not None and health.ewma_latency > self.slow_threshold:
+            latency_class = int(math.ceil(math.log2(health.ewma_latency / self.slow_threshold)))
+        return tier, latency_class
+
+    def order(self, method: str, adapters: Sequence[Any]) -> List[Any]:
+        """按健康度对适配器重新排序（同档位内保持原有优先级顺序）"""
+        now = time.time()
+        with self._lock:
+            ranks = [self._rank(self._health.get((a.name, method)), now) for a in adapters]
+        indexed = sorted(range(len(adapters)), key=lambda i: (ranks[i], i))
+        return [adapters[i] for i in indexed]
+
+    def can_attempt(self, source: str, method: str) -> bool:
+        """熔断器当前是否会放行（只查看状态，不占用 half_open 探测名额）"""
+        now = time.time()
+        with self._lock:
+            health = self._health.get((source, method))
+            if health is None or health.state == CLOSED:
+                return True
+            if health.state == OPEN:
+                return self._probe_due(health, now)
+            return not health.probe_in_flight
+
+    def allow(self, source: str, method: str) -> bool:
+        """熔断器是否放行本次调用（冷却期满时转为 half_open 并放行一次探测）"""
+        now = time.time()
+        with self._lock:
+            health = self._get(source, method)
+            if health.state == CLOSED:
+                return True
+            if health.state == OPEN and self._probe_due(health, now):
+                health.state = HALF_OPEN
+                health.probe_in_flight = True
+                return True
+            if health.state == HALF_OPEN and not health.probe_in_flight:
+                health.probe_in_flight = True
+                return True
+            health.short_circuited += 1
+            return False
+
+    def record(self, source: str, method: str, success: bool, latency: float, error: Optional[str] = None) -> None:
+        """记录一次调用结果"""
+        with self._lock:
+            health = self._get(source, method)
+            health.calls += 1
+            if health.ewma_latency is None:
+                health.ewma_latency = latency
+            else:
+                health.ewma_latency = self.alpha * latency + (1 - self.alpha) * health.ewma_latency
+            health.ewma_error = self.alpha * (0.0 if success else 1.0) + (1 - self.alpha) * health.ewma_error
+            health.probe_in_flight = False
+
+            if success:
+                health.latency_samples.append(latency)
+                health.consecutive_failures = 0
+                health.state = CLOSED
+                return
+
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_error = error
+            if health.state != CLOSED or health.consecutive_failures >= self.failure_threshold:
+                health.state = OPEN
+                health.opened_at = time.time()
+
+    def record_empty(self, source: str, method: str, latency: float) -> None:
+        """
+        记录一次返回空结果的调用（中性结果）
+
+        按股票查询的方法（K线、新闻）返回空往往只是该股票没有数据，不代表数据源故障：
+        只更新调用次数和延迟并释放探测名额，不计入失败率、连续失败次数，也不改变熔断状态。
+        """
+        with self._lock:
+            health = self._get(source, method)
+            health.calls += 1
+            if health.ewma_latency is None:
+                health.ewma_latency = latency
+            else:
+                health.ewma_latency = self.alpha * latency + (1 - self.alpha) * health.ewma_latency
+            health.probe_in_flight = False
+
+    def latency_percentile(self, source: str, method: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """最近成功调用延迟的 q 分位数（0-1），样本不足时返回 None"""
+        with self._lock:
+            health = self._health.get((source, method))
+            samples = sorted(health.latency_samples) if health is not None else []
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, max(0, int(math.ceil(q * len(samples))) - 1))
+        return samples[index]
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """各 (数据源, 方法) 的实时健康度"""
+        now = time.time()
+        with self._lock:
+            items = list(self._health.values())
+            stats = []
+            for h in items:
+                tier, latency_class = self._rank(h, now)
+                stats.append({
+                    "source": h.source,
+                    "method": h.method,
+                    "state": h.state,
+                    "tier": tier,
+                    "latency_class": latency_class,
+                    "ewma_latency_ms": round(h.ewma_latency * 1000, 1) if h.ewma_latency is not None else None,
+                    "error_rate": round(h.ewma_error, 4),
+                    "consecutive_failures": h.consecutive_failures,
+                    "calls": h.calls,
+                    "failures": h.failures,
+                    "short_circuited": h.short_circuited,
+                    "retry_in_seconds": round(max(0.0, h.opened_at + self.open_seconds - now), 1) if h.state == OPEN else 0.0,
+                    "last_error": h.last_error,
+                })
+        return sorted(stats, key=lambda s: (s["method"], s["tier"], s["latency_class"]))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._health.clear()
+
+
+_source_health_tracker: Optional[SourceHealthTracker] = None
+
+
+def get_source_health_tracker() -> SourceHealthTracker:
+    """获取全局数据源健康度跟踪器"""
+    global _source_health_tracker
+    if _source_health_tracker is None:
+        _source_health_tracker = SourceHealthTracker()
+    return _source_health_tracker
@@ -0,0 +1,172 @@
+"""
+Hedged requests for latency-critical data source lookups
+
+主数据源在其自身近期延迟的某个分位数（默认 p95）内仍未返回时，同时向下一个数据源发起对冲请求，
+先返回的有效结果胜出，落后的请求被取消（尚未开始时，不计入对冲次数）或忽略（结果照常计入健康度）。
+
+对冲会增加上游调用量，因此用令牌预算限制：每个请求存入 budget_ratio 个令牌，每次对冲消耗 1 个，
+额外调用量不会超过请求数的 budget_ratio 倍（加上 max_tokens 的突发余量）。
+
+主请求与对冲请求使用各自的线程池：对冲请求不会排在卡住的主请求后面。
+对冲线程池全部占用时（例如上游整体变慢）不再发起对冲、退回令牌并计入 pool_saturated，
+而不是让对冲请求排队——排队的对冲只会在主请求之后才开始，起不到削减长尾的作用。
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .health import SourceHealthTracker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HedgePolicy:
+    """对冲策略"""
+    percentile: float = 0.95  # 主数据源超过自身近期延迟的该分位数后发起对冲
+    min_samples: int = 20  # 延迟样本不足时使用 default_delay
+    default_delay: float = 1.0  # 秒
+    min_delay: float = 0.005  # 秒，避免对极快的数据源几乎每次都对冲
+    budget_ratio: float = 0.1  # 额外调用占请求数的比例上限
+    max_tokens: float = 5.0  # 预算令牌上限（允许的突发对冲次数）
+
+
+class HedgeBudget:
+    """对冲预算（令牌桶：按请求数而非时间补充）"""
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.denied = 0
+
+    def on_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0 - 1e-9:  # 容忍浮点累加误差（0.1 累加 10 次 < 1.0）
+                self._tokens = max(0.0, self._tokens - 1.0)
+                self.hedges += 1
+                return True
+            self.denied += 1
+            return False
+
+    def refund(self) -> None:
+        """对冲请求没有实际发出（没有可用的对冲目标，或开始执行前已被取消）时退回令牌，不计入对冲次数"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + 1.0)
+            self.hedges -= 1
+
+
+class RequestHedger:
+    """对冲请求的执行器、预算与触发时机"""
+
+    def __init__(
+        self,
+        policy: Optional[HedgePolicy] = None,
+        enabled: bool = False,
+        max_workers: int = 4,
+        primary_workers: int = 16,
+    ):
+        self.policy = policy or HedgePolicy()
+        self.enabled = enabled
+        self.budget = HedgeBudget(self.policy.budget_ratio, self.policy.max_tokens)
+        self.hedge_wins = 0
+        self.pool_saturated = 0
+        self._max_workers = max_workers
+        self._primary_workers = primary_workers
+        self._hedge_slots = threading.BoundedSemaphore(max_workers)
+        self._primary_executor: Optional[ThreadPoolExecutor] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit_primary(self, fn, *args) -> Future:
+        """在主请求线程池中执行"""
+        with self._lock:
+            if self._primary_executor is None:
+                self._primary_executor = ThreadPoolExecutor(
+                    max_workers=self._primary_workers, thread_name_prefix="ds-primary"
+                )
+        return self._primary_executor.submit(fn, *args)
+
+    def submit(self, fn, *args) -> Optional[Future]:
+        """在对冲线程池中执行；线程全部占用时返回 None（不排队）"""
+        if not self._hedge_slots.acquire(blocking=False):
+            with self._lock:
+                self.pool_saturated += 1
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="ds-hedge")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._hedge_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._hedge_slots.release())
+        return future
+
+    def hedge_delay(self, tracker: SourceHealthTracker, source: str, method: str) -> float:
+        """等待主数据源多久后发起对冲"""
+        delay = tracker.latency_percentile(source, method, self.policy.percentile, self.policy.min_samples)
+        if delay is None:
+            return self.policy.default_delay
+        return max(self.policy.min_delay, delay)
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        budget = self.budget
+        return {
+            "enabled": self.enabled,
+            "percentile": self.policy.percentile,
+            "budget_ratio": self.policy.budget_ratio,
+            "requests": budget.requests,
+            "hedges": budget.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_denied": budget.denied,
+            "pool_saturated": self.pool_saturated,
+            "extra_call_ratio": round(budget.hedges / budget.requests, 4) if budget.requests else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for executor in (self._primary_executor, self._executor):
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+            self._primary_executor = self._executor = None
+
+
+_request_hedger: Optional[RequestHedger] = None
+
+
+def get_request_hedger() -> RequestHedger:
+    """获取全局对冲请求执行器（策略读取自 settings）"""
+    global _request_hedger
+    if _request_hedger is None:
+        try:
+            from app.core.config import settings
+            policy = HedgePolicy(
+                percentile=settings.DATA_SOURCE_HEDGE_PERCENTILE,
+                budget_ratio=settings.DATA_SOURCE_HEDGE_BUDGET_RATIO,
+            )
+            enabled = settings.DATA_SOURCE_HEDGE_ENABLED
+            workers = dict(
+                max_workers=settings.DATA_SOURCE_HEDGE_MAX_WORKERS,
+                primary_workers=settings.DATA_SOURCE_HEDGE_PRIMARY_WORKERS,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ 读取对冲请求配置失败，使用默认值: {e}")
+            policy, enabled, workers = HedgePolicy(), False, {}
+        _request_hedger = RequestHedger(policy, enabled=enabled, **workers)
+    return _request_hedger
@@ -1,12 +1,16 @@
 """
 Data source manager that orchestrates multiple adapters with priority and optional consistency checks
 """
-from typing import List, Optional, Tuple, Dict
+from typing import Any, Callable, List, Optional, Tuple, Dict
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
 from datetime import datetime, timedelta
 import pandas as pd
 
 from .base import DataSourceAdapter
+from .health import get_source_health_tracker
+from .hedging import get_request_hedger
 from .tushare_adapter import TushareAdapter
 from .akshare_adapter import AKShareAdapter
 from .baostock_adapter import BaoStockAdapter
@@ -27,11 +31,15 @@ class DataSourceManager:
     """
     数据源管理器
     - 管理多个适配器，基于优先级排序
-    - 提供 fallback 获取能力
+    - 提供 fallback 获取能力（按健康度动态排序，熔断中的数据源跳过）
     - 可选：一致性检查（若依赖存在）
     """
 
     def __init__(self):
+        # 健康度与熔断状态在进程内共享（管理器在各处按需创建）
+        self.health = get_source_health_tracker()
+        self.hedger = get_request_hedger()
+
         adapters_list = [
             AKShareAdapter(),
             TushareAdapter(),
@@ -119,6 +127,168 @@ class DataSourceManager:
                 logger.warning(f"Data source {adapter.name} is not available")
         return available
 
+    @staticmethod
+    def _apply_preferred_sources(adapters: List[DataSourceAdapter], preferred_sources: Optional[List[str]]) -> List[DataSourceAdapter]:
+        """将指定的数据源按给定顺序排在前面，其他的保持原顺序"""
+        if not preferred_sources:
+            return adapters
+        priority_map = {name: idx for idx, name in enumerate(preferred_sources)}
+        preferred = [a for a in adapters if a.name in priority_map]
+        others = [a for a in adapters if a.name not in priority_map]
+        preferred.sort(key=lambda a: priority_map.get(a.name, 999))
+        return preferred + others
+
+    def _call_with_fallback(
+        self,
+        method: str,
+        call: Callable[[DataSourceAdapter], Any],
+        is_valid: Callable[[Any], bool],
+        preferred_sources: Optional[List[str]] = None,
+        exclude: Optional[set] = None,
+        empty_is_failure: bool = True,
+    ) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        按健康度排序依次调用数据源，返回首个有效结果
+
+        每次调用的延迟和成败计入健康度；熔断中的数据源先跳过，
+        只有其他数据源全部失败时才作为最后手段尝试。
+        empty_is_failure 为 False 时（按股票查询的方法），空结果只作为中性结果记录，
+        仍继续尝试下一个数据源，但不会因个别股票无数据打开整个方法的熔断器。
+        """
+        adapters = self.health.order(method, self.get_available_adapters())
+        adapters = self._apply_preferred_sources(adapters, preferred_sources)
+        if exclude:
+            adapters = [a for a in adapters if a.name not in exclude]
+
+        skipped: List[DataSourceAdapter] = []
+        for adapter in adapters:
+            if not self.health.allow(adapter.name, method):
+                logger.info(f"⚡ {adapter.name} 的 {method} 熔断中，暂时跳过")
+                skipped.append(adapter)
+                continue
+            result = self._try_adapter(adapter, method, call, is_valid, empty_is_failure)
+            if result is not None:
+                return result, adapter.name
+
+        for adapter in skipped:
+            logger.info(f"Trying circuit-open source {adapter.name} for {method} as last resort")
+            result = self._try_adapter(adapter, method, call, is_valid, empty_is_failure)
+            if result is not None:
+                return result, adapter.name
+        return None, None
+
+    def _should_hedge(self, hedge: Optional[bool]) -> bool:
+        return self.hedger.enabled if hedge is None else hedge
+
+    def _call_hedged(
+        self,
+        method: str,
+        call: Callable[[DataSourceAdapter], Any],
+        is_valid: Callable[[Any], bool],
+        empty_is_failure: bool = True,
+    ) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        对冲调用：主数据源超过其近期延迟分位数仍未返回时，并发请求下一个数据源
+
+        先返回的有效结果胜出；已开始的落后请求不会被中断，其结果照常计入健康度，
+        尚未开始的请求被取消，不占用熔断器探测名额，也不计入对冲次数。
+        两者都失败时按普通 fallback 继续尝试剩余数据源。
+        """
+        candidates = iter(self.health.order(method, self.get_available_adapters()))
+
+        def next_allowed() -> Optional[DataSourceAdapter]:
+            for adapter in candidates:
+                if self.health.can_attempt(adapter.name, method):
+                    return adapter
+            return None
+
+        primary = next_allowed()
+        if primary is None:
+            return self._call_with_fallback(method, call, is_valid, empty_is_failure=empty_is_failure)
+
+        self.hedger.budget.on_request()
+        delay = self.hedger.hedge_delay(self.health, primary.name, method)
+        futures = {self.hedger.submit_primary(self._try_adapter_if_allowed, primary, method, call, is_valid, empty_is_failure): primary}
+        done, pending = wait(futures, timeout=delay)
+
+        if not done and self.hedger.budget.try_spend():
+            secondary = next_allowed()
+            hedged = None
+            if secondary is not None:
+                hedged = self.hedger.submit(self._try_adapter_if_allowed, secondary, method, call, is_valid, empty_is_failure)
+            if hedged is not None:
+                logger.info(f"⏱️ {primary.name} 的 {method} 超过 {delay * 1000:.0f}ms 未返回，对冲请求 {secondary.name}")
+                futures[hedged] = secondary
+                pending = set(futures)
+            else:
+                # 没有可用的对冲目标，或对冲线程池已满（不排队）
+                self.hedger.budget.refund()
+
+        while True:
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    for other in pending:
+                        if other.cancel() and futures[other] is not primary:
+                            self.hedger.budget.refund()
+                    adapter = futures[future]
+                    if adapter is not primary:
+                        self.hedger.record_win()
+                    return result, adapter.name
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+        tried = {adapter.name for adapter in futures.values()}
+        return self._call_with_fallback(method, call, is_valid, exclude=tried, empty_is_failure=empty_is_failure)
+
+    def _try_adapter_if_allowed(
+        self,
+        adapter: DataSourceAdapter,
+        method: str,
+        call: Callable[[DataSourceAdapter], Any],
+        is_valid: Callable[[Any], bool],
+        empty_is_failure: bool = True,
+    ) -> Optional[Any]:
+        """在工作线程开始执行时才经过熔断器，排队中被取消的请求不会占用 half_open 探测名额"""
+        if not self.health.allow(adapter.name, method):
+            return None
+        return self._try_adapter(adapter, method, call, is_valid, empty_is_failure)
+
+    def _try_adapter(
+        self,
+        adapter: DataSourceAdapter,
+        method: str,
+        call: Callable[[DataSourceAdapter], Any],
+        is_valid: Callable[[Any], bool],
+        empty_is_failure: bool = True,
+    ) -> Optional[Any]:
+        start = time.perf_counter()
+        try:
+            logger.info(f"Trying to fetch {method} from {adapter.name}")
+            result = call(adapter)
+        except Exception as e:
+            self.health.record(adapter.name, method, False, time.perf_counter() - start, error=str(e))
+            logger.error(f"Failed to fetch {method} from {adapter.name}: {e}")
+            return None
+        ok = is_valid(result)
+        if not ok and not empty_is_failure:
+            self.health.record_empty(adapter.name, method, time.perf_counter() - start)
+            return None
+        self.health.record(
+            adapter.name, method, ok, time.perf_counter() - start,
+            error=None if ok else "empty result",
+        )
+        return result if ok else None
+
+    def get_health_stats(self) -> List[Dict[str, Any]]:
+        """各数据源各方法的实时健康度（EWMA 延迟、失败率、熔断状态）"""
+        return self.health.get_stats()
+
+    def get_hedging_stats(self) -> Dict[str, Any]:
+        """对冲请求统计（对冲次数、对冲胜出次数、额外调用比例）"""
+        return self.hedger.get_stats()
+
     def get_stock_list_with_fallback(self, preferred_sources: Optional[List[str]] = None) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
         """
         获取股票列表，支持指定优先数据源
@@ -130,31 +300,14 @@ class DataSourceManager:
         Returns:
             (DataFrame, source_name) 或 (None, None)
         """
-        available_adapters = self.get_available_adapters()
-
-        # 如果指定了优先数据源，重新排序
         if preferred_sources:
             logger.info(f"Using preferred data sources: {preferred_sources}")
-            # 创建优先级映射
-            priority_map = {name: idx for idx, name in enumerate(preferred_sources)}
-            # 将指定的数据源排在前面，其他的保持原顺序
-            preferred = [a for a in available_adapters if a.name in priority_map]
-            others = [a for a in available_adapters if a.name not in priority_map]
-            # 按照 preferred_sources 的顺序排序
-            preferred.sort(key=lambda a: priority_map.get(a.name, 999))
-            available_adapters = preferred + others
-            logger.info(f"Reordered adapters: {[a.name for a in available_adapters]}")
-
-        for adapter in available_adapters:
-            try:
-                logger.info(f"Trying to fetch stock list from {adapter.name}")
-                df = adapter.get_stock_list()
-                if df is not None and not df.empty:
-                    return df, adapter.name
-            except Exception as e:
-                logger.error(f"Failed to fetch stock list from {adapter.name}: {e}")
-                continue
-        return None, None
+        return self._call_with_fallback(
+            "stock_list",
+            lambda adapter: adapter.get_stock_list(),
+            lambda df: df is not None and not df.empty,
+            preferred_sources,
+        )
 
     def get_daily_basic_with_fallback(self, trade_date: str, preferred_sources: Optional[List[str]] = None) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
         """
@@ -167,26 +320,12 @@ class DataSourceManager:
         Returns:
             (DataFrame, source_name) 或 (None, None)
         """
-        available_adapters = self.get_available_adapters()
-
-        # 如果指定了优先数据源，重新排序
-        if preferred_sources:
-            priority_map = {name: idx for idx, name in enumerate(preferred_sources)}
-            preferred = [a for a in available_adapters if a.name in priority_map]
-            others = [a for a in available_adapters if a.name not in priority_map]
-            preferred.sort(key=lambda a: priority_map.get(a.name, 999))
-            available_adapters = preferred + others
-
-        for adapter in available_adapters:
-            try:
-                logger.info(f"Trying to fetch daily basic data from {adapter.name}")
-                df = adapter.get_daily_basic(trade_date)
-                if df is not None and not df.empty:
-                    return df, adapter.name
-            except Exception as e:
-                logger.error(f"Failed to fetch daily basic data from {adapter.name}: {e}")
-                continue
-        return None, None
+        return self._call_with_fallback(
+            "daily_basic",
+            lambda adapter: adapter.get_daily_basic(trade_date),
+            lambda df: df is not None and not df.empty,
+            preferred_sources,
+        )
 
     def find_latest_trade_date_with_fallback(self, preferred_sources: Optional[List[str]] = None) -> Optional[str]:
         """
@@ -198,44 +337,30 @@ class DataSourceManager:
         Returns:
             交易日期字符串（YYYYMMDD格式）或 None
         """
-        available_adapters = self.get_available_adapters()
-
-        # 如果指定了优先数据源，重新排序
-        if preferred_sources:
-            priority_map = {name: idx for idx, name in enumerate(preferred_sources)}
-            preferred = [a for a in available_adapters if a.name in priority_map]
-            others = [a for a in available_adapters if a.name not in priority_map]
-            preferred.sort(key=lambda a: priority_map.get(a.name, 999))
-            available_adapters = preferred + others
-
-        for adapter in available_adapters:
-            try:
-                trade_date = adapter.find_latest_trade_date()
-                if trade_date:
-                    return trade_date
-            except Exception as e:
-                logger.error(f"Failed to find trade date from {adapter.name}: {e}")
-                continue
+        trade_date, _ = self._call_with_fallback(
+            "latest_trade_date",
+            lambda adapter: adapter.find_latest_trade_date(),
+            bool,
+            preferred_sources,
+        )
+        if trade_date:
+            return trade_date
         return (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
 
-    def get_realtime_quotes_with_fallback(self) -> Tuple[Optional[Dict], Optional[str]]:
+    def get_realtime_quotes_with_fallback(self, hedge: Optional[bool] = None) -> Tuple[Optional[Dict], Optional[str]]:
         """
         获取全市场实时快照，按适配器优先级依次尝试，返回首个成功结果
+        Args:
+            hedge: 是否启用对冲请求，None 时使用 DATA_SOURCE_HEDGE_ENABLED
         Returns: (quotes_dict, source_name)
         quotes_dict 形如 { '000001': {'close': 10.0, 'pct_chg': 1.2, 'amount': 1.2e8}, ... }
         """
-        available_adapters = self.get_available_adapters()
-        for adapter in available_adapters:
-            try:
-                logger.info(f"Trying to fetch realtime quotes from {adapter.name}")
-                data = adapter.get_realtime_quotes()
-                if data:
-                    return data, adapter.name
-            except Exception as e:
-                logger.error(f"Failed to fetch realtime quotes from {adapter.name}: {e}")
-                continue
-        return None, None
-
+        caller = self._call_hedged if self._should_hedge(hedge) else self._call_with_fallback
+        return caller(
+            "realtime_quotes",
+            lambda adapter: adapter.get_realtime_quotes(),
+            bool,
+        )
 
     def get_daily_basic_with_consistency_check(
         self, trade_date: str
@@ -298,30 +423,21 @@ class DataSourceManager:
 
 
 
-    def get_kline_with_fallback(self, code: str, period: str = "day", limit: int = 120, adj: Optional[str] = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
-        """按优先级尝试获取K线，返回(items, source)"""
-        available_adapters = self.get_available_adapters()
-        for adapter in available_adapters:
-            try:
-                logger.info(f"Trying to fetch kline from {adapter.name}")
-                items = adapter.get_kline(code=code, period=period, limit=limit, adj=adj)
-                if items:
-                    return items, adapter.name
-            except Exception as e:
-                logger.error(f"Failed to fetch kline from {adapter.name}: {e}")
-                continue
-        return None, None
+    def get_kline_with_fallback(self, code: str, period: str = "day", limit: int = 120, adj: Optional[str] = None, hedge: Optional[bool] = None) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """按优先级尝试获取K线，返回(items, source)；hedge 为 None 时使用 DATA_SOURCE_HEDGE_ENABLED"""
+        caller = self._call_hedged if self._should_hedge(hedge) else self._call_with_fallback
+        return caller(
+            "kline",
+            lambda adapter: adapter.get_kline(code=code, period=period, limit=limit, adj=adj),
+            bool,
+            empty_is_failure=False,
+        )
 
     def get_news_with_fallback(self, code: str, days: int = 2, limit: int = 50, include_announcements: bool = True) -> Tuple[Optional[List[Dict]], Optional[str]]:
         """按优先级尝试获取新闻与公告，返回(items, source)"""
-        available_adapters = self.get_available_adapters()
-        for adapter in available_adapters:
-            try:
-                logger.info(f"Trying to fetch news from {adapter.name}")
-                items = adapter.get_news(code=code, days=days, limit=limit, include_announcements=include_announcements)
-                if items:
-                    return items, adapter.name
-            except Exception as e:
-                logger.error(f"Failed to fetch news from {adapter.name}: {e}")
-                continue
-        return None, None
+        return self._call_with_fallback(
+            "news",
+            lambda adapter: adapter.get_news(code=code, days=days, limit=limit, include_announcements=include_announcements),
+            bool,
+            empty_is_failure=False,
+        )
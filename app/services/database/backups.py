@@ -5,19 +5,22 @@ from __future__ import annotations
 
 import json
 import os
+import io
 import gzip
+import hashlib
 import asyncio
 import subprocess
 import shutil
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 import logging
 
 from bson import ObjectId
+from pymongo import InsertOne, ReplaceOne
 
 from app.core.database import get_mongo_db
 from app.core.config import settings
-from .serialization import serialize_document
+from .serialization import serialize_document, to_extended_json, from_extended_json
 
 logger = logging.getLogger(__name__)
 
@@ -134,47 +137,127 @@ async def create_backup_native(name: str, backup_dir: str, collections: Optional
     }
 
 
-async def create_backup(name: str, backup_dir: str, collections: Optional[List[str]] = None, user_id: str | None = None) -> Dict[str, Any]:
+# 流式备份格式：每个集合一个 gzip member，member 内首行为集合头，其后每行一个文档（扩展 JSON）；
+# 文件最后一个 member 是清单（各集合文档数和 SHA-256），恢复前据此校验完整性
+BACKUP_FORMAT = "ndjson-gzip"
+BACKUP_FORMAT_VERSION = 2
+BACKUP_BATCH_SIZE = 1000
+BACKUP_COMPRESS_LEVEL = 6
+_HEADER_PREFIX = b'{"__collection__":'
+_MANIFEST_PREFIX = b'{"__manifest__":'
+
+ProgressCallback = Callable[[str, int, Optional[int]], None]
+
+
+def _write_member_lines(member: gzip.GzipFile, digest, docs: List[dict]) -> int:
+    """在线程池中编码一批文档并写入当前 gzip member，返回写入的字节数（未压缩）"""
+    payload = "".join(to_extended_json(doc) + "\n" for doc in docs).encode("utf-8")
+    digest.update(payload)
+    member.write(payload)
+    return len(payload)
+
+
+async def _dump_collection(
+    collection,
+    collection_name: str,
+    raw: BinaryIO,
+    batch_size: int,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """把一个集合按游标批次写成一个 gzip member，内存中最多保留 batch_size 条文档"""
+    member = gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=BACKUP_COMPRESS_LEVEL)
+    digest = hashlib.sha256()
+    header = json.dumps({"__collection__": collection_name}, ensure_ascii=False) + "\n"
+    await asyncio.to_thread(member.write, header.encode("utf-8"))
+
+    documents, size = 0, 0
+    batch: List[dict] = []
+    try:
+        async for doc in collection.find().batch_size(batch_size):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                size += await asyncio.to_thread(_write_member_lines, member, digest, batch)
+                documents += len(batch)
+                batch = []
+                if progress_callback:
+                    progress_callback(collection_name, documents, None)
+        if batch:
+            size += await asyncio.to_thread(_write_member_lines, member, digest, batch)
+            documents += len(batch)
+            if progress_callback:
+                progress_callback(collection_name, documents, documents)
+    finally:
+        await asyncio.to_thread(member.close)
+
+    logger.info(f"💾 备份集合 {collection_name}: {documents} 条文档")
+    return {"name": collection_name, "documents": documents, "bytes": size, "sha256": digest.hexdigest()}
+
+
+async def create_backup(
+    name: str,
+    backup_dir: str,
+    collections: Optional[List[str]] = None,
+    user_id: str | None = None,
+    *,
+    batch_size: int = BACKUP_BATCH_SIZE,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
     """
     创建数据库备份（Python 实现，兼容性好但速度较慢）
 
+    按游标批次流式写入 NDJSON + gzip，内存占用与数据库大小无关。
     对于大数据量（>100MB），建议使用 create_backup_native() 方法
+
+    Args:
+        batch_size: 每批读取和写入的文档数
+        progress_callback: 进度回调 (集合名, 已备份文档数, 总数或 None)
     """
     db = get_mongo_db()
 
     backup_id = str(ObjectId())
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"backup_{name}_{timestamp}.json.gz"
+    created_at = datetime.utcnow()
+    timestamp = created_at.strftime("%Y%m%d_%H%M%S")
+    backup_filename = f"backup_{name}_{timestamp}.ndjson.gz"
     backup_path = os.path.join(backup_dir, backup_filename)
 
     if not collections:
         collections = await db.list_collection_names()
+        collections = [c for c in collections if not c.startswith("system.")]
 
-    backup_data: Dict[str, Any] = {
-        "backup_id": backup_id,
-        "name": name,
-        "created_at": datetime.utcnow().isoformat(),
-        "created_by": user_id,
-        "collections": collections,
-        "data": {},
-    }
+    os.makedirs(backup_dir, exist_ok=True)
 
-    for collection_name in collections:
-        collection = db[collection_name]
-        documents: List[dict] = []
-        async for doc in collection.find():
-            documents.append(serialize_document(doc))
-        backup_data["data"][collection_name] = documents
+    entries: List[Dict[str, Any]] = []
+    raw = await asyncio.to_thread(open, backup_path, "wb")
+    try:
+        for collection_name in collections:
+            entries.append(await _dump_collection(db[collection_name], collection_name, raw, batch_size, progress_callback))
+
+        manifest = {
+            "format": BACKUP_FORMAT,
+            "version": BACKUP_FORMAT_VERSION,
+            "backup_id": backup_id,
+            "name": name,
+            "created_at": created_at.isoformat(),
+            "created_by": user_id,
+            "collections": entries,
+        }
 
-    os.makedirs(backup_dir, exist_ok=True)
+        def _write_manifest():
+            with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=BACKUP_COMPRESS_LEVEL) as member:
+                member.write((json.dumps({"__manifest__": manifest}, ensure_ascii=False) + "\n").encode("utf-8"))
 
-    # 🔥 使用 asyncio.to_thread 将阻塞的文件 I/O 操作放到线程池执行
-    def _write_backup():
-        with gzip.open(backup_path, "wt", encoding="utf-8") as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
-        return os.path.getsize(backup_path)
+        await asyncio.to_thread(_write_manifest)
+    except Exception:
+        await asyncio.to_thread(raw.close)
+        # 清理不完整的备份文件
+        if os.path.exists(backup_path):
+            await asyncio.to_thread(os.remove, backup_path)
+        raise
+    await asyncio.to_thread(raw.close)
 
-    file_size = await asyncio.to_thread(_write_backup)
+    file_size = await asyncio.to_thread(os.path.getsize, backup_path)
+    total_documents = sum(entry["documents"] for entry in entries)
+    logger.info(f"✅ 备份完成: {name}，{len(entries)} 个集合，{total_documents} 条文档，{file_size} 字节")
 
     backup_meta = {
         "_id": ObjectId(backup_id),
@@ -183,8 +266,11 @@ async def create_backup(name: str, backup_dir: str, collections: Optional[List[s
         "file_path": backup_path,
         "size": file_size,
         "collections": collections,
-        "created_at": datetime.utcnow(),
+        "documents": total_documents,
+        "manifest": entries,
+        "created_at": created_at,
         "created_by": user_id,
+        "backup_type": BACKUP_FORMAT,
     }
 
     await db.database_backups.insert_one(backup_meta)
@@ -196,7 +282,9 @@ async def create_backup(name: str, backup_dir: str, collections: Optional[List[s
         "file_path": backup_path,
         "size": file_size,
         "collections": collections,
+        "documents": total_documents,
         "created_at": backup_meta["created_at"].isoformat(),
+        "backup_type": BACKUP_FORMAT,
     }
 
 
@@ -262,31 +350,280 @@ def _convert_date_fields(doc: dict) -> dict:
     return doc
 
 
-async def import_data(content: bytes, collection: str, *, format: str = "json", overwrite: bool = False, filename: str | None = None) -> Dict[str, Any]:
+class _BackupStreamReader:
+    """
+    逐行读取 NDJSON 备份流（已解压），按集合分批返回文档，同时累计各集合的文档数和 SHA-256
+
+    只在线程池中调用（gzip 解压和 JSON 解析都是阻塞操作）。
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._pending_header: Optional[str] = None
+        self._digest = None
+        self.collection: Optional[str] = None
+        self.manifest: Optional[Dict[str, Any]] = None
+        self.seen: Dict[str, Dict[str, Any]] = {}
+        self.eof = False
+
+    def _start(self, collection_name: str) -> None:
+        self.collection = collection_name
+        self._digest = hashlib.sha256()
+        self.seen[collection_name] = {"documents": 0, "digest": self._digest}
+
+    def _control_line(self, line: bytes) -> Optional[str]:
+        """处理集合头/清单行，返回新集合名（清单行返回 None）"""
+        if line.startswith(_HEADER_PREFIX):
+            return json.loads(line)["__collection__"]
+        self.manifest = json.loads(line)["__manifest__"]
+        return None
+
+    def read_batch(self, size: int, decode: bool = True) -> Tuple[Optional[str], List[Any]]:
+        """
+        读取当前集合的下一批文档（最多 size 条）；遇到下一个集合头时先返回已读部分
+
+        Returns:
+            (集合名, 文档列表)；decode=False 时只校验不解析，文档列表为空
+        """
+        if self._pending_header is not None:
+            self._start(self._pending_header)
+            self._pending_header = None
+
+        docs: List[Any] = []
+        count = 0
+        while count < size:
+            line = self._stream.readline()
+            if not line:
+                self.eof = True
+                break
+            if line.startswith(_HEADER_PREFIX) or line.startswith(_MANIFEST_PREFIX):
+                collection_name = self._control_line(line)
+                if collection_name is None:
+                    continue
+                if count:
+                    self._pending_header = collection_name
+                    break
+                self._start(collection_name)
+                continue
+            if self._digest is None:
+                raise Exception("备份文件格式错误：文档出现在集合头之前")
+            self._digest.update(line)
+            count += 1
+            if decode:
+                docs.append(from_extended_json(line))
+
+        if self.collection is not None:
+            self.seen[self.collection]["documents"] += count
+        return self.collection, docs
+
+    def verify(self) -> Dict[str, Any]:
+        """读完整个流后，对照清单校验各集合的文档数和 SHA-256"""
+        if self.manifest is None:
+            raise Exception("备份文件不完整：缺少清单（备份可能被截断）")
+        expected = {entry["name"]: entry for entry in self.manifest.get("collections", [])}
+        if set(expected) != set(self.seen):
+            raise Exception(f"备份文件校验失败：集合不一致 {sorted(set(expected) ^ set(self.seen))}")
+        for collection_name, entry in expected.items():
+            actual = self.seen[collection_name]
+            if actual["documents"] != entry["documents"] or actual["digest"].hexdigest() != entry["sha256"]:
+                raise Exception(f"备份文件校验失败：集合 {collection_name} 的文档数或校验和不一致")
+        return self.manifest
+
+
+def _verify_backup_stream(stream: BinaryIO, batch_size: int = 10000) -> Dict[str, Any]:
+    """只计算校验和、不解析文档地读完备份流，返回校验通过的清单"""
+    reader = _BackupStreamReader(stream)
+    while not reader.eof:
+        reader.read_batch(batch_size, decode=False)
+    return reader.verify()
+
+
+async def _write_restore_batch(collection_obj, docs: List[dict], overwrite: bool) -> int:
+    """写入一批文档：覆盖模式下集合已清空，直接 insert_many；否则按 _id upsert，重复恢复不产生重复文档"""
+    if overwrite:
+        res = await collection_obj.insert_many(docs, ordered=False)
+        return len(res.inserted_ids)
+    operations = [
+        ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) if "_id" in doc else InsertOne(doc)
+        for doc in docs
+    ]
+    res = await collection_obj.bulk_write(operations, ordered=False)
+    return res.upserted_count + res.matched_count + res.inserted_count
+
+
+async def _restore_backup_stream(
+    db,
+    stream: BinaryIO,
+    *,
+    collections: Optional[List[str]] = None,
+    overwrite: bool = False,
+    batch_size: int = BACKUP_BATCH_SIZE,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    流式恢复 NDJSON 备份：先校验清单（可 seek 的流），再按批写入，内存中最多保留 batch_size 条文档
+
+    Args:
+        stream: 已解压的备份流
+        collections: 只恢复这些集合，None 表示全部
+    """
+    manifest = None
+    # Python 3.10 的 SpooledTemporaryFile（UploadFile.file）没有 seekable()，但支持 seek
+    if getattr(stream, "seekable", lambda: hasattr(stream, "seek"))():
+        manifest = await asyncio.to_thread(_verify_backup_stream, stream)
+        await asyncio.to_thread(stream.seek, 0)
+    totals = {entry["name"]: entry["documents"] for entry in (manifest or {}).get("collections", [])}
+
+    reader = _BackupStreamReader(stream)
+    restored: Dict[str, int] = {}
+    current: Optional[str] = None
+    batches = 0
+    while not reader.eof:
+        collection_name, docs = await asyncio.to_thread(reader.read_batch, batch_size)
+        if collection_name is None or (collections and collection_name not in collections):
+            continue
+        collection_obj = db[collection_name]
+        if collection_name != current:
+            current = collection_name
+            restored.setdefault(collection_name, 0)
+            if overwrite:
+                deleted = await collection_obj.delete_many({})
+                logger.info(f"🗑️ 清空集合 {collection_name}：删除 {deleted.deleted_count} 条文档")
+        if not docs:
+            continue
+
+        restored[collection_name] += await _write_restore_batch(collection_obj, docs, overwrite)
+        batches += 1
+        if progress_callback:
+            progress_callback(collection_name, restored[collection_name], totals.get(collection_name))
+        if batches % 100 == 0:
+            logger.info(f"📥 恢复进度 {collection_name}: {restored[collection_name]}/{totals.get(collection_name, '?')}")
+
+    # 不可 seek 的流在读完后校验；此时数据已写入，只能报告错误
+    manifest = manifest or reader.verify()
+    for collection_name, count in restored.items():
+        logger.info(f"✅ 恢复集合 {collection_name}：{count} 条文档")
+
+    return {
+        "mode": "multi_collection",
+        "collections": [name for name, count in restored.items() if count],
+        "total_collections": sum(1 for count in restored.values() if count),
+        "total_inserted": sum(restored.values()),
+        "backup_id": manifest.get("backup_id"),
+        "verified": True,
+    }
+
+
+def _open_import_stream(source: Union[bytes, BinaryIO]) -> Tuple[BinaryIO, bool]:
+    """
+    把导入内容包装为（解压后的）二进制流
+
+    Returns:
+        (流, 是否为 NDJSON 流式备份)
+    """
+    stream: BinaryIO = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    head = stream.read(2)
+    stream.seek(0)
+    if head == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    first = stream.read(len(_HEADER_PREFIX))
+    stream.seek(0)
+    return stream, first == _HEADER_PREFIX
+
+
+async def restore_backup(
+    backup_id: str,
+    *,
+    collections: Optional[List[str]] = None,
+    overwrite: bool = False,
+    batch_size: int = BACKUP_BATCH_SIZE,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    从 create_backup 生成的备份文件恢复数据（流式，内存占用与备份大小无关）
+
+    mongodump 备份请使用 mongorestore 恢复
+    """
+    db = get_mongo_db()
+    backup = await db.database_backups.find_one({"_id": ObjectId(backup_id)})
+    if not backup:
+        raise Exception("备份不存在")
+    if backup.get("backup_type") == "mongodump":
+        raise Exception("mongodump 备份请使用 mongorestore 恢复")
+    if not os.path.exists(backup["file_path"]):
+        raise Exception(f"备份文件不存在: {backup['file_path']}")
+
+    logger.info(f"🔄 开始恢复备份: {backup['name']} ({backup['filename']})")
+    raw = await asyncio.to_thread(open, backup["file_path"], "rb")
+    try:
+        stream, streaming = await asyncio.to_thread(_open_import_stream, raw)
+        if not streaming:
+            # 旧版 .json.gz 备份：整体解析后按多集合导入
+            data = await asyncio.to_thread(lambda: json.loads(stream.read().decode("utf-8")))
+            result = await _import_parsed_data(db, data, "imported_data", overwrite=overwrite)
+        else:
+            result = await _restore_backup_stream(
+                db, stream, collections=collections, overwrite=overwrite,
+                batch_size=batch_size, progress_callback=progress_callback,
+            )
+    finally:
+        await asyncio.to_thread(raw.close)
+
+    result.update({"filename": backup["filename"], "overwrite": overwrite})
+    return result
+
+
+async def import_data(
+    content: Union[bytes, BinaryIO],
+    collection: str,
+    *,
+    format: str = "json",
+    overwrite: bool = False,
+    filename: str | None = None,
+    batch_size: int = BACKUP_BATCH_SIZE,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
     """
     导入数据到数据库
 
-    支持两种导入模式：
-    1. 单集合模式：导入数据到指定集合
-    2. 多集合模式：导入包含多个集合的导出文件（自动检测）
+    支持三种导入模式：
+    1. 流式备份：create_backup 生成的 NDJSON + gzip 文件（自动检测），校验清单后按批写入，内存占用有界
+    2. 单集合模式：导入数据到指定集合
+    3. 多集合模式：导入包含多个集合的导出文件（自动检测）
+
+    content 可以是字节串，也可以是可 seek 的二进制文件对象（如 UploadFile.file），后者不会整体读入内存
     """
     db = get_mongo_db()
 
-    if format.lower() == "json":
+    if format.lower() not in ("json", "ndjson"):
+        raise Exception(f"不支持的格式: {format}")
+
+    stream, streaming = await asyncio.to_thread(_open_import_stream, content)
+    if streaming:
+        logger.info("📦 检测到流式备份文件（NDJSON + gzip），按批恢复")
+        result = await _restore_backup_stream(
+            db, stream, overwrite=overwrite, batch_size=batch_size, progress_callback=progress_callback,
+        )
+    else:
         # 🔥 使用 asyncio.to_thread 将阻塞的 JSON 解析放到线程池执行
         def _parse_json():
-            return json.loads(content.decode("utf-8"))
+            return json.loads(stream.read().decode("utf-8"))
 
         data = await asyncio.to_thread(_parse_json)
-    else:
-        raise Exception(f"不支持的格式: {format}")
+        result = await _import_parsed_data(db, data, collection, overwrite=overwrite)
+
+    result.update({"filename": filename, "format": format, "overwrite": overwrite})
+    return result
+
 
+async def _import_parsed_data(db, data: Any, collection: str, *, overwrite: bool = False) -> Dict[str, Any]:
+    """导入已解析的 JSON 导出文件（旧版备份、export_data 导出或单集合文档列表）"""
     # 检测是否为多集合导出格式
     logger.info(f"🔍 [导入检测] 数据类型: {type(data)}")
 
-    # 🔥 新格式：包含 export_info 和 data 的字典
-    if isinstance(data, dict) and "export_info" in data and "data" in data:
-        logger.info(f"📦 检测到新版多集合导出文件（包含 export_info）")
+    # 🔥 新格式：包含 export_info（旧版 JSON 备份为 backup_id）和 data 的字典
+    if isinstance(data, dict) and ("export_info" in data or "backup_id" in data) and "data" in data:
+        logger.info(f"📦 检测到新版多集合导出文件（包含 export_info）或旧版 JSON 备份")
         export_info = data.get("export_info", {})
         logger.info(f"📋 导出信息: 创建时间={export_info.get('created_at')}, 集合数={len(export_info.get('collections', []))}")
 
@@ -348,9 +685,6 @@ async def import_data(content: bytes, collection: str, *, format: str = "json",
             "collections": imported_collections,
             "total_collections": len(imported_collections),
             "total_inserted": total_inserted,
-            "filename": filename,
-            "format": format,
-            "overwrite": overwrite,
         }
     else:
         # 单集合模式（兼容旧版本）
@@ -393,9 +727,6 @@ async def import_data(content: bytes, collection: str, *, format: str = "json",
             "mode": "single_collection",
             "collection": collection,
             "inserted_count": inserted_count,
-            "filename": filename,
-            "format": format,
-            "overwrite": overwrite,
         }
 
 
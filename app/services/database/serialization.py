@@ -3,8 +3,9 @@ Serialization helpers for MongoDB documents.
 """
 from __future__ import annotations
 
+import json
 from datetime import datetime
-from bson import ObjectId
+from bson import ObjectId, json_util
 
 
 def serialize_document(doc: dict) -> dict:
@@ -37,3 +38,42 @@ def serialize_document(doc: dict) -> dict:
             serialized[key] = value
     return serialized
 
+
+
+def _extended_default(value):
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    # Decimal128, Binary, Int64 and other BSON types fall back to bson.json_util
+    return json_util.default(value)
+
+
+def _extended_object_hook(obj: dict):
+    if len(obj) == 1:
+        if "$oid" in obj:
+            return ObjectId(obj["$oid"])
+        if "$date" in obj and isinstance(obj["$date"], str):
+            return datetime.fromisoformat(obj["$date"])
+        if next(iter(obj)).startswith("$"):
+            return json_util.object_hook(obj)
+    return obj
+
+
+_extended_encoder = json.JSONEncoder(default=_extended_default, ensure_ascii=False, separators=(",", ":"))
+_extended_decoder = json.JSONDecoder(object_hook=_extended_object_hook)
+
+
+def to_extended_json(doc: dict) -> str:
+    """Encode a document as one line of extended JSON that round-trips BSON types.
+    - ObjectId -> {"$oid": ...}, datetime -> {"$date": ISO string}
+    - Other BSON types use the bson.json_util representation
+    """
+    return _extended_encoder.encode(doc)
+
+
+def from_extended_json(line) -> dict:
+    """Decode a line produced by to_extended_json back into a document with BSON types."""
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    return _extended_decoder.decode(line)
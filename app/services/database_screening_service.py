@@ -17,8 +17,8 @@ class DatabaseScreeningService:
     """基于数据库的股票筛选服务"""
     
     def __init__(self):
-        # 使用视图而不是基础信息表，视图已经包含了实时行情数据
-        self.collection_name = "stock_screening_view"
+        # 使用物化筛选集合（已包含实时行情和最新财务数据），未就绪时回退到视图
+        self.collection_name = "stock_screening"
         
         # 支持的基础信息字段映射
         self.basic_fields = {
@@ -67,6 +67,11 @@ class DatabaseScreeningService:
             "contains": "$regex",   # 字符串包含
         }
     
+    async def _get_collection(self, db):
+        """获取筛选查询集合（物化集合未完成首次刷新时使用视图）"""
+        from app.services.screening_table_service import get_screening_table_service
+        return db[await get_screening_table_service().get_query_collection_name(db)]
+
     async def can_handle_conditions(self, conditions: List[Dict[str, Any]]) -> bool:
         """
         检查是否可以完全通过数据库筛选处理这些条件
@@ -116,7 +121,7 @@ class DatabaseScreeningService:
         """
         try:
             db = get_mongo_db()
-            collection = db[self.collection_name]
+            collection = await self._get_collection(db)
 
             # 🔥 获取数据源优先级配置
             if not source:
@@ -403,7 +408,7 @@ class DatabaseScreeningService:
                 return {}
             
             db = get_mongo_db()
-            collection = db[self.collection_name]
+            collection = await self._get_collection(db)
             
             # 使用聚合管道获取统计信息
             pipeline = [
@@ -570,7 +575,7 @@ class DatabaseScreeningService:
                 return []
             
             db = get_mongo_db()
-            collection = db[self.collection_name]
+            collection = await self._get_collection(db)
             
             # 获取字段的不重复值
             values = await collection.distinct(db_field)
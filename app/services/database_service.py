@@ -9,7 +9,7 @@ import gzip
 import shutil
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, BinaryIO, List, Optional, Union
 from bson import ObjectId
 import motor.motor_asyncio
 import redis.asyncio as redis
@@ -167,7 +167,12 @@ class DatabaseService:
         """清理操作日志（委托子模块）"""
         return await _db_cleanup.cleanup_operation_logs(days)
 
-    async def import_data(self, content: bytes, collection: str, format: str = "json",
+    async def restore_backup(self, backup_id: str, collections: List[str] = None,
+                             overwrite: bool = False) -> Dict[str, Any]:
+        """从备份恢复数据（委托子模块）"""
+        return await _db_backups.restore_backup(backup_id, collections=collections or None, overwrite=overwrite)
+
+    async def import_data(self, content: Union[bytes, BinaryIO], collection: str, format: str = "json",
                          overwrite: bool = False, filename: str = None) -> Dict[str, Any]:
         """导入数据（委托子模块）"""
         return await _db_backups.import_data(content, collection, format=format, overwrite=overwrite, filename=filename)
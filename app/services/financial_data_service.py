@@ -153,6 +153,10 @@ class FinancialDataService:
                 actual_saved = result.upserted_count + result.modified_count
                 
                 logger.info(f"✅ {symbol} 财务数据保存完成: {actual_saved}条记录")
+                if actual_saved:
+                    # 登记筛选物化集合待刷新（延迟合并后批量刷新）
+                    from app.services.screening_table_service import get_screening_table_service
+                    get_screening_table_service().mark_dirty([symbol])
                 return actual_saved
             
             return 0
@@ -3,17 +3,66 @@
 提供日志文件的查询、过滤和导出功能
 """
 
+import bisect
 import logging
 import os
+import shutil
+import threading
 import zipfile
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator
 import re
 import json
 
 logger = logging.getLogger("webapi")
 
+# 流式读取块大小
+_BLOCK_SIZE = 64 * 1024
+# 日志时间戳（YYYY-MM-DD HH:MM:SS），只在行首附近查找
+_TIME_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}')
+_TIME_PREFIX_BYTES = 64
+# 行首的分钟级时间戳，用于构建偏移索引
+_LINE_MINUTE_PATTERN = re.compile(rb'^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}', re.M)
+
+
+def _normalize_time(value: Optional[str]) -> Optional[str]:
+    """将 ISO 时间统一为日志中的 'YYYY-MM-DD HH:MM:SS' 形式，便于字符串比较"""
+    if not value:
+        return None
+    return value.replace("T", " ")[:19]
+
+
+def _extract_time(line: str) -> Optional[str]:
+    match = _TIME_PATTERN.search(line[:_TIME_PREFIX_BYTES])
+    if not match:
+        return None
+    return match.group().replace("T", " ")
+
+
+@dataclass
+class _LogFileIndex:
+    """单个日志文件的轻量索引：行数 + 每分钟首行的字节偏移"""
+    inode: int
+    indexed_size: int = 0
+    line_count: int = 0
+    minutes: List[str] = field(default_factory=list)
+    offsets: List[int] = field(default_factory=list)
+    # 上一次扫描是否从 jump_from 处跳过了若干同分钟的行
+    pending_jump: bool = False
+    jump_from: int = 0
+
+    def offset_for(self, start_time: Optional[str]) -> int:
+        """二分查找不早于 start_time 所在分钟的第一行偏移"""
+        if not start_time or not self.minutes:
+            return 0
+        pos = bisect.bisect_left(self.minutes, start_time[:16])
+        if pos >= len(self.offsets):
+            return self.indexed_size
+        return self.offsets[pos]
+
 
 class LogExportService:
     """日志导出服务"""
@@ -26,6 +75,8 @@ class LogExportService:
             log_dir: 日志文件目录
         """
         self.log_dir = Path(log_dir)
+        self._indexes: Dict[str, _LogFileIndex] = {}
+        self._index_lock = threading.Lock()
         logger.info(f"🔍 [LogExportService] 初始化日志导出服务")
         logger.info(f"🔍 [LogExportService] 配置的日志目录: {log_dir}")
         logger.info(f"🔍 [LogExportService] 解析后的日志目录: {self.log_dir}")
@@ -125,6 +176,172 @@ class LogExportService:
         else:
             return "other"
 
+    def _get_index(self, file_path: Path) -> _LogFileIndex:
+        """获取（必要时增量构建）文件的分钟偏移索引
+
+        追加写入的日志只扫描新增部分；文件被轮转（inode 变化）或截断时重建。
+        """
+        stat = file_path.stat()
+        key = str(file_path.resolve())
+        with self._index_lock:
+            index = self._indexes.get(key)
+            if index is None or index.inode != stat.st_ino or stat.st_size < index.indexed_size:
+                index = _LogFileIndex(inode=stat.st_ino)
+                self._indexes[key] = index
+            if stat.st_size > index.indexed_size:
+                self._extend_index(file_path, index, stat.st_size)
+            return index
+
+    def _extend_index(self, file_path: Path, index: _LogFileIndex, size: int) -> None:
+        """按块扫描 [indexed_size, size) 区间：统计行数并记录每个新分钟首行的偏移"""
+        position = index.indexed_size
+        carry = b''
+        with open(file_path, 'rb') as f:
+            f.seek(position)
+            while position < size:
+                chunk = f.read(min(_BLOCK_SIZE, size - position))
+                if not chunk:
+                    break
+                base = position - len(carry)
+                position += len(chunk)
+                data = carry + chunk
+                cut = data.rfind(b'\n') + 1
+                # 只处理完整的行，剩余部分并入下一块（尚未写完的最后一行留待下次索引）
+                complete, carry = data[:cut], data[cut:]
+                if not complete:
+                    continue
+                index.line_count += complete.count(b'\n')
+                self._index_minutes(index, complete, base)
+        index.indexed_size = position - len(carry)
+
+    @staticmethod
+    def _index_minutes(index: _LogFileIndex, data: bytes, base: int) -> None:
+        # 找到某分钟的首行后直接跳到该分钟在本块中的最后一行，循环次数只与分钟数有关。
+        # 多进程写同一文件时相邻分钟可能交错，跳跃后发现的新分钟保守地记录为上一分钟的起点。
+        pos = 0
+        while True:
+            match = _LINE_MINUTE_PATTERN.search(data, pos)
+            if not match:
+                return
+            raw_minute = match.group()
+            minute = raw_minute.decode('ascii').replace("T", " ")
+            last = data.rfind(b'\n' + raw_minute, match.start())
+            if not index.minutes or minute > index.minutes[-1]:
+                offset = base + match.start()
+                if index.pending_jump:
+                    offset = min(offset, index.jump_from)
+                index.minutes.append(minute)
+                index.offsets.append(offset)
+            index.pending_jump = last > match.start()
+            index.jump_from = base + match.start()
+            line_start = last + 1 if last >= 0 else match.start()
+            next_line = data.find(b'\n', line_start)
+            if next_line < 0:
+                return
+            pos = next_line + 1
+
+    @staticmethod
+    def _tail_lines(file_path: Path, count: int) -> List[str]:
+        """从文件末尾按块向前读取最后 count 行"""
+        if count <= 0:
+            return []
+        with open(file_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            chunks: List[bytes] = []
+            newlines = 0
+            while position > 0 and newlines <= count:
+                read_size = min(_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                chunk = f.read(read_size)
+                chunks.append(chunk)
+                newlines += chunk.count(b'\n')
+        data = b''.join(reversed(chunks))
+        raw_lines = data.splitlines()
+        if position > 0:
+            # 第一行可能不完整
+            raw_lines = raw_lines[1:]
+        return [line.decode('utf-8', errors='ignore') for line in raw_lines[-count:]]
+
+    @staticmethod
+    def _iter_lines(file_path: Path, start_offset: int = 0) -> Iterator[str]:
+        """从指定偏移开始逐行流式读取"""
+        with open(file_path, 'rb') as f:
+            f.seek(start_offset)
+            for raw in f:
+                yield raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+
+    @staticmethod
+    def _filter_lines(
+        lines: Iterable[str],
+        level: Optional[str] = None,
+        keyword: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> Iterator[str]:
+        """按级别、关键词和时间范围过滤行（生成器）
+
+        日志按时间追加写入，遇到晚于 end_time 的行即停止读取。
+        不带时间戳的行（如异常堆栈）跟随所在区域保留。
+        """
+        level_upper = level.upper() if level else None
+        keyword_lower = keyword.lower() if keyword else None
+        start_time = _normalize_time(start_time)
+        end_time = _normalize_time(end_time)
+
+        for line in lines:
+            if start_time or end_time:
+                log_time = _extract_time(line)
+                if log_time:
+                    if end_time and log_time > end_time:
+                        break
+                    if start_time and log_time < start_time:
+                        continue
+
+            # 统计日志级别
+            if stats is not None:
+                if "ERROR" in line:
+                    stats["error_count"] += 1
+                elif "WARNING" in line:
+                    stats["warning_count"] += 1
+                elif "INFO" in line:
+                    stats["info_count"] += 1
+                elif "DEBUG" in line:
+                    stats["debug_count"] += 1
+
+            # 应用过滤条件
+            if level_upper and level_upper not in line:
+                continue
+
+            if keyword_lower and keyword_lower not in line.lower():
+                continue
+
+            yield line
+
+    def iter_log_lines(
+        self,
+        file_path: Path,
+        level: Optional[str] = None,
+        keyword: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> Iterator[str]:
+        """流式遍历日志文件中满足过滤条件的行，时间范围查询通过索引直接定位起点"""
+        start_offset = 0
+        if start_time:
+            start_offset = self._get_index(file_path).offset_for(_normalize_time(start_time))
+        return self._filter_lines(
+            self._iter_lines(file_path, start_offset),
+            level=level,
+            keyword=keyword,
+            start_time=start_time,
+            end_time=end_time,
+            stats=stats
+        )
+
     def read_log_file(
         self,
         filename: str,
@@ -147,6 +364,9 @@ class LogExportService:
             
         Returns:
             日志内容和统计信息
+
+        无时间范围时只从文件末尾向前读取最后 lines 行；
+        指定时间范围时通过分钟索引定位起点，返回范围内最后 lines 条匹配行。
         """
         file_path = self.log_dir / filename
         
@@ -154,54 +374,25 @@ class LogExportService:
             raise FileNotFoundError(f"日志文件不存在: {filename}")
         
         try:
-            # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                all_lines = f.readlines()
-            
-            # 从末尾开始读取指定行数
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-            
-            # 应用过滤器
-            filtered_lines = []
             stats = {
-                "total_lines": len(all_lines),
+                "total_lines": self._get_index(file_path).line_count,
                 "filtered_lines": 0,
                 "error_count": 0,
                 "warning_count": 0,
                 "info_count": 0,
                 "debug_count": 0
             }
-            
-            for line in recent_lines:
-                # 统计日志级别
-                if "ERROR" in line:
-                    stats["error_count"] += 1
-                elif "WARNING" in line:
-                    stats["warning_count"] += 1
-                elif "INFO" in line:
-                    stats["info_count"] += 1
-                elif "DEBUG" in line:
-                    stats["debug_count"] += 1
-                
-                # 应用过滤条件
-                if level and level.upper() not in line:
-                    continue
-                
-                if keyword and keyword.lower() not in line.lower():
-                    continue
-                
-                # 时间过滤（简单实现，假设日志格式为 YYYY-MM-DD HH:MM:SS）
-                if start_time or end_time:
-                    time_match = re.search(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', line)
-                    if time_match:
-                        log_time = time_match.group()
-                        if start_time and log_time < start_time:
-                            continue
-                        if end_time and log_time > end_time:
-                            continue
-                
-                filtered_lines.append(line.rstrip())
-            
+
+            if start_time or end_time:
+                filtered = self.iter_log_lines(
+                    file_path, level, keyword, start_time, end_time, stats=stats
+                )
+            else:
+                filtered = self._filter_lines(
+                    self._tail_lines(file_path, lines), level, keyword, stats=stats
+                )
+
+            filtered_lines = list(deque(filtered, maxlen=lines)) if lines > 0 else []
             stats["filtered_lines"] = len(filtered_lines)
             
             return {
@@ -258,21 +449,13 @@ class LogExportService:
                 # 创建ZIP文件
                 with zipfile.ZipFile(export_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                     for file_path in files_to_export:
-                        # 如果有过滤条件，先过滤再添加
+                        # 如果有过滤条件，边过滤边写入压缩包
                         if level or start_time or end_time:
-                            filtered_data = self.read_log_file(
-                                file_path.name,
-                                lines=999999,  # 读取所有行
-                                level=level,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                            # 将过滤后的内容写入临时文件
-                            temp_file = export_dir / f"temp_{file_path.name}"
-                            with open(temp_file, 'w', encoding='utf-8') as f:
-                                f.write('\n'.join(filtered_data['lines']))
-                            zipf.write(temp_file, file_path.name)
-                            temp_file.unlink()  # 删除临时文件
+                            with zipf.open(file_path.name, 'w') as member:
+                                self._write_lines(
+                                    member,
+                                    self.iter_log_lines(file_path, level, None, start_time, end_time)
+                                )
                         else:
                             zipf.write(file_path, file_path.name)
                 
@@ -290,17 +473,12 @@ class LogExportService:
                         outf.write(f"{'='*80}\n\n")
                         
                         if level or start_time or end_time:
-                            filtered_data = self.read_log_file(
-                                file_path.name,
-                                lines=999999,
-                                level=level,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                            outf.write('\n'.join(filtered_data['lines']))
+                            for line in self.iter_log_lines(file_path, level, None, start_time, end_time):
+                                outf.write(line)
+                                outf.write('\n')
                         else:
                             with open(file_path, 'r', encoding='utf-8', errors='ignore') as inf:
-                                outf.write(inf.read())
+                                shutil.copyfileobj(inf, outf, _BLOCK_SIZE)
                         
                         outf.write('\n\n')
                 
@@ -314,6 +492,20 @@ class LogExportService:
             logger.error(f"❌ 导出日志失败: {e}")
             raise
 
+    @staticmethod
+    def _write_lines(stream, lines: Iterable[str]) -> None:
+        """将行以 UTF-8 分块写入二进制流"""
+        buffer: List[str] = []
+        size = 0
+        for line in lines:
+            buffer.append(line)
+            size += len(line)
+            if size >= _BLOCK_SIZE:
+                stream.write(('\n'.join(buffer) + '\n').encode('utf-8'))
+                buffer, size = [], 0
+        if buffer:
+            stream.write(('\n'.join(buffer) + '\n').encode('utf-8'))
+
     def get_log_statistics(self, days: int = 7) -> Dict[str, Any]:
         """
         获取日志统计信息
@@ -356,10 +548,8 @@ class LogExportService:
                     stats["error_files"] += 1
                     # 读取最近的错误
                     try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = f.readlines()
-                            error_lines = [line for line in lines[-100:] if "ERROR" in line]
-                            stats["recent_errors"].extend(error_lines[-10:])
+                        error_lines = [line for line in self._tail_lines(file_path, 100) if "ERROR" in line]
+                        stats["recent_errors"].extend(error_lines[-10:])
                     except Exception:
                         pass
             
@@ -318,6 +318,13 @@ class MultiSourceBasicsSyncService:
                 f"✅ Multi-source sync finished: total={stats.total} inserted={inserted} "
                 f"updated={updated} errors={errors} sources={stats.data_sources_used}"
             )
+
+            # 基础信息（市值、估值等）全市场更新，全量刷新筛选物化集合
+            try:
+                from app.services.screening_table_service import get_screening_table_service
+                await get_screening_table_service().refresh()
+            except Exception as e:
+                logger.warning(f"Screening table refresh failed: {e}")
             return stats.__dict__
 
         except Exception as e:
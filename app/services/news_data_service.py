@@ -5,12 +5,23 @@
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+import asyncio
 import logging
+import time
 from pymongo import ReplaceOne
 from pymongo.errors import BulkWriteError
 from bson import ObjectId
 
+from app.core.config import settings
 from app.core.database import get_database
+from app.services.news_search_index import (
+    FILTER_FIELDS,
+    INDEX_FIELDS,
+    LOAD_PROJECTION,
+    NewsSearchIndex,
+    TTLResultCache,
+    news_key,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -78,12 +89,24 @@ class NewsStats:
 class NewsDataService:
     """新闻数据服务"""
     
+    # 增量补齐时 updated_at 的回看余量，覆盖多进程之间的时钟偏差和写入延迟
+    INDEX_REFRESH_OVERLAP = timedelta(seconds=5)
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self._db = None
         self._collection = None
         self._indexes_ensured = False
 
+        # 本地倒排索引和查询结果缓存
+        self._search_index_enabled = settings.NEWS_SEARCH_INDEX_ENABLED
+        self._search_index = NewsSearchIndex(max_docs=settings.NEWS_SEARCH_INDEX_MAX_DOCS)
+        self._index_refresh_seconds = settings.NEWS_SEARCH_INDEX_REFRESH_SECONDS
+        self._index_refreshed_at = 0.0
+        self._index_lock = asyncio.Lock()
+        self._index_build_task: Optional[asyncio.Task] = None
+        self._result_cache = TTLResultCache(ttl_seconds=settings.NEWS_SEARCH_CACHE_TTL_SECONDS)
+
     async def _ensure_indexes(self):
         """确保必要的索引存在"""
         if self._indexes_ensured:
@@ -142,6 +165,118 @@ class NewsDataService:
             self._db = get_database()
             self._collection = self._db.stock_news
         return self._collection
+
+    def start_search_index_build(self) -> Optional[asyncio.Task]:
+        """
+        在后台构建本地倒排索引（需在事件循环中调用），构建完成前查询直接走 MongoDB
+
+        Returns:
+            构建任务；未启用、已加载或正在构建时返回 None / 已有的任务
+        """
+        if not self._search_index_enabled or self._search_index.loaded:
+            return None
+        task = self._index_build_task
+        if task is None or task.done():
+            task = self._index_build_task = asyncio.get_running_loop().create_task(self.build_search_index())
+        return task
+
+    async def build_search_index(self) -> bool:
+        """
+        从 MongoDB 加载最近的新闻（只取索引需要的字段）并在线程中完成分词和建表，不阻塞事件循环
+
+        Returns:
+            索引是否可用
+        """
+        index = self._search_index
+        async with self._index_lock:
+            if index.loaded:
+                return True
+            try:
+                started = time.monotonic()
+                collection = self._get_collection()
+                cursor = collection.find({}, LOAD_PROJECTION).sort("publish_time", -1).limit(index.max_docs)
+                docs = await cursor.to_list(length=None)
+                await asyncio.to_thread(index.load, docs)
+                # 构建期间本进程保存的新闻没有写入索引，下次查询时立即按 updated_at 补齐
+                self._index_refreshed_at = 0.0
+                self.logger.info(
+                    f"📚 新闻倒排索引加载完成: {len(index)} 条新闻，耗时 {time.monotonic() - started:.1f}s"
+                )
+                return True
+            except Exception as e:
+                self.logger.warning(f"⚠️ 新闻倒排索引构建失败，继续使用 MongoDB 查询: {e}")
+                return False
+
+    async def _ensure_search_index(self) -> Optional[NewsSearchIndex]:
+        """
+        获取本地倒排索引：未加载时在后台开始构建，已加载时按 updated_at 定期补齐其他进程写入的新闻
+
+        Returns:
+            可用的索引；未启用、尚未构建完成或补齐失败时返回 None（调用方回退到 MongoDB 查询）
+        """
+        if not self._search_index_enabled:
+            return None
+
+        index = self._search_index
+        if not index.loaded:
+            self.start_search_index_build()
+            return None
+        if time.monotonic() - self._index_refreshed_at < self._index_refresh_seconds:
+            return index
+
+        async with self._index_lock:
+            if time.monotonic() - self._index_refreshed_at < self._index_refresh_seconds:
+                return index
+            try:
+                collection = self._get_collection()
+                if index.last_updated_at is not None:
+                    since = index.last_updated_at - self.INDEX_REFRESH_OVERLAP
+                    cursor = collection.find({"updated_at": {"$gte": since}}, LOAD_PROJECTION)
+                else:
+                    cursor = collection.find({}, LOAD_PROJECTION).sort("publish_time", -1).limit(index.max_docs)
+                docs = await cursor.to_list(length=None)
+                if docs:
+                    await asyncio.to_thread(index.add_many, docs)
+                self._index_refreshed_at = time.monotonic()
+                return index
+            except Exception as e:
+                self.logger.warning(f"⚠️ 新闻倒排索引补齐失败，回退到 MongoDB 查询: {e}")
+                return None
+
+    async def _fetch_indexed_news(self, refs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按索引命中的顺序从 MongoDB 取回完整新闻（索引只保存投影），保留 score 等附加字段"""
+        if not refs:
+            return []
+        ids = [ref["_id"] for ref in refs if ref.get("_id") is not None]
+        # 本进程保存、尚未拿到 _id 的新闻按唯一键取回
+        clauses = [{"_id": {"$in": ids}}] if ids else []
+        clauses += [
+            {"url": ref.get("url"), "title": ref.get("title"), "publish_time": ref.get("publish_time")}
+            for ref in refs if ref.get("_id") is None
+        ]
+        query = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+        docs = await self._get_collection().find(query).to_list(length=None)
+        by_id = {doc["_id"]: doc for doc in docs}
+        by_key = {news_key(doc): doc for doc in docs}
+
+        results = []
+        for ref in refs:
+            doc = by_id.get(ref.get("_id")) or by_key.get(news_key(ref))
+            if doc is None:
+                continue  # 已被其他进程删除
+            extra = {name: value for name, value in ref.items() if name not in INDEX_FIELDS}
+            results.append({**doc, **extra})
+        return convert_objectid_to_str(results)
+
+    def _on_news_saved(self, docs: List[Dict[str, Any]], result) -> None:
+        """保存成功后增量更新索引，并清空查询结果缓存"""
+        if self._search_index.loaded:
+            upserted_ids = getattr(result, "upserted_ids", None) or {}
+            for position, doc_id in upserted_ids.items():
+                docs[position]["_id"] = doc_id
+            # 本进程写入的新闻不推进补齐位置，避免跳过其他进程稍早写入的新闻
+            self._search_index.add_many(docs, track_updates=False)
+        self._result_cache.clear()
     
     async def save_news_data(
         self,
@@ -178,6 +313,7 @@ class NewsDataService:
             
             # 准备批量操作
             operations = []
+            documents = []
 
             for i, news in enumerate(news_list):
                 # 标准化新闻数据
@@ -192,6 +328,7 @@ class NewsDataService:
                     self.logger.info(f"      title: {standardized_news.get('title', '')[:50]}...")
                     self.logger.info(f"      publish_time: {standardized_news.get('publish_time')} (type: {type(standardized_news.get('publish_time'))})")
                     self.logger.info(f"      url: {standardized_news.get('url', '')[:80]}...")
+                documents.append(standardized_news)
 
                 # 使用URL、标题和发布时间作为唯一标识
                 filter_query = {
@@ -212,6 +349,7 @@ class NewsDataService:
             if operations:
                 result = await collection.bulk_write(operations)
                 saved_count = result.upserted_count + result.modified_count
+                self._on_news_saved(documents, result)
                 
                 self.logger.info(f"💾 新闻数据保存完成: {saved_count}条记录 (数据源: {data_source})")
                 return saved_count
@@ -223,6 +361,8 @@ class NewsDataService:
             write_errors = e.details.get('writeErrors', [])
             error_count = len(write_errors)
             self.logger.warning(f"⚠️ 部分新闻数据保存失败: {error_count}条错误")
+            # 成功写入的新闻由索引的定期补齐收录
+            self._result_cache.clear()
 
             # 记录详细错误信息
             for i, error in enumerate(write_errors[:3], 1):  # 只记录前3个错误
@@ -278,6 +418,7 @@ class NewsDataService:
 
             # 准备批量操作
             operations = []
+            documents = []
 
             self.logger.info(f"📝 开始标准化 {len(news_list)} 条新闻数据...")
 
@@ -293,6 +434,7 @@ class NewsDataService:
                     publish_time = standardized_news.get('publish_time')
                     self.logger.info(f"      publish_time: {publish_time} (type: {type(publish_time)})")
                     self.logger.info(f"      url: {standardized_news.get('url', '')[:60]}...")
+                documents.append(standardized_news)
 
                 # 使用URL+标题+发布时间作为唯一标识
                 filter_query = {
@@ -313,6 +455,7 @@ class NewsDataService:
             if operations:
                 result = collection.bulk_write(operations)
                 saved_count = result.upserted_count + result.modified_count
+                self._on_news_saved(documents, result)
 
                 self.logger.info(f"💾 新闻数据保存完成: {saved_count}条记录 (数据源: {data_source})")
                 return saved_count
@@ -324,6 +467,8 @@ class NewsDataService:
             write_errors = e.details.get('writeErrors', [])
             error_count = len(write_errors)
             self.logger.warning(f"⚠️ 部分新闻数据保存失败: {error_count}条错误")
+            # 成功写入的新闻由索引的定期补齐收录
+            self._result_cache.clear()
 
             # 记录详细错误信息
             for i, error in enumerate(write_errors[:3], 1):  # 只记录前3个错误
@@ -464,6 +609,40 @@ class NewsDataService:
         Returns:
             新闻数据列表
         """
+        index = await self._ensure_search_index()
+        if index is not None and not index.covers(params.start_time):
+            self.logger.info(
+                f"📚 [query_news] 查询范围早于本地索引覆盖的新闻 ({index.truncated_before})，回退到 MongoDB 查询"
+            )
+            index = None
+        if index is not None and params.sort_by not in INDEX_FIELDS:
+            index = None
+        if index is not None:
+            filters = {field: getattr(params, field) for field in FILTER_FIELDS if getattr(params, field)}
+            cache_key = (
+                "query", params.symbol, tuple(params.symbols or ()), params.start_time, params.end_time,
+                tuple(sorted(filters.items())), tuple(params.keywords or ()),
+                params.sort_by, params.sort_order, params.skip, params.limit, index.generation,
+            )
+            results = self._result_cache.get(cache_key)
+            if results is None:
+                results = index.query(
+                    symbol=params.symbol,
+                    symbols=params.symbols,
+                    start_time=params.start_time,
+                    end_time=params.end_time,
+                    filters=filters,
+                    keywords=params.keywords,
+                    sort_by=params.sort_by,
+                    sort_order=params.sort_order,
+                    skip=params.skip,
+                    limit=params.limit,
+                )
+                results = await self._fetch_indexed_news(results)
+                self._result_cache.put(cache_key, results)
+            self.logger.info(f"✅ [query_news] 本地索引查询完成，返回 {len(results)} 条记录 (symbol={params.symbol})")
+            return results
+
         try:
             collection = self._get_collection()
 
@@ -700,6 +879,8 @@ class NewsDataService:
             })
             
             deleted_count = result.deleted_count
+            self._search_index.remove_before(cutoff_date)
+            self._result_cache.clear()
             self.logger.info(f"🗑️ 删除过期新闻: {deleted_count}条记录")
             
             return deleted_count
@@ -723,8 +904,22 @@ class NewsDataService:
             limit: 返回数量限制
 
         Returns:
-            搜索结果列表
+            搜索结果列表（按相关性降序，附带 score）
         """
+        index = await self._ensure_search_index()
+        if index is not None and not index.covers(None):
+            # 相关性排序不限时间范围，索引只有最近的新闻时更早的匹配会缺失
+            self.logger.info(f"📚 全文搜索范围超出本地索引覆盖的新闻 ({index.truncated_before})，回退到 MongoDB 查询")
+            index = None
+        if index is not None:
+            cache_key = ("search", query_text, symbol, limit, index.generation)
+            results = self._result_cache.get(cache_key)
+            if results is None:
+                results = await self._fetch_indexed_news(index.search(query_text, symbol=symbol, limit=limit))
+                self._result_cache.put(cache_key, results)
+            self.logger.info(f"🔍 全文搜索返回 {len(results)} 条结果（本地索引）")
+            return results
+
         try:
             collection = self._get_collection()
 
@@ -0,0 +1,453 @@
+"""
+新闻本地倒排索引
+MongoDB 的 $text 按空格分词，中文标题整句被当作一个词，检索效果很差；query_news 每次都按条件扫描集合。
+本模块在进程内为 stock_news 维护倒排索引：
+- 中文按相邻两字（bigram）切分，英文/数字按词切分
+- 标题和正文的词项倒排表，按 BM25 排序（标题词频加权）
+- 股票代码倒排表和按发布时间排序的时间线，用于股票/时间窗口查询
+- 由 save_news_data / save_news_data_sync 增量维护，并按 updated_at 定期补齐其他进程写入的新闻
+- 每条新闻只保存 ID、发布时间和过滤字段，正文只用于分词，查询命中后按 _id 从 MongoDB 取回完整新闻
+- 查询结果放入短 TTL 缓存，索引有写入时缓存自动失效
+"""
+import bisect
+import heapq
+import itertools
+import logging
+import math
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+")
+_WORD = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)?")
+
+# BM25 参数；标题中的词频按 TITLE_WEIGHT 倍计入
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3
+# 正文只取前若干字建索引（导语已覆盖主要信息），限制每条新闻的词项数和常驻内存
+CONTENT_INDEX_CHARS = 300
+
+FILTER_FIELDS = ("category", "sentiment", "importance", "data_source")
+# 索引中每条新闻只保留这些字段（过滤、排序和去重用），完整新闻由调用方按 _id 从 MongoDB 取回
+INDEX_FIELDS = ("_id", "url", "title", "publish_time", "symbol", "symbols") + FILTER_FIELDS
+# 从 MongoDB 加载时的投影：索引字段 + 分词用的正文 + 增量补齐用的 updated_at
+LOAD_PROJECTION = {name: 1 for name in INDEX_FIELDS + ("content", "updated_at")}
+
+
+def tokenize(text: str) -> List[str]:
+    """中文连续片段切分为 bigram（单字片段保留单字），英文/数字按词切分并转小写"""
+    if not text:
+        return []
+    text = text.lower()
+    tokens: List[str] = []
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(_WORD.findall(_CJK_RUN.sub(" ", text)))
+    return tokens
+
+
+def news_key(doc: Dict[str, Any]) -> Tuple:
+    """新闻的唯一标识，与保存时的 upsert 条件一致（URL+标题+发布时间）"""
+    return doc.get("url"), doc.get("title"), doc.get("publish_time")
+
+
+class _IndexedNews:
+    __slots__ = ("ref", "length", "terms")
+
+    def __init__(self, ref: Dict[str, Any], length: int, terms: Tuple[str, ...]):
+        self.ref = ref
+        self.length = length
+        self.terms = terms
+
+
+class NewsSearchIndex:
+    """stock_news 的进程内倒排索引（线程安全），只保存 INDEX_FIELDS 投影，不保存正文"""
+
+    def __init__(self, max_docs: int = 5000):
+        """
+        Args:
+            max_docs: 索引保留的最大新闻数，超出时按发布时间淘汰最早的新闻
+        """
+        self.max_docs = max_docs
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._next_id = 0
+        self._ids: Dict[Tuple, int] = {}
+        self._docs: Dict[int, _IndexedNews] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._symbols: Dict[str, Set[int]] = {}
+        # 按 (发布时间, doc_id) 升序排列
+        self._timeline: List[Tuple[datetime, int]] = []
+        self._total_length = 0
+        # 每次写入递增，用于使查询缓存失效
+        self.generation = 0
+        self.loaded = False
+        self.last_updated_at: Optional[datetime] = None
+        # 发布时间不晚于该时间的新闻可能不在索引中（加载达到上限或被淘汰）；None 表示覆盖全部新闻
+        self.truncated_before: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ------------------------------------------------------------------ 写入
+
+    def load(self, docs: List[Dict[str, Any]]) -> int:
+        """
+        初次加载（CPU 密集，调用方应放到线程中执行）
+
+        Args:
+            docs: 按发布时间倒序取回的最近 max_docs 条新闻；取满上限时更早的新闻视为不在索引中
+        """
+        with self._lock:
+            count = self.add_many(docs)
+            if len(docs) >= self.max_docs:
+                publish_times = [d["publish_time"] for d in docs if isinstance(d.get("publish_time"), datetime)]
+                self._mark_truncated(min(publish_times) if publish_times else datetime.max)
+            self.loaded = True
+        return count
+
+    def add_many(self, docs: Iterable[Dict[str, Any]], track_updates: bool = True) -> int:
+        """
+        Args:
+            track_updates: 是否用新闻的 updated_at 推进增量补齐的位置。本进程保存的新闻应传 False，
+                否则其他进程稍早写入、尚未补齐的新闻会被跳过
+        """
+        count = 0
+        with self._lock:
+            added: List[Tuple[datetime, int]] = []
+            for doc in docs:
+                item = self._add(doc, track_updates)
+                if item is not None:
+                    added.append(item)
+                count += 1
+            if added:
+                # 整批并入后排序一次：原时间线和按加载顺序追加的部分各自有序，timsort 按有序段线性合并
+                self._timeline.extend(item for item in added if item[1] in self._docs)
+                self._timeline.sort()
+            self._evict()
+            self.generation += 1
+        return count
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        self.add_many([doc])
+
+    def _add(self, doc: Dict[str, Any], track_updates: bool = True) -> Optional[Tuple[datetime, int]]:
+        """写入倒排表，返回待并入时间线的 (发布时间, doc_id)"""
+        key = news_key(doc)
+        ref = {name: doc[name] for name in INDEX_FIELDS if name in doc}
+        existing = self._ids.get(key)
+        if existing is not None:
+            # 同一条新闻被重新保存（upsert 替换），沿用已有的 _id
+            if ref.get("_id") is None:
+                ref["_id"] = self._docs[existing].ref.get("_id")
+            self._remove_id(existing)
+
+        terms: Dict[str, int] = {}
+        for token in tokenize(doc.get("title") or ""):
+            terms[token] = terms.get(token, 0) + TITLE_WEIGHT
+        for token in tokenize((doc.get("content") or "")[:CONTENT_INDEX_CHARS]):
+            terms[token] = terms.get(token, 0) + 1
+        length = sum(terms.values())
+
+        doc_id = self._next_id
+        self._next_id += 1
+        self._ids[key] = doc_id
+        # 词项驻留为同一个字符串对象，倒排表和每条新闻的词项列表不再各自持有切片出来的副本
+        interned = tuple(sys.intern(term) for term in terms)
+        self._docs[doc_id] = _IndexedNews(ref, length, interned)
+        self._total_length += length
+        for term, tf in zip(interned, terms.values()):
+            self._postings.setdefault(term, {})[doc_id] = tf
+        for symbol in self._doc_symbols(ref):
+            self._symbols.setdefault(symbol, set()).add(doc_id)
+
+        updated_at = doc.get("updated_at")
+        if track_updates and isinstance(updated_at, datetime):
+            if self.last_updated_at is None or updated_at > self.last_updated_at:
+                self.last_updated_at = updated_at
+        publish_time = ref.get("publish_time")
+        return (publish_time, doc_id) if isinstance(publish_time, datetime) else None
+
+    @staticmethod
+    def _doc_symbols(doc: Dict[str, Any]) -> Set[str]:
+        symbols = set(doc.get("symbols") or [])
+        if doc.get("symbol"):
+            symbols.add(doc["symbol"])
+        return symbols
+
+    def _remove_id(self, doc_id: int, in_timeline: bool = True) -> None:
+        """移除一条新闻；in_timeline 为 False 表示调用方会自行批量删除时间线上的条目"""
+        entry = self._docs.pop(doc_id)
+        self._ids.pop(news_key(entry.ref), None)
+        self._total_length -= entry.length
+        for term in entry.terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        for symbol in self._doc_symbols(entry.ref):
+            ids = self._symbols.get(symbol)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._symbols[symbol]
+        publish_time = entry.ref.get("publish_time")
+        if in_timeline and isinstance(publish_time, datetime):
+            index = bisect.bisect_left(self._timeline, (publish_time, doc_id))
+            if index < len(self._timeline) and self._timeline[index] == (publish_time, doc_id):
+                del self._timeline[index]
+
+    def _evict(self) -> None:
+        excess = len(self._docs) - self.max_docs
+        if excess <= 0:
+            return
+        # 时间线按发布时间升序，最早的新闻在前，整段切掉
+        evicted = self._timeline[:excess]
+        del self._timeline[:excess]
+        for _, doc_id in evicted:
+            self._remove_id(doc_id, in_timeline=False)
+        if evicted:
+            self._mark_truncated(evicted[-1][0])
+        while len(self._docs) > self.max_docs:
+            # 没有发布时间的新闻：不限起始时间的查询不再完整
+            self._remove_id(next(iter(self._docs)))
+            self._mark_truncated(datetime.min)
+
+    def _mark_truncated(self, before: datetime) -> None:
+        if self.truncated_before is None or before > self.truncated_before:
+            self.truncated_before = before
+
+    def mark_truncated(self, before: datetime) -> None:
+        """记录发布时间不晚于 before 的新闻可能不完整"""
+        with self._lock:
+            self._mark_truncated(before)
+
+    def covers(self, start_time: Optional[datetime]) -> bool:
+        """从 start_time 起的新闻是否全部在索引中（start_time 为 None 表示不限起始时间）"""
+        with self._lock:
+            if self.truncated_before is None:
+                return True
+            return start_time is not None and start_time > self.truncated_before
+
+    def remove_before(self, cutoff: datetime) -> int:
+        """移除发布时间早于 cutoff 的新闻（与 delete_old_news 保持一致）"""
+        with self._lock:
+            index = bisect.bisect_left(self._timeline, (cutoff, -1))
+            expired = self._timeline[:index]
+            del self._timeline[:index]
+            for _, doc_id in expired:
+                self._remove_id(doc_id, in_timeline=False)
+            # 缺失的新闻都早于 cutoff，已随过期新闻一起从数据库删除
+            if self.truncated_before is not None and self.truncated_before < cutoff:
+                self.truncated_before = None
+            if expired:
+                self.generation += 1
+            return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+
+    # ------------------------------------------------------------------ 查询
+
+    def _window(self, start_time: Optional[datetime], end_time: Optional[datetime]) -> Tuple[int, int]:
+        """时间窗口在时间线上的切片范围 [lo, hi)"""
+        lo = bisect.bisect_left(self._timeline, (start_time, -1)) if start_time else 0
+        hi = bisect.bisect_right(self._timeline, (end_time, math.inf)) if end_time else len(self._timeline)
+        return lo, hi
+
+    def _candidates(
+        self,
+        symbol: Optional[str] = None,
+        symbols: Optional[List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Set[int]]:
+        """按股票/时间窗口/字段过滤出候选新闻；没有任何条件时返回 None（表示全部）"""
+        candidates: Optional[Set[int]] = None
+        if symbol:
+            # 与 Mongo 查询一致：symbol 条件匹配主股票代码
+            candidates = {i for i in self._symbols.get(symbol, ()) if self._docs[i].ref.get("symbol") == symbol}
+        if symbols:
+            wanted = set(symbols)
+            ids = {
+                i for s in symbols for i in self._symbols.get(s, ())
+                if wanted.intersection(self._docs[i].ref.get("symbols") or ())
+            }
+            candidates = ids if candidates is None else candidates & ids
+        if start_time or end_time:
+            lo, hi = self._window(start_time, end_time)
+            if candidates is None:
+                candidates = {doc_id for _, doc_id in self._timeline[lo:hi]}
+            else:
+                candidates = {i for i in candidates if self._in_window(i, start_time, end_time)}
+        for field, value in (filters or {}).items():
+            pool = self._docs.keys() if candidates is None else candidates
+            candidates = {i for i in pool if self._docs[i].ref.get(field) == value}
+        return candidates
+
+    def _in_window(self, doc_id: int, start_time: Optional[datetime], end_time: Optional[datetime]) -> bool:
+        publish_time = self._docs[doc_id].ref.get("publish_time")
+        if not isinstance(publish_time, datetime):
+            return False
+        return (not start_time or publish_time >= start_time) and (not end_time or publish_time <= end_time)
+
+    def _bm25(self, terms: List[str], candidates: Optional[Set[int]]) -> Dict[int, float]:
+        total = len(self._docs)
+        if not total:
+            return {}
+        avg_length = self._total_length / total or 1.0
+        # norm = k1 * (1 - b + b * length / avg_length) = norm_base + norm_slope * length
+        norm_base = BM25_K1 * (1 - BM25_B)
+        norm_slope = BM25_K1 * BM25_B / avg_length
+        docs = self._docs
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5)) * (BM25_K1 + 1)
+            for doc_id, tf in posting.items():
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = norm_base + norm_slope * docs[doc_id].length
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf / (tf + norm)
+        return scores
+
+    def _matching_keywords(self, keywords: List[str], candidates: Optional[Set[int]]) -> Set[int]:
+        """关键词之间为“或”，同一关键词的所有词项都需出现"""
+        matched: Set[int] = set()
+        for keyword in keywords:
+            terms = set(tokenize(keyword))
+            if not terms:
+                continue
+            postings = sorted((self._postings.get(t, {}) for t in terms), key=len)
+            ids = set(postings[0])
+            for posting in postings[1:]:
+                ids &= posting.keys()
+            matched |= ids
+        return matched if candidates is None else matched & candidates
+
+    def search(self, query_text: str, symbol: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """全文检索：按 BM25 相关性降序返回新闻的索引投影（附带 score）"""
+        with self._lock:
+            candidates = self._candidates(symbol=symbol)
+            scores = self._bm25(tokenize(query_text), candidates)
+            ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], -self._publish_ts(item[0])))
+            return [{**self._docs[doc_id].ref, "score": round(score, 6)} for doc_id, score in ranked]
+
+    def query(
+        self,
+        symbol: Optional[str] = None,
+        symbols: Optional[List[str]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        keywords: Optional[List[str]] = None,
+        sort_by: str = "publish_time",
+        sort_order: int = -1,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """
+        按股票/时间窗口/字段/关键词过滤并排序分页，语义与 query_news 的 Mongo 查询一致
+
+        Returns:
+            新闻的索引投影（INDEX_FIELDS），sort_by 需为其中的字段
+        """
+        with self._lock:
+            candidates = self._candidates(symbol, symbols, start_time, end_time, filters)
+            if keywords:
+                candidates = self._matching_keywords(keywords, candidates)
+            if sort_by == "publish_time" and len(self._timeline) == len(self._docs):
+                ids = self._timeline_page(candidates, start_time, end_time, sort_order, skip, limit)
+            else:
+                pool = sorted(self._docs.keys() if candidates is None else candidates)
+                ids = sorted(pool, key=lambda i: self._sort_key(i, sort_by), reverse=sort_order < 0)
+                ids = ids[skip:skip + limit]
+            return [dict(self._docs[doc_id].ref) for doc_id in ids]
+
+    def _timeline_page(
+        self,
+        candidates: Optional[Set[int]],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        sort_order: int,
+        skip: int,
+        limit: int,
+    ) -> List[int]:
+        """按发布时间分页：在已排序的时间线上切片并过滤，不再整体排序"""
+        lo, hi = self._window(start_time, end_time)
+        if candidates is not None and len(candidates) * 8 < hi - lo:
+            # 候选远少于窗口内的新闻时，直接排序候选比扫描时间线更快
+            ordered = sorted(
+                candidates, key=lambda i: (self._docs[i].ref["publish_time"], i), reverse=sort_order < 0
+            )
+            return ordered[skip:skip + limit]
+        timeline = self._timeline
+        span = range(hi - 1, lo - 1, -1) if sort_order < 0 else range(lo, hi)
+        ids: Iterable[int] = (timeline[i][1] for i in span)
+        if candidates is not None:
+            ids = (i for i in ids if i in candidates)
+        return list(itertools.islice(ids, skip, skip + limit))
+
+    def _publish_ts(self, doc_id: int) -> float:
+        publish_time = self._docs[doc_id].ref.get("publish_time")
+        return publish_time.timestamp() if isinstance(publish_time, datetime) else 0.0
+
+    def _sort_key(self, doc_id: int, sort_by: str):
+        value = self._docs[doc_id].ref.get(sort_by)
+        # None 排在最前（与 MongoDB 升序一致）；同值保持写入顺序（调用方按 doc_id 预排序，排序稳定）
+        return (value is not None, value if value is not None else 0)
+
+
+class TTLResultCache:
+    """短 TTL 的查询结果缓存（LRU 淘汰）"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 512, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(doc) for doc in entry[1]]
+
+    def put(self, key: Hashable, results: List[Dict[str, Any]]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, [dict(doc) for doc in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -2,9 +2,11 @@
 操作日志服务
 """
 
+import asyncio
 import logging
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from bson import ObjectId
 
 from app.core.database import get_mongo_db
@@ -27,6 +29,33 @@ class OperationLogService:
     def __init__(self):
         self.collection_name = "operation_logs"
     
+    @staticmethod
+    def build_log_doc(
+        user_id: str,
+        username: str,
+        log_data: OperationLogCreate,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """构建操作日志文档"""
+        # 🔥 使用 naive datetime（不带时区信息），MongoDB 会按原样存储，不会转换为 UTC
+        current_time = now_tz().replace(tzinfo=None)  # 移除时区信息，保留本地时间值
+        return {
+            "user_id": user_id,
+            "username": username,
+            "action_type": log_data.action_type,
+            "action": log_data.action,
+            "details": log_data.details or {},
+            "success": log_data.success,
+            "error_message": log_data.error_message,
+            "duration_ms": log_data.duration_ms,
+            "ip_address": ip_address or log_data.ip_address,
+            "user_agent": user_agent or log_data.user_agent,
+            "session_id": log_data.session_id,
+            "timestamp": current_time,  # naive datetime，MongoDB 按原样存储
+            "created_at": current_time  # naive datetime，MongoDB 按原样存储
+        }
+
     async def create_log(
         self,
         user_id: str,
@@ -40,23 +69,7 @@ class OperationLogService:
             db = get_mongo_db()
 
             # 构建日志文档
-            # 🔥 使用 naive datetime（不带时区信息），MongoDB 会按原样存储，不会转换为 UTC
-            current_time = now_tz().replace(tzinfo=None)  # 移除时区信息，保留本地时间值
-            log_doc = {
-                "user_id": user_id,
-                "username": username,
-                "action_type": log_data.action_type,
-                "action": log_data.action,
-                "details": log_data.details or {},
-                "success": log_data.success,
-                "error_message": log_data.error_message,
-                "duration_ms": log_data.duration_ms,
-                "ip_address": ip_address or log_data.ip_address,
-                "user_agent": user_agent or log_data.user_agent,
-                "session_id": log_data.session_id,
-                "timestamp": current_time,  # naive datetime，MongoDB 按原样存储
-                "created_at": current_time  # naive datetime，MongoDB 按原样存储
-            }
+            log_doc = self.build_log_doc(user_id, username, log_data, ip_address, user_agent)
             
             # 插入数据库
             result = await db[self.collection_name].insert_one(log_doc)
@@ -242,8 +255,136 @@ class OperationLogService:
             return None
 
 
+class OperationLogWriter:
+    """操作日志批量写入器
+
+    请求路径只把日志文档放入进程内有界缓冲区，由后台任务按条数/时间阈值
+    使用 insert_many 批量写入。缓冲区超过水位线后对成功操作抽样保留（失败操作
+    始终保留），缓冲区满时直接丢弃；关闭时会刷写剩余日志。
+    """
+
+    def __init__(
+        self,
+        collection_name: str = "operation_logs",
+        max_size: int = 5000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        sample_watermark: float = 0.8,
+        sample_rate: int = 10
+    ):
+        self.collection_name = collection_name
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.sample_threshold = int(self.max_size * sample_watermark)
+        self.sample_rate = max(1, sample_rate)
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._sample_counter = 0
+
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.failed = 0
+        self.batches = 0
+
+    def enqueue(self, log_doc: Dict[str, Any]) -> bool:
+        """放入缓冲区（不等待数据库），返回是否被接收"""
+        size = len(self._buffer)
+        if size >= self.max_size:
+            self.dropped += 1
+            return False
+
+        if size >= self.sample_threshold and log_doc.get("success", True):
+            self._sample_counter += 1
+            if self._sample_counter % self.sample_rate:
+                self.sampled_out += 1
+                return False
+
+        self._buffer.append(log_doc)
+        self.queued += 1
+        self._ensure_started()
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _ensure_started(self) -> None:
+        if self._closing or (self._task is not None and not self._task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """将缓冲区中的日志分批写入数据库，返回写入条数"""
+        written = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                db = get_mongo_db()
+                await db[self.collection_name].insert_many(batch, ordered=False)
+                self.flushed += len(batch)
+                self.batches += 1
+                written += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"批量写入操作日志失败（丢弃 {len(batch)} 条）: {e}")
+        if written:
+            logger.debug(f"📝 批量写入操作日志: {written} 条")
+        return written
+
+    async def start(self) -> None:
+        """启动后台刷写任务"""
+        self._closing = False
+        self._ensure_started()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """停止后台任务并刷写剩余日志"""
+        self._closing = True
+        task = self._task
+        if task is not None and not task.done():
+            if self._wakeup is not None:
+                self._wakeup.set()
+            try:
+                await asyncio.wait_for(task, timeout=timeout)
+            except Exception as e:
+                logger.warning(f"等待操作日志写入任务结束失败: {e}")
+        self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写入器计数"""
+        return {
+            "pending": len(self._buffer),
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "failed": self.failed,
+            "batches": self.batches,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+
 # 全局服务实例
 _operation_log_service: Optional[OperationLogService] = None
+_operation_log_writer: Optional[OperationLogWriter] = None
 
 
 def get_operation_log_service() -> OperationLogService:
@@ -254,6 +395,21 @@ def get_operation_log_service() -> OperationLogService:
     return _operation_log_service
 
 
+def get_operation_log_writer() -> OperationLogWriter:
+    """获取操作日志批量写入器实例"""
+    global _operation_log_writer
+    if _operation_log_writer is None:
+        from app.core.config import settings
+        _operation_log_writer = OperationLogWriter(
+            max_size=settings.OPLOG_BUFFER_MAX_SIZE,
+            batch_size=settings.OPLOG_BATCH_SIZE,
+            flush_interval=settings.OPLOG_FLUSH_INTERVAL_SECONDS,
+            sample_watermark=settings.OPLOG_SAMPLE_WATERMARK,
+            sample_rate=settings.OPLOG_SAMPLE_RATE
+        )
+    return _operation_log_writer
+
+
 # 便捷函数
 async def log_operation(
     user_id: str,
@@ -282,3 +438,32 @@ async def log_operation(
         session_id=session_id
     )
     return await service.create_log(user_id, username, log_data, ip_address, user_agent)
+
+
+def enqueue_operation_log(
+    user_id: str,
+    username: str,
+    action_type: str,
+    action: str,
+    details: Optional[Dict[str, Any]] = None,
+    success: bool = True,
+    error_message: Optional[str] = None,
+    duration_ms: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    session_id: Optional[str] = None
+) -> bool:
+    """异步批量记录操作日志（不等待数据库写入）"""
+    log_data = OperationLogCreate(
+        action_type=action_type,
+        action=action,
+        details=details,
+        success=success,
+        error_message=error_message,
+        duration_ms=duration_ms,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        session_id=session_id
+    )
+    log_doc = OperationLogService.build_log_doc(user_id, username, log_data, ip_address, user_agent)
+    return get_operation_log_writer().enqueue(log_doc)
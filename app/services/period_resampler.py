@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+周线/月线本地重采样
+由 stock_daily_quotes 中已存储的日线聚合出周线、月线，避免按股票逐只重新从数据源下载：
+- 周期按实际交易日分组（周按 ISO 周，月按自然月），节假日缺失的交易日不会产生空周期
+- 开盘取首个交易日开盘价，收盘取最后一个交易日收盘价，最高/最低取极值，成交量/成交额/换手率求和
+- 周期的 trade_date 为周期内最后一个交易日（与 Tushare/BaoStock 周线、月线一致）
+- 当前尚未结束的周期标记为 is_partial
+- 可选按复权因子（adj_factor）做前复权/后复权；默认按日线存储的价格直接聚合
+- 增量更新时只重算新写入日线所在的周期
+"""
+import logging
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("weekly", "monthly")
+
+ADJUST_NONE = "none"
+ADJUST_QFQ = "qfq"
+ADJUST_HFQ = "hfq"
+
+
+@lru_cache(maxsize=16384)
+def period_key(trade_date: str, period: str) -> str:
+    """交易日所属周期的标识：周线为 ISO 周（2024-W05），月线为年月（2024-02）"""
+    if period == "weekly":
+        year, week, _ = date.fromisoformat(trade_date[:10]).isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == "monthly":
+        return trade_date[:7]
+    raise ValueError(f"不支持的周期: {period}")
+
+
+@lru_cache(maxsize=16384)
+def period_bounds(trade_date: str, period: str) -> Tuple[str, str]:
+    """交易日所属周期的自然日起止（周一~周日 / 月初~月末）"""
+    day = date.fromisoformat(trade_date[:10])
+    if period == "weekly":
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=6)
+    elif period == "monthly":
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    else:
+        raise ValueError(f"不支持的周期: {period}")
+    return start.isoformat(), end.isoformat()
+
+
+def touched_period_start(trade_dates: Iterable[str], period: str) -> Optional[str]:
+    """新增/更新的日线所涉及周期中最早的周期起始日；没有日期时返回 None"""
+    starts = [period_bounds(d, period)[0] for d in trade_dates if d]
+    return min(starts) if starts else None
+
+
+def _num(value) -> Optional[float]:
+    if value.__class__ is float:
+        return None if value != value else value  # NaN
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value  # NaN
+
+
+def _adjust_ratio(rows: List[Dict[str, Any]], adjust: str) -> List[float]:
+    """每条日线的复权系数；缺失的复权因子沿用前一个交易日的值"""
+    if adjust == ADJUST_NONE:
+        return [1.0] * len(rows)
+    factors, last = [], None
+    for row in rows:
+        factor = _num(row.get("adj_factor"))
+        if factor:
+            last = factor
+        factors.append(last)
+    first_known = next((f for f in factors if f), 1.0)
+    factors = [f or first_known for f in factors]
+    if adjust == ADJUST_QFQ:
+        ref = factors[-1] if factors else 1.0
+        return [f / ref for f in factors]
+    if adjust == ADJUST_HFQ:
+        return factors
+    raise ValueError(f"不支持的复权方式: {adjust}")
+
+
+def resample_daily_bars(
+    rows: List[Dict[str, Any]],
+    period: str,
+    adjust: str = ADJUST_NONE,
+    as_of: Optional[str] = None,
+    prev_close: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    把一只股票的日线聚合为周线/月线
+
+    Args:
+        rows: 日线记录（需包含 trade_date 和 OHLCV 字段），无需预先排序
+        period: weekly / monthly
+        adjust: none（按存储价格）/ qfq（前复权，以最后一条日线为基准）/ hfq（后复权）
+        as_of: 判断周期是否结束的日期（默认今天），周期自然日结束前为 is_partial
+        prev_close: 第一条日线之前的收盘价，用于计算第一个周期的 pre_close
+
+    Returns:
+        按 trade_date 升序的周期K线
+    """
+    rows = sorted((r for r in rows if r.get("trade_date")), key=lambda r: r["trade_date"])
+    # 停牌日（tradestatus=0）不参与价格聚合
+    rows = [r for r in rows if _num(r.get("tradestatus")) != 0.0 and _num(r.get("close")) is not None]
+    if not rows:
+        return []
+    as_of = as_of or datetime.now().strftime("%Y-%m-%d")
+
+    # 先按列取出数值，再按周期切片用内置 max/min/sum 聚合
+    dates = [r["trade_date"][:10] for r in rows]
+    closes = [_num(r.get("close")) for r in rows]
+    columns = {}
+    for field in ("open", "high", "low"):
+        values = [_num(r.get(field)) for r in rows]
+        columns[field] = [c if v is None else v for v, c in zip(values, closes)]
+    ratios = _adjust_ratio(rows, adjust)
+    if adjust != ADJUST_NONE:
+        closes = [v * k for v, k in zip(closes, ratios)]
+        columns = {f: [v * k for v, k in zip(values, ratios)] for f, values in columns.items()}
+    opens, highs, lows = columns["open"], columns["high"], columns["low"]
+    volumes = [_num(r.get("volume")) or 0.0 for r in rows]
+    amounts = [_num(r.get("amount")) or 0.0 for r in rows]
+    turnovers = [_num(r.get("turnover_rate")) for r in rows]
+
+    keys = [period_key(d, period) for d in dates]
+    boundaries = [0] + [i for i in range(1, len(keys)) if keys[i] != keys[i - 1]] + [len(keys)]
+
+    bars: List[Dict[str, Any]] = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        close = round(closes[end - 1], 4)
+        turnover = [t for t in turnovers[start:end] if t is not None]
+        bar = {
+            "period_key": keys[start],
+            "period_start": dates[start],
+            "trade_date": dates[end - 1],
+            "open": round(opens[start], 4),
+            "high": round(max(highs[start:end]), 4),
+            "low": round(min(lows[start:end]), 4),
+            "close": close,
+            "pre_close": None,
+            "change": None,
+            "pct_chg": None,
+            "volume": sum(volumes[start:end]),
+            "amount": sum(amounts[start:end]),
+            "turnover_rate": sum(turnover) if turnover else None,
+            "trading_days": end - start,
+            "is_partial": period_bounds(dates[end - 1], period)[1] > as_of,
+        }
+        if prev_close:
+            bar["pre_close"] = round(prev_close, 4)
+            bar["change"] = round(close - bar["pre_close"], 4)
+            bar["pct_chg"] = round(bar["change"] / bar["pre_close"] * 100, 4)
+        if adjust != ADJUST_NONE:
+            bar["adj_factor"] = _num(rows[end - 1].get("adj_factor"))
+        prev_close = closes[end - 1]
+        bars.append(bar)
+    return bars
+
+
+class PeriodBarResampler:
+    """基于 stock_daily_quotes 的周线/月线增量重采样"""
+
+    def __init__(self, collection, adjust: str = ADJUST_NONE):
+        """
+        Args:
+            collection: stock_daily_quotes 集合（motor 异步集合）
+            adjust: 复权方式，见 resample_daily_bars
+        """
+        self.collection = collection
+        self.adjust = adjust
+
+    async def _last_derived(self, symbol: str, data_source: str, period: str) -> Optional[Dict[str, Any]]:
+        cursor = self.collection.find(
+            {"symbol": symbol, "data_source": data_source, "period": period, "derived": True},
+            {"trade_date": 1, "derived_at": 1, "adj_ref_factor": 1},
+        ).sort("trade_date", -1).limit(1)
+        docs = await cursor.to_list(length=1)
+        return docs[0] if docs else None
+
+    async def _rebuild_since(self, symbol: str, data_source: str, period: str) -> Optional[str]:
+        """
+        计算需要重算的起始日期：
+        - 没有已派生的周期K线 → 全量（返回 None）
+        - 否则取上次派生之后写入/更新过的日线所在的最早周期起始日
+        - 前复权且最新复权因子变化（除权除息）→ 全量
+        没有新日线时返回空字符串。
+        """
+        last = await self._last_derived(symbol, data_source, period)
+        if not last or not last.get("derived_at"):
+            return None
+        query = {
+            "symbol": symbol, "data_source": data_source, "period": "daily",
+            "updated_at": {"$gt": last["derived_at"]},
+        }
+        changed = [doc["trade_date"] async for doc in self.collection.find(query, {"trade_date": 1, "adj_factor": 1})]
+        if not changed:
+            return ""
+        if self.adjust == ADJUST_QFQ:
+            latest = await self.collection.find(
+                {"symbol": symbol, "data_source": data_source, "period": "daily"}, {"adj_factor": 1}
+            ).sort("trade_date", -1).limit(1).to_list(length=1)
+            if latest and _num(latest[0].get("adj_factor")) != _num(last.get("adj_ref_factor")):
+                return None
+        return touched_period_start(changed, period)
+
+    async def resample_symbol(
+        self,
+        symbol: str,
+        data_source: str,
+        periods: Iterable[str] = PERIODS,
+        since: Optional[str] = None,
+        full: bool = False,
+        as_of: Optional[str] = None,
+        market: str = "CN",
+    ) -> Dict[str, int]:
+        """
+        重算一只股票的周线/月线并写回 stock_daily_quotes
+
+        Args:
+            since: 只重算该日期所在周期及之后的周期；为空时按增量规则自动判断
+            full: 忽略增量判断，全量重算
+
+        Returns:
+            {period: 写入条数}
+        """
+        written: Dict[str, int] = {}
+        for period in periods:
+            if full:
+                start = None
+            elif since:
+                start = period_bounds(since, period)[0]
+            else:
+                start = await self._rebuild_since(symbol, data_source, period)
+                if start == "":
+                    written[period] = 0
+                    continue
+
+            query: Dict[str, Any] = {"symbol": symbol, "data_source": data_source, "period": "daily"}
+            if start:
+                query["trade_date"] = {"$gte": start}
+            rows = await self.collection.find(query).to_list(length=None)
+            prev_close = await self._prev_close(symbol, data_source, start, rows) if start else None
+            bars = resample_daily_bars(rows, period, self.adjust, as_of=as_of, prev_close=prev_close)
+            written[period] = await self._replace_bars(symbol, data_source, period, start, bars, market)
+        return written
+
+    async def _prev_close(
+        self, symbol: str, data_source: str, start: str, rows: List[Dict[str, Any]]
+    ) -> Optional[float]:
+        """重算范围之前最后一个交易日的收盘价（复权模式下换算到与重算范围相同的基准）"""
+        prev = await self.collection.find(
+            {"symbol": symbol, "data_source": data_source, "period": "daily", "trade_date": {"$lt": start}},
+            {"close": 1, "adj_factor": 1},
+        ).sort("trade_date", -1).limit(1).to_list(length=1)
+        if not prev:
+            return None
+        close = _num(prev[0].get("close"))
+        if close is None or self.adjust == ADJUST_NONE:
+            return close
+        factor = _num(prev[0].get("adj_factor")) or 1.0
+        if self.adjust == ADJUST_HFQ:
+            return close * factor
+        latest = next((_num(r.get("adj_factor")) for r in sorted(rows, key=lambda r: r["trade_date"], reverse=True)
+                       if _num(r.get("adj_factor"))), factor)
+        return close * factor / latest
+
+    async def _replace_bars(
+        self, symbol: str, data_source: str, period: str, start: Optional[str],
+        bars: List[Dict[str, Any]], market: str,
+    ) -> int:
+        """删除重算范围内已有的周期K线后写入新结果（当前未结束周期的 trade_date 会随新日线后移）"""
+        remove: Dict[str, Any] = {"symbol": symbol, "data_source": data_source, "period": period}
+        if start:
+            remove["trade_date"] = {"$gte": start}
+        await self.collection.delete_many(remove)
+        if not bars:
+            return 0
+
+        now = datetime.utcnow()
+        ref_factor = bars[-1].get("adj_factor") if self.adjust == ADJUST_QFQ else None
+        docs = []
+        for bar in bars:
+            doc = {
+                "symbol": symbol,
+                "code": symbol,
+                "market": market,
+                "period": period,
+                "data_source": data_source,
+                "derived": True,
+                "adjust": self.adjust,
+                "derived_at": now,
+                "created_at": now,
+                "updated_at": now,
+                "version": 1,
+                **bar,
+            }
+            doc.pop("adj_factor", None)
+            if ref_factor is not None:
+                doc["adj_ref_factor"] = ref_factor
+            docs.append(doc)
+        await self.collection.insert_many(docs, ordered=False)
+        return len(docs)
@@ -9,4 +9,5 @@ from .log_handler import (
     register_analysis_tracker,
     unregister_analysis_tracker,
 )
+from .pipeline import ProgressPipeline, get_progress_pipeline
 
@@ -0,0 +1,233 @@
+"""
+分析进度更新管道
+
+分析线程只把进度放入线程安全的待处理表（同一任务后写覆盖先写），由主事件循环上的
+一个后台任务在短时间窗口内合并后，统一写入内存状态（并推送 WebSocket）、MongoDB 和
+Redis（进度快照 + task_progress 频道，供 SSE 订阅），复用全局连接池，
+分析线程不再为每次进度更新创建事件循环和数据库连接。
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingProgress:
+    """某个任务尚未写出的最新进度"""
+    status: Optional[Dict[str, Any]] = None
+    tracker_payload: Optional[str] = None
+
+
+class ProgressPipeline:
+    """分析进度合并写入管道"""
+
+    def __init__(self, coalesce_window: float = 0.25, redis_ttl: int = 3600):
+        self.coalesce_window = coalesce_window
+        self.redis_ttl = redis_ttl
+
+        self._pending: Dict[str, _PendingProgress] = {}
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._apply_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.applied = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._closing
+
+    def submit(
+        self,
+        task_id: str,
+        progress: Optional[int] = None,
+        message: Optional[str] = None,
+        step: Optional[str] = None,
+        tracker_payload: Optional[str] = None
+    ) -> bool:
+        """从任意线程提交进度（不阻塞），管道未运行时返回 False"""
+        loop = self._loop
+        if not self.running or loop is None or loop.is_closed():
+            return False
+
+        with self._lock:
+            entry = self._pending.get(task_id)
+            if entry is None:
+                entry = self._pending[task_id] = _PendingProgress()
+            else:
+                self.coalesced += 1
+            if progress is not None:
+                entry.status = {"progress": progress, "message": message, "current_step": step}
+            if tracker_payload is not None:
+                entry.tracker_payload = tracker_payload
+            self.submitted += 1
+            wake = not self._scheduled
+            self._scheduled = True
+
+        if wake:
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                return False
+        return True
+
+    def _take(self, task_id: Optional[str] = None) -> List[Tuple[str, _PendingProgress]]:
+        with self._lock:
+            if task_id is None:
+                items = list(self._pending.items())
+                self._pending.clear()
+                self._scheduled = False
+            else:
+                entry = self._pending.pop(task_id, None)
+                items = [(task_id, entry)] if entry is not None else []
+        return items
+
+    def _ensure_started(self) -> None:
+        if self._closing or (self._task is not None and not self._task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._apply_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # 合并窗口：等待同一批突发更新到齐后只写最新值
+            await asyncio.sleep(self.coalesce_window)
+            await self.flush()
+
+    async def flush(self, task_id: Optional[str] = None) -> int:
+        """写出待处理进度（指定 task_id 时只写该任务），返回写出的任务数"""
+        if self._apply_lock is None:
+            return 0
+        # 串行写出，避免较早的进度晚于较新的进度落库
+        async with self._apply_lock:
+            items = self._take(task_id)
+            for tid, entry in items:
+                try:
+                    await self._apply(tid, entry)
+                    self.applied += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning(f"⚠️ [进度管道] 写出进度失败: {tid} - {e}")
+            return len(items)
+
+    def discard(self, task_id: str) -> None:
+        """丢弃任务尚未写出的进度"""
+        self._take(task_id)
+
+    @staticmethod
+    def _get_redis():
+        try:
+            from app.core.database import get_redis_client
+            return get_redis_client()
+        except Exception:
+            return None
+
+    def redis_available(self) -> bool:
+        return self._get_redis() is not None
+
+    async def _apply(self, task_id: str, entry: _PendingProgress) -> None:
+        status = entry.status
+        if status is not None:
+            from app.services.memory_state_manager import get_memory_state_manager, TaskStatus
+            from app.core.database import get_mongo_db
+
+            # 内存状态（同时推送 WebSocket）
+            await get_memory_state_manager().update_task_status(
+                task_id=task_id,
+                status=TaskStatus.RUNNING,
+                progress=status["progress"],
+                message=status["message"],
+                current_step=status["current_step"]
+            )
+            await get_mongo_db().analysis_tasks.update_one(
+                {"task_id": task_id},
+                {
+                    "$set": {
+                        "progress": status["progress"],
+                        "current_step": status["current_step"],
+                        "message": status["message"],
+                        "updated_at": datetime.utcnow()
+                    }
+                }
+            )
+
+        redis = self._get_redis()
+        if redis is None:
+            return
+        if entry.tracker_payload is not None:
+            await redis.set(f"progress:{task_id}", entry.tracker_payload, ex=self.redis_ttl)
+        if status is not None:
+            await redis.publish(f"task_progress:{task_id}", json.dumps({
+                "task_id": task_id,
+                "progress": status["progress"],
+                "message": status["message"],
+                "current_step": status["current_step"],
+                "timestamp": datetime.now().isoformat(),
+            }, ensure_ascii=False))
+
+    async def start(self) -> None:
+        """在当前事件循环上启动后台写出任务"""
+        self._closing = False
+        self._ensure_started()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """停止后台任务并写出剩余进度"""
+        self._closing = True
+        task = self._task
+        if task is not None and not task.done():
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(task, timeout=timeout)
+            except Exception as e:
+                logger.warning(f"等待进度管道任务结束失败: {e}")
+        self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取管道计数"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "applied": self.applied,
+            "failed": self.failed,
+            "running": self.running,
+        }
+
+
+_progress_pipeline: Optional[ProgressPipeline] = None
+
+
+def get_progress_pipeline() -> ProgressPipeline:
+    """获取进度管道实例"""
+    global _progress_pipeline
+    if _progress_pipeline is None:
+        from app.core.config import settings
+        _progress_pipeline = ProgressPipeline(
+            coalesce_window=settings.PROGRESS_COALESCE_WINDOW_SECONDS
+        )
+    return _progress_pipeline
@@ -3,7 +3,7 @@
 - 暂时从旧模块导入 RedisProgressTracker 类
 - 在本模块内提供 get_progress_by_id 的实现（与旧实现一致，修正 cls 引用）
 """
-from typing import Any, Dict, Optional, List
+from typing import Any, Callable, Dict, Optional, List
 import json
 import os
 import logging
@@ -56,6 +56,9 @@ class RedisProgressTracker:
         self.redis_client = None
         self.use_redis = self._init_redis()
 
+        # 可选的保存钩子：返回 True 表示已接管保存（如交给进度管道合并写入），不再直接写 Redis/文件
+        self.save_hook: Optional[Callable[[str], bool]] = None
+
         # 进度数据
         self.progress_data = {
             'task_id': task_id,
@@ -88,6 +91,18 @@ class RedisProgressTracker:
 
         logger.info(f"📊 [Redis进度] 初始化完成: {task_id}, 步骤数: {len(self.analysis_steps)}")
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # 跨进程传递（进程池执行器）时不携带 Redis 连接和保存钩子
+        state = self.__dict__.copy()
+        state['redis_client'] = None
+        state['save_hook'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if self.use_redis:
+            self.use_redis = self._init_redis()
+
     def _init_redis(self) -> bool:
         """初始化Redis连接"""
         try:
@@ -407,6 +422,8 @@ class RedisProgressTracker:
         try:
             progress_copy = self.to_dict()
             serialized = json.dumps(progress_copy)
+            if self.save_hook is not None and self.save_hook(serialized):
+                return
             if self.use_redis and self.redis_client:
                 key = f"progress:{self.task_id}"
                 self.redis_client.set(key, serialized)
@@ -1,4 +1,5 @@
 import logging
+import math
 from datetime import datetime, time as dtime, timedelta
 from typing import Dict, Optional, Tuple, List
 from zoneinfo import ZoneInfo
@@ -12,6 +13,9 @@ from app.services.data_sources.manager import DataSourceManager
 
 logger = logging.getLogger(__name__)
 
+# 筛选物化集合依赖的行情字段：只有这些字段变化的股票才需要刷新筛选数据
+QUOTE_SNAPSHOT_FIELDS = ("close", "pct_chg", "amount", "volume", "open", "high", "low", "pre_close")
+
 
 class QuotesIngestionService:
     """
@@ -44,6 +48,9 @@ class QuotesIngestionService:
         self._rotation_sources = ["tushare", "akshare_eastmoney", "akshare_sina"]
         self._rotation_index = 0  # 当前轮换索引
 
+        # 上次写入的行情快照（用于识别发生变化的股票，只增量刷新筛选物化集合）
+        self._last_quote_snapshot: Dict[str, tuple] = {}
+
     @staticmethod
     def _normalize_stock_code(code: str) -> str:
         """
@@ -364,21 +371,48 @@ class QuotesIngestionService:
         except Exception:
             return True
 
+    @staticmethod
+    def _quote_snapshot(quote: Dict, trade_date: Optional[str]) -> tuple:
+        """行情快照（NaN 统一为 None：NaN != NaN，否则停牌等缺失值每轮都会被当作变化）"""
+        values = []
+        for field in QUOTE_SNAPSHOT_FIELDS:
+            value = quote.get(field)
+            if isinstance(value, float) and math.isnan(value):
+                value = None
+            values.append(value)
+        values.append(trade_date)
+        return tuple(values)
+
+    async def _seed_quote_snapshots(self, coll, codes: List[str]) -> None:
+        """进程内还没有快照的股票从已入库的行情初始化，避免重启后整个市场都被登记为变化"""
+        missing = [code for code in codes if code not in self._last_quote_snapshot]
+        if not missing:
+            return
+        projection = {"_id": 0, "code": 1, "trade_date": 1, **{f: 1 for f in QUOTE_SNAPSHOT_FIELDS}}
+        try:
+            async for doc in coll.find({"code": {"$in": missing}}, projection):
+                self._last_quote_snapshot[doc["code"]] = self._quote_snapshot(doc, doc.get("trade_date"))
+        except Exception as e:
+            logger.debug(f"初始化行情快照失败，本轮按全部变化处理: {e}")
+
     async def _bulk_upsert(self, quotes_map: Dict[str, Dict], trade_date: str, source: Optional[str] = None) -> None:
         db = get_mongo_db()
         coll = db[self.collection_name]
         ops = []
+        changed_codes = []
         updated_at = datetime.now(self.tz)
-        for code, q in quotes_map.items():
-            if not code:
-                continue
-            # 使用标准化方法处理股票代码（去掉交易所前缀，如 sz000001 -> 000001）
-            code6 = self._normalize_stock_code(code)
-            if not code6:
-                continue
+        # 使用标准化方法处理股票代码（去掉交易所前缀，如 sz000001 -> 000001）
+        normalized = [(self._normalize_stock_code(code), q) for code, q in quotes_map.items() if code]
+        normalized = [(code6, q) for code6, q in normalized if code6]
+        await self._seed_quote_snapshots(coll, [code6 for code6, _ in normalized])
 
+        for code6, q in normalized:
             # 🔥 日志：记录写入的成交量值
             volume = q.get("volume")
+            snapshot = self._quote_snapshot(q, trade_date)
+            if self._last_quote_snapshot.get(code6) != snapshot:
+                self._last_quote_snapshot[code6] = snapshot
+                changed_codes.append(code6)
             if code6 in ["300750", "000001", "600000"]:  # 只记录几个示例股票
                 logger.info(f"📊 [写入market_quotes] {code6} - volume={volume}, amount={q.get('amount')}, source={source}")
 
@@ -410,6 +444,14 @@ class QuotesIngestionService:
             f"✅ 行情入库完成 source={source}, matched={result.matched_count}, upserted={len(result.upserted_ids) if result.upserted_ids else 0}, modified={result.modified_count}"
         )
 
+        # 登记行情发生变化的股票，筛选物化数据在后台合并后分块刷新，不阻塞入库周期
+        if changed_codes:
+            try:
+                from app.services.screening_table_service import get_screening_table_service
+                get_screening_table_service().mark_dirty(changed_codes)
+            except Exception as e:
+                logger.warning(f"⚠️ 登记筛选物化刷新失败: {e}")
+
     async def backfill_from_historical_data(self) -> None:
         """
         从历史数据集合导入前一天的收盘数据到 market_quotes
@@ -0,0 +1,228 @@
+"""
+报告导出服务
+
+Word/PDF 渲染（pandoc / wkhtmltopdf 子进程）耗时数秒，结果按报告 Markdown 内容哈希
+缓存到磁盘：同一份报告重复下载直接返回缓存文件，内容变化后哈希随之变化自动失效。
+渲染在有界线程池中执行，不阻塞事件循环；同一内容的并发请求只渲染一次。
+可配置在分析完成后预渲染常用格式。
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 渲染逻辑（模板/样式）变化时递增，使旧缓存失效
+RENDER_VERSION = "1"
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    extension: str
+    media_type: str
+    renderer: str  # ReportExporter 上的方法名
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "docx": ExportFormat(
+        "docx",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "generate_docx_report",
+    ),
+    "pdf": ExportFormat("pdf", "application/pdf", "generate_pdf_report"),
+}
+
+
+class ReportExportService:
+    """报告导出产物缓存与后台渲染"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_workers: int = 2,
+        max_cache_mb: int = 512,
+        exporter: Any = None
+    ):
+        """
+        Args:
+            cache_dir: 导出产物缓存目录
+            max_workers: 同时渲染的最大数量
+            max_cache_mb: 缓存目录容量上限（MB），超出时按最近访问时间淘汰
+            exporter: 报告导出器，默认使用 app.utils.report_exporter.report_exporter
+        """
+        self.cache_dir = cache_dir
+        self.max_cache_bytes = max_cache_mb * 1024 * 1024
+        self._exporter = exporter
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="report-export")
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.failures = 0
+        self.prerenders = 0
+        self._render_seconds: Deque[float] = deque(maxlen=200)
+
+    @property
+    def exporter(self):
+        if self._exporter is None:
+            from app.utils.report_exporter import report_exporter
+            self._exporter = report_exporter
+        return self._exporter
+
+    def content_hash(self, report_doc: Dict[str, Any], fmt: str) -> str:
+        """按渲染输入（报告 Markdown）计算内容哈希"""
+        markdown = self.exporter.generate_markdown_report(report_doc)
+        digest = hashlib.sha256()
+        digest.update(f"{RENDER_VERSION}:{fmt}:".encode())
+        digest.update(markdown.encode("utf-8"))
+        return digest.hexdigest()
+
+    def artifact_path(self, content_hash: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.{EXPORT_FORMATS[fmt].extension}")
+
+    def _render_to_file(self, report_doc: Dict[str, Any], fmt: str, path: str) -> str:
+        start = time.perf_counter()
+        content = getattr(self.exporter, EXPORT_FORMATS[fmt].renderer)(report_doc)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        elapsed = time.perf_counter() - start
+        self._render_seconds.append(elapsed)
+        logger.info(f"📄 [报告导出] 渲染完成: {os.path.basename(path)} ({len(content)} 字节, {elapsed:.2f}s)")
+        return path
+
+    async def get_artifact(self, report_doc: Dict[str, Any], fmt: str) -> str:
+        """获取渲染好的导出文件路径（命中缓存直接返回，否则在线程池中渲染）"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {fmt}")
+
+        content_hash = self.content_hash(report_doc, fmt)
+        path = self.artifact_path(content_hash, fmt)
+        if os.path.exists(path):
+            self.hits += 1
+            try:
+                # 更新访问时间，供容量淘汰使用
+                os.utime(path)
+            except OSError:
+                pass
+            return path
+
+        key = f"{content_hash}.{fmt}"
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.get_running_loop().run_in_executor(
+                self._pool, self._render_to_file, report_doc, fmt, path
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda f, k=key: self._on_render_done(k, f))
+        else:
+            # 相同内容正在渲染，等待同一个结果
+            self.hits += 1
+
+        # 请求方断开不取消渲染，产物仍写入缓存
+        await asyncio.shield(future)
+        return path
+
+    def _on_render_done(self, key: str, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            self.failures += 1
+            return
+        self.renders += 1
+        self._pool.submit(self._evict_if_needed)
+
+    def schedule_prerender(self, report_doc: Dict[str, Any], formats: Iterable[str]) -> None:
+        """分析完成后在后台预渲染指定格式（失败只记录日志）"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        async def _prerender(fmt: str) -> None:
+            try:
+                await self.get_artifact(report_doc, fmt)
+                self.prerenders += 1
+            except Exception as e:
+                logger.warning(f"⚠️ [报告导出] 预渲染失败 ({fmt}): {e}")
+
+        for fmt in formats:
+            fmt = fmt.strip().lower()
+            if fmt in EXPORT_FORMATS:
+                loop.create_task(_prerender(fmt))
+
+    def _evict_if_needed(self) -> int:
+        """缓存目录超出容量时按访问时间从旧到新删除"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        if total <= self.max_cache_bytes:
+            return removed
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            if total <= self.max_cache_bytes:
+                break
+        logger.info(f"🧹 [报告导出] 缓存超出容量，已淘汰 {removed} 个文件")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取导出缓存命中率和渲染耗时"""
+        lookups = self.hits + self.misses
+        samples = sorted(self._render_seconds)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "renders": self.renders,
+            "failures": self.failures,
+            "prerenders": self.prerenders,
+            "inflight": len(self._inflight),
+            "render_seconds_avg": round(sum(samples) / len(samples), 3) if samples else 0.0,
+            "render_seconds_p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3) if samples else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+_report_export_service: Optional[ReportExportService] = None
+
+
+def get_report_export_service() -> ReportExportService:
+    """获取报告导出服务实例"""
+    global _report_export_service
+    if _report_export_service is None:
+        from app.core.config import settings
+        _report_export_service = ReportExportService(
+            cache_dir=settings.REPORT_EXPORT_CACHE_DIR,
+            max_workers=settings.REPORT_EXPORT_WORKERS,
+            max_cache_mb=settings.REPORT_EXPORT_CACHE_MAX_MB,
+        )
+    return _report_export_service
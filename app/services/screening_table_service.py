@@ -0,0 +1,212 @@
+"""
+股票筛选物化集合服务
+
+将 stock_basic_info、market_quotes 和最新一期 stock_financial_data 的关联结果
+通过 $merge 物化到 stock_screening 集合，并建立常用筛选/排序字段的复合索引，
+筛选查询走索引范围扫描，不再每次对全市场执行 $lookup。
+
+- 行情入库和财务数据保存后登记待刷新股票，在后台延迟合并后分块增量刷新
+  （不阻塞入库流程；交易时段几乎全市场变化时也不退化为全量重建）
+- 基础信息同步完成后全量刷新，并清理已不存在的股票
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+
+from app.core.database import get_mongo_db, build_stock_screening_pipeline
+
+logger = logging.getLogger(__name__)
+
+SCREENING_COLLECTION = "stock_screening"
+SCREENING_VIEW = "stock_screening_view"
+
+# 筛选查询总是带 source 条件，索引以 source 为前缀
+SCREENING_INDEXES = [
+    [("source", 1), ("code", 1)],
+    [("source", 1), ("total_mv", -1)],
+    [("source", 1), ("circ_mv", -1)],
+    [("source", 1), ("pe", 1)],
+    [("source", 1), ("pb", 1)],
+    [("source", 1), ("pe_ttm", 1)],
+    [("source", 1), ("roe", -1)],
+    [("source", 1), ("pct_chg", -1)],
+    [("source", 1), ("amount", -1)],
+    [("source", 1), ("turnover_rate", -1)],
+    [("source", 1), ("industry", 1), ("total_mv", -1)],
+    [("refreshed_at", 1)],
+]
+
+
+class ScreeningTableService:
+    """股票筛选物化集合维护服务"""
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        debounce_seconds: float = 5.0
+    ):
+        """
+        Args:
+            chunk_size: 增量刷新时单次 $match 的股票数
+            debounce_seconds: 变更登记后延迟刷新的合并窗口
+        """
+        self.chunk_size = chunk_size
+        self.debounce_seconds = debounce_seconds
+
+        self._ready = False
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+        self.full_refreshes = 0
+        self.incremental_refreshes = 0
+        self.refreshed_codes = 0
+        self.failed_refreshes = 0
+
+    def _lock(self) -> asyncio.Lock:
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        return self._refresh_lock
+
+    async def ensure_table(self, db=None) -> None:
+        """创建索引；集合为空时在后台执行首次全量刷新"""
+        db = db if db is not None else get_mongo_db()
+        collection = db[SCREENING_COLLECTION]
+        for keys in SCREENING_INDEXES:
+            try:
+                await collection.create_index(keys)
+            except Exception as e:
+                logger.debug(f"筛选集合索引创建: {keys} - {e}")
+
+        if await collection.estimated_document_count() > 0:
+            self._ready = True
+            logger.info(f"📋 物化集合 {SCREENING_COLLECTION} 已存在")
+            return
+
+        logger.info(f"📋 物化集合 {SCREENING_COLLECTION} 为空，后台执行首次全量刷新")
+        asyncio.create_task(self._safe_refresh(None))
+
+    async def is_ready(self, db=None) -> bool:
+        """物化集合是否已有数据（未就绪时查询回退到视图）"""
+        if not self._ready:
+            db = db if db is not None else get_mongo_db()
+            try:
+                self._ready = await db[SCREENING_COLLECTION].estimated_document_count() > 0
+            except Exception as e:
+                logger.debug(f"检查筛选物化集合失败: {e}")
+        return self._ready
+
+    async def get_query_collection_name(self, db=None) -> str:
+        """获取筛选查询应使用的集合名"""
+        return SCREENING_COLLECTION if await self.is_ready(db) else SCREENING_VIEW
+
+    async def _merge(self, db, codes: Optional[List[str]], refreshed_at: datetime) -> None:
+        pipeline = build_stock_screening_pipeline(codes)
+        pipeline.append({"$addFields": {"refreshed_at": refreshed_at}})
+        pipeline.append({
+            "$merge": {
+                "into": SCREENING_COLLECTION,
+                "on": "_id",
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }
+        })
+        # $merge 阶段不返回文档，遍历游标即执行完成
+        async for _ in db["stock_basic_info"].aggregate(pipeline, allowDiskUse=True):
+            pass
+
+    async def refresh(self, codes: Optional[Iterable[str]] = None) -> int:
+        """刷新物化集合
+
+        Args:
+            codes: 需要刷新的股票代码（按 chunk_size 分块增量合并），None 表示全量刷新
+
+        Returns:
+            int: 刷新的股票数（全量刷新时为集合文档数）
+        """
+        db = get_mongo_db()
+        code_list = None if codes is None else sorted({c for c in codes if c})
+        if code_list is not None and not code_list:
+            return 0
+
+        async with self._lock():
+            refreshed_at = datetime.utcnow()
+            if code_list is None:
+                await self._merge(db, None, refreshed_at)
+                # 全量刷新后删除未被本轮刷新的文档（股票已从基础信息中移除）
+                deleted = await db[SCREENING_COLLECTION].delete_many({"refreshed_at": {"$lt": refreshed_at}})
+                total = await db[SCREENING_COLLECTION].estimated_document_count()
+                self.full_refreshes += 1
+                self._ready = total > 0
+                logger.info(f"✅ [筛选物化] 全量刷新完成: {total} 条, 清理 {deleted.deleted_count} 条")
+                return total
+
+            for i in range(0, len(code_list), self.chunk_size):
+                await self._merge(db, code_list[i:i + self.chunk_size], refreshed_at)
+            self.incremental_refreshes += 1
+            self.refreshed_codes += len(code_list)
+            logger.info(f"✅ [筛选物化] 增量刷新完成: {len(code_list)} 只股票")
+            return len(code_list)
+
+    async def _safe_refresh(self, codes: Optional[Iterable[str]]) -> int:
+        try:
+            return await self.refresh(codes)
+        except Exception as e:
+            logger.warning(f"⚠️ [筛选物化] 刷新失败: {e}")
+            return 0
+
+    def mark_dirty(self, codes: Iterable[str]) -> None:
+        """登记需要刷新的股票，在合并窗口结束后批量刷新"""
+        self._dirty.update(c for c in codes if c)
+        if not self._dirty or (self._flush_task is not None and not self._flush_task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        # 刷新期间新登记的股票在下一个合并窗口继续处理
+        while self._dirty:
+            await asyncio.sleep(self.debounce_seconds)
+            await self.refresh_dirty()
+
+    async def refresh_dirty(self) -> int:
+        """立即刷新已登记的股票；刷新失败的股票重新登记，在下一个合并窗口重试"""
+        codes, self._dirty = self._dirty, set()
+        if not codes:
+            return 0
+        try:
+            return await self.refresh(codes)
+        except Exception as e:
+            # $merge 按 _id 整体替换，重试已成功的分块没有副作用
+            self._dirty.update(codes)
+            self.failed_refreshes += 1
+            logger.warning(f"⚠️ [筛选物化] 增量刷新失败，{len(codes)} 只股票将在下一轮重试: {e}")
+            return 0
+
+    def get_stats(self) -> dict:
+        """获取刷新统计"""
+        return {
+            "ready": self._ready,
+            "dirty": len(self._dirty),
+            "full_refreshes": self.full_refreshes,
+            "incremental_refreshes": self.incremental_refreshes,
+            "refreshed_codes": self.refreshed_codes,
+            "failed_refreshes": self.failed_refreshes,
+        }
+
+
+# 全局服务实例
+_screening_table_service: Optional[ScreeningTableService] = None
+
+
+def get_screening_table_service() -> ScreeningTableService:
+    """获取筛选物化集合服务实例"""
+    global _screening_table_service
+    if _screening_table_service is None:
+        _screening_table_service = ScreeningTableService()
+    return _screening_table_service
@@ -7,6 +7,7 @@ import asyncio
 import uuid
 import logging
 import re
+import json
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from pathlib import Path
@@ -33,6 +34,7 @@ from app.services.config_service import ConfigService
 from app.services.memory_state_manager import get_memory_state_manager, TaskStatus
 from app.services.redis_progress_tracker import RedisProgressTracker, get_progress_by_id
 from app.services.progress_log_handler import register_analysis_tracker, unregister_analysis_tracker
+from app.services.progress.pipeline import get_progress_pipeline
 
 # 股票基础信息获取（用于补充显示名称）
 try:
@@ -600,13 +602,21 @@ class SimpleAnalysisService:
         self._progress_trackers: Dict[str, RedisProgressTracker] = {}
 
         # 🔧 创建共享的线程池，支持并发执行多个分析任务
-        # 默认最多同时执行3个分析任务（可根据服务器资源调整）
+        # 并发数由 ANALYSIS_MAX_WORKERS 配置（默认3，可根据服务器资源调整）
         import concurrent.futures
-        self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+        from app.core.config import settings
+        self._max_workers = settings.ANALYSIS_MAX_WORKERS
+        self._executor_mode = settings.ANALYSIS_EXECUTOR_MODE.lower()
+        self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers)
+
+        # 进程池执行器（ANALYSIS_EXECUTOR_MODE=process 时按需创建）
+        self._process_executor = None
+        # 是否复用分析引擎（仅在进程池子进程中开启：每个子进程同一时间只执行一个分析）
+        self._reuse_trading_graphs = False
 
         logger.info(f"🔧 [服务初始化] SimpleAnalysisService 实例ID: {id(self)}")
         logger.info(f"🔧 [服务初始化] 内存管理器实例ID: {id(self.memory_manager)}")
-        logger.info(f"🔧 [服务初始化] 线程池最大并发数: 3")
+        logger.info(f"🔧 [服务初始化] 分析执行器: {self._executor_mode}, 最大并发数: {self._max_workers}")
 
         # 设置 WebSocket 管理器
         # 简单的股票名称缓存，减少重复查询
@@ -619,37 +629,6 @@ class SimpleAnalysisService:
         except ImportError:
             logger.warning("⚠️ WebSocket 管理器不可用")
 
-    async def _update_progress_async(self, task_id: str, progress: int, message: str):
-        """异步更新进度（内存和MongoDB）"""
-        try:
-            # 更新内存
-            await self.memory_manager.update_task_status(
-                task_id=task_id,
-                status=TaskStatus.RUNNING,
-                progress=progress,
-                message=message,
-                current_step=message
-            )
-
-            # 更新 MongoDB
-            from app.core.database import get_mongo_db
-            from datetime import datetime
-            db = get_mongo_db()
-            await db.analysis_tasks.update_one(
-                {"task_id": task_id},
-                {
-                    "$set": {
-                        "progress": progress,
-                        "current_step": message,
-                        "message": message,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
-            logger.debug(f"✅ [异步更新] 已更新内存和MongoDB: {progress}%")
-        except Exception as e:
-            logger.warning(f"⚠️ [异步更新] 失败: {e}")
-
     def _resolve_stock_name(self, code: Optional[str]) -> str:
         """解析股票名称（带缓存）"""
         if not code:
@@ -1118,18 +1097,99 @@ class SimpleAnalysisService:
         # 🔧 使用共享线程池，支持多个任务并发执行
         # 不再每次创建新的线程池，避免串行执行
         loop = asyncio.get_event_loop()
-        logger.info(f"🚀 [线程池] 提交分析任务到共享线程池: {task_id} - {request.stock_code}")
-        result = await loop.run_in_executor(
-            self._thread_pool,  # 使用共享线程池
-            self._run_analysis_sync,
-            task_id,
-            user_id,
-            request,
-            progress_tracker
-        )
-        logger.info(f"✅ [线程池] 分析任务执行完成: {task_id}")
+
+        # 分析线程中的进度更新经由进度管道在主事件循环上合并写出
+        pipeline = get_progress_pipeline()
+        await pipeline.start()
+        if progress_tracker is not None and progress_tracker.use_redis and pipeline.redis_available():
+            progress_tracker.save_hook = lambda payload: pipeline.submit(task_id, tracker_payload=payload)
+
+        try:
+            if self._executor_mode == "process":
+                logger.info(f"🚀 [进程池] 提交分析任务到分析进程池: {task_id} - {request.stock_code}")
+                executor = await self._get_process_executor()
+                result = await executor.run(
+                    task_id,
+                    user_id,
+                    request,
+                    progress_tracker,
+                    forward_tracker=progress_tracker is not None and progress_tracker.save_hook is not None
+                )
+            else:
+                logger.info(f"🚀 [线程池] 提交分析任务到共享线程池: {task_id} - {request.stock_code}")
+                result = await loop.run_in_executor(
+                    self._thread_pool,  # 使用共享线程池
+                    self._run_analysis_sync,
+                    task_id,
+                    user_id,
+                    request,
+                    progress_tracker
+                )
+        finally:
+            # 写出该任务尚未落库的进度，避免晚到的进度覆盖完成/失败状态
+            if progress_tracker is not None:
+                progress_tracker.save_hook = None
+            await pipeline.flush(task_id)
+        logger.info(f"✅ [{self._executor_mode}] 分析任务执行完成: {task_id}")
         return result
 
+    async def _get_process_executor(self):
+        """获取（并预热）分析进程池执行器"""
+        if self._process_executor is None:
+            from app.core.config import settings
+            from app.services.analysis.process_executor import ProcessAnalysisExecutor
+            self._process_executor = ProcessAnalysisExecutor(
+                max_workers=self._max_workers,
+                memory_limit_mb=settings.ANALYSIS_WORKER_MEMORY_LIMIT_MB,
+                max_tasks_per_worker=settings.ANALYSIS_WORKER_MAX_TASKS,
+                cancel_grace_seconds=settings.ANALYSIS_CANCEL_GRACE_SECONDS
+            )
+        await self._process_executor.start()
+        return self._process_executor
+
+    async def warm_up_executor(self) -> None:
+        """进程池模式下预热分析进程"""
+        if self._executor_mode == "process":
+            await self._get_process_executor()
+
+    def cancel_running_analysis(self, task_id: str) -> bool:
+        """请求取消正在进程池中执行的分析（线程模式下无法中断线程，返回 False）"""
+        if self._process_executor is None:
+            return False
+        return self._process_executor.cancel(task_id)
+
+    async def shutdown_executors(self) -> None:
+        """关闭分析执行器"""
+        if self._process_executor is not None:
+            await self._process_executor.shutdown()
+            self._process_executor = None
+        self._thread_pool.shutdown(wait=False)
+
+    def _get_or_create_trading_graph(self, config: Dict[str, Any], workflow_config: Optional[Dict[str, Any]]):
+        """创建分析引擎；开启复用时按配置缓存，相同配置的后续分析不再重建"""
+        def _create():
+            return TradingAgentsGraph(
+                selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
+                debug=config.get("debug", False),
+                config=config,
+                workflow_config=workflow_config
+            )
+
+        if not self._reuse_trading_graphs:
+            return _create()
+
+        key = json.dumps([config, workflow_config], sort_keys=True, default=str)
+        trading_graph = self._trading_graph_cache.get(key)
+        if trading_graph is None:
+            trading_graph = _create()
+            # 只保留少量不同配置的引擎，避免子进程内存持续增长
+            while len(self._trading_graph_cache) >= 2:
+                self._trading_graph_cache.pop(next(iter(self._trading_graph_cache)))
+            self._trading_graph_cache[key] = trading_graph
+        else:
+            logger.info("♻️ [进程池] 复用已初始化的分析引擎")
+        return trading_graph
+
     def _run_analysis_sync(
         self,
         task_id: str,
@@ -1151,6 +1211,8 @@ class SimpleAnalysisService:
             # 基础准备阶段 (10%): 0.03 + 0.02 + 0.01 + 0.02 + 0.02 = 0.10
             # 步骤索引 0-4 对应 0-10%
 
+            progress_pipeline = get_progress_pipeline()
+
             # 异步更新进度（在线程池中调用）
             def update_progress_sync(progress: int, message: str, step: str):
                 """在线程池中同步更新进度"""
@@ -1162,44 +1224,9 @@ class SimpleAnalysisService:
                             "last_message": message
                         })
 
-                    # 🔥 使用同步方式更新内存和 MongoDB，避免事件循环冲突
-                    # 1. 更新内存中的任务状态（使用新事件循环）
-                    import asyncio
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(
-                            self.memory_manager.update_task_status(
-                                task_id=task_id,
-                                status=TaskStatus.RUNNING,
-                                progress=progress,
-                                message=message,
-                                current_step=step
-                            )
-                        )
-                    finally:
-                        loop.close()
-
-                    # 2. 更新 MongoDB（使用同步客户端，避免事件循环冲突）
-                    from pymongo import MongoClient
-                    from app.core.config import settings
-                    from datetime import datetime
-
-                    sync_client = MongoClient(settings.MONGO_URI)
-                    sync_db = sync_client[settings.MONGO_DB]
-
-                    sync_db.analysis_tasks.update_one(
-                        {"task_id": task_id},
-                        {
-                            "$set": {
-                                "progress": progress,
-                                "current_step": step,
-                                "message": message,
-                                "updated_at": datetime.utcnow()
-                            }
-                        }
-                    )
-                    sync_client.close()
+                    # 内存状态、MongoDB 和 SSE/WebSocket 推送交给进度管道合并写出
+                    if not progress_pipeline.submit(task_id, progress=progress, message=message, step=step):
+                        logger.debug(f"📊 进度管道未运行，跳过内存/MongoDB进度更新: {task_id}")
 
                 except Exception as e:
                     logger.warning(f"⚠️ 进度更新失败: {e}")
@@ -1311,12 +1338,7 @@ class SimpleAnalysisService:
             if workflow_config:
                 logger.info("✅ 使用数据库中的默认工作流配置")
             
-            trading_graph = TradingAgentsGraph(
-                selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
-                debug=config.get("debug", False),
-                config=config,
-                workflow_config=workflow_config
-            )
+            trading_graph = self._get_or_create_trading_graph(config, workflow_config)
 
             # 🔍 验证TradingGraph实例中的配置
             logger.info(f"🔍 [引擎验证] TradingGraph配置中的快速模型: {trading_graph.config.get('quick_think_llm')}")
@@ -1485,61 +1507,8 @@ class SimpleAnalysisService:
                             })
                             logger.info(f"📊 [Graph进度] 进度已更新: {current_progress}% → {int(progress_pct)}% - {message}")
 
-                            # 🔥 同时更新内存和 MongoDB
-                            try:
-                                import asyncio
-                                from datetime import datetime
-
-                                # 尝试获取当前运行的事件循环
-                                try:
-                                    loop = asyncio.get_running_loop()
-                                    # 如果在事件循环中，使用 create_task
-                                    asyncio.create_task(
-                                        self._update_progress_async(task_id, int(progress_pct), message)
-                                    )
-                                    logger.debug(f"✅ [Graph进度] 已提交异步更新任务: {int(progress_pct)}%")
-                                except RuntimeError:
-                                    # 没有运行的事件循环，使用同步方式更新 MongoDB
-                                    from pymongo import MongoClient
-                                    from app.core.config import settings
-
-                                    # 创建同步 MongoDB 客户端
-                                    sync_client = MongoClient(settings.MONGO_URI)
-                                    sync_db = sync_client[settings.MONGO_DB]
-
-                                    # 同步更新 MongoDB
-                                    sync_db.analysis_tasks.update_one(
-                                        {"task_id": task_id},
-                                        {
-                                            "$set": {
-                                                "progress": int(progress_pct),
-                                                "current_step": message,
-                                                "message": message,
-                                                "updated_at": datetime.utcnow()
-                                            }
-                                        }
-                                    )
-                                    sync_client.close()
-
-                                    # 异步更新内存（创建新的事件循环）
-                                    loop = asyncio.new_event_loop()
-                                    asyncio.set_event_loop(loop)
-                                    try:
-                                        loop.run_until_complete(
-                                            self.memory_manager.update_task_status(
-                                                task_id=task_id,
-                                                status=TaskStatus.RUNNING,
-                                                progress=int(progress_pct),
-                                                message=message,
-                                                current_step=message
-                                            )
-                                        )
-                                    finally:
-                                        loop.close()
-
-                                    logger.debug(f"✅ [Graph进度] 已同步更新内存和MongoDB: {int(progress_pct)}%")
-                            except Exception as sync_err:
-                                logger.warning(f"⚠️ [Graph进度] 同步更新失败: {sync_err}")
+                            # 🔥 同时更新内存和 MongoDB（经由进度管道合并写出）
+                            progress_pipeline.submit(task_id, progress=int(progress_pct), message=message, step=message)
                         else:
                             # 进度没有增加，只更新消息
                             progress_tracker.update_progress({
@@ -2683,11 +2652,23 @@ class SimpleAnalysisService:
                 "performance_metrics": result.get("performance_metrics", {})
             }
 
+            # 报告列表搜索使用的 n-gram 搜索词
+            from app.utils.report_search import build_report_search_fields, invalidate_report_list_cache
+            document.update(build_report_search_fields(document))
+
             # 保存到analysis_reports集合（与web目录保持一致）
             result_insert = await db.analysis_reports.insert_one(document)
 
             if result_insert.inserted_id:
                 logger.info(f"✅ 分析报告已保存到MongoDB analysis_reports: {analysis_id}")
+                invalidate_report_list_cache()
+
+                # 可选：后台预渲染导出格式，首次下载直接命中缓存
+                from app.core.config import settings
+                prerender_formats = [f for f in settings.REPORT_EXPORT_PRERENDER_FORMATS.split(",") if f.strip()]
+                if prerender_formats:
+                    from app.services.report_export_service import get_report_export_service
+                    get_report_export_service().schedule_prerender(document, prerender_formats)
 
                 # 同时更新analysis_tasks集合中的result字段，保持API兼容性
                 await db.analysis_tasks.update_one(
@@ -14,13 +14,87 @@ from app.models.config import UsageRecord, UsageStatistics
 logger = logging.getLogger("app.services.usage_statistics_service")
 
 
+# 汇总维度：日期 × 供应商 × 模型 × 货币
+ROLLUP_KEY_FIELDS = ("date", "provider", "model_name", "currency")
+
+# 回填标记版本：汇总口径变化时递增，已部署实例会在下次查询时重新回填
+ROLLUP_BACKFILL_VERSION = 1
+ROLLUP_BACKFILL_MARKER_ID = "token_usage_daily_backfill"
+
+
+def _rollup_key(record: Dict[str, Any]) -> Dict[str, str]:
+    """根据原始使用记录计算日汇总文档的键"""
+    return {
+        "date": (record.get("timestamp") or "")[:10],  # YYYY-MM-DD
+        "provider": record.get("provider") or "unknown",
+        "model_name": record.get("model_name") or "unknown",
+        "currency": record.get("currency") or "CNY",
+    }
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {
+        "requests": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cost": 0.0,
+        "cost_by_currency": defaultdict(float)
+    }
+
+
 class UsageStatisticsService:
-    """使用统计服务"""
+    """使用统计服务
+
+    原始记录写入 ``token_usage``，同时按 日期×供应商×模型×货币 增量累加到
+    ``token_usage_daily`` 汇总集合；统计查询只读取汇总文档。
+    """
     
     def __init__(self):
         # 使用 tradingagents 的集合名称
         self.collection_name = "token_usage"
-    
+        # 日汇总集合（与 tradingagents.config.mongodb_storage 共用）
+        self.rollup_collection_name = "token_usage_daily"
+        # 回填完成标记（独立集合，避免混入汇总文档）
+        self.rollup_meta_collection_name = "token_usage_rollup_meta"
+        self._rollup_indexes_ready = False
+        self._rollups_checked = False
+
+    async def _ensure_rollup_indexes(self, db) -> None:
+        """创建汇总集合索引（$merge 需要在 on 字段上有唯一索引）"""
+        if self._rollup_indexes_ready:
+            return
+        try:
+            rollups = db[self.rollup_collection_name]
+            await rollups.create_index(
+                [(field, 1) for field in ROLLUP_KEY_FIELDS],
+                unique=True,
+                name="rollup_key_unique"
+            )
+            await rollups.create_index([("date", -1)])
+            await db[self.collection_name].create_index([("timestamp", -1)])
+            self._rollup_indexes_ready = True
+        except Exception as e:
+            logger.warning(f"创建使用统计汇总索引失败(忽略): {e}")
+
+    async def _inc_rollup(self, db, record_dict: Dict[str, Any]) -> None:
+        """将单条使用记录累加到日汇总文档（$inc upsert）"""
+        key = _rollup_key(record_dict)
+        if not key["date"]:
+            return
+        await db[self.rollup_collection_name].update_one(
+            key,
+            {
+                "$inc": {
+                    "requests": 1,
+                    "input_tokens": record_dict.get("input_tokens", 0) or 0,
+                    "output_tokens": record_dict.get("output_tokens", 0) or 0,
+                    "cost": record_dict.get("cost", 0.0) or 0.0,
+                },
+                "$set": {"updated_at": datetime.now()}
+            },
+            upsert=True
+        )
+
     async def add_usage_record(self, record: UsageRecord) -> bool:
         """添加使用记录"""
         try:
@@ -30,12 +104,122 @@ class UsageStatisticsService:
             record_dict = record.model_dump(exclude={"id"})
             result = await collection.insert_one(record_dict)
 
+            try:
+                await self._ensure_rollup_indexes(db)
+                await self._inc_rollup(db, record_dict)
+            except Exception as e:
+                # 汇总失败不影响原始记录，可通过 rebuild_rollups 重建
+                logger.warning(f"⚠️ 更新使用统计汇总失败: {e}")
+
             logger.info(f"✅ 添加使用记录成功: {record.provider}/{record.model_name}")
             return True
         except Exception as e:
             logger.error(f"❌ 添加使用记录失败: {e}")
             return False
-    
+
+    async def rebuild_rollups(self, days: Optional[int] = None) -> int:
+        """从原始记录重建日汇总（聚合管道 + $merge，幂等）
+
+        Args:
+            days: 只重建最近 N 天；为 None 时重建全部
+
+        Returns:
+            写入/覆盖的汇总日期区间内的汇总文档数
+        """
+        try:
+            db = get_mongo_db()
+            return await self._rebuild_rollups(db, days)
+        except Exception as e:
+            logger.error(f"❌ 重建使用统计汇总失败: {e}")
+            return 0
+
+    async def _rebuild_rollups(self, db, days: Optional[int] = None) -> int:
+        """执行重建；失败时抛出异常，由调用方决定如何处理"""
+        await self._ensure_rollup_indexes(db)
+
+        match: Dict[str, Any] = {"timestamp": {"$type": "string"}}
+        start_day = None
+        if days is not None:
+            start_day = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+            match["timestamp"]["$gte"] = start_day
+
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "date": {"$substrCP": ["$timestamp", 0, 10]},
+                    "provider": {"$ifNull": ["$provider", "unknown"]},
+                    "model_name": {"$ifNull": ["$model_name", "unknown"]},
+                    "currency": {"$ifNull": ["$currency", "CNY"]},
+                },
+                "requests": {"$sum": 1},
+                "input_tokens": {"$sum": {"$ifNull": ["$input_tokens", 0]}},
+                "output_tokens": {"$sum": {"$ifNull": ["$output_tokens", 0]}},
+                "cost": {"$sum": {"$ifNull": ["$cost", 0.0]}},
+            }},
+            {"$project": {
+                "_id": 0,
+                "date": "$_id.date",
+                "provider": "$_id.provider",
+                "model_name": "$_id.model_name",
+                "currency": "$_id.currency",
+                "requests": 1,
+                "input_tokens": 1,
+                "output_tokens": 1,
+                "cost": 1,
+                "updated_at": "$$NOW",
+            }},
+            {"$merge": {
+                "into": self.rollup_collection_name,
+                "on": list(ROLLUP_KEY_FIELDS),
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }},
+        ]
+        await db[self.collection_name].aggregate(pipeline).to_list(length=None)
+
+        if days is None:
+            # 全量重建等价于一次完整回填
+            await self._mark_backfilled(db)
+
+        rollup_query: Dict[str, Any] = {}
+        if start_day:
+            rollup_query["date"] = {"$gte": start_day}
+        count = await db[self.rollup_collection_name].count_documents(rollup_query)
+        logger.info(f"✅ 重建使用统计汇总完成: {count} 条汇总")
+        return count
+
+    async def _mark_backfilled(self, db) -> None:
+        """持久化回填完成标记"""
+        await db[self.rollup_meta_collection_name].update_one(
+            {"_id": ROLLUP_BACKFILL_MARKER_ID},
+            {"$set": {"version": ROLLUP_BACKFILL_VERSION, "completed_at": datetime.now()}},
+            upsert=True
+        )
+        self._rollups_checked = True
+
+    async def _ensure_rollups(self, db) -> None:
+        """首次查询时，若尚未完成回填（无持久化标记或版本过旧），则从原始记录重建汇总
+
+        不能以"汇总集合非空"作为判断依据：写入端可能在首次查询前就已 upsert 了新的汇总，
+        此时更早的原始记录仍未计入。$merge 以原始记录整体覆盖，对已有汇总是幂等的。
+        """
+        if self._rollups_checked:
+            return
+        try:
+            marker = await db[self.rollup_meta_collection_name].find_one({"_id": ROLLUP_BACKFILL_MARKER_ID})
+            if marker and marker.get("version", 0) >= ROLLUP_BACKFILL_VERSION:
+                self._rollups_checked = True
+                return
+            if await db[self.collection_name].estimated_document_count() == 0:
+                await self._mark_backfilled(db)
+                return
+            logger.info("📊 使用统计汇总尚未回填，开始从原始记录回填")
+            await self._rebuild_rollups(db)
+        except Exception as e:
+            # 未写入标记，下次查询时重试
+            logger.warning(f"⚠️ 回填使用统计汇总失败: {e}")
+
     async def get_usage_records(
         self,
         provider: Optional[str] = None,
@@ -82,10 +266,11 @@ class UsageStatisticsService:
         provider: Optional[str] = None,
         model_name: Optional[str] = None
     ) -> UsageStatistics:
-        """获取使用统计"""
+        """获取使用统计（按日汇总，统计粒度为自然日）"""
         try:
             db = get_mongo_db()
-            collection = db[self.collection_name]
+            await self._ensure_rollups(db)
+            collection = db[self.rollup_collection_name]
             
             # 计算时间范围
             end_date = datetime.now()
@@ -93,9 +278,9 @@ class UsageStatisticsService:
             
             # 构建查询条件
             query = {
-                "timestamp": {
-                    "$gte": start_date.isoformat(),
-                    "$lte": end_date.isoformat()
+                "date": {
+                    "$gte": start_date.strftime("%Y-%m-%d"),
+                    "$lte": end_date.strftime("%Y-%m-%d")
                 }
             }
             if provider:
@@ -103,84 +288,48 @@ class UsageStatisticsService:
             if model_name:
                 query["model_name"] = model_name
             
-            # 获取所有记录
-            cursor = collection.find(query)
-            records = []
-            async for doc in cursor:
-                records.append(doc)
-            
             # 统计数据
             stats = UsageStatistics()
-            stats.total_requests = len(records)
 
             # 按货币统计成本
             cost_by_currency = defaultdict(float)
 
-            by_provider = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
-            by_model = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
-            by_date = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
+            by_provider = defaultdict(_empty_bucket)
+            by_model = defaultdict(_empty_bucket)
+            by_date = defaultdict(_empty_bucket)
 
-            for record in records:
-                cost = record.get("cost", 0.0)
-                currency = record.get("currency", "CNY")
+            rollup_count = 0
+            async for rollup in collection.find(query, {"_id": 0}):
+                rollup_count += 1
+                requests = rollup.get("requests", 0)
+                input_tokens = rollup.get("input_tokens", 0)
+                output_tokens = rollup.get("output_tokens", 0)
+                cost = rollup.get("cost", 0.0)
+                currency = rollup.get("currency", "CNY")
 
                 # 总计
-                stats.total_input_tokens += record.get("input_tokens", 0)
-                stats.total_output_tokens += record.get("output_tokens", 0)
+                stats.total_requests += requests
+                stats.total_input_tokens += input_tokens
+                stats.total_output_tokens += output_tokens
                 stats.total_cost += cost  # 保留向后兼容
                 cost_by_currency[currency] += cost
 
-                # 按供应商统计
-                provider_key = record.get("provider", "unknown")
-                by_provider[provider_key]["requests"] += 1
-                by_provider[provider_key]["input_tokens"] += record.get("input_tokens", 0)
-                by_provider[provider_key]["output_tokens"] += record.get("output_tokens", 0)
-                by_provider[provider_key]["cost"] += cost
-                by_provider[provider_key]["cost_by_currency"][currency] += cost
-
-                # 按模型统计
-                model_key = f"{record.get('provider', 'unknown')}/{record.get('model_name', 'unknown')}"
-                by_model[model_key]["requests"] += 1
-                by_model[model_key]["input_tokens"] += record.get("input_tokens", 0)
-                by_model[model_key]["output_tokens"] += record.get("output_tokens", 0)
-                by_model[model_key]["cost"] += cost
-                by_model[model_key]["cost_by_currency"][currency] += cost
-
-                # 按日期统计
-                timestamp = record.get("timestamp", "")
-                if timestamp:
-                    date_key = timestamp[:10]  # YYYY-MM-DD
-                    by_date[date_key]["requests"] += 1
-                    by_date[date_key]["input_tokens"] += record.get("input_tokens", 0)
-                    by_date[date_key]["output_tokens"] += record.get("output_tokens", 0)
-                    by_date[date_key]["cost"] += cost
-                    by_date[date_key]["cost_by_currency"][currency] += cost
+                provider_key = rollup.get("provider", "unknown")
+                model_key = f"{provider_key}/{rollup.get('model_name', 'unknown')}"
+                for bucket in (by_provider[provider_key], by_model[model_key], by_date[rollup["date"]]):
+                    bucket["requests"] += requests
+                    bucket["input_tokens"] += input_tokens
+                    bucket["output_tokens"] += output_tokens
+                    bucket["cost"] += cost
+                    bucket["cost_by_currency"][currency] += cost
 
             # 转换 defaultdict 为普通 dict（包括嵌套的 cost_by_currency）
             stats.cost_by_currency = dict(cost_by_currency)
             stats.by_provider = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in by_provider.items()}
             stats.by_model = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in by_model.items()}
-            stats.by_date = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in by_date.items()}
+            stats.by_date = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in sorted(by_date.items())}
             
-            logger.info(f"✅ 获取使用统计成功: {stats.total_requests} 条记录")
+            logger.info(f"✅ 获取使用统计成功: {stats.total_requests} 条记录（{rollup_count} 条汇总）")
             return stats
         except Exception as e:
             logger.error(f"❌ 获取使用统计失败: {e}")
@@ -225,6 +374,12 @@ class UsageStatisticsService:
             })
             
             deleted_count = result.deleted_count
+
+            # 同步清理截止日期之前整天的汇总（截止当天的汇总保留，避免误删当日剩余数据）
+            await db[self.rollup_collection_name].delete_many({
+                "date": {"$lt": cutoff_date.strftime("%Y-%m-%d")}
+            })
+
             logger.info(f"✅ 删除旧记录成功: {deleted_count} 条")
             return deleted_count
         except Exception as e:
@@ -0,0 +1,172 @@
+"""
+分析报告检索工具
+
+- 为 analysis_reports 生成 n-gram 搜索词（股票代码、分析ID、完整摘要），写入 search_terms
+  字段并建立多键索引，关键词搜索先按 n-gram 走索引缩小范围，再用正则精确校验
+- 基于 (created_at, _id) 的游标分页编解码
+- 报告列表总数的短时缓存（报告写入/删除后失效）
+"""
+
+import base64
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TERMS_FIELD = "search_terms"
+SEARCH_TERMS_VERSION_FIELD = "search_terms_version"
+# 搜索词生成规则变化时递增；版本不一致的报告在预筛中放行，并由后台任务重新生成
+SEARCH_TERMS_VERSION = 2
+SEARCH_FIELDS = ("stock_symbol", "analysis_id", "summary")
+NGRAM_SIZE = 2
+
+# 报告列表总数缓存: 查询签名 -> (总数, 时间戳)
+REPORT_COUNT_TTL = 30
+REPORT_COUNT_CACHE_SIZE = 1000
+_report_count_cache: Dict[str, Tuple[int, float]] = {}
+
+_SPLIT_RE = re.compile(r"\s+")
+
+
+def _ngrams(text: str, n: int = NGRAM_SIZE) -> List[str]:
+    grams: List[str] = []
+    for segment in _SPLIT_RE.split(text.lower()):
+        if len(segment) < n:
+            continue
+        grams.extend(segment[i:i + n] for i in range(len(segment) - n + 1))
+    return grams
+
+
+def build_report_search_terms(doc: Dict[str, Any]) -> List[str]:
+    """生成报告的 n-gram 搜索词（去重）
+
+    摘要必须整段参与：预筛条件只放行搜索词覆盖的文档，截断会漏掉原正则能匹配到的报告。
+    """
+    terms: Dict[str, None] = {}
+    for field in SEARCH_FIELDS:
+        value = doc.get(field)
+        if not value:
+            continue
+        terms.update(dict.fromkeys(_ngrams(str(value))))
+    return list(terms)
+
+
+def build_report_search_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """生成写入报告文档的搜索字段（搜索词及其生成规则版本）"""
+    return {
+        SEARCH_TERMS_FIELD: build_report_search_terms(doc),
+        SEARCH_TERMS_VERSION_FIELD: SEARCH_TERMS_VERSION,
+    }
+
+
+def build_keyword_query(keyword: str) -> Dict[str, Any]:
+    """构建关键词搜索条件
+
+    n-gram 条件可走 search_terms 索引；搜索词缺失或按旧规则生成的文档一并纳入，
+    最终由正则校验保证与原有子串匹配语义一致。
+    """
+    pattern = re.escape(keyword)
+    regex_match = {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in SEARCH_FIELDS]}
+    grams = list(dict.fromkeys(_ngrams(keyword)))
+    if not grams:
+        return regex_match
+    return {
+        "$and": [
+            {"$or": [
+                {SEARCH_TERMS_FIELD: {"$all": grams}},
+                {SEARCH_TERMS_VERSION_FIELD: {"$ne": SEARCH_TERMS_VERSION}},
+            ]},
+            regex_match,
+        ]
+    }
+
+
+def encode_cursor(created_at: Optional[datetime], doc_id: ObjectId) -> str:
+    """编码分页游标（上一页最后一条的 created_at 和 _id）"""
+    payload = {"t": created_at.isoformat() if isinstance(created_at, datetime) else None, "id": str(doc_id)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+    """解码分页游标，格式错误时抛出 ValueError"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        created_at = datetime.fromisoformat(payload["t"]) if payload.get("t") else None
+        return created_at, ObjectId(payload["id"])
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def build_keyset_query(created_at: Optional[datetime], doc_id: ObjectId) -> Dict[str, Any]:
+    """构建按 (created_at desc, _id desc) 排序时位于游标之后的条件"""
+    if created_at is None:
+        # 没有 created_at 的文档排在最后，只需按 _id 继续
+        return {"created_at": None, "_id": {"$lt": doc_id}}
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": doc_id}},
+            {"created_at": None},
+        ]
+    }
+
+
+def query_signature(query: Dict[str, Any]) -> str:
+    return json.dumps(query, sort_keys=True, default=str)
+
+
+async def count_reports(db, query: Dict[str, Any]) -> int:
+    """获取报告总数：无筛选条件时使用集合元数据估算，有条件时短时间缓存"""
+    if not query:
+        return await db.analysis_reports.estimated_document_count()
+
+    signature = query_signature(query)
+    now = datetime.utcnow().timestamp()
+    cached = _report_count_cache.get(signature)
+    if cached and now - cached[1] < REPORT_COUNT_TTL:
+        return cached[0]
+
+    total = await db.analysis_reports.count_documents(query)
+    if len(_report_count_cache) >= REPORT_COUNT_CACHE_SIZE:
+        _report_count_cache.clear()
+    _report_count_cache[signature] = (total, now)
+    return total
+
+
+def invalidate_report_list_cache() -> None:
+    """报告写入或删除后清空列表总数缓存"""
+    _report_count_cache.clear()
+
+
+async def backfill_report_search_terms(db, batch_size: int = 500) -> int:
+    """为缺少搜索词或搜索词版本过旧的报告重新生成，返回处理条数"""
+    from pymongo import UpdateOne
+
+    collection = db.analysis_reports
+    projection = {field: 1 for field in SEARCH_FIELDS}
+    total = 0
+    try:
+        while True:
+            docs = await collection.find(
+                {SEARCH_TERMS_VERSION_FIELD: {"$ne": SEARCH_TERMS_VERSION}}, projection
+            ).limit(batch_size).to_list(batch_size)
+            if not docs:
+                break
+            ops = [
+                UpdateOne({"_id": doc["_id"]}, {"$set": build_report_search_fields(doc)})
+                for doc in docs
+            ]
+            await collection.bulk_write(ops, ordered=False)
+            total += len(docs)
+            if len(docs) < batch_size:
+                break
+    except Exception as e:
+        logger.warning(f"⚠️ 补充报告搜索词失败: {e}")
+    if total:
+        logger.info(f"✅ 已为 {total} 份分析报告生成搜索词")
+    return total
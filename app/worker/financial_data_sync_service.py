@@ -6,7 +6,7 @@
 import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from dataclasses import dataclass, field
 
 from app.core.database import get_mongo_db
@@ -78,7 +78,9 @@ class FinancialDataSyncService:
         data_sources: List[str] = None,
         report_types: List[str] = None,
         batch_size: int = 50,
-        delay_seconds: float = 1.0
+        delay_seconds: float = 1.0,
+        max_concurrency: int = 5,
+        progress_callback: Optional[Callable[[str, int, int], Any]] = None
     ) -> Dict[str, FinancialSyncStats]:
         """
         同步财务数据
@@ -89,6 +91,8 @@ class FinancialDataSyncService:
             report_types: 报告类型列表 ["quarterly", "annual"]
             batch_size: 批处理大小
             delay_seconds: API调用延迟
+            max_concurrency: 同时同步的股票数量上限
+            progress_callback: 进度回调 (数据源, 已处理数量, 总数)
             
         Returns:
             各数据源的同步统计结果
@@ -129,7 +133,9 @@ class FinancialDataSyncService:
                 symbols=symbols,
                 report_types=report_types,
                 batch_size=batch_size,
-                delay_seconds=delay_seconds
+                delay_seconds=delay_seconds,
+                max_concurrency=max_concurrency,
+                progress_callback=progress_callback
             )
             
             results[data_source] = stats
@@ -137,7 +143,11 @@ class FinancialDataSyncService:
             logger.info(f"✅ {data_source} 财务数据同步完成: "
                        f"成功 {stats.success_count}/{stats.total_symbols} "
                        f"({stats.success_count/max(stats.total_symbols,1)*100:.1f}%)")
-        
+
+        # 同步结束后立即刷新本轮财务数据有变化的股票
+        from app.services.screening_table_service import get_screening_table_service
+        await get_screening_table_service().refresh_dirty()
+
         return results
     
     async def _sync_source_financial_data(
@@ -146,7 +156,9 @@ class FinancialDataSyncService:
         symbols: List[str],
         report_types: List[str],
         batch_size: int,
-        delay_seconds: float
+        delay_seconds: float,
+        max_concurrency: int = 5,
+        progress_callback: Optional[Callable[[str, int, int], Any]] = None
     ) -> FinancialSyncStats:
         """同步单个数据源的财务数据"""
         stats = FinancialSyncStats()
@@ -162,6 +174,28 @@ class FinancialDataSyncService:
             stats.end_time = datetime.now(timezone.utc)
             return stats
         
+        # 限制同时进行的股票数量（每只股票内部还会并发获取多张报表）
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        processed = 0
+
+        async def sync_one(symbol: str) -> bool:
+            nonlocal processed
+            try:
+                async with semaphore:
+                    return await self._sync_symbol_financial_data(
+                        symbol=symbol,
+                        data_source=data_source,
+                        provider=provider,
+                        report_types=report_types
+                    )
+            finally:
+                processed += 1
+                if progress_callback:
+                    try:
+                        progress_callback(data_source, processed, len(symbols))
+                    except Exception as e:
+                        logger.debug(f"财务数据同步进度回调失败: {e}")
+
         # 批量处理股票
         for i in range(0, len(symbols), batch_size):
             batch_symbols = symbols[i:i + batch_size]
@@ -169,19 +203,11 @@ class FinancialDataSyncService:
             logger.info(f"📈 {data_source} 处理批次 {i//batch_size + 1}: "
                        f"{len(batch_symbols)} 只股票")
             
-            # 并发处理批次内的股票
-            tasks = []
-            for symbol in batch_symbols:
-                task = self._sync_symbol_financial_data(
-                    symbol=symbol,
-                    data_source=data_source,
-                    provider=provider,
-                    report_types=report_types
-                )
-                tasks.append(task)
-            
-            # 执行并发任务
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+            # 并发处理批次内的股票（受 max_concurrency 限制）
+            batch_results = await asyncio.gather(
+                *(sync_one(symbol) for symbol in batch_symbols),
+                return_exceptions=True
+            )
             
             # 统计批次结果
             for j, result in enumerate(batch_results):
@@ -203,6 +229,9 @@ class FinancialDataSyncService:
                     stats.skipped_count += 1
                     logger.debug(f"⏭️ {symbol} 财务数据跳过 ({data_source})")
             
+            logger.info(f"📊 {data_source} 财务数据同步进度: {processed}/{len(symbols)} "
+                       f"(成功 {stats.success_count}, 失败 {stats.error_count})")
+
             # API限流延迟
             if i + batch_size < len(symbols):
                 await asyncio.sleep(delay_seconds)
@@ -318,7 +347,10 @@ class FinancialDataSyncService:
             except Exception as e:
                 logger.error(f"❌ {symbol} 单股票财务数据同步失败 ({data_source}): {e}")
                 results[data_source] = False
-        
+
+        from app.services.screening_table_service import get_screening_table_service
+        await get_screening_table_service().refresh_dirty()
+
         return results
 
 
@@ -9,7 +9,9 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+from app.core.config import settings
 from app.services.historical_data_service import get_historical_data_service
+from app.services.period_resampler import PERIODS, PeriodBarResampler
 from app.worker.tushare_sync_service import TushareSyncService
 from app.worker.akshare_sync_service import AKShareSyncService
 from app.worker.baostock_sync_service import BaoStockSyncService
@@ -41,11 +43,16 @@ class MultiPeriodSyncService:
         self.tushare_service = None
         self.akshare_service = None
         self.baostock_service = None
+        self.derive_from_daily = settings.MULTI_PERIOD_DERIVE_FROM_DAILY
+        self.resampler = None
         
     async def initialize(self):
         """初始化服务"""
         try:
             self.historical_service = await get_historical_data_service()
+            self.resampler = PeriodBarResampler(
+                self.historical_service.collection, adjust=settings.MULTI_PERIOD_ADJUST
+            )
             
             # 初始化各数据源服务
             self.tushare_service = TushareSyncService()
@@ -150,6 +157,10 @@ class MultiPeriodSyncService:
     ) -> Dict[str, Any]:
         """同步特定周期的数据"""
         stats = {"records": 0, "success": 0, "errors": 0}
+
+        # 周线/月线由已同步的日线本地聚合，不再重复请求数据源
+        if period in PERIODS and self.derive_from_daily:
+            return await self._derive_period_data(data_source, period, symbols, start_date)
         
         try:
             logger.info(f"📈 开始同步{data_source}-{period}数据: {len(symbols)}只股票")
@@ -242,6 +253,42 @@ class MultiPeriodSyncService:
         
         return stats
     
+    async def _derive_period_data(
+        self,
+        data_source: str,
+        period: str,
+        symbols: List[str],
+        start_date: str = None
+    ) -> Dict[str, Any]:
+        """
+        由 stock_daily_quotes 中该数据源的日线聚合周线/月线
+
+        指定 start_date 时重算其所在周期及之后的周期，否则只重算上次聚合后
+        新写入日线所涉及的周期（首次聚合为全量）。
+        """
+        stats = {"records": 0, "success": 0, "errors": 0}
+        started = datetime.now()
+        logger.info(f"📈 开始聚合{data_source}-{period}数据: {len(symbols)}只股票（基于日线）")
+
+        for index, symbol in enumerate(symbols, 1):
+            try:
+                written = await self.resampler.resample_symbol(
+                    symbol, data_source, periods=[period], since=start_date
+                )
+                stats["records"] += written.get(period, 0)
+                stats["success"] += 1
+            except Exception as e:
+                logger.error(f"❌ {symbol}-{period}聚合失败: {e}")
+                stats["errors"] += 1
+
+            if index % 500 == 0:
+                logger.info(f"📊 {data_source}-{period}聚合进度: {index}/{len(symbols)}")
+                await asyncio.sleep(0)
+
+        elapsed = (datetime.now() - started).total_seconds()
+        logger.info(f"✅ {data_source}-{period}聚合完成: {stats['records']}条记录，耗时{elapsed:.1f}秒")
+        return stats
+
     async def _get_all_symbols(self) -> List[str]:
         """获取所有股票代码"""
         try:
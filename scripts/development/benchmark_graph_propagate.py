@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+TradingAgentsGraph.propagate 离线基准测试
+
+用确定性的假 LLM（支持工具调用，可配置 token 延迟）和夹具数据工具执行 N 次完整分析，
+不需要 API Key 和数据源。统计各节点耗时（来自 propagate 的 node_timings）、总耗时、
+内存峰值、LLM 调用次数和工具调用次数，可保存为基线并与之前的结果对比，
+用于发现图构建、状态复制、提示词构造等编排开销的回归。
+
+用法:
+    python scripts/development/benchmark_graph_propagate.py
+    python scripts/development/benchmark_graph_propagate.py --runs 10 --save graph_baseline.json
+    python scripts/development/benchmark_graph_propagate.py --baseline graph_baseline.json --max-regression 0.2
+    python scripts/development/benchmark_graph_propagate.py --token-latency-ms 0.5 --analysts market_analyst news_analyst
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from tradingagents.graph.benchmark import DEFAULT_ANALYSTS, run_propagate_benchmark  # noqa: E402
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """打印与基线的对比（总耗时和各节点中位数），超过允许的回归比例时返回 False"""
+    passed = True
+    print("\n对比基线（中位数）:")
+    rows = [("总耗时", result["total"], baseline.get("total", {}))]
+    rows += [(node, stats, baseline.get("nodes", {}).get(node, {})) for node, stats in result["nodes"].items()]
+    for name, current, base in rows:
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = (current["median_ms"] - base["median_ms"]) / base["median_ms"]
+        flag = ""
+        # 节点级耗时只有毫秒量级，只对总耗时做回归判定
+        if name == "总耗时" and max_regression is not None and ratio > max_regression:
+            flag = "  ❌ 超出允许回归"
+            passed = False
+        print(f"  {name:<24} {base['median_ms']:>9.2f} ms -> {current['median_ms']:>9.2f} ms ({ratio:+.1%}){flag}")
+    return passed
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    total = result["total"]
+    print(f"📊 {result['runs']} 次完整分析（{result['ticker']}，分析师: {', '.join(result['analysts'])}）")
+    print(f"   图构建: {result['graph_build_ms']:.1f} ms")
+    print(f"   总耗时: 中位数 {total['median_ms']:.1f} ms / 平均 {total['mean_ms']:.1f} ms / "
+          f"p95 {total['p95_ms']:.1f} ms / 最大 {total['max_ms']:.1f} ms")
+    if result["peak_memory_mb"] is not None:
+        print(f"   内存分配峰值: {result['peak_memory_mb']:.2f} MB")
+    print(f"   LLM 调用: {result['llm_calls']}（工具调用 {result['llm_tool_calls']} 次，提示词 {result['prompt_chars']} 字符）")
+    print(f"   工具调用: {result['tool_calls']}")
+    print(f"   决策: {result['decisions']}")
+    print(f"\n{'节点':<26}{'中位数':>10}{'平均':>10}{'p95':>10}{'最大':>10}")
+    for node, stats in sorted(result["nodes"].items(), key=lambda kv: kv[1]["median_ms"], reverse=True):
+        print(f"{node:<26}{stats['median_ms']:>8.2f}ms{stats['mean_ms']:>8.2f}ms{stats['p95_ms']:>8.2f}ms{stats['max_ms']:>8.2f}ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="TradingAgentsGraph.propagate 离线基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="计入统计的运行次数")
+    parser.add_argument("--warmup", type=int, default=1, help="预热次数（不计入统计）")
+    parser.add_argument("--ticker", default="AAPL", help="股票代码（美股代码全程离线）")
+    parser.add_argument("--date", default="2025-01-02", help="分析日期")
+    parser.add_argument("--analysts", nargs="*", default=DEFAULT_ANALYSTS, help="参与的分析师")
+    parser.add_argument("--token-latency-ms", type=float, default=0.0, help="假 LLM 每个输出 token 的延迟（毫秒）")
+    parser.add_argument("--response-tokens", type=int, default=400, help="假 LLM 每次回复的 token 数")
+    parser.add_argument("--tool-latency-ms", type=float, default=0.0, help="夹具工具每次调用的延迟（毫秒）")
+    parser.add_argument("--fixtures", help="夹具 JSON 文件：{工具名: 返回文本}")
+    parser.add_argument("--debate-rounds", type=int, default=1, help="投资辩论轮次")
+    parser.add_argument("--risk-rounds", type=int, default=1, help="风险讨论轮次")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="不统计内存峰值（tracemalloc 会增加开销）")
+    parser.add_argument("--log-level", default="INFO",
+                        help="运行期间屏蔽该级别及以下的日志（NONE 表示保留全部日志）")
+    parser.add_argument("--save", help="将结果保存为 JSON（可作为基线）")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 基线对比")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="允许的总耗时最大回归比例（如 0.2 表示 20%%），超出时以非零状态退出")
+    args = parser.parse_args(argv)
+
+    fixtures = None
+    if args.fixtures:
+        fixtures = json.loads(Path(args.fixtures).read_text(encoding="utf-8"))
+    log_level = None if args.log_level.upper() == "NONE" else getattr(logging, args.log_level.upper())
+
+    result = run_propagate_benchmark(
+        runs=max(1, args.runs),
+        ticker=args.ticker,
+        trade_date=args.date,
+        selected_analysts=args.analysts,
+        token_latency=args.token_latency_ms / 1000,
+        response_tokens=args.response_tokens,
+        tool_latency=args.tool_latency_ms / 1000,
+        fixtures=fixtures,
+        max_debate_rounds=args.debate_rounds,
+        max_risk_discuss_rounds=args.risk_rounds,
+        warmup=max(0, args.warmup),
+        trace_memory=not args.no_tracemalloc,
+        log_level=log_level,
+    )
+    print_report(result)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.save}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if not compare(result, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
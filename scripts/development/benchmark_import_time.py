@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+导入耗时基准测试（基于 python -X importtime）
+
+在全新的子进程中冷启动导入 API、CLI 和 Worker 的入口模块，统计总导入耗时和
+最耗时的模块，可保存为基线并与之前的结果对比，用于跟踪启动时间回归。
+
+用法:
+    python scripts/development/benchmark_import_time.py
+    python scripts/development/benchmark_import_time.py --repeat 5 --save import_baseline.json
+    python scripts/development/benchmark_import_time.py --baseline import_baseline.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+project_root = Path(__file__).resolve().parents[2]
+
+# 需要跟踪的入口模块
+DEFAULT_TARGETS = {
+    "api": "app.main",
+    "cli": "cli.main",
+    "worker": "app.worker.analysis_worker",
+    "dataflows": "tradingagents.dataflows",
+}
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """解析 -X importtime 输出，返回 {模块: 累计耗时(微秒)}（只保留首次出现）"""
+    cumulative: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            module = match.group(4)
+            cumulative.setdefault(module, int(match.group(2)))
+    return cumulative
+
+
+def measure(module: str, python: str = sys.executable) -> Dict[str, object]:
+    """在新进程中导入模块一次，返回导入墙钟耗时和各模块累计耗时"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(project_root), env.get("PYTHONPATH", "")]))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    code = (
+        "import time; _t = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - _t)"
+    )
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        cwd=str(project_root),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    ok = proc.returncode == 0
+    total_ms = 0.0
+    if ok:
+        try:
+            total_ms = float(proc.stdout.strip().splitlines()[-1]) * 1000
+        except (IndexError, ValueError):
+            ok = False
+    return {
+        "ok": ok,
+        "error": proc.stderr.strip().splitlines()[-1] if not ok and proc.stderr.strip() else None,
+        "total_ms": total_ms,
+        "modules": parse_importtime(proc.stderr),
+    }
+
+
+def run_benchmark(targets: Dict[str, str], repeat: int, top: int) -> Dict[str, Dict[str, object]]:
+    results: Dict[str, Dict[str, object]] = {}
+    for name, module in targets.items():
+        # 先导入一次生成字节码缓存，避免把编译时间计入
+        measure(module)
+        runs = [measure(module) for _ in range(repeat)]
+        ok_runs = [r for r in runs if r["ok"]]
+        if not ok_runs:
+            results[name] = {"module": module, "ok": False, "error": runs[-1]["error"]}
+            continue
+        totals = [r["total_ms"] for r in ok_runs]
+        # 去掉目标自身及其父包，只列出被拖入的依赖
+        own = {module.rsplit(".", i)[0] for i in range(module.count(".") + 1)}
+        slowest = sorted(ok_runs[-1]["modules"].items(), key=lambda kv: kv[1], reverse=True)
+        results[name] = {
+            "module": module,
+            "ok": True,
+            "median_ms": round(statistics.median(totals), 1),
+            "min_ms": round(min(totals), 1),
+            "max_ms": round(max(totals), 1),
+            "module_count": len(ok_runs[-1]["modules"]),
+            "top_modules": [
+                {"module": m, "cumulative_ms": round(us / 1000, 1)}
+                for m, us in slowest if m not in own
+            ][:top],
+        }
+    return results
+
+
+def compare(results: Dict[str, Dict[str, object]], baseline: Dict[str, Dict[str, object]],
+            max_regression: Optional[float]) -> bool:
+    """打印与基线的对比，超过允许的回归比例时返回 False"""
+    passed = True
+    print("\n对比基线:")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not current.get("ok") or not base or not base.get("ok"):
+            continue
+        delta = current["median_ms"] - base["median_ms"]
+        ratio = delta / base["median_ms"] if base["median_ms"] else 0.0
+        flag = ""
+        if max_regression is not None and ratio > max_regression:
+            flag = "  ❌ 超出允许回归"
+            passed = False
+        print(f"  {name:<10} {base['median_ms']:>9.1f} ms -> {current['median_ms']:>9.1f} ms ({ratio:+.1%}){flag}")
+    return passed
+
+
+def print_report(results: Dict[str, Dict[str, object]]) -> None:
+    for name, result in results.items():
+        if not result.get("ok"):
+            print(f"❌ {name:<10} {result['module']}: 导入失败 ({result.get('error')})")
+            continue
+        print(f"✅ {name:<10} {result['module']}: 中位数 {result['median_ms']:.1f} ms "
+              f"(min {result['min_ms']:.1f} / max {result['max_ms']:.1f}), {result['module_count']} 个模块")
+        for item in result["top_modules"]:
+            print(f"      {item['cumulative_ms']:>9.1f} ms  {item['module']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="入口模块冷启动导入耗时基准测试")
+    parser.add_argument("--targets", nargs="*", help="只测试指定入口（api/cli/worker/dataflows）或任意模块名")
+    parser.add_argument("--repeat", type=int, default=3, help="每个入口的重复次数（取中位数）")
+    parser.add_argument("--top", type=int, default=10, help="显示最耗时的前 N 个模块")
+    parser.add_argument("--save", help="将结果保存为 JSON（可作为基线）")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 基线对比")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="允许的最大回归比例（如 0.2 表示 20%%），超出时以非零状态退出")
+    args = parser.parse_args(argv)
+
+    targets = DEFAULT_TARGETS
+    if args.targets:
+        targets = {t: DEFAULT_TARGETS.get(t, t) for t in args.targets}
+
+    results = run_benchmark(targets, max(1, args.repeat), args.top)
+    print_report(results)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 结果已保存: {args.save}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if not compare(results, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
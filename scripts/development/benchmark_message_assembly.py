@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+消息预算组装微基准
+
+构造合成的消息栈（系统提示 + 多轮工具调用 + 长报告），测量 MessageBudgetAssembler.assemble
+每次调用的耗时：首次调用（token 估算未缓存）和重复调用（同一批消息内容已缓存），
+以及预算充足（无需裁剪）和需要裁剪两种情况，不访问任何外部接口。
+
+用法:
+    python scripts/development/benchmark_message_assembly.py
+    python scripts/development/benchmark_message_assembly.py --rounds 20 --report-chars 20000 --budget 8000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage  # noqa: E402
+
+from tradingagents.llm_adapters.message_budget import MessageBudgetAssembler, message_tokens  # noqa: E402
+from tradingagents.utils.token_estimator import clear_cache, estimate_tokens  # noqa: E402
+
+
+def build_stack(rounds: int, report_chars: int, tool_chars: int, salt: str = "") -> List[BaseMessage]:
+    section = "营收与利润保持增长，现金流稳健，估值处于历史中位。Revenue grew 12% YoY. "
+    report = "\n\n".join(
+        f"## 第{i}节{salt}\n" + section * max(1, report_chars // (len(section) * 8)) for i in range(8)
+    )
+    messages: List[BaseMessage] = [
+        SystemMessage(content="你是一名专业的股票分析师，请基于工具数据撰写报告。" * 10 + salt),
+        HumanMessage(content=report),
+    ]
+    for i in range(rounds):
+        call_id = f"call_{i}"
+        messages.append(AIMessage(content="", tool_calls=[{"name": "get_stock_data", "args": {"ticker": "000001", "i": i}, "id": call_id}]))
+        messages.append(ToolMessage(content=f"{salt}日期,开盘,收盘\n" + "2025-01-02,10.00,10.20\n" * (tool_chars // 24), tool_call_id=call_id))
+    return messages
+
+
+def measure(messages: List[BaseMessage], budget: int, repeat: int) -> List[float]:
+    assembler = MessageBudgetAssembler(budget)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        assembler.assemble(messages)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="消息预算组装微基准")
+    parser.add_argument("--rounds", type=int, default=10, help="工具调用轮数")
+    parser.add_argument("--report-chars", type=int, default=12000, help="报告长度（字符）")
+    parser.add_argument("--tool-chars", type=int, default=4000, help="每次工具输出长度（字符）")
+    parser.add_argument("--budget", type=int, default=6000, help="需要裁剪时的 token 预算")
+    parser.add_argument("--repeat", type=int, default=200, help="重复次数")
+    args = parser.parse_args()
+
+    messages = build_stack(args.rounds, args.report_chars, args.tool_chars)
+    total = sum(message_tokens(m) for m in messages)
+    print(f"📊 消息栈: {len(messages)} 条, ~{total:,} tokens, 预算 {args.budget:,} tokens")
+    print(f"{'场景':<20}{'p50':>10}{'p95':>10}{'max':>10}")
+
+    cold = []
+    for i in range(min(args.repeat, 50)):
+        clear_cache()
+        fresh = build_stack(args.rounds, args.report_chars, args.tool_chars, salt=str(i))
+        cold += measure(fresh, args.budget, 1)
+
+    scenarios = [
+        ("首次调用（未缓存）", cold),
+        ("重复调用/无需裁剪", measure(messages, total + 1, args.repeat)),
+        ("重复调用/需要裁剪", measure(messages, args.budget, args.repeat)),
+    ]
+    for name, timings in scenarios:
+        ordered = sorted(timings)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        print(f"{name:<20}{statistics.median(ordered):>8.3f}ms{p95:>8.3f}ms{ordered[-1]:>8.3f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
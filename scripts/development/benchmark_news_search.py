@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+新闻检索基准：MongoDB $text 路径 vs 本地倒排索引
+
+构造合成的中文新闻语料（默认 20000 条），对比三条路径：
+- $text 模拟：mongomock 不支持 $text，这里按 $text 的分词方式（空白/标点切分）预先写入词数组，
+  用 {"_text_terms": {"$in": ...}} 在 mongomock 上查询，代表原 search_news 的匹配语义和扫描成本
+- 本地倒排索引（NewsSearchIndex，bigram + BM25）
+- 索引 + TTL 结果缓存（重复查询）
+同时对比股票+时间窗口查询（query_news 的常见用法）和中文短语的召回率。
+
+用法:
+    python scripts/development/benchmark_news_search.py
+    python scripts/development/benchmark_news_search.py --docs 50000 --queries 200
+"""
+
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List
+
+import mongomock
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from app.services.news_search_index import NewsSearchIndex, TTLResultCache  # noqa: E402
+
+COMPANIES = [
+    ("000001", "平安银行"), ("600036", "招商银行"), ("601398", "工商银行"), ("600519", "贵州茅台"),
+    ("000858", "五粮液"), ("300750", "宁德时代"), ("002594", "比亚迪"), ("601318", "中国平安"),
+    ("600276", "恒瑞医药"), ("000333", "美的集团"), ("600900", "长江电力"), ("601012", "隆基绿能"),
+]
+EVENTS = [
+    "发布年报", "发布季报", "净利润同比增长", "营收不及预期", "宣布回购", "大股东减持", "获机构调研",
+    "股价创新高", "遭北向资金净卖出", "签订重大合同", "下调产品价格", "提价", "高管变动", "分红方案出炉",
+]
+DETAILS = [
+    "公司表示将继续加大研发投入", "分析师认为短期业绩承压", "市场人士预计行业景气度回升",
+    "机构维持买入评级", "成交额明显放大", "板块资金流入居前",
+]
+_TEXT_SPLIT = re.compile(r"[\s，。：、！？,.:;!?]+")
+
+
+def text_terms(text: str) -> List[str]:
+    """模拟 $text 的分词：按空白和标点切分，中文整段视为一个词"""
+    return [t.lower() for t in _TEXT_SPLIT.split(text) if t]
+
+
+def build_corpus(count: int, seed: int = 7) -> List[dict]:
+    rng = random.Random(seed)
+    base = datetime(2024, 3, 8, 15)
+    docs = []
+    for index in range(count):
+        symbol, name = rng.choice(COMPANIES)
+        event = rng.choice(EVENTS)
+        title = f"{name}{event} {rng.choice(DETAILS)}"
+        content = f"{name}（{symbol}）{event}。{rng.choice(DETAILS)}，{rng.choice(DETAILS)}。"
+        docs.append({
+            "symbol": symbol, "symbols": [symbol], "title": title, "content": content,
+            "url": f"https://news.example.com/{index}",
+            "publish_time": base - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+            "category": "company_announcement", "sentiment": "neutral", "importance": "medium",
+            "data_source": "benchmark", "updated_at": base,
+        })
+    return docs
+
+
+def timed(fn: Callable, queries: list) -> tuple:
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    return statistics.median(ordered), p95, results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="新闻检索基准：$text vs 本地倒排索引")
+    parser.add_argument("--docs", type=int, default=20000, help="新闻条数")
+    parser.add_argument("--queries", type=int, default=100, help="每种查询的次数")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.docs)
+    collection = mongomock.MongoClient().db.stock_news
+    collection.insert_many([
+        {**doc, "_text_terms": text_terms(doc["title"]) + text_terms(doc["content"])} for doc in corpus
+    ])
+    collection.create_index([("symbol", 1), ("publish_time", -1)])
+
+    start = time.perf_counter()
+    index = NewsSearchIndex(max_docs=max(args.docs, 1000))
+    index.add_many(collection.find({}, {"_text_terms": 0}))
+    print(f"📊 语料: {args.docs:,} 条新闻，索引构建 {time.perf_counter() - start:.2f}s，"
+          f"词项 {len(index._postings):,} 个")
+
+    rng = random.Random(11)
+    # 热门查询集中在少数短语上，TTL 缓存可以复用结果
+    phrases = rng.sample([(name, event) for _, name in COMPANIES for event in EVENTS], 20)
+    search_queries = [rng.choice(phrases) for _ in range(args.queries)]
+
+    def text_search(query):
+        terms = text_terms(f"{query[0]} {query[1]}")
+        return list(collection.find({"_text_terms": {"$in": terms}}).limit(20))
+
+    def index_search(query):
+        return index.search(f"{query[0]} {query[1]}", limit=20)
+
+    cache = TTLResultCache(ttl_seconds=30)
+
+    def cached_search(query):
+        results = cache.get(query)
+        if results is None:
+            results = index_search(query)
+            cache.put(query, results)
+        return results
+
+    print(f"{'全文检索':<20}{'p50':>10}{'p95':>10}{'召回':>8}")
+    for label, fn in (("$text 模拟", text_search), ("本地索引", index_search), ("索引 + TTL 缓存", cached_search)):
+        p50, p95, results = timed(fn, search_queries)
+        # 召回：前 20 条中至少有一条标题同时包含公司名和事件
+        hits = sum(any(q[0] in d["title"] and q[1] in d["title"] for d in r) for q, r in zip(search_queries, results))
+        print(f"{label:<20}{p50:>8.2f}ms{p95:>8.2f}ms{hits / len(search_queries):>8.0%}")
+
+    window_end = datetime(2024, 3, 8, 15)
+    window_queries = [
+        (rng.choice(COMPANIES)[0], window_end - timedelta(days=rng.randint(1, 30))) for _ in range(args.queries)
+    ]
+
+    def mongo_window(query):
+        symbol, start_time = query
+        cursor = collection.find({"symbol": symbol, "publish_time": {"$gte": start_time}}, {"_text_terms": 0})
+        return [d["url"] for d in cursor.sort("publish_time", -1).limit(50)]
+
+    def index_window(query):
+        symbol, start_time = query
+        return [d["url"] for d in index.query(symbol=symbol, start_time=start_time, limit=50)]
+
+    print(f"{'股票+时间窗口':<20}{'p50':>10}{'p95':>10}{'一致':>8}")
+    p50, p95, expected = timed(mongo_window, window_queries)
+    print(f"{'MongoDB 过滤':<20}{p50:>8.2f}ms{p95:>8.2f}ms{'-':>8}")
+    p50, p95, actual = timed(index_window, window_queries)
+    same = sum(a == e for a, e in zip(actual, expected))
+    print(f"{'本地索引':<20}{p50:>8.2f}ms{p95:>8.2f}ms{same / len(window_queries):>8.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
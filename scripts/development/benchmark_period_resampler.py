@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+周线/月线本地重采样吞吐基准
+
+构造合成的股票池（默认 5000 只，每只约一年日线），测量由日线聚合周线、月线的吞吐：
+全量重算（整段历史）和增量重算（只重算最近一个周期），不访问数据库和外部数据源。
+
+用法:
+    python scripts/development/benchmark_period_resampler.py
+    python scripts/development/benchmark_period_resampler.py --symbols 5000 --days 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from app.services.period_resampler import PERIODS, period_bounds, resample_daily_bars  # noqa: E402
+
+
+def trading_days(count: int, end: date) -> List[str]:
+    """倒推 count 个工作日（跳过周末和一段春节休市）"""
+    days, current = [], end
+    while len(days) < count:
+        if current.weekday() < 5 and not (current.month == 2 and 9 <= current.day <= 16):
+            days.append(current.isoformat())
+        current -= timedelta(days=1)
+    return days[::-1]
+
+
+def build_universe(symbols: int, days: List[str], seed: int = 42) -> Dict[str, List[dict]]:
+    rng = random.Random(seed)
+    universe = {}
+    for index in range(symbols):
+        price, rows = rng.uniform(3, 200), []
+        for trade_date in days:
+            open_ = price * (1 + rng.uniform(-0.01, 0.01))
+            close = open_ * (1 + rng.uniform(-0.05, 0.05))
+            volume = rng.randint(1_000, 500_000) * 100
+            rows.append({
+                "trade_date": trade_date,
+                "open": round(open_, 2),
+                "high": round(max(open_, close) * 1.01, 2),
+                "low": round(min(open_, close) * 0.99, 2),
+                "close": round(close, 2),
+                "volume": volume,
+                "amount": round(volume * close, 2),
+                "turnover_rate": round(rng.uniform(0.1, 5), 4),
+            })
+            price = close
+        universe[f"{index:06d}"] = rows
+    return universe
+
+
+def run(universe: Dict[str, List[dict]], since: str = None) -> tuple:
+    bars, rows_seen = 0, 0
+    start = time.perf_counter()
+    for rows in universe.values():
+        for period in PERIODS:
+            window = rows
+            if since:
+                period_start = period_bounds(since, period)[0]
+                window = [r for r in rows if r["trade_date"] >= period_start]
+            rows_seen += len(window)
+            bars += len(resample_daily_bars(window, period, as_of=rows[-1]["trade_date"]))
+    return time.perf_counter() - start, rows_seen, bars
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="周线/月线本地重采样吞吐基准")
+    parser.add_argument("--symbols", type=int, default=5000, help="股票数量")
+    parser.add_argument("--days", type=int, default=250, help="每只股票的日线条数")
+    args = parser.parse_args()
+
+    days = trading_days(args.days, date(2024, 12, 31))
+    build_start = time.perf_counter()
+    universe = build_universe(args.symbols, days)
+    print(f"📊 合成股票池: {args.symbols} 只 × {len(days)} 个交易日 "
+          f"({args.symbols * len(days):,} 条日线，生成耗时 {time.perf_counter() - build_start:.1f}s)")
+    print(f"{'场景':<16}{'耗时':>10}{'股票/秒':>12}{'日线/秒':>14}{'周期K线':>10}")
+
+    for name, since in (("全量重算", None), ("增量（最近一日）", days[-1])):
+        elapsed, rows_seen, bars = run(universe, since)
+        print(f"{name:<16}{elapsed:>9.2f}s{args.symbols / elapsed:>12,.0f}{rows_seen / elapsed:>14,.0f}{bars:>10,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
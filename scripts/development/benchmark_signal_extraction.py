@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+最终决策提取延迟对比
+
+在 tests/tradingagents/fixtures/signal_reports.json 的报告语料上对比两条路径：
+规则提取（RuleBasedDecisionExtractor）与总是调用 LLM 的 SignalProcessor。
+LLM 使用固定延迟的桩模型模拟一次 quick_thinking_llm 往返，不访问外部接口。
+
+用法:
+    python scripts/development/benchmark_signal_extraction.py
+    python scripts/development/benchmark_signal_extraction.py --llm-latency-ms 1500 --repeat 200
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from tradingagents.graph.decision_extractor import (  # noqa: E402
+    CURRENCY_BY_NAME,
+    DEFAULT_CONFIDENCE_THRESHOLD,
+    RuleBasedDecisionExtractor,
+)
+from tradingagents.graph.signal_processing import SignalProcessor  # noqa: E402
+from tradingagents.utils.stock_utils import StockUtils  # noqa: E402
+
+CORPUS_PATH = project_root / "tests" / "tradingagents" / "fixtures" / "signal_reports.json"
+
+
+class DelayedStubLLM:
+    """按固定延迟返回 JSON 决策的桩模型"""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        content = '{"action": "持有", "target_price": 10.0, "confidence": 0.7, "risk_score": 0.5, "reasoning": "stub"}'
+        return type("Response", (), {"content": content})()
+
+
+def percentiles(timings: List[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    return f"{statistics.median(ordered):>9.3f}ms{p95:>9.3f}ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="最终决策提取延迟对比")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="模拟的 LLM 往返延迟（毫秒）")
+    parser.add_argument("--repeat", type=int, default=100, help="规则提取重复次数")
+    args = parser.parse_args()
+
+    corpus = json.loads(CORPUS_PATH.read_text(encoding="utf-8"))["reports"]
+    currencies = {
+        case["symbol"]: CURRENCY_BY_NAME.get(StockUtils.get_market_info(case["symbol"])["currency_name"])
+        for case in corpus
+    }
+
+    rule_timings, accepted = [], 0
+    for _ in range(args.repeat):
+        for case in corpus:
+            start = time.perf_counter()
+            extraction = RuleBasedDecisionExtractor(currencies[case["symbol"]]).extract(case["report"])
+            rule_timings.append((time.perf_counter() - start) * 1000)
+    for case in corpus:
+        extraction = RuleBasedDecisionExtractor(currencies[case["symbol"]]).extract(case["report"])
+        accepted += extraction.extraction_confidence >= DEFAULT_CONFIDENCE_THRESHOLD
+
+    llm = DelayedStubLLM(args.llm_latency_ms / 1000)
+    always_llm = SignalProcessor(llm, rule_confidence_threshold=1.01)
+    rule_first = SignalProcessor(llm)
+    timings = {"always_llm": [], "rule_first": []}
+    for name, processor in (("always_llm", always_llm), ("rule_first", rule_first)):
+        for case in corpus:
+            start = time.perf_counter()
+            processor.process_signal(case["report"], case["symbol"])
+            timings[name].append((time.perf_counter() - start) * 1000)
+
+    print(f"📊 语料: {len(corpus)} 篇报告，规则提取得分 ≥ {DEFAULT_CONFIDENCE_THRESHOLD} 的 {accepted} 篇跳过 LLM "
+          f"（{accepted / len(corpus):.0%}）")
+    print(f"{'路径':<24}{'p50':>11}{'p95':>11}{'总耗时':>12}")
+    print(f"{'规则提取（单次）':<24}{percentiles(rule_timings)}")
+    for name, label in (("always_llm", "总是调用 LLM"), ("rule_first", "规则优先，低分回退 LLM")):
+        print(f"{label:<24}{percentiles(timings[name])}{sum(timings[name]) / 1000:>11.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+数据源对冲请求模拟基准
+
+用合成延迟分布（均匀的基础延迟 + 一定概率的长尾延迟）模拟多个数据源，
+分别在关闭和开启对冲请求时调用 DataSourceManager.get_realtime_quotes_with_fallback，
+输出 p50/p95/p99 延迟以及对冲产生的额外调用比例，不访问任何外部接口。
+
+用法:
+    python scripts/development/benchmark_source_hedging.py
+    python scripts/development/benchmark_source_hedging.py --requests 2000 --tail-prob 0.05 --tail-ms 300
+    python scripts/development/benchmark_source_hedging.py --percentile 0.9 --budget 0.2
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from app.services.data_sources.base import DataSourceAdapter  # noqa: E402
+from app.services.data_sources.health import SourceHealthTracker  # noqa: E402
+from app.services.data_sources.hedging import HedgePolicy, RequestHedger  # noqa: E402
+from app.services.data_sources.manager import DataSourceManager  # noqa: E402
+
+
+class SyntheticAdapter(DataSourceAdapter):
+    """延迟服从合成分布的数据源"""
+
+    def __init__(self, name: str, base_ms=(20.0, 40.0), tail_prob: float = 0.02, tail_ms: float = 200.0, seed: int = 0):
+        super().__init__()
+        self._name = name
+        self.base_ms = base_ms
+        self.tail_prob = tail_prob
+        self.tail_ms = tail_ms
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def _get_default_priority(self) -> int:
+        return 1
+
+    def is_available(self) -> bool:
+        return True
+
+    def sample_latency(self) -> float:
+        with self._lock:
+            self.calls += 1
+            if self._rng.random() < self.tail_prob:
+                return self.tail_ms / 1000
+            return self._rng.uniform(*self.base_ms) / 1000
+
+    def get_realtime_quotes(self):
+        time.sleep(self.sample_latency())
+        return {"000001": {"close": 10.0, "pct_chg": 0.0, "amount": 1e8}}
+
+    def get_stock_list(self):
+        return None
+
+    def get_daily_basic(self, trade_date):
+        return None
+
+    def find_latest_trade_date(self):
+        return None
+
+    def get_kline(self, code, period="day", limit=120, adj=None):
+        return None
+
+    def get_news(self, code, days=2, limit=50, include_announcements=True):
+        return None
+
+
+def build_manager(adapters: List[DataSourceAdapter], policy: HedgePolicy) -> DataSourceManager:
+    manager = DataSourceManager.__new__(DataSourceManager)
+    manager.adapters = adapters
+    manager.health = SourceHealthTracker()
+    manager.hedger = RequestHedger(policy)
+    return manager
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def simulate(hedge: bool, requests: int, tail_prob: float, tail_ms: float, policy: HedgePolicy,
+             warmup: int = 50, seed: int = 7) -> Dict[str, float]:
+    """跑一轮模拟，返回延迟分位数（毫秒）和调用统计"""
+    adapters = [
+        SyntheticAdapter("primary", tail_prob=tail_prob, tail_ms=tail_ms, seed=seed),
+        SyntheticAdapter("secondary", tail_prob=tail_prob, tail_ms=tail_ms, seed=seed + 1),
+    ]
+    manager = build_manager(adapters, policy)
+    # 预热：积累主数据源的延迟样本，使对冲时机基于真实分位数
+    for _ in range(warmup):
+        manager.get_realtime_quotes_with_fallback(hedge=False)
+    for adapter in adapters:
+        adapter.calls = 0
+
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        quotes, _ = manager.get_realtime_quotes_with_fallback(hedge=hedge)
+        latencies.append(time.perf_counter() - start)
+        assert quotes
+    manager.hedger.shutdown()
+
+    hedging = manager.get_hedging_stats()
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "upstream_calls": sum(a.calls for a in adapters),
+        "hedges": hedging["hedges"],
+        "hedge_wins": hedging["hedge_wins"],
+        "extra_call_ratio": hedging["hedges"] / requests,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="数据源对冲请求模拟基准")
+    parser.add_argument("--requests", type=int, default=500, help="每轮请求数")
+    parser.add_argument("--tail-prob", type=float, default=0.03, help="长尾延迟概率")
+    parser.add_argument("--tail-ms", type=float, default=200.0, help="长尾延迟（毫秒）")
+    parser.add_argument("--percentile", type=float, default=0.95, help="触发对冲的延迟分位数")
+    parser.add_argument("--budget", type=float, default=0.1, help="额外调用比例上限")
+    args = parser.parse_args()
+
+    policy = HedgePolicy(percentile=args.percentile, budget_ratio=args.budget)
+    print(f"📊 {args.requests} 次请求/轮，长尾 {args.tail_prob:.0%} × {args.tail_ms:.0f}ms，"
+          f"对冲分位数 p{args.percentile * 100:.0f}，预算 {args.budget:.0%}")
+    print(f"{'mode':<10}{'p50':>9}{'p95':>9}{'p99':>9}{'mean':>9}{'calls':>8}{'hedges':>8}{'wins':>6}{'extra':>8}")
+    for hedge in (False, True):
+        r = simulate(hedge, args.requests, args.tail_prob, args.tail_ms, policy)
+        print(f"{'hedged' if hedge else 'baseline':<10}{r['p50_ms']:>8.1f}ms{r['p95_ms']:>7.1f}ms{r['p99_ms']:>7.1f}ms"
+              f"{r['mean_ms']:>7.1f}ms{r['upstream_calls']:>8}{r['hedges']:>8}{r['hedge_wins']:>6}{r['extra_call_ratio']:>8.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
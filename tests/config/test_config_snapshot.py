@@ -0,0 +1,119 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_MONGODB_STORAGE", "false")
+    from tradingagents.config.config_manager import ConfigManager
+
+    return ConfigManager(str(tmp_path))
+
+
+def test_snapshot_reused_until_file_changes(manager, monkeypatch):
+    first = manager.get_snapshot()
+    assert manager.get_snapshot() is first
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *a, **kw: opened.append(a[0]) or real_open(*a, **kw))
+    for _ in range(10):
+        manager.load_settings()
+        manager.load_pricing()
+        manager.load_models()
+    assert opened == []
+    monkeypatch.undo()
+
+    # 返回的是副本，修改不影响快照
+    settings = manager.load_settings()
+    settings["cost_alert_threshold"] = -1
+    assert manager.get_snapshot().settings["cost_alert_threshold"] != -1
+
+    # 外部进程修改文件：按 mtime 失效
+    data = json.loads(manager.settings_file.read_text(encoding="utf-8"))
+    data["cost_alert_threshold"] = 42.0
+    manager.settings_file.write_text(json.dumps(data), encoding="utf-8")
+    stat = manager.settings_file.stat()
+    os.utime(manager.settings_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = manager.get_snapshot()
+    assert second.version == first.version + 1
+    assert second.settings["cost_alert_threshold"] == 42.0
+    assert second.pricing is first.pricing
+
+
+def test_env_change_refreshes_settings(manager, monkeypatch):
+    monkeypatch.setenv("TRADINGAGENTS_LOG_LEVEL", "DEBUG")
+    assert manager.load_settings()["log_level"] == "DEBUG"
+    monkeypatch.setenv("TRADINGAGENTS_LOG_LEVEL", "WARNING")
+    assert manager.load_settings()["log_level"] == "WARNING"
+
+
+def test_change_listeners_notified_on_save_and_mongo_version(manager):
+    from tradingagents.config.config_manager import PricingConfig
+
+    manager.get_snapshot()
+    events = []
+    manager.add_change_listener(lambda old, new: events.append((old.version, new.version)))
+
+    manager.save_pricing(manager.load_pricing() + [PricingConfig("custom", "m1", 1.0, 2.0, "USD")])
+    assert len(events) == 1
+    assert manager.get_pricing_index()[("custom", "m1")].currency == "USD"
+
+    manager.notify_mongo_config_version(7)
+    assert len(events) == 2
+    assert manager.get_snapshot().mongo_config_version == 7
+
+    # 无变化时不通知
+    manager.get_snapshot()
+    assert len(events) == 2
+
+
+def test_bound_method_listeners_do_not_keep_owner_alive(manager):
+    import gc
+    import weakref
+
+    from tradingagents.config.config_manager import PricingConfig
+
+    class _Provider:
+        def __init__(self):
+            self.updates = 0
+            manager.add_change_listener(self._on_config_changed)
+
+        def _on_config_changed(self, old, new):
+            self.updates += 1
+
+    manager.get_snapshot()
+    kept = _Provider()
+    refs = [weakref.ref(_Provider()) for _ in range(5)]
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+    manager.save_pricing(manager.load_pricing() + [PricingConfig("custom", "m2", 1.0, 2.0, "USD")])
+    assert kept.updates == 1
+    assert len(manager._listeners) == 1
+
+    manager.remove_change_listener(kept._on_config_changed)
+    assert manager._listeners == []
+
+
+def test_mongo_version_read_outside_snapshot_lock(manager):
+    class _Collection:
+        def find_one(self, *args, **kwargs):
+            # 在快照锁内查询会阻塞其他读取快照的线程
+            calls.append(manager._snapshot_lock._is_owned())
+            return {"version": 3}
+
+    class _Storage:
+        db = type("_DB", (), {"system_configs": _Collection()})()
+
+        def is_connected(self):
+            return True
+
+    calls = []
+    manager.mongodb_storage = _Storage()
+    manager._mongo_version_checked_at = 0.0
+    assert manager.get_snapshot().mongo_config_version == 3
+    assert calls == [False]
@@ -0,0 +1,123 @@
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def tracker(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_MONGODB_STORAGE", "false")
+    from tradingagents.config.config_manager import ConfigManager, TokenTracker
+
+    manager = ConfigManager(str(tmp_path))
+    tracker = TokenTracker(manager)
+    yield tracker
+    tracker.flush()
+
+
+def test_track_usage_keeps_running_counters_and_batches_writes(tracker, monkeypatch):
+    manager = tracker.config_manager
+    persisted_batches = []
+    original = manager.persist_usage_records
+    monkeypatch.setattr(manager, "persist_usage_records",
+                        lambda records: persisted_batches.append(len(records)) or original(records))
+    # 记账路径上不应再读取定价/使用记录文件
+    load_pricing_calls = []
+    original_load_pricing = manager.load_pricing
+    monkeypatch.setattr(manager, "load_pricing",
+                        lambda: load_pricing_calls.append(1) or original_load_pricing())
+
+    for _ in range(5):
+        record = tracker.track_usage("dashscope", "qwen-turbo", 1000, 1000, session_id="s1")
+    tracker.track_usage("deepseek", "deepseek-chat", 1000, 0, session_id="s2")
+
+    assert record.cost == pytest.approx(0.008)
+    assert len(load_pricing_calls) <= 1
+    assert tracker.get_session_cost("s1") == pytest.approx(0.04)
+    summary = tracker.get_today_summary()
+    assert summary["requests"] == 6
+    assert summary["provider_stats"]["deepseek"]["cost"] == pytest.approx(0.0014)
+
+    tracker.flush()
+    assert sum(persisted_batches) == 6
+    assert len(persisted_batches) < 6
+    assert len(manager.load_usage_records()) == 6
+
+
+def test_pricing_index_refreshes_after_save(tracker):
+    from tradingagents.config.config_manager import PricingConfig
+
+    manager = tracker.config_manager
+    assert tracker.estimate_cost("custom", "m1", 1000, 1000) == (0.0, "CNY")
+
+    manager.save_pricing(manager.load_pricing() + [PricingConfig("custom", "m1", 1.0, 2.0, "USD")])
+    assert tracker.estimate_cost("custom", "m1", 1000, 1000) == (3.0, "USD")
+
+
+def test_cost_alert_uses_in_memory_total(tracker, monkeypatch):
+    manager = tracker.config_manager
+    settings = manager.load_settings()
+    settings["cost_alert_threshold"] = 0.01
+    manager.save_settings(settings)
+
+    tracker.track_usage("dashscope", "qwen-turbo", 1000, 1000, session_id="s1")
+    monkeypatch.setattr(manager, "get_usage_statistics", lambda days=30: pytest.fail("stats reloaded"))
+
+    # tradingagents.config 导出了同名的 config_manager 实例，需从 sys.modules 取模块
+    mod = sys.modules["tradingagents.config.config_manager"]
+
+    warnings = []
+    monkeypatch.setattr(mod.logger, "warning", lambda msg, *a, **kw: warnings.append(msg))
+    tracker.track_usage("dashscope", "qwen-turbo", 1000, 1000, session_id="s1")
+    assert any("成本警告" in w for w in warnings)
+
+
+def test_partial_mongo_failure_falls_back_only_for_failed_records(tracker):
+    from pymongo.errors import BulkWriteError
+
+    from tradingagents.config.mongodb_storage import MongoDBStorage
+
+    class _Collection:
+        def __init__(self):
+            self.docs = []
+
+        def insert_many(self, docs, ordered=True):
+            assert ordered is False
+            # 第 2 条写入失败，其余照常写入
+            self.docs.extend(d for i, d in enumerate(docs) if i != 1)
+            raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "boom"}], "nInserted": len(docs) - 1})
+
+    class _Rollups:
+        def __init__(self):
+            self.requests = 0
+
+        def bulk_write(self, ops, ordered=True):
+            self.requests += sum(op._doc["$inc"]["requests"] for op in ops)
+
+    storage = MongoDBStorage.__new__(MongoDBStorage)
+    storage.database_name, storage.collection_name = "test", "token_usage"
+    storage.collection, storage.rollup_collection = _Collection(), _Rollups()
+    storage._connected = True
+
+    manager = tracker.config_manager
+    manager.mongodb_storage = storage
+    records = [
+        manager.build_usage_record("dashscope", "qwen-turbo", 10, 10, session_id=f"s{i}") for i in range(3)
+    ]
+
+    assert manager.persist_usage_records(records)
+    assert len(storage.collection.docs) == 2
+    assert storage.rollup_collection.requests == 2
+    assert [r.session_id for r in manager.load_usage_records()] == ["s1"]
+
+
+def test_session_costs_are_bounded_and_evicted_sessions_read_from_storage(tracker, monkeypatch):
+    monkeypatch.setattr(tracker, "SESSION_COST_CACHE_SIZE", 3)
+    for i in range(5):
+        tracker.track_usage("dashscope", "qwen-turbo", 1000, 1000, session_id=f"s{i}")
+    # s0 被淘汰后再次记账，内存中只有部分累计，不再缓存
+    tracker.track_usage("dashscope", "qwen-turbo", 1000, 1000, session_id="s0")
+
+    assert list(tracker._session_costs) == ["s2", "s3", "s4"]
+    assert tracker.get_session_cost("s4") == pytest.approx(0.008)
+    assert tracker.get_session_cost("s0") == pytest.approx(0.016)
+    assert tracker.get_session_cost("s1") == pytest.approx(0.008)
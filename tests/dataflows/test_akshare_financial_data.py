@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from tradingagents.dataflows.cache.kv_store import SQLiteKVStore
+from tradingagents.dataflows.providers.china import akshare as akshare_module
+from tradingagents.dataflows.providers.china.akshare import AKShareProvider, financial_statement_ttl
+
+
+class _FakeAk:
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _fetch(self, name, symbol):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append((name, symbol))
+        return pd.DataFrame([{"报告期": pd.Timestamp("2024-09-30"), "营业收入": 1.5}])
+
+    def __getattr__(self, name):
+        return lambda symbol: self._fetch(name, symbol)
+
+
+class _Limiter:
+    def __init__(self):
+        self.acquired = 0
+
+    async def acquire(self):
+        self.acquired += 1
+
+
+def _provider(tmp_path, ak):
+    provider = AKShareProvider.__new__(AKShareProvider)
+    provider.ak = ak
+    provider.connected = True
+    provider._financial_cache = SQLiteKVStore(str(tmp_path / "fin.sqlite3"), namespace="akshare_financial")
+    provider._rate_limiter = _Limiter()
+    return provider
+
+
+def test_statements_are_fetched_concurrently_and_cached(tmp_path):
+    ak = _FakeAk()
+    provider = _provider(tmp_path, ak)
+
+    start = time.perf_counter()
+    first = asyncio.run(provider.get_financial_data("000001"))
+    elapsed = time.perf_counter() - start
+    second = asyncio.run(provider.get_financial_data("000001"))
+
+    assert set(first) == set(akshare_module.FINANCIAL_STATEMENTS)
+    assert elapsed < 0.3  # 四张报表串行需要 0.4 秒
+    # 日期列在缓存命中前后都还原为 Timestamp，与直接返回 DataFrame 记录时一致
+    assert first == second and first["balance_sheet"][0]["报告期"] == pd.Timestamp("2024-09-30")
+    assert len(ak.calls) == 4 and provider._rate_limiter.acquired == 4
+
+
+def test_bulk_fetch_bounds_parallelism_and_reports_progress(tmp_path):
+    provider = _provider(tmp_path, _FakeAk(delay=0))
+    active = 0
+    peak = 0
+    original = provider.get_financial_data
+
+    async def tracked(code):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        try:
+            return await original(code)
+        finally:
+            active -= 1
+
+    provider.get_financial_data = tracked
+    progress = []
+    codes = [f"00000{i}" for i in range(6)]
+
+    results = asyncio.run(provider.get_financial_data_bulk(
+        codes, max_concurrency=2, progress_callback=lambda done, total, code: progress.append((done, total))
+    ))
+
+    assert set(results) == set(codes)
+    assert peak == 2
+    assert progress[-1] == (6, 6) and len(progress) == 6
+
+
+def test_ttl_is_short_inside_disclosure_windows_and_long_outside():
+    assert financial_statement_ttl(datetime(2025, 4, 15)) == akshare_module.DISCLOSURE_WINDOW_TTL
+    assert financial_statement_ttl(datetime(2025, 10, 31, 12)) == akshare_module.DISCLOSURE_WINDOW_TTL
+    # 5 月 1 日到 7 月 1 日之间报表不会变化
+    assert financial_statement_ttl(datetime(2025, 5, 1)) == (datetime(2025, 7, 1) - datetime(2025, 5, 1)).total_seconds()
+    assert financial_statement_ttl(datetime(2025, 12, 1)) == (datetime(2026, 1, 1) - datetime(2025, 12, 1)).total_seconds()
+
+
+def test_shared_limiter_works_across_event_loops_and_threads():
+    from app.core.rate_limiter import AKShareRateLimiter
+
+    limiter = AKShareRateLimiter(max_calls=4, time_window=0.2)
+    errors = []
+
+    async def burst():
+        await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+    def worker():
+        try:
+            asyncio.run(burst())
+        except Exception as e:  # 绑定到其他事件循环时会抛 RuntimeError
+            errors.append(e)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    assert errors == []
+    assert limiter.total_calls == 9
+    # 9 次调用、每 0.2 秒最多 4 次：第 9 次至少要等两个窗口
+    assert elapsed >= 0.4
+    stamps = sorted(limiter.calls)
+    assert all(stamps[i + 4] - stamps[i] >= 0.2 for i in range(len(stamps) - 4))
@@ -0,0 +1,121 @@
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from tradingagents.dataflows.http_client import (
+    HostPolicy,
+    HttpClient,
+    TokenBucket,
+    install_akshare_http_client,
+    uninstall_akshare_http_client,
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = []
+    flaky_remaining = 0
+
+    def do_GET(self):
+        type(self).hits.append((self.path, self.headers.get("If-None-Match")))
+        if self.path.startswith("/flaky") and type(self).flaky_remaining > 0:
+            type(self).flaky_remaining -= 1
+            return self._reply(503, b"busy")
+        if self.path.startswith("/feed") and self.headers.get("If-None-Match") == '"v1"':
+            return self._reply(304, b"")
+        self._reply(200, b"<rss>ok</rss>", etag='"v1"')
+
+    def _reply(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = []
+    _Handler.flaky_remaining = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _client():
+    return HttpClient(policies={"127.0.0.1": HostPolicy(rate=1000, burst=100)}, backoff_base=0.01)
+
+
+def test_connections_are_reused_per_host(server):
+    client = _client()
+    for i in range(5):
+        assert client.get(f"{server}/quote?i={i}").status_code == 200
+
+    stats = client.get_stats()["127.0.0.1"]
+    assert stats["requests"] == 5 and stats["connections_opened"] == 1
+    assert stats["connection_reuse_rate"] == 0.8
+    client.close()
+
+
+def test_retries_transient_status_with_backoff(server):
+    client = _client()
+    _Handler.flaky_remaining = 2
+
+    assert client.get(f"{server}/flaky").status_code == 200
+    assert client.get_stats()["127.0.0.1"]["retries"] == 2
+
+    _Handler.flaky_remaining = 5
+    assert client.get(f"{server}/flaky", retries=0).status_code == 503
+    client.close()
+
+
+def test_cached_response_is_revalidated_with_etag(server, monkeypatch):
+    client = _client()
+    first = client.get(f"{server}/feed", cache_ttl=60)
+    again = client.get(f"{server}/feed", cache_ttl=60)
+    assert again is first and len(_Handler.hits) == 1
+
+    # 过期后带 If-None-Match 条件请求，304 时继续使用缓存的响应
+    for entry in client._cache.values():
+        entry.expires_at = 0
+    revalidated = client.get(f"{server}/feed", cache_ttl=60)
+    assert revalidated is first and revalidated.text == "<rss>ok</rss>"
+    assert _Handler.hits[-1] == ("/feed", '"v1"')
+    stats = client.get_stats()["127.0.0.1"]
+    assert stats["cache_hits"] == 1 and stats["not_modified"] == 1
+    client.close()
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+
+
+def test_akshare_modules_are_routed_without_patching_requests(monkeypatch):
+    # 使用独立的包名，不改动已导入的真实 akshare 模块
+    package = "fake_akshare"
+    fake = types.ModuleType(f"{package}.stock")
+    fake.requests = requests
+    monkeypatch.setitem(sys.modules, f"{package}.stock", fake)
+    original_get = requests.get
+
+    try:
+        assert install_akshare_http_client(package) == 1
+        assert fake.requests is not requests
+        assert fake.requests.Session is requests.Session
+        assert requests.get is original_get
+    finally:
+        assert uninstall_akshare_http_client(package) == 1
+    assert fake.requests is requests
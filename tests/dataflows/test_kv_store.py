@@ -0,0 +1,63 @@
+import json
+import os
+import time
+
+from tradingagents.dataflows.cache.kv_store import SQLiteKVStore
+
+
+def test_writes_are_batched_and_visible_across_connections(tmp_path):
+    db_path = str(tmp_path / "kv.sqlite3")
+    writer = SQLiteKVStore(db_path, namespace="hk_stock", flush_interval=60, flush_batch_size=3)
+    reader = SQLiteKVStore(db_path, namespace="hk_stock")
+
+    writer.set("name_0700", "腾讯控股", source="builtin_mapping")
+    writer.set("financial_00700", {"eps_basic": 1.2})
+    # 未达到批量阈值，尚未落盘，但本进程可立即读到
+    assert writer.get("name_0700") == "腾讯控股"
+    assert reader.get("name_0700") is None
+
+    writer.set("name_0941", "中国移动")
+    assert reader.get("name_0700") == "腾讯控股"
+    assert reader.get("financial_00700") == {"eps_basic": 1.2}
+
+    writer.close()
+    reader.close()
+
+
+def test_per_entry_ttl_and_purge(tmp_path):
+    store = SQLiteKVStore(str(tmp_path / "kv.sqlite3"), default_ttl=3600)
+    store.set("short", "x", ttl=0.05)
+    store.set("long", "y")
+    store.set("forever", "z", ttl=None)
+    time.sleep(0.1)
+
+    assert store.get("short") is None
+    assert store.get("long") == "y"
+    assert store.purge_expired() == 1
+    assert len(store) == 2
+
+    store.delete("long")
+    store.flush()
+    assert SQLiteKVStore(store.db_path).get("long") is None
+    store.close()
+
+
+def test_hk_provider_uses_store_and_migrates_legacy_json(tmp_path, monkeypatch):
+    import tradingagents.dataflows.providers.hk.improved_hk as mod
+
+    monkeypatch.setattr(mod, "get_cache_dir", lambda subdir=None, create=True: str(tmp_path))
+    legacy = {
+        "name_9999": {"data": "旧缓存名称", "timestamp": time.time(), "source": "unified_api"},
+        "name_8888": {"data": "已过期", "timestamp": 0},
+    }
+    (tmp_path / "hk_stock_cache.json").write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+
+    provider = mod.ImprovedHKStockProvider()
+    assert not os.path.exists(provider.cache_file)
+    assert provider.get_company_name("9999") == "旧缓存名称"
+    assert provider.cache.get("name_8888") is None
+
+    assert provider.get_company_name("0700.HK") == "腾讯控股"
+    provider.cache.flush()
+    assert SQLiteKVStore(provider.cache_db_file, namespace="hk_stock").get("name_0700.HK") == "腾讯控股"
+    provider.cache.close()
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _run(code: str) -> str:
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return proc.stdout.strip().splitlines()[-1]
+
+
+def test_importing_dataflows_does_not_load_heavy_modules():
+    out = _run(
+        "import sys, tradingagents.dataflows; "
+        "heavy = ['tradingagents.dataflows.interface', 'tradingagents.dataflows.providers', "
+        "'tradingagents.dataflows.news', 'yfinance', 'stockstats']; "
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    assert out == "[]"
+
+
+def test_lazy_attributes_resolve_on_first_access():
+    out = _run(
+        "import sys, tradingagents.dataflows as d; "
+        "f = d.get_china_stock_data_unified; "
+        "from tradingagents.dataflows.interface import get_china_stock_data_unified as g; "
+        "print(f is g, 'get_china_stock_data_unified' in vars(d), "
+        "isinstance(d.STOCKSTATS_AVAILABLE, bool), 'get_YFin_data' in dir(d))"
+    )
+    assert out == "True True True True"
+
+
+def test_unknown_attribute_raises_attribute_error():
+    import tradingagents.dataflows as d
+
+    try:
+        d.definitely_not_exported
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("expected AttributeError")
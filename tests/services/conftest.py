@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from app.services.data_sources.base import DataSourceAdapter
+from app.services.data_sources.health import SourceHealthTracker
+from app.services.data_sources.hedging import HedgePolicy, RequestHedger
+from app.services.data_sources.manager import DataSourceManager
+
+
+class FakeAdapter(DataSourceAdapter):
+    """可控延迟/失败的数据源；stall_every=N 时每第 N 次调用挂起，直到 release()"""
+
+    def __init__(self, name, delay=0.0, fail=False, stall_every=0):
+        super().__init__()
+        self._name = name
+        self.delay = delay
+        self.fail = fail
+        self.stall_every = stall_every
+        self.calls = 0
+        self.stalled = []
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self._name
+
+    def _get_default_priority(self):
+        return 1
+
+    def is_available(self):
+        return True
+
+    def release(self):
+        """放行所有挂起中的调用"""
+        with self._lock:
+            for gate in self.stalled:
+                gate.set()
+
+    def _respond(self, value):
+        gate = None
+        with self._lock:
+            self.calls += 1
+            if self.stall_every and self.calls % self.stall_every == 0:
+                gate = threading.Event()
+                self.stalled.append(gate)
+        if gate is not None:
+            gate.wait(timeout=5)
+        elif self.delay:
+            time.sleep(self.delay)
+        if self.fail == "raise":
+            raise TimeoutError(f"{self._name} timed out")
+        return None if self.fail else value
+
+    def get_stock_list(self):
+        return None
+
+    def get_daily_basic(self, trade_date):
+        return None
+
+    def find_latest_trade_date(self):
+        return self._respond("20250102")
+
+    def get_realtime_quotes(self):
+        return self._respond({"000001": {"close": 10.0, "pct_chg": 0.1, "amount": 1e8}})
+
+    def get_kline(self, code, period="day", limit=120, adj=None):
+        return self._respond([{"time": "2025-01-02", "close": 10.0}])
+
+    def get_news(self, code, days=2, limit=50, include_announcements=True):
+        return self._respond([])
+
+
+@pytest.fixture
+def fake_adapter():
+    """创建 FakeAdapter，测试结束时放行所有挂起的调用"""
+    adapters = []
+
+    def factory(name, **kwargs):
+        adapter = FakeAdapter(name, **kwargs)
+        adapters.append(adapter)
+        return adapter
+
+    yield factory
+    for adapter in adapters:
+        adapter.release()
+
+
+@pytest.fixture
+def make_manager():
+    """绕过 __init__ 组装 DataSourceManager（不连接真实数据源），测试结束时关闭对冲线程池
+
+    默认关闭降级排序（degraded_error_rate > 1），单独验证熔断器；其余关键字参数传给 HedgePolicy。
+    """
+    managers = []
+
+    def factory(*adapters, open_seconds=0.1, degraded_error_rate=1.1, max_workers=4, **policy):
+        manager = DataSourceManager.__new__(DataSourceManager)
+        manager.adapters = list(adapters)
+        manager.health = SourceHealthTracker(open_seconds=open_seconds, degraded_error_rate=degraded_error_rate)
+        manager.hedger = RequestHedger(HedgePolicy(**policy), max_workers=max_workers)
+        managers.append(manager)
+        return manager
+
+    yield factory
+    for manager in managers:
+        manager.hedger.shutdown()
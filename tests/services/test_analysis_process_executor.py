@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+
+def _quick_runner(task_id, user_id, request, progress_tracker):
+    from app.services.progress.pipeline import get_progress_pipeline
+
+    for i in (10, 50, 90):
+        get_progress_pipeline().submit(task_id, progress=i, message=f"step {i}", step="s")
+    return {"task_id": task_id, "symbol": request["symbol"], "pid": os.getpid()}
+
+
+def _progress_loop_runner(task_id, user_id, request, progress_tracker):
+    from app.services.progress.pipeline import get_progress_pipeline
+
+    while True:
+        # 取消信号在进度回调处生效，分析代码中的 except Exception 不会吞掉它
+        try:
+            get_progress_pipeline().submit(task_id, progress=1, message="loop", step="s")
+        except Exception:
+            pass
+        time.sleep(0.02)
+
+
+def _hang_runner(task_id, user_id, request, progress_tracker):
+    time.sleep(60)
+
+
+class _FakePipeline:
+    def __init__(self):
+        self.updates = []
+
+    def submit(self, task_id, progress=None, message=None, step=None, tracker_payload=None):
+        self.updates.append((task_id, progress))
+        return True
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    import app.services.progress.pipeline as pipeline_module
+
+    fake = _FakePipeline()
+    monkeypatch.setattr(pipeline_module, "_progress_pipeline", fake)
+    return fake
+
+
+def test_runs_in_warm_workers_and_streams_progress(pipeline):
+    from app.services.analysis.process_executor import ProcessAnalysisExecutor
+
+    executor = ProcessAnalysisExecutor(max_workers=2, preload=False, runner=_quick_runner)
+
+    async def _run():
+        await executor.warm_up()
+        try:
+            return await asyncio.gather(*[
+                executor.run(f"t{n}", "u", {"symbol": f"00000{n}"}) for n in range(4)
+            ])
+        finally:
+            await executor.shutdown()
+
+    results = asyncio.run(_run())
+
+    assert [r["symbol"] for r in results] == [f"00000{n}" for n in range(4)]
+    assert len({r["pid"] for r in results}) <= 2
+    assert all(r["pid"] != os.getpid() for r in results)
+    for n in range(4):
+        assert [p for tid, p in pipeline.updates if tid == f"t{n}"] == [10, 50, 90]
+    stats = executor.get_stats()
+    assert stats["completed"] == 4 and stats["respawned"] == 0
+
+
+def test_cancel_is_graceful_then_kills_only_that_worker(pipeline):
+    from app.services.analysis.process_executor import AnalysisCancelledError, ProcessAnalysisExecutor
+
+    executor = ProcessAnalysisExecutor(max_workers=2, preload=False, cancel_grace_seconds=0.5,
+                                       runner=_progress_loop_runner)
+
+    async def _run():
+        await executor.warm_up()
+        try:
+            graceful = asyncio.create_task(executor.run("loop", "u", {}))
+            await asyncio.sleep(0.5)
+            assert executor.cancel("loop")
+            with pytest.raises(AnalysisCancelledError):
+                await asyncio.wait_for(graceful, 5)
+            assert executor.get_stats()["killed"] == 0
+
+            executor.runner = _hang_runner
+            # 已预热的进程仍使用原 runner，这里强制新建进程
+            for worker in list(executor._workers):
+                worker.process.terminate()
+                worker.process.join(5)
+            hanging = asyncio.create_task(executor.run("hang", "u", {}))
+            await asyncio.sleep(0.5)
+            assert executor.cancel("hang")
+            with pytest.raises(AnalysisCancelledError):
+                await asyncio.wait_for(hanging, 10)
+            assert executor.get_stats()["killed"] == 1
+            assert not executor.cancel("missing")
+        finally:
+            await executor.shutdown()
+
+    asyncio.run(_run())
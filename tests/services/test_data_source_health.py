@@ -0,0 +1,120 @@
+import time
+
+from app.services.data_sources.health import CLOSED, HALF_OPEN, OPEN, SourceHealthTracker
+
+
+def test_breaker_opens_and_skips_slow_failing_primary(fake_adapter, make_manager):
+    primary = fake_adapter("primary", delay=0.05, fail="raise")
+    backup = fake_adapter("backup")
+    manager = make_manager(primary, backup, open_seconds=60)
+
+    latencies = []
+    for _ in range(10):
+        start = time.perf_counter()
+        quotes, source = manager.get_realtime_quotes_with_fallback()
+        latencies.append(time.perf_counter() - start)
+        assert source == "backup" and quotes
+
+    # 连续失败 3 次后熔断，后续调用不再等待慢源
+    assert primary.calls == 3
+    assert max(latencies[3:]) < 0.01 <= min(latencies[:3])
+    stats = {(s["source"], s["method"]): s for s in manager.get_health_stats()}
+    assert stats[("primary", "realtime_quotes")]["state"] == OPEN
+    assert stats[("primary", "realtime_quotes")]["last_error"] == "primary timed out"
+
+
+def test_degraded_primary_is_demoted_before_breaker_opens(fake_adapter, make_manager):
+    primary = fake_adapter("primary", delay=0.05, fail="raise")
+    manager = make_manager(primary, fake_adapter("backup"), open_seconds=60, degraded_error_rate=0.5)
+
+    for _ in range(5):
+        assert manager.get_realtime_quotes_with_fallback()[1] == "backup"
+
+    # EWMA 失败率超过阈值后排到备用源之后，不必等连续失败触发熔断
+    assert primary.calls == 2
+    stats = manager.get_health_stats()
+    assert [(s["source"], s["tier"], s["state"]) for s in stats] == [("backup", 0, CLOSED), ("primary", 1, CLOSED)]
+
+
+def test_half_open_probe_recovers_primary_after_cooldown(fake_adapter, make_manager):
+    primary = fake_adapter("primary", fail="raise")
+    backup = fake_adapter("backup")
+    manager = make_manager(primary, backup)
+
+    for _ in range(4):
+        assert manager.get_kline_with_fallback("000001")[1] == "backup"
+    assert primary.calls == 3
+
+    time.sleep(0.12)
+    primary.fail = False
+    assert manager.get_kline_with_fallback("000001")[1] == "primary"
+    assert manager.health._get("primary", "kline").state == CLOSED
+
+    # 熔断是按方法区分的，其他方法不受影响
+    assert manager.find_latest_trade_date_with_fallback() == "20250102"
+    assert primary.calls == 5
+
+
+def test_failed_probe_reopens_and_open_sources_are_last_resort(fake_adapter, make_manager):
+    primary = fake_adapter("primary", fail="raise")
+    backup = fake_adapter("backup", fail="raise")
+    manager = make_manager(primary, backup, open_seconds=60)
+
+    for _ in range(3):
+        assert manager.get_kline_with_fallback("000001") == (None, None)
+
+    # 全部熔断时仍作为最后手段尝试，恢复的源立即被使用
+    backup.fail = False
+    assert manager.get_kline_with_fallback("000001")[1] == "backup"
+    assert manager.health._get("backup", "kline").state == CLOSED
+
+    tracker = SourceHealthTracker(open_seconds=0)
+    for _ in range(3):
+        tracker.record("s", "m", False, 0.01)
+    assert tracker.allow("s", "m") and tracker._get("s", "m").state == HALF_OPEN
+    assert not tracker.allow("s", "m")  # 只放行一次探测
+    tracker.record("s", "m", False, 0.01)
+    assert tracker._get("s", "m").state == OPEN
+
+
+def test_empty_symbol_results_do_not_open_breaker(fake_adapter, make_manager):
+    primary = fake_adapter("primary", fail=True)  # 该股票没有数据，返回空结果
+    backup = fake_adapter("backup")
+    manager = make_manager(primary, backup, open_seconds=60)
+
+    for _ in range(5):
+        assert manager.get_kline_with_fallback("000001")[1] == "backup"
+        assert manager.get_news_with_fallback("000001") == (None, None)
+
+    # 空结果仍回退到下一个数据源，但不计入失败，熔断器保持关闭
+    assert primary.calls == 10
+    for method in ("kline", "news"):
+        health = manager.health._get("primary", method)
+        assert (health.state, health.failures, health.ewma_error) == (CLOSED, 0, 0.0)
+        assert health.calls == 5
+
+    # 按市场整体查询的方法返回空结果仍计为失败
+    for _ in range(3):
+        assert manager.get_realtime_quotes_with_fallback()[1] == "backup"
+    assert manager.health._get("primary", "realtime_quotes").state == OPEN
+
+    # 中性结果释放 half_open 探测名额，但不关闭熔断器
+    tracker = SourceHealthTracker(open_seconds=0)
+    for _ in range(3):
+        tracker.record("s", "m", False, 0.01)
+    assert tracker.allow("s", "m")
+    tracker.record_empty("s", "m", 0.01)
+    assert tracker._get("s", "m").state == HALF_OPEN and tracker.allow("s", "m")
+
+
+def test_slow_or_degraded_sources_are_reordered(fake_adapter):
+    tracker = SourceHealthTracker(slow_threshold=1.0)
+    adapters = [fake_adapter("a"), fake_adapter("b"), fake_adapter("c")]
+
+    assert [a.name for a in tracker.order("quotes", adapters)] == ["a", "b", "c"]
+    tracker.record("a", "quotes", True, 5.0)
+    tracker.record("b", "quotes", False, 0.1)
+    tracker.record("b", "quotes", False, 0.1)
+    assert [a.name for a in tracker.order("quotes", adapters)] == ["c", "a", "b"]
+    # 其他方法保持静态优先级
+    assert [a.name for a in tracker.order("kline", adapters)] == ["a", "b", "c"]
@@ -0,0 +1,129 @@
+import threading
+import time
+
+from app.services.data_sources.hedging import HedgeBudget
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_hedge_wins_every_stalled_primary_within_budget(fake_adapter, make_manager):
+    # 主数据源每第 10 次调用挂起，只有对冲请求能让这些请求返回
+    primary = fake_adapter("primary", stall_every=10)
+    secondary = fake_adapter("secondary")
+    manager = make_manager(primary, secondary, default_delay=0.05, min_samples=1000, budget_ratio=0.2)
+
+    for _ in range(200):
+        items, source = manager.get_kline_with_fallback("000001", hedge=True)
+        assert items
+        if primary.calls % 10 == 0:
+            assert source == "secondary"
+        primary.release()
+
+    stats = manager.get_hedging_stats()
+    assert stats["requests"] == 200 and stats["hedge_wins"] >= 20
+    # 开始前被取消的对冲不计入，对冲次数与额外上游调用一一对应，且受预算约束
+    assert stats["hedges"] == secondary.calls <= 200 * 0.2
+
+
+def test_budget_caps_hedges_for_a_persistently_slow_primary(fake_adapter, make_manager):
+    primary = fake_adapter("primary", delay=0.02)
+    secondary = fake_adapter("secondary")
+    manager = make_manager(primary, secondary, default_delay=0.005, min_samples=1000, budget_ratio=0.1, max_tokens=2)
+
+    for _ in range(40):
+        assert manager.get_realtime_quotes_with_fallback(hedge=True)[0]
+    stats = manager.get_hedging_stats()
+
+    # 40 个请求累计 4 个令牌：实际发出的对冲不超过 4 次，其余请求被预算拒绝
+    assert 0 < secondary.calls == stats["hedges"] <= 4 < stats["budget_denied"]
+
+
+def test_failed_primary_falls_back_without_spending_budget(fake_adapter, make_manager):
+    primary = fake_adapter("primary", fail=True)
+    secondary = fake_adapter("secondary")
+    manager = make_manager(primary, secondary, default_delay=0.5)
+
+    assert manager.get_kline_with_fallback("000001", hedge=True)[1] == "secondary"
+    assert manager.get_hedging_stats()["hedges"] == 0
+
+
+def test_budget_accrues_per_request_and_is_capped():
+    budget = HedgeBudget(ratio=0.5, max_tokens=1)
+    assert not budget.try_spend()
+    for _ in range(5):
+        budget.on_request()
+    assert budget.try_spend() and not budget.try_spend()
+    budget.on_request()
+    budget.on_request()
+    assert budget.try_spend()
+    budget.refund()
+    assert budget.hedges == 1 and budget.try_spend()
+
+
+def test_cancelled_hedge_releases_probe_and_is_not_counted(fake_adapter, make_manager):
+    from concurrent.futures import Future
+
+    primary = fake_adapter("primary")
+    secondary = fake_adapter("secondary")
+    manager = make_manager(primary, secondary, default_delay=0.001, max_tokens=1, budget_ratio=1.0)
+
+    # secondary 熔断冷却期已满，下一次放行即为 half_open 探测
+    health = manager.health
+    for _ in range(health.failure_threshold):
+        health.record("secondary", "kline", False, 0.01)
+    health._get("secondary", "kline").opened_at -= health.open_seconds + 1
+
+    futures = {}
+
+    def submit(fn, *args):
+        # 模拟对冲线程刚提交还未开始时主请求返回，尚未开始的对冲请求被取消
+        futures[args[0].name] = future = Future()
+        if args[0] is secondary:
+            futures["primary"].set_result([{"time": "2025-01-02", "close": 10.0}])
+        return future
+
+    manager.hedger.submit = manager.hedger.submit_primary = submit
+    assert manager.get_kline_with_fallback("000001", hedge=True)[1] == "primary"
+
+    assert futures["secondary"].cancelled()
+    assert secondary.calls == 0
+    stats = manager.get_hedging_stats()
+    assert stats["hedges"] == 0 and stats["extra_call_ratio"] == 0.0
+    # 探测名额未被占用，冷却期满的 secondary 仍可被探测
+    assert health.can_attempt("secondary", "kline")
+    assert health.allow("secondary", "kline")
+
+
+def test_saturated_hedge_pool_skips_hedging_instead_of_queueing(fake_adapter, make_manager):
+    primary = fake_adapter("primary", stall_every=1)
+    secondary = fake_adapter("secondary", stall_every=1)
+    manager = make_manager(
+        primary, secondary, max_workers=1, default_delay=0.001, min_samples=1000, budget_ratio=1.0
+    )
+    sources = []
+
+    def request():
+        sources.append(manager.get_kline_with_fallback("000001", hedge=True)[1])
+
+    # 第一个请求的主请求挂起，对冲请求在独立线程池中照常发出并占满唯一的对冲线程
+    first = threading.Thread(target=request)
+    first.start()
+    _wait_until(lambda: secondary.calls == 1)
+
+    # 第二个请求不再排队对冲，退回令牌，只等待自己的主请求
+    second = threading.Thread(target=request)
+    second.start()
+    _wait_until(lambda: manager.get_hedging_stats()["pool_saturated"] == 1 and primary.calls == 2)
+    primary.release()
+    secondary.release()
+    first.join(5)
+    second.join(5)
+
+    stats = manager.get_hedging_stats()
+    assert stats["hedges"] == 1 and secondary.calls == 1 and primary.calls == 2
+    assert len(sources) == 2 and set(sources) <= {"primary", "secondary"}
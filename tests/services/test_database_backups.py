@@ -0,0 +1,346 @@
+import asyncio
+import gzip
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import mongomock
+import pytest
+from bson import Decimal128, ObjectId
+
+from app.services.database import backups
+from app.services.database.serialization import from_extended_json, to_extended_json
+
+
+class _AsyncCursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class _AsyncColl:
+    """Minimal motor-like wrapper around a mongomock collection"""
+
+    def __init__(self, coll):
+        self._coll = coll
+
+    def find(self, *args, **kwargs):
+        return _AsyncCursor(self._coll.find(*args, **kwargs))
+
+    async def find_one(self, query):
+        return self._coll.find_one(query)
+
+    async def insert_one(self, doc):
+        return self._coll.insert_one(doc)
+
+    async def insert_many(self, docs, ordered=True):
+        return self._coll.insert_many(docs, ordered=ordered)
+
+    async def delete_many(self, query):
+        return self._coll.delete_many(query)
+
+    async def bulk_write(self, operations, ordered=True):
+        # mongomock 的 bulk_write 与当前 pymongo 的 ReplaceOne 不兼容，逐条执行
+        upserted = matched = inserted = 0
+        for op in operations:
+            if hasattr(op, "_filter"):
+                result = self._coll.replace_one(op._filter, op._doc, upsert=op._upsert)
+                upserted += result.upserted_id is not None
+                matched += result.matched_count
+            else:
+                self._coll.insert_one(op._doc)
+                inserted += 1
+        return _Result(upserted_count=upserted, matched_count=matched, inserted_count=inserted)
+
+
+class _AsyncDb:
+    def __init__(self):
+        self._db = mongomock.MongoClient().db
+
+    def __getitem__(self, name):
+        return _AsyncColl(self._db[name])
+
+    def __getattr__(self, name):
+        return self[name]
+
+    async def list_collection_names(self):
+        return self._db.list_collection_names()
+
+
+def _seed(db):
+    base = datetime(2024, 3, 8, 15, 0, 0, 123000)
+    db._db.stock_daily_quotes.insert_many([
+        {
+            "symbol": f"{i:06d}", "trade_date": "2024-03-08", "close": 10.0 + i / 100, "volume": 1000 * i,
+            "amount": Decimal128("123456.78"), "updated_at": base + timedelta(seconds=i),
+            "tags": ["a", {"at": base}], "nested": {"ref": ObjectId(), "note": "平安银行"},
+        }
+        for i in range(2500)
+    ])
+    db._db.users.insert_many([{"username": "admin", "created_at": base, "settings": {"theme": "dark"}}])
+    db._db.create_collection("empty_collection")
+
+
+def _snapshot(db, name):
+    return sorted(db._db[name].find(), key=lambda doc: str(doc["_id"]))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = _AsyncDb()
+    monkeypatch.setattr(backups, "get_mongo_db", lambda: db)
+    return db
+
+
+def test_backup_restore_round_trip_preserves_bson_types(db, tmp_path):
+    _seed(db)
+    expected = {name: _snapshot(db, name) for name in ("stock_daily_quotes", "users")}
+    progress = []
+
+    info = asyncio.run(backups.create_backup("nightly", str(tmp_path), batch_size=1000))
+    assert info["filename"].endswith(".ndjson.gz") and info["documents"] == 2501
+    meta = db._db.database_backups.find_one()
+    assert sorted((e["name"], e["documents"]) for e in meta["manifest"]) == [
+        ("empty_collection", 0), ("stock_daily_quotes", 2500), ("users", 1),
+    ]
+
+    for name in expected:
+        db._db[name].drop()
+    result = asyncio.run(backups.restore_backup(
+        info["id"], overwrite=True, batch_size=1000, progress_callback=lambda *args: progress.append(args),
+    ))
+
+    assert result["total_inserted"] == 2501 and result["verified"]
+    assert sorted(result["collections"]) == ["stock_daily_quotes", "users"]
+    for name, docs in expected.items():
+        assert _snapshot(db, name) == docs
+    assert progress[:3] == [
+        ("stock_daily_quotes", 1000, 2500), ("stock_daily_quotes", 2000, 2500), ("stock_daily_quotes", 2500, 2500),
+    ]
+
+
+def test_restore_upserts_by_id_and_overwrite_clears_collection(db, tmp_path):
+    _seed(db)
+    info = asyncio.run(backups.create_backup("nightly", str(tmp_path), collections=["users"]))
+    db._db.users.update_many({}, {"$set": {"settings.theme": "light"}})
+    db._db.users.insert_one({"username": "guest"})
+
+    # 非覆盖模式：按 _id 替换，重复恢复不产生重复文档
+    for _ in range(2):
+        asyncio.run(backups.restore_backup(info["id"]))
+    users = {doc["username"]: doc for doc in db._db.users.find()}
+    assert set(users) == {"admin", "guest"} and users["admin"]["settings"]["theme"] == "dark"
+
+    asyncio.run(backups.restore_backup(info["id"], overwrite=True))
+    assert [doc["username"] for doc in db._db.users.find()] == ["admin"]
+
+
+def test_restore_only_selected_collections(db, tmp_path):
+    _seed(db)
+    info = asyncio.run(backups.create_backup("nightly", str(tmp_path)))
+    db._db.stock_daily_quotes.drop()
+    db._db.users.drop()
+
+    result = asyncio.run(backups.restore_backup(info["id"], collections=["users"]))
+    assert result["collections"] == ["users"]
+    assert db._db.stock_daily_quotes.count_documents({}) == 0
+
+
+def test_import_data_streams_backup_file_objects(db, tmp_path):
+    _seed(db)
+    info = asyncio.run(backups.create_backup("nightly", str(tmp_path)))
+    expected = _snapshot(db, "stock_daily_quotes")
+    db._db.stock_daily_quotes.drop()
+
+    with open(info["file_path"], "rb") as upload:
+        result = asyncio.run(backups.import_data(upload, "ignored", filename=info["filename"], overwrite=True))
+    assert result["mode"] == "multi_collection" and result["total_inserted"] == 2501
+    assert result["filename"] == info["filename"]
+    assert _snapshot(db, "stock_daily_quotes") == expected
+
+
+def _rewrite_members(path, transform):
+    """解压备份的全部行，经 transform 处理后重新按集合写成 gzip member"""
+    with gzip.open(path, "rb") as f:
+        lines = transform(f.read().splitlines(keepends=True))
+    with open(path, "wb") as raw:
+        for line in lines:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as member:
+                member.write(line)
+
+
+def test_corrupted_or_truncated_backups_are_rejected_before_writing(db, tmp_path):
+    _seed(db)
+    info = asyncio.run(backups.create_backup("nightly", str(tmp_path), collections=["users"]))
+    with open(info["file_path"], "rb") as f:
+        pristine = f.read()
+    db._db.users.drop()
+
+    def tamper(lines):
+        lines[1] = lines[1].replace(b"dark", b"DARK")
+        return lines
+
+    _rewrite_members(info["file_path"], tamper)
+    with pytest.raises(Exception, match="校验失败"):
+        asyncio.run(backups.restore_backup(info["id"]))
+    assert db._db.users.count_documents({}) == 0
+
+    with open(info["file_path"], "wb") as f:
+        f.write(pristine)
+    _rewrite_members(info["file_path"], lambda lines: lines[:-1])
+    with pytest.raises(Exception, match="缺少清单"):
+        asyncio.run(backups.import_data(open(info["file_path"], "rb"), "ignored"))
+    assert db._db.users.count_documents({}) == 0
+
+
+def test_legacy_json_exports_still_import(db):
+    export = {
+        "export_info": {"created_at": "2024-03-08T00:00:00", "collections": ["users"]},
+        "data": {"users": [{"_id": str(ObjectId()), "username": "admin", "created_at": "2024-03-08T00:00:00"}]},
+    }
+    result = asyncio.run(backups.import_data(json.dumps(export).encode("utf-8"), "ignored"))
+    assert result["mode"] == "multi_collection" and result["total_inserted"] == 1
+    assert db._db.users.find_one()["created_at"] == datetime(2024, 3, 8)
+
+    single = asyncio.run(backups.import_data(b'[{"name": "a"}, {"name": "b"}]', "imported", format="json"))
+    assert single["mode"] == "single_collection" and single["inserted_count"] == 2
+
+
+# ---------------------------------------------------------------- 大数据量内存上限
+
+
+def _synthetic_doc(i):
+    return {
+        "_id": ObjectId(f"{i:024x}"), "symbol": f"{i % 5000:06d}", "trade_date": f"2024-{i % 12 + 1:02d}-15",
+        "open": 10.01 + i % 97, "high": 10.51 + i % 97, "low": 9.81 + i % 97, "close": 10.21 + i % 97,
+        "volume": 100000 + i, "amount": 1234567.89 + i, "data_source": "tushare",
+        "updated_at": datetime(2024, 3, 8) + timedelta(seconds=i),
+    }
+
+
+class _SyntheticCollection:
+    """按需生成文档的只读集合，不在内存中保存数据"""
+
+    def __init__(self, count):
+        self.count = count
+
+    def find(self):
+        return _AsyncCursor(_synthetic_doc(i) for i in range(self.count))
+
+
+class _CheckingCollection:
+    """只校验写入的文档（按 _id 顺序、类型还原），不保存数据"""
+
+    def __init__(self):
+        self.count = 0
+
+    async def delete_many(self, query):
+        return _Result(deleted_count=0)
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            assert doc["_id"] == ObjectId(f"{self.count:024x}")
+            assert doc["updated_at"] == datetime(2024, 3, 8) + timedelta(seconds=self.count)
+            self.count += 1
+        return _Result(inserted_ids=[doc["_id"] for doc in docs])
+
+
+class _MetaCollection:
+    def __init__(self):
+        self.doc = None
+
+    async def insert_one(self, doc):
+        self.doc = doc
+
+    async def find_one(self, query):
+        return self.doc
+
+
+class _SyntheticDb:
+    def __init__(self, collections):
+        self.collections = collections
+        self.database_backups = _MetaCollection()
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+
+LARGE_SIZES = {"stock_daily_quotes": 160000, "stock_weekly_quotes": 40000}
+
+
+def _large_round_trip(backup_dir):
+    """在独立进程中执行：备份并恢复合成数据集，返回峰值 RSS 的增长（KB）"""
+    import resource
+
+    source = _SyntheticDb({name: _SyntheticCollection(count) for name, count in LARGE_SIZES.items()})
+    target = _SyntheticDb({name: _CheckingCollection() for name in LARGE_SIZES})
+    target.database_backups = source.database_backups
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    backups.get_mongo_db = lambda: source
+    info = asyncio.run(backups.create_backup("large", backup_dir, collections=list(LARGE_SIZES)))
+    backup_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+
+    backups.get_mongo_db = lambda: target
+    result = asyncio.run(backups.restore_backup(info["id"], overwrite=True))
+    return {
+        "documents": info["documents"],
+        "restored": result["total_inserted"],
+        "counts": {name: coll.count for name, coll in target.collections.items()},
+        "raw_bytes": sum(entry["bytes"] for entry in source.database_backups.doc["manifest"]),
+        "backup_growth_kb": backup_growth,
+        "total_growth_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline,
+    }
+
+
+def test_large_backup_and_restore_keep_memory_bounded(tmp_path):
+    pytest.importorskip("resource")
+    # 峰值 RSS 在独立进程中测量，避免受其他测试的内存占用影响
+    script = (
+        "import importlib.util, json, sys\n"
+        f"spec = importlib.util.spec_from_file_location('backup_tests', {__file__!r})\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(module)\n"
+        "print(json.dumps(module._large_round_trip(sys.argv[1])))\n"
+    )
+    project_root = Path(__file__).resolve().parents[2]
+    completed = subprocess.run(
+        [sys.executable, "-c", script, str(tmp_path)],
+        cwd=project_root, capture_output=True, text=True, timeout=300,
+        env={**os.environ, "PYTHONPATH": str(project_root)},
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    stats = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    assert stats["documents"] == stats["restored"] == 200000
+    assert stats["counts"] == LARGE_SIZES
+
+    # 一个文档约 250 字节（扩展 JSON），全部读入内存需要数百 MB；流式处理只保留一批
+    assert stats["raw_bytes"] > 40 * 1024 * 1024
+    assert stats["backup_growth_kb"] < 32 * 1024
+    assert stats["total_growth_kb"] < 32 * 1024
+
+
+def test_extended_json_round_trip():
+    doc = {"_id": ObjectId(), "at": datetime(2024, 3, 8, 1, 2, 3, 4000), "price": Decimal128("1.10"),
+           "items": [{"ref": ObjectId()}], "text": "平安银行", "none": None}
+    assert from_extended_json(to_extended_json(doc).encode("utf-8")) == doc
@@ -0,0 +1,95 @@
+import zipfile
+from datetime import datetime, timedelta
+
+
+def _write_log(path, start: datetime, count: int, step_seconds: int = 20):
+    lines = []
+    for i in range(count):
+        ts = (start + timedelta(seconds=i * step_seconds)).strftime("%Y-%m-%d %H:%M:%S")
+        level = "ERROR" if i % 10 == 0 else "INFO"
+        lines.append(f"{ts},000 | webapi               | {level:<8} | line {i}")
+        if i % 50 == 0:
+            lines.append("Traceback (most recent call last):")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return lines
+
+
+def _service(tmp_path):
+    from app.services.log_export_service import LogExportService
+
+    return LogExportService(log_dir=str(tmp_path))
+
+
+def test_read_log_file_tail_matches_readlines(tmp_path):
+    log = tmp_path / "webapi.log"
+    lines = _write_log(log, datetime(2025, 1, 1, 8, 0, 0), 5000)
+    svc = _service(tmp_path)
+
+    result = svc.read_log_file("webapi.log", lines=150)
+
+    assert result["lines"] == lines[-150:]
+    assert result["stats"]["total_lines"] == len(lines)
+    assert result["stats"]["error_count"] == sum("ERROR" in l for l in lines[-150:])
+
+    errors = svc.read_log_file("webapi.log", lines=150, level="error")
+    assert errors["lines"] == [l for l in lines[-150:] if "ERROR" in l]
+
+
+def test_read_log_file_time_range_uses_index(tmp_path):
+    log = tmp_path / "webapi.log"
+    lines = _write_log(log, datetime(2025, 1, 1, 8, 0, 0), 5000)
+    svc = _service(tmp_path)
+
+    result = svc.read_log_file(
+        "webapi.log",
+        lines=100000,
+        start_time="2025-01-01T09:00:00",
+        end_time="2025-01-01T09:05:00",
+    )
+
+    expected = []
+    in_range = False
+    for line in lines:
+        ts = line[:19] if line[:4].isdigit() else None
+        if ts:
+            in_range = "2025-01-01 09:00:00" <= ts <= "2025-01-01 09:05:00"
+        if in_range:
+            expected.append(line)
+    assert result["lines"] == expected
+
+    index = svc._get_index(log)
+    assert index.line_count == len(lines)
+    assert index.minutes == sorted(set(index.minutes))
+    assert index.offset_for("2025-01-01 09:00:00") > 0
+
+
+def test_index_extends_incrementally_on_append(tmp_path):
+    log = tmp_path / "webapi.log"
+    _write_log(log, datetime(2025, 1, 1, 8, 0, 0), 100)
+    svc = _service(tmp_path)
+    index = svc._get_index(log)
+    size_before = index.indexed_size
+
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("2025-01-01 10:00:00,000 | webapi | INFO | appended\n")
+        f.write("2025-01-01 10:01:00,000 | webapi | INFO | partial")
+
+    index = svc._get_index(log)
+    assert index.indexed_size > size_before
+    assert index.minutes[-1] == "2025-01-01 10:00"
+    assert svc.read_log_file("webapi.log", lines=1)["lines"] == [
+        "2025-01-01 10:01:00,000 | webapi | INFO | partial"
+    ]
+
+
+def test_export_logs_streams_filtered_lines(tmp_path, monkeypatch):
+    log = tmp_path / "webapi.log"
+    lines = _write_log(log, datetime(2025, 1, 1, 8, 0, 0), 2000)
+    svc = _service(tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    path = svc.export_logs(filenames=["webapi.log"], level="ERROR", format="zip")
+
+    with zipfile.ZipFile(path) as zf:
+        exported = zf.read("webapi.log").decode("utf-8").splitlines()
+    assert exported == [l for l in lines if "ERROR" in l]
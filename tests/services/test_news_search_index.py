@@ -0,0 +1,438 @@
+import asyncio
+import random
+import re
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from app.services.news_data_service import NewsDataService, NewsQueryParams
+from app.services.news_search_index import NewsSearchIndex, TTLResultCache, tokenize
+
+BASE = datetime(2024, 3, 8, 9, 30)
+
+# (symbol, symbols, title, content, hours_before_base, category, sentiment, importance, source)
+CORPUS = [
+    ("000001", [], "平安银行发布2023年年报 净利润同比增长2.1%", "平安银行披露年报，全年实现净利润464.55亿元，不良贷款率保持稳定。", 1,
+     "company_announcement", "positive", "high", "tushare"),
+    ("000001", [], "平安银行零售业务转型提速", "零售客户数持续增长，财富管理收入贡献提升。", 5,
+     "industry_news", "positive", "medium", "akshare"),
+    ("000001", ["600036"], "股份制银行息差承压 招商银行与平安银行对比", "多家银行净息差收窄，招商银行零售优势仍然明显。", 30,
+     "industry_news", "neutral", "medium", "akshare"),
+    ("600036", [], "招商银行年报：净利润创新高", "招商银行2023年实现净利润1466亿元，分红比例提升至35%。", 2,
+     "company_announcement", "positive", "high", "tushare"),
+    ("600036", [], "招商银行下调存款利率", "招商银行宣布下调部分定期存款利率，银行负债成本有望下降。", 50,
+     "market_news", "neutral", "low", "akshare"),
+    ("600519", [], "贵州茅台提价 出厂价上调约20%", "贵州茅台宣布上调飞天茅台出厂价，白酒板块集体走强。", 3,
+     "company_announcement", "positive", "high", "tushare"),
+    ("600519", ["000858"], "白酒板块回调 茅台五粮液领跌", "白酒板块午后回调，贵州茅台、五粮液跌幅居前。", 20,
+     "market_news", "negative", "medium", "akshare"),
+    ("000858", [], "五粮液召开经销商大会", "五粮液在宜宾召开经销商大会，明确全年营收增长目标。", 70,
+     "company_announcement", "neutral", "medium", "akshare"),
+    ("300750", [], "宁德时代发布神行电池 快充性能提升", "宁德时代发布新一代磷酸铁锂快充电池，充电10分钟续航400公里。", 4,
+     "company_announcement", "positive", "high", "tushare"),
+    ("300750", [], "CATL expands battery plant in Hungary", "Contemporary Amperex Technology (CATL) invests in a new EV battery plant.", 8,
+     "industry_news", "positive", "medium", "finnhub"),
+    ("300750", [], "新能源车销量不及预期 电池股下跌", "新能源车月度销量环比下滑，宁德时代等电池股集体下跌。", 100,
+     "market_news", "negative", "high", "akshare"),
+    (None, ["000001", "600036"], "央行降准0.5个百分点 银行股拉升", "央行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿元。", 6,
+     "policy_news", "positive", "high", "tushare"),
+]
+
+
+def _news(rows=CORPUS):
+    return [
+        {
+            "symbol": symbol, "symbols": list(symbols), "title": title, "content": content,
+            "url": f"https://news.example.com/{index}", "publish_time": BASE - timedelta(hours=hours),
+            "category": category, "sentiment": sentiment, "importance": importance,
+            "source": source,
+        }
+        for index, (symbol, symbols, title, content, hours, category, sentiment, importance, source) in enumerate(rows)
+    ]
+
+
+class _AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        if args and isinstance(args[0], list) and any(isinstance(order, dict) for _, order in args[0]):
+            return self  # $text 的 textScore 排序，见 _AsyncColl.find
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, n):
+        self._cursor = self._cursor.skip(n)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._cursor)
+
+
+class _BulkResult:
+    def __init__(self, upserted_ids, modified_count):
+        self.upserted_ids = upserted_ids
+        self.upserted_count = len(upserted_ids)
+        self.modified_count = modified_count
+
+
+def _bulk_replace(coll, operations):
+    # mongomock 的 bulk_write 与当前 pymongo 的 ReplaceOne 不兼容，逐条执行
+    upserted_ids, modified = {}, 0
+    for position, op in enumerate(operations):
+        result = coll.replace_one(op._filter, op._doc, upsert=op._upsert)
+        if result.upserted_id is not None:
+            upserted_ids[position] = result.upserted_id
+        modified += result.modified_count
+    return _BulkResult(upserted_ids, modified)
+
+
+class _AsyncColl:
+    """Minimal motor-like wrapper around a mongomock collection"""
+
+    def __init__(self, coll=None):
+        self._coll = coll if coll is not None else mongomock.MongoClient().db.stock_news
+        self.finds = []
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+    def find(self, *args, **kwargs):
+        self.finds.append(args[0] if args else {})
+        query = dict(args[0]) if args else {}
+        text = query.pop("$text", None)
+        if text is not None:
+            # mongomock 不支持 $text：按空格分词后匹配标题或正文
+            terms = text["$search"].split()
+            query["$or"] = [{field: {"$regex": re.escape(t)}} for t in terms for field in ("title", "content")]
+            return _AsyncCursor(self._coll.find(query))
+        return _AsyncCursor(self._coll.find(*args, **kwargs))
+
+    async def count_documents(self, query):
+        return self._coll.count_documents(query)
+
+    async def bulk_write(self, operations):
+        return _bulk_replace(self._coll, operations)
+
+    async def delete_many(self, query):
+        return self._coll.delete_many(query)
+
+
+def _service(coll, index_enabled=True):
+    service = NewsDataService()
+    service._collection = coll
+    service._search_index_enabled = index_enabled
+    return service
+
+
+def _loaded_service(rows=CORPUS, max_docs=None):
+    coll = _AsyncColl()
+    service = _service(coll)
+    if max_docs:
+        service._search_index = NewsSearchIndex(max_docs=max_docs)
+    asyncio.run(service.save_news_data(_news(rows), data_source="fixture"))
+    assert asyncio.run(service.build_search_index())
+    return coll, service
+
+
+def test_tokenize_splits_cjk_into_bigrams_and_words():
+    assert tokenize("平安银行") == ["平安", "安银", "银行"]
+    assert tokenize("茅台 提价") == ["茅台", "提价"]
+    assert tokenize("CATL发布2023年报 EPS 1.23") == ["发布", "年报", "catl", "2023", "eps", "1.23"]
+    assert tokenize("涨") == ["涨"]
+    assert tokenize("") == []
+
+
+def test_search_ranks_title_matches_first():
+    _, service = _loaded_service()
+
+    results = asyncio.run(service.search_news("平安银行年报"))
+    assert results[0]["title"].startswith("平安银行发布2023年年报")
+    assert results[0]["score"] > results[1]["score"]
+
+    # 整句中文标题在 $text 下是一个词；bigram 索引能按片段命中
+    titles = [r["title"] for r in asyncio.run(service.search_news("茅台提价"))]
+    assert titles[0] == "贵州茅台提价 出厂价上调约20%"
+
+    english = asyncio.run(service.search_news("CATL battery"))
+    assert english[0]["title"] == "CATL expands battery plant in Hungary"
+
+    assert asyncio.run(service.search_news("不存在的词语组合")) == []
+
+
+def test_search_filters_by_symbol():
+    _, service = _loaded_service()
+    results = asyncio.run(service.search_news("银行", symbol="600036", limit=10))
+    assert results and {r["symbol"] for r in results} == {"600036"}
+    assert len(asyncio.run(service.search_news("银行", limit=2))) == 2
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        NewsQueryParams(),
+        NewsQueryParams(symbol="000001"),
+        NewsQueryParams(symbols=["600036"]),
+        NewsQueryParams(symbol="000001", symbols=["600036"]),
+        NewsQueryParams(start_time=BASE - timedelta(hours=24), end_time=BASE - timedelta(hours=2)),
+        NewsQueryParams(symbol="300750", start_time=BASE - timedelta(hours=8)),
+        NewsQueryParams(category="company_announcement", sentiment="positive", importance="high"),
+        NewsQueryParams(data_source="fixture", sort_order=1, skip=2, limit=4),
+        NewsQueryParams(sort_by="sentiment", sort_order=1, limit=20),
+        NewsQueryParams(end_time=BASE - timedelta(hours=50)),
+    ],
+)
+def test_index_query_matches_mongo_filters(params):
+    coll, service = _loaded_service()
+    mongo = _service(coll, index_enabled=False)
+
+    expected = asyncio.run(mongo.query_news(params))
+    actual = asyncio.run(service.query_news(params))
+
+    # 排序值相同的新闻之间顺序不确定，按排序值分组比较
+    def groups(docs):
+        grouped = []
+        for doc in docs:
+            row = (doc["url"], doc["_id"], doc["title"], doc["publish_time"], doc["symbol"])
+            if grouped and grouped[-1][0] == doc[params.sort_by]:
+                grouped[-1][1].add(row)
+            else:
+                grouped.append((doc[params.sort_by], {row}))
+        return grouped
+
+    assert len(actual) == len(expected)
+    assert groups(actual) == groups(expected)
+
+
+def test_keyword_query_matches_any_keyword():
+    _, service = _loaded_service()
+    results = asyncio.run(service.query_news(NewsQueryParams(keywords=["降准", "提价"])))
+    assert {r["title"][:6] for r in results} == {"央行降准0.", "贵州茅台提价"}
+
+    scoped = asyncio.run(service.query_news(NewsQueryParams(symbol="000001", keywords=["零售"])))
+    assert [r["url"] for r in scoped] == ["https://news.example.com/1", "https://news.example.com/2"]
+
+
+def test_saves_update_index_incrementally_and_invalidate_cache(monkeypatch):
+    coll, service = _loaded_service(CORPUS[:6])
+    assert asyncio.run(service.search_news("宁德时代")) == []
+    loads = len(coll.finds)
+
+    asyncio.run(service.save_news_data(_news()[8:9], data_source="fixture"))
+    results = asyncio.run(service.search_news("宁德时代"))
+    assert [r["url"] for r in results] == ["https://news.example.com/8"]
+    assert results[0]["_id"] == str(coll._coll.find_one({"url": results[0]["url"]})["_id"])
+
+    # 同步保存（PyMongo）同样增量更新索引
+    monkeypatch.setattr("app.core.database.get_mongo_db_sync", lambda: type("Db", (), {"stock_news": _Bulk(coll)})())
+    assert service.save_news_data_sync(_news()[10:11], data_source="fixture") == 1
+    assert len(asyncio.run(service.search_news("宁德时代"))) == 2
+
+    # 重新保存同一条新闻：替换索引中的旧版本，_id 不变
+    updated = dict(_news()[8], content="宁德时代发布钠离子电池")
+    asyncio.run(service.save_news_data(updated, data_source="fixture"))
+    results = asyncio.run(service.search_news("钠离子"))
+    assert [r["_id"] for r in results] == [str(coll._coll.find_one({"url": updated["url"]})["_id"])]
+    assert len(asyncio.run(service.search_news("宁德时代"))) == 2
+
+    # 加载后的查询全部由索引回答，只按 _id 取回命中的新闻，没有再扫描集合
+    assert all(set(query) <= {"_id", "$or"} for query in coll.finds[loads:])
+
+
+class _Bulk:
+    def __init__(self, coll):
+        self._coll = coll._coll
+
+    def bulk_write(self, operations):
+        return _bulk_replace(self._coll, operations)
+
+
+def test_refresh_picks_up_news_written_by_other_processes():
+    coll, service = _loaded_service(CORPUS[:6])
+    asyncio.run(service.search_news("银行"))
+
+    other = NewsDataService()._standardize_news_data(_news()[11], "other", "CN", datetime.utcnow() + timedelta(seconds=1))
+    coll._coll.insert_one(other)
+    assert asyncio.run(service.search_news("降准")) == []
+
+    watermark = service._search_index.last_updated_at
+    service._index_refreshed_at = 0.0
+    results = asyncio.run(service.search_news("降准"))
+    assert [r["data_source"] for r in results] == ["other"]
+    assert {"updated_at": {"$gte": watermark - service.INDEX_REFRESH_OVERLAP}} in coll.finds
+
+
+def test_delete_old_news_removes_from_index():
+    coll, service = _loaded_service()
+    asyncio.run(service.query_news(NewsQueryParams()))
+    days_to_keep = (datetime.utcnow() - (BASE - timedelta(hours=48))).days
+
+    deleted = asyncio.run(service.delete_old_news(days_to_keep))
+    remaining = asyncio.run(service.query_news(NewsQueryParams(limit=100)))
+    assert deleted == len(CORPUS) - len(remaining)
+    assert {r["url"] for r in remaining} == {d["url"] for d in coll._coll.find()}
+
+
+def test_queries_use_mongo_until_index_is_built():
+    class _Broken(_AsyncColl):
+        def find(self, *args, **kwargs):
+            if not self.finds:
+                self.finds.append("boom")
+                raise RuntimeError("connection reset")
+            return super().find(*args, **kwargs)
+
+    coll = _Broken()
+    coll._coll.insert_many([NewsDataService()._standardize_news_data(n, "fixture", "CN", BASE) for n in _news()])
+    service = _service(coll)
+    assert not asyncio.run(service.build_search_index())
+    assert not service._search_index.loaded
+
+    async def query_while_building():
+        results = await service.query_news(NewsQueryParams(symbol="600519"))
+        # 查询只触发后台构建，不等待
+        return results, await service._index_build_task
+
+    results, built = asyncio.run(query_while_building())
+    assert [r["url"] for r in results] == ["https://news.example.com/5", "https://news.example.com/6"]
+    assert built and service._search_index.loaded
+    assert [r["url"] for r in asyncio.run(service.query_news(NewsQueryParams(symbol="600519")))] == [
+        "https://news.example.com/5", "https://news.example.com/6"
+    ]
+
+
+def test_ttl_cache_expires_and_evicts():
+    now = [100.0]
+    cache = TTLResultCache(ttl_seconds=30, max_entries=2, clock=lambda: now[0])
+    cache.put("a", [{"title": "x"}])
+    cached = cache.get("a")
+    cached[0]["title"] = "mutated"
+    assert cache.get("a") == [{"title": "x"}]
+
+    now[0] += 31
+    assert cache.get("a") is None
+
+    cache.put("a", [])
+    cache.put("b", [])
+    cache.put("c", [])
+    assert cache.get("a") is None and cache.get("c") == []
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_cached_results_are_reused_within_ttl():
+    _, service = _loaded_service()
+    first = asyncio.run(service.search_news("茅台"))
+    second = asyncio.run(service.search_news("茅台"))
+    assert first == second
+    assert service._result_cache.hits == 1
+
+
+def test_index_evicts_oldest_news_beyond_capacity():
+    index = NewsSearchIndex(max_docs=3)
+    docs = _news()
+    index.add_many(docs)
+    assert len(index) == 3
+    kept = {d["url"] for d in index.query(limit=10)}
+    newest = sorted(docs, key=lambda d: d["publish_time"])[-3:]
+    assert kept == {d["url"] for d in newest}
+    # 被淘汰的新闻之前的时间范围不再由索引回答
+    assert index.truncated_before == sorted(d["publish_time"] for d in docs)[-4]
+    assert not index.covers(None) and not index.covers(index.truncated_before)
+    assert index.covers(newest[0]["publish_time"])
+
+
+def test_queries_beyond_truncated_index_fall_back_to_mongo():
+    coll, service = _loaded_service(max_docs=6)
+    mongo = _service(coll, index_enabled=False)
+
+    # 初次加载只取最近 6 条：不限起始时间或起始时间早于最早已索引新闻的查询回退到 MongoDB
+    for params in (NewsQueryParams(symbol="300750"), NewsQueryParams(start_time=BASE - timedelta(hours=72))):
+        expected = asyncio.run(mongo.query_news(params))
+        finds = len(coll.finds)
+        assert [r["url"] for r in asyncio.run(service.query_news(params))] == [r["url"] for r in expected]
+        assert coll.finds[finds - 1] in coll.finds[finds:]  # 与 MongoDB 查询条件相同
+
+    # 最近时间窗口仍由索引回答，只按 _id 取回命中的新闻
+    finds = len(coll.finds)
+    recent = asyncio.run(service.query_news(NewsQueryParams(symbol="300750", start_time=BASE - timedelta(hours=5))))
+    assert [r["url"] for r in recent] == ["https://news.example.com/8"]
+    assert [set(query) for query in coll.finds[finds:]] == [{"_id"}]
+
+
+def test_search_beyond_truncated_index_falls_back_to_mongo():
+    coll, service = _loaded_service(max_docs=6)
+    assert service._search_index.truncated_before == BASE - timedelta(hours=6)
+
+    # 索引只有最近 6 条新闻，100 小时前的匹配只能由 MongoDB 找到
+    results = asyncio.run(service.search_news("新能源车"))
+    assert [r["url"] for r in results] == ["https://news.example.com/10"]
+    assert {"$text": {"$search": "新能源车"}} in coll.finds
+
+    # 缺失的新闻都已过期删除后，索引重新覆盖全部新闻，搜索回到索引
+    service._search_index.remove_before(BASE - timedelta(hours=5, minutes=30))
+    assert service._search_index.covers(None)
+    finds = len(coll.finds)
+    assert [r["url"] for r in asyncio.run(service.search_news("茅台"))] == ["https://news.example.com/5"]
+    assert [set(query) for query in coll.finds[finds:]] == [{"_id"}]
+
+
+def test_timeline_stays_sorted_without_resorting_on_query(monkeypatch):
+    index = NewsSearchIndex(max_docs=100)
+    docs = sorted(_news(), key=lambda d: d["publish_time"], reverse=True)
+    index.load(docs)
+    index.add_many(_news()[:2])
+    assert index._timeline == sorted(index._timeline)
+
+    def no_sort(*args, **kwargs):
+        raise AssertionError("query re-sorted the timeline")
+
+    monkeypatch.setattr("app.services.news_search_index.sorted", no_sort, raising=False)
+    newest = index.query(limit=3)
+    oldest = index.query(sort_order=1, limit=2, start_time=BASE - timedelta(hours=70))
+    assert [d["url"] for d in newest] == [f"https://news.example.com/{i}" for i in (0, 3, 5)]
+    assert [d["url"] for d in oldest] == ["https://news.example.com/7", "https://news.example.com/4"]
+
+
+def _synthetic_news(count, seed=7):
+    rng = random.Random(seed)
+    companies = ["平安银行", "招商银行", "贵州茅台", "宁德时代", "比亚迪", "中国平安", "恒瑞医药", "美的集团"]
+    events = ["发布年报", "净利润同比增长", "营收不及预期", "宣布回购", "大股东减持", "获机构调研", "签订重大合同"]
+    details = ["公司表示将继续加大研发投入", "分析师认为短期业绩承压", "市场人士预计行业景气度回升", "机构维持买入评级"]
+    return [
+        {
+            "_id": index, "symbol": f"{index % 500:06d}", "symbols": [], "url": f"https://news.example.com/{index}",
+            "title": f"{rng.choice(companies)}{rng.choice(events)} {rng.choice(details)}",
+            "content": "，".join(rng.choice(details) + rng.choice(events) for _ in range(12)),
+            "publish_time": BASE - timedelta(minutes=index), "category": "company_announcement",
+            "sentiment": "neutral", "importance": "medium", "data_source": "fixture", "updated_at": BASE,
+        }
+        for index in range(count)
+    ]
+
+
+def test_index_build_time_and_memory_are_bounded():
+    docs = _synthetic_news(5000)
+
+    start = time.perf_counter()
+    NewsSearchIndex(max_docs=5000).load(docs)
+    elapsed = time.perf_counter() - start
+
+    index = NewsSearchIndex(max_docs=5000)
+    tracemalloc.start()
+    try:
+        index.load(docs)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # 默认上限下构建在秒级完成；索引不保存正文且词项驻留共享，每条新闻常驻内存在几 KB 以内
+    assert len(index) == 5000 and index.truncated_before == docs[-1]["publish_time"]
+    assert elapsed < 3.0
+    assert retained / len(index) < 6 * 1024
+    assert "content" not in index.query(limit=1)[0]
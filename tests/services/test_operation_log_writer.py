@@ -0,0 +1,112 @@
+import asyncio
+
+
+class _FakeColl:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def insert_many(self, docs, ordered=True):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append(list(docs))
+
+
+class _FakeDB:
+    def __init__(self, coll):
+        self._coll = coll
+
+    def __getitem__(self, name):
+        return self._coll
+
+
+def _doc(i, success=True):
+    return {"action": f"op-{i}", "success": success}
+
+
+def test_writer_batches_by_size_and_flushes_on_stop(monkeypatch):
+    import app.services.operation_log_service as mod
+
+    coll = _FakeColl()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: _FakeDB(coll))
+    writer = mod.OperationLogWriter(batch_size=10, flush_interval=60)
+
+    async def _run():
+        for i in range(25):
+            assert writer.enqueue(_doc(i))
+        # 达到批量阈值后由后台任务写入，无需等待定时刷写
+        await asyncio.sleep(0.05)
+        assert sum(len(b) for b in coll.batches) == 25
+        writer.enqueue(_doc(25))
+        await writer.stop()
+
+    asyncio.run(_run())
+
+    assert [len(b) for b in coll.batches] == [10, 10, 5, 1]
+    assert [d["action"] for b in coll.batches for d in b] == [f"op-{i}" for i in range(26)]
+    stats = writer.get_stats()
+    assert stats["queued"] == 26
+    assert stats["flushed"] == 26
+    assert stats["pending"] == 0
+    assert stats["batches"] == 4
+    assert stats["running"] is False
+
+
+def test_writer_flushes_on_interval(monkeypatch):
+    import app.services.operation_log_service as mod
+
+    coll = _FakeColl()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: _FakeDB(coll))
+    writer = mod.OperationLogWriter(batch_size=100, flush_interval=0.02)
+
+    async def _run():
+        writer.enqueue(_doc(1))
+        await asyncio.sleep(0.1)
+        assert writer.get_stats()["flushed"] == 1
+        await writer.stop()
+
+    asyncio.run(_run())
+
+
+def test_writer_samples_and_drops_under_backpressure(monkeypatch):
+    import app.services.operation_log_service as mod
+
+    coll = _FakeColl()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: _FakeDB(coll))
+    writer = mod.OperationLogWriter(max_size=10, batch_size=1000, sample_watermark=0.5, sample_rate=2)
+
+    # 没有运行中的事件循环，缓冲区不会被消费
+    accepted = [writer.enqueue(_doc(i)) for i in range(5)]
+    assert all(accepted)
+    # 超过水位线：成功操作每 2 条保留 1 条，失败操作始终保留
+    assert writer.enqueue(_doc(5)) is False
+    assert writer.enqueue(_doc(6)) is True
+    assert writer.enqueue(_doc(7, success=False)) is True
+    for i in range(8, 20):
+        writer.enqueue(_doc(i, success=False))
+
+    stats = writer.get_stats()
+    assert stats["pending"] == 10
+    assert stats["sampled_out"] == 1
+    assert stats["dropped"] == 20 - 10 - 1
+    assert stats["queued"] == 10
+
+    asyncio.run(writer.flush())
+    assert writer.get_stats()["flushed"] == 10
+
+
+def test_writer_counts_failed_batches(monkeypatch):
+    import app.services.operation_log_service as mod
+
+    coll = _FakeColl(fail=True)
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: _FakeDB(coll))
+    writer = mod.OperationLogWriter(batch_size=3)
+
+    for i in range(5):
+        writer.enqueue(_doc(i))
+    asyncio.run(writer.flush())
+
+    stats = writer.get_stats()
+    assert stats["failed"] == 5
+    assert stats["flushed"] == 0
+    assert stats["pending"] == 0
@@ -0,0 +1,243 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from app.services.period_resampler import (
+    ADJUST_QFQ,
+    PeriodBarResampler,
+    period_key,
+    resample_daily_bars,
+)
+
+# 000001 日线（含 2024 年春节休市：2024-02-09 ~ 2024-02-18）
+# (trade_date, open, high, low, close, volume, amount, turnover_rate)
+DAILY = [
+    ("2024-01-22", 9.17, 9.26, 8.97, 8.98, 148000000, 1343100000.0, 0.7627),
+    ("2024-01-23", 8.91, 9.07, 8.88, 8.95, 91000000, 812630000.0, 0.4689),
+    ("2024-01-24", 8.94, 8.95, 8.65, 8.71, 185000000, 1632625000.0, 0.9533),
+    ("2024-01-25", 8.72, 9.03, 8.64, 8.95, 87000000, 768645000.0, 0.4483),
+    ("2024-01-26", 8.96, 9.09, 8.89, 8.9, 189000000, 1687770000.0, 0.9739),
+    ("2024-01-29", 8.83, 8.9, 8.71, 8.79, 151000000, 1330310000.0, 0.7781),
+    ("2024-01-30", 8.85, 8.93, 8.6, 8.68, 127000000, 1113155000.0, 0.6545),
+    ("2024-01-31", 8.61, 8.79, 8.53, 8.72, 143000000, 1239095000.0, 0.7369),
+    ("2024-02-01", 8.75, 8.79, 8.63, 8.71, 138000000, 1204740000.0, 0.7111),
+    ("2024-02-02", 8.69, 8.71, 8.46, 8.56, 90000000, 776250000.0, 0.4638),
+    ("2024-02-05", 8.57, 8.69, 8.48, 8.58, 116000000, 994700000.0, 0.5978),
+    ("2024-02-06", 8.6, 8.67, 8.36, 8.38, 123000000, 1044270000.0, 0.6338),
+    ("2024-02-07", 8.32, 8.32, 8.23, 8.31, 177000000, 1471755000.0, 0.9121),
+    ("2024-02-08", 8.32, 8.56, 8.28, 8.46, 124000000, 1040360000.0, 0.639),
+    ("2024-02-19", 8.48, 8.58, 8.37, 8.52, 200000000, 1700000000.0, 1.0306),
+    ("2024-02-20", 8.48, 8.59, 8.39, 8.58, 119000000, 1015070000.0, 0.6132),
+    ("2024-02-21", 8.61, 8.97, 8.57, 8.86, 129000000, 1126815000.0, 0.6648),
+    ("2024-02-22", 8.93, 9.06, 8.8, 8.85, 158000000, 1404620000.0, 0.8142),
+    ("2024-02-23", 8.78, 8.88, 8.53, 8.55, 111000000, 961815000.0, 0.572),
+    ("2024-02-26", 8.53, 8.81, 8.51, 8.74, 131000000, 1131185000.0, 0.6751),
+    ("2024-02-27", 8.75, 9.06, 8.64, 8.95, 115000000, 1017750000.0, 0.5926),
+    ("2024-02-28", 8.99, 9.34, 8.94, 9.25, 109000000, 994080000.0, 0.5617),
+    ("2024-02-29", 9.19, 9.22, 8.98, 9.01, 142000000, 1292200000.0, 0.7317),
+    ("2024-03-01", 9.07, 9.11, 8.88, 8.9, 148000000, 1329780000.0, 0.7627),
+    ("2024-03-04", 8.88, 9.05, 8.79, 8.92, 145000000, 1290500000.0, 0.7472),
+    ("2024-03-05", 9.0, 9.18, 8.94, 9.08, 191000000, 1726640000.0, 0.9843),
+    ("2024-03-06", 9.13, 9.45, 9.08, 9.34, 131000000, 1209785000.0, 0.6751),
+    ("2024-03-07", 9.32, 9.38, 9.28, 9.31, 106000000, 987390000.0, 0.5462),
+    ("2024-03-08", 9.3, 9.38, 9.07, 9.08, 152000000, 1396880000.0, 0.7833),
+]
+
+# 数据源周线/月线（与上面的日线同一区间）
+# (trade_date, open, high, low, close, pre_close, volume, amount)
+VENDOR_WEEKLY = [
+    ("2024-01-26", 9.17, 9.26, 8.64, 8.9, None, 700000000, 6244770000.0),
+    ("2024-02-02", 8.83, 8.93, 8.46, 8.56, 8.9, 649000000, 5663550000.0),
+    ("2024-02-08", 8.57, 8.69, 8.23, 8.46, 8.56, 540000000, 4551085000.0),
+    ("2024-02-23", 8.48, 9.06, 8.37, 8.55, 8.46, 717000000, 6208320000.0),
+    ("2024-03-01", 8.53, 9.34, 8.51, 8.9, 8.55, 645000000, 5764995000.0),
+    ("2024-03-08", 8.88, 9.45, 8.79, 9.08, 8.9, 725000000, 6611195000.0),
+]
+VENDOR_MONTHLY = [
+    ("2024-01-31", 9.17, 9.26, 8.53, 8.72, None, 1121000000, 9927330000.0),
+    ("2024-02-29", 8.75, 9.34, 8.23, 9.01, 8.72, 1982000000, 17175610000.0),
+    ("2024-03-08", 9.07, 9.45, 8.79, 9.08, 9.01, 873000000, 7940975000.0),
+]
+
+
+def _daily_rows(symbol="000001", data_source="tushare", updated_at=None):
+    updated_at = updated_at or datetime(2024, 3, 8, 16)
+    return [
+        {
+            "symbol": symbol, "data_source": data_source, "period": "daily", "trade_date": d,
+            "open": o, "high": h, "low": l, "close": c, "volume": v, "amount": a, "turnover_rate": t,
+            "updated_at": updated_at,
+        }
+        for d, o, h, l, c, v, a, t in DAILY
+    ]
+
+
+def _assert_matches_vendor(bars, vendor):
+    assert [b["trade_date"] for b in bars] == [v[0] for v in vendor]
+    for bar, (_, o, h, l, c, pc, v, a) in zip(bars, vendor):
+        assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (o, h, l, c)
+        assert bar["pre_close"] == pc
+        assert bar["volume"] == v and bar["amount"] == pytest.approx(a)
+        if pc:
+            assert bar["pct_chg"] == round((c - pc) / pc * 100, 4)
+
+
+@pytest.mark.parametrize("period,vendor", [("weekly", VENDOR_WEEKLY), ("monthly", VENDOR_MONTHLY)])
+def test_resampled_bars_match_vendor_bars(period, vendor):
+    bars = resample_daily_bars(_daily_rows()[::-1], period, as_of="2024-03-31")
+    _assert_matches_vendor(bars, vendor)
+    # 春节休市周只有 4 个交易日，休市期间不产生空周期
+    if period == "weekly":
+        assert [b["trading_days"] for b in bars] == [5, 5, 4, 5, 5, 5]
+    assert sum(b["turnover_rate"] for b in bars) == pytest.approx(sum(row[7] for row in DAILY))
+
+
+def test_current_period_is_marked_partial():
+    weekly = resample_daily_bars(_daily_rows(), "weekly", as_of="2024-03-08")
+    monthly = resample_daily_bars(_daily_rows(), "monthly", as_of="2024-03-08")
+    assert [b["is_partial"] for b in weekly] == [False] * 5 + [True]
+    assert [b["is_partial"] for b in monthly] == [False, False, True]
+    assert not resample_daily_bars(_daily_rows(), "weekly", as_of="2024-03-10")[-1]["is_partial"]
+
+
+def test_suspended_days_are_skipped():
+    rows = _daily_rows()
+    # 停牌日：开高低收均为前收，不应影响周线开盘价
+    rows.insert(0, {"trade_date": "2024-01-22", "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0,
+                    "volume": 0, "amount": 0, "tradestatus": 0})
+    rows[1]["trade_date"] = "2024-01-21"  # 原周一行情移到上一周，本周首个交易日为 01-23
+    bars = resample_daily_bars(rows, "weekly", as_of="2024-03-31")
+    assert bars[1]["open"] == 8.91 and bars[1]["low"] == 8.64 and bars[1]["trading_days"] == 4
+
+
+def test_forward_adjusted_bars_use_latest_factor():
+    rows = _daily_rows()
+    # 2024-02-21 除息，此前的复权因子较小；前复权后价格以最新因子为基准
+    for row in rows:
+        row["adj_factor"] = 100.0 if row["trade_date"] < "2024-02-21" else 102.0
+    bars = resample_daily_bars(rows, "weekly", adjust=ADJUST_QFQ, as_of="2024-03-31")
+    ratio = 100.0 / 102.0
+
+    raw = resample_daily_bars(_daily_rows(), "weekly", as_of="2024-03-31")
+    assert bars[0]["close"] == round(8.9 * ratio, 4)
+    assert bars[-1]["close"] == raw[-1]["close"]
+    # 除息所在周：开盘按旧因子换算，收盘按新因子
+    assert bars[3]["open"] == round(8.48 * ratio, 4) and bars[3]["close"] == 8.55
+    assert bars[3]["low"] == round(8.37 * ratio, 4)
+    assert bars[3]["volume"] == raw[3]["volume"]
+
+
+def test_period_key_follows_iso_weeks_across_year_end():
+    assert period_key("2024-12-31", "weekly") == period_key("2025-01-03", "weekly") == "2025-W01"
+    assert period_key("2024-12-31", "monthly") == "2024-12"
+
+
+class _AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._cursor)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _AsyncColl:
+    """Minimal motor-like wrapper around a mongomock collection"""
+
+    def __init__(self):
+        self._coll = mongomock.MongoClient().db.stock_daily_quotes
+        self.deleted = []
+
+    def find(self, *args, **kwargs):
+        return _AsyncCursor(self._coll.find(*args, **kwargs))
+
+    async def delete_many(self, query):
+        self.deleted.append(query)
+        return self._coll.delete_many(query)
+
+    async def insert_many(self, docs, ordered=True):
+        return self._coll.insert_many(docs, ordered=ordered)
+
+    def docs(self, **query):
+        return list(self._coll.find(query).sort("trade_date", 1))
+
+
+def test_incremental_update_only_rewrites_touched_periods():
+    coll = _AsyncColl()
+    head = [row for row in _daily_rows() if row["trade_date"] <= "2024-03-06"]
+    coll._coll.insert_many(head)
+    resampler = PeriodBarResampler(coll)
+
+    async def run():
+        first = await resampler.resample_symbol("000001", "tushare", as_of="2024-03-06")
+        # 没有新日线：不重写
+        idle = await resampler.resample_symbol("000001", "tushare", as_of="2024-03-06")
+
+        weekly_before = {d["trade_date"]: d["_id"] for d in coll.docs(period="weekly")}
+        later = datetime.utcnow() + timedelta(seconds=1)
+        tail = [row for row in _daily_rows(updated_at=later) if row["trade_date"] > "2024-03-06"]
+        coll._coll.insert_many(tail)
+        second = await resampler.resample_symbol("000001", "tushare", as_of="2024-03-08")
+        return first, idle, weekly_before, second
+
+    first, idle, weekly_before, second = asyncio.run(run())
+    assert first == {"weekly": 6, "monthly": 3}
+    assert idle == {"weekly": 0, "monthly": 0}
+    assert second == {"weekly": 1, "monthly": 1}
+    assert coll.deleted[-2]["trade_date"] == {"$gte": "2024-03-04"}
+    assert coll.deleted[-1]["trade_date"] == {"$gte": "2024-03-01"}
+
+    weekly = coll.docs(period="weekly")
+    # 未触及的周期保持原文档，当前周的 trade_date 后移且没有残留的旧记录
+    assert [d["_id"] for d in weekly[:5]] == [weekly_before[d["trade_date"]] for d in weekly[:5]]
+    assert "2024-03-06" not in [d["trade_date"] for d in weekly]
+    _assert_matches_vendor(weekly, VENDOR_WEEKLY)
+    _assert_matches_vendor(coll.docs(period="monthly"), VENDOR_MONTHLY)
+    assert all(d["derived"] for d in weekly) and weekly[-1]["is_partial"]
+
+
+def test_sync_service_derives_weekly_bars_without_provider_calls(monkeypatch):
+    from app.worker.multi_period_sync_service import MultiPeriodSyncService
+
+    coll = _AsyncColl()
+    coll._coll.insert_many(_daily_rows())
+
+    class _Provider:
+        calls = 0
+
+        async def get_historical_data(self, *args, **kwargs):
+            _Provider.calls += 1
+
+    service = MultiPeriodSyncService()
+    service.historical_service = object()
+    service.resampler = PeriodBarResampler(coll)
+    service.derive_from_daily = True
+    service.tushare_service = type("Svc", (), {"provider": _Provider()})()
+
+    async def no_sleep(_):
+        raise AssertionError("本地聚合不应限流等待")
+
+    monkeypatch.setattr("app.worker.multi_period_sync_service.asyncio.sleep", no_sleep)
+    stats = asyncio.run(service._sync_period_data("tushare", "weekly", ["000001"]))
+
+    assert stats == {"records": 6, "success": 1, "errors": 0}
+    assert _Provider.calls == 0
+    _assert_matches_vendor(coll.docs(period="weekly"), VENDOR_WEEKLY)
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+
+class _FakeMemoryManager:
+    def __init__(self):
+        self.calls = []
+
+    async def update_task_status(self, task_id, status, progress=None, message=None, current_step=None, **kwargs):
+        self.calls.append((task_id, progress, message))
+        return True
+
+
+class _FakeTasks:
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, query, update):
+        self.updates.append((query["task_id"], update["$set"]["progress"]))
+
+
+class _FakeDB:
+    def __init__(self):
+        self.analysis_tasks = _FakeTasks()
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def publish(self, channel, message):
+        self.published.append(channel)
+
+
+def _patch(monkeypatch):
+    import app.core.database as database
+    import app.services.memory_state_manager as msm
+
+    memory, db, redis = _FakeMemoryManager(), _FakeDB(), _FakeRedis()
+    monkeypatch.setattr(msm, "get_memory_state_manager", lambda: memory)
+    monkeypatch.setattr(database, "get_mongo_db", lambda: db)
+    monkeypatch.setattr(database, "get_redis_client", lambda: redis)
+    return memory, db, redis
+
+
+def test_bursts_from_threads_are_coalesced_latest_wins(monkeypatch):
+    from app.services.progress.pipeline import ProgressPipeline
+
+    memory, db, redis = _patch(monkeypatch)
+    pipeline = ProgressPipeline(coalesce_window=0.05)
+
+    async def _run():
+        await pipeline.start()
+
+        def worker(task_id):
+            for i in range(1, 51):
+                assert pipeline.submit(task_id, progress=i, message=f"step {i}", step="s")
+            pipeline.submit(task_id, tracker_payload='{"progress_percentage": 50}')
+
+        threads = [threading.Thread(target=worker, args=(f"t{n}",)) for n in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        await asyncio.sleep(0.2)
+        await pipeline.stop()
+
+    asyncio.run(_run())
+
+    stats = pipeline.get_stats()
+    assert stats["submitted"] == 153
+    assert stats["applied"] < 20
+    assert stats["pending"] == 0
+    for n in range(3):
+        final = [p for tid, p in db.analysis_tasks.updates if tid == f"t{n}"]
+        assert final[-1] == 50
+        assert redis.values[f"progress:t{n}"] == '{"progress_percentage": 50}'
+    assert len(memory.calls) == len(db.analysis_tasks.updates)
+    assert "task_progress:t0" in redis.published
+
+
+def test_flush_single_task_and_submit_when_stopped(monkeypatch):
+    from app.services.progress.pipeline import ProgressPipeline
+
+    _, db, _ = _patch(monkeypatch)
+    pipeline = ProgressPipeline(coalesce_window=10)
+    assert pipeline.submit("t1", progress=1) is False
+
+    async def _run():
+        await pipeline.start()
+        pipeline.submit("t1", progress=30, message="a", step="a")
+        pipeline.submit("t2", progress=40, message="b", step="b")
+        assert await pipeline.flush("t1") == 1
+        assert db.analysis_tasks.updates == [("t1", 30)]
+        pipeline.discard("t2")
+        await pipeline.stop()
+
+    asyncio.run(_run())
+    assert db.analysis_tasks.updates == [("t1", 30)]
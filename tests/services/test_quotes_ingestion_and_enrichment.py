@@ -133,3 +133,71 @@ def test_quotes_ingestion_run_once_writes_bulk(monkeypatch):
     import asyncio
     asyncio.run(_run())
 
+
+
+def test_only_changed_quotes_mark_screening_dirty(monkeypatch):
+    import asyncio
+
+    import app.services.quotes_ingestion_service as qis_mod
+    import app.services.screening_table_service as sts_mod
+    from app.services.quotes_ingestion_service import QuotesIngestionService
+
+    stored = {
+        "000001": {"code": "000001", "close": 10.1, "pct_chg": 0.1, "amount": 1.0e8, "volume": None,
+                   "open": None, "high": None, "low": None, "pre_close": None, "trade_date": "20250102"},
+    }
+
+    class _Cursor:
+        def __init__(self, docs):
+            self._docs = iter(docs)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self._docs)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    class _Result:
+        matched_count = modified_count = 0
+        upserted_ids = None
+
+    class _Coll:
+        def __init__(self):
+            self.finds = []
+
+        def find(self, query, projection=None):
+            self.finds.append(query["code"]["$in"])
+            return _Cursor([stored[c] for c in query["code"]["$in"] if c in stored])
+
+        async def bulk_write(self, ops, ordered=False):
+            return _Result()
+
+    coll = _Coll()
+    monkeypatch.setattr(qis_mod, "get_mongo_db", lambda: {"market_quotes": coll})
+    marked = []
+
+    class _Screening:
+        def mark_dirty(self, codes):
+            marked.append(sorted(codes))
+
+    monkeypatch.setattr(sts_mod, "get_screening_table_service", lambda: _Screening())
+
+    quotes = {
+        "000001": {"close": 10.1, "pct_chg": 0.1, "amount": 1.0e8},  # 与已入库行情一致
+        "sh600000": {"close": 9.8, "pct_chg": float("nan"), "amount": 7.5e7},  # 停牌缺失值
+    }
+
+    async def _run():
+        svc = QuotesIngestionService()
+        # 重启后首轮：从已入库行情初始化快照，未变化的股票不登记
+        await svc._bulk_upsert(quotes, "20250102", "fake")
+        # 同样的行情（含新的 NaN 对象）不再登记
+        await svc._bulk_upsert({k: dict(v, pct_chg=v["pct_chg"] * 1) for k, v in quotes.items()}, "20250102", "fake")
+        await svc._bulk_upsert({"000001": {"close": 10.2, "pct_chg": 1.1, "amount": 1.1e8}}, "20250102", "fake")
+
+    asyncio.run(_run())
+    assert marked == [["600000"], ["000001"]]
+    assert coll.finds == [["000001", "600000"]]
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+
+class _FakeExporter:
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.renders = 0
+        self._lock = threading.Lock()
+
+    def generate_markdown_report(self, doc):
+        return f"# {doc['stock_symbol']}\n{doc.get('summary', '')}"
+
+    def _render(self, doc):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("pandoc failed")
+        with self._lock:
+            self.renders += 1
+        return self.generate_markdown_report(doc).encode("utf-8") * 10
+
+    generate_docx_report = _render
+    generate_pdf_report = _render
+
+
+def test_concurrent_downloads_render_once_then_hit_cache(tmp_path):
+    from app.services.report_export_service import ReportExportService
+
+    exporter = _FakeExporter()
+    svc = ReportExportService(str(tmp_path), max_workers=2, exporter=exporter)
+    doc = {"stock_symbol": "000001", "summary": "稳健"}
+
+    async def _run():
+        paths = await asyncio.gather(*[svc.get_artifact(doc, "docx") for _ in range(5)])
+        again = await svc.get_artifact(dict(doc), "docx")
+        changed = await svc.get_artifact({**doc, "summary": "更新"}, "docx")
+        return paths, again, changed
+
+    paths, again, changed = asyncio.run(_run())
+
+    assert len(set(paths)) == 1 and again == paths[0] and changed != paths[0]
+    assert os.path.exists(paths[0]) and paths[0].endswith(".docx")
+    assert exporter.renders == 2
+    stats = svc.get_stats()
+    assert stats["misses"] == 2 and stats["hits"] == 5
+    assert stats["render_seconds_avg"] > 0
+    svc.shutdown()
+
+
+def test_failed_render_is_not_cached_and_prerender_fills_cache(tmp_path):
+    from app.services.report_export_service import ReportExportService
+
+    exporter = _FakeExporter(delay=0, fail=True)
+    svc = ReportExportService(str(tmp_path), exporter=exporter)
+    doc = {"stock_symbol": "600000"}
+
+    async def _run():
+        with pytest.raises(RuntimeError):
+            await svc.get_artifact(doc, "pdf")
+        exporter.fail = False
+        svc.schedule_prerender(doc, ["pdf", "html"])
+        await asyncio.sleep(0.2)
+        return await svc.get_artifact(doc, "pdf")
+
+    path = asyncio.run(_run())
+    assert os.path.exists(path)
+    stats = svc.get_stats()
+    assert stats["failures"] == 1 and stats["prerenders"] == 1 and stats["hits"] == 1
+    svc.shutdown()
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    from app.services.report_export_service import ReportExportService
+
+    svc = ReportExportService(str(tmp_path), max_cache_mb=1, exporter=_FakeExporter(delay=0))
+    old = tmp_path / "aa" / "old.pdf"
+    old.parent.mkdir()
+    old.write_bytes(b"x" * 800 * 1024)
+    os.utime(old, (1, 1))
+    new = tmp_path / "bb" / "new.pdf"
+    new.parent.mkdir()
+    new.write_bytes(b"y" * 800 * 1024)
+
+    assert svc._evict_if_needed() == 1
+    assert not old.exists() and new.exists()
+    svc.shutdown()
@@ -0,0 +1,157 @@
+import asyncio
+
+
+class _AggCursor:
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+
+class _DeleteResult:
+    deleted_count = 2
+
+
+class _FakeColl:
+    def __init__(self, name, db):
+        self.name = name
+        self.db = db
+
+    def aggregate(self, pipeline, **kwargs):
+        self.db.pipelines.append(pipeline)
+        return _AggCursor()
+
+    async def delete_many(self, query):
+        self.db.deletes.append(query)
+        return _DeleteResult()
+
+    async def estimated_document_count(self):
+        return self.db.count
+
+    async def create_index(self, keys):
+        self.db.indexes.append(keys)
+
+
+class _FakeDB:
+    def __init__(self):
+        self.pipelines = []
+        self.deletes = []
+        self.indexes = []
+        self.count = 0
+
+    def __getitem__(self, name):
+        return _FakeColl(name, self)
+
+
+def _patch(monkeypatch):
+    import app.services.screening_table_service as mod
+
+    db = _FakeDB()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: db)
+    return mod, db
+
+
+def test_incremental_refresh_merges_only_changed_codes_in_chunks(monkeypatch):
+    mod, db = _patch(monkeypatch)
+    svc = mod.ScreeningTableService(chunk_size=2)
+
+    assert asyncio.run(svc.refresh(["000003", "000001", "000002", "000001", ""])) == 3
+
+    assert len(db.pipelines) == 2
+    assert db.pipelines[0][0] == {"$match": {"code": {"$in": ["000001", "000002"]}}}
+    assert db.pipelines[1][0] == {"$match": {"code": {"$in": ["000003"]}}}
+    assert db.pipelines[0][-1]["$merge"]["into"] == "stock_screening"
+    assert db.deletes == []
+
+
+def test_full_refresh_removes_stale_rows_and_marks_ready(monkeypatch):
+    mod, db = _patch(monkeypatch)
+    svc = mod.ScreeningTableService()
+    db.count = 5
+
+    async def _run():
+        assert await svc.get_query_collection_name() == "stock_screening"
+        return await svc.refresh()
+
+    assert asyncio.run(_run()) == 5
+    assert "$match" not in db.pipelines[0][0]
+    assert "$lt" in db.deletes[0]["refreshed_at"]
+    assert svc.get_stats()["full_refreshes"] == 1
+
+
+def test_dirty_codes_are_debounced_into_one_refresh(monkeypatch):
+    mod, db = _patch(monkeypatch)
+    svc = mod.ScreeningTableService(debounce_seconds=0.05)
+
+    async def _run():
+        assert await svc.get_query_collection_name() == "stock_screening_view"
+        for code in ("000001", "000002", "000001"):
+            svc.mark_dirty([code])
+        await asyncio.sleep(0.2)
+
+    asyncio.run(_run())
+    assert len(db.pipelines) == 1
+    assert db.pipelines[0][0]["$match"]["code"]["$in"] == ["000001", "000002"]
+    assert svc.get_stats()["dirty"] == 0
+
+
+def test_large_change_set_stays_incremental(monkeypatch):
+    mod, db = _patch(monkeypatch)
+    svc = mod.ScreeningTableService(chunk_size=500)
+
+    codes = [f"{i:06d}" for i in range(5000)]
+    assert asyncio.run(svc.refresh(codes)) == 5000
+    assert len(db.pipelines) == 10
+    assert all("$match" in p[0] for p in db.pipelines)
+    assert db.deletes == []
+    assert svc.get_stats()["full_refreshes"] == 0
+
+
+def test_codes_marked_during_refresh_are_flushed_next_window(monkeypatch):
+    mod, db = _patch(monkeypatch)
+    svc = mod.ScreeningTableService(debounce_seconds=0.05)
+
+    original_merge = svc._merge
+
+    async def _slow_merge(*args):
+        await asyncio.sleep(0.05)
+        await original_merge(*args)
+
+    monkeypatch.setattr(svc, "_merge", _slow_merge)
+
+    async def _run():
+        svc.mark_dirty(["000001"])
+        await asyncio.sleep(0.07)
+        # 第一轮刷新进行中登记
+        svc.mark_dirty(["000002"])
+        await asyncio.sleep(0.3)
+
+    asyncio.run(_run())
+    assert [p[0]["$match"]["code"]["$in"] for p in db.pipelines] == [["000001"], ["000002"]]
+
+
+def test_failed_refresh_keeps_codes_dirty_for_retry(monkeypatch):
+    mod, db = _patch(monkeypatch)
+    svc = mod.ScreeningTableService(debounce_seconds=0.05)
+
+    original_merge = svc._merge
+    failures = [RuntimeError("merge failed")]
+
+    async def _flaky_merge(*args):
+        if failures:
+            raise failures.pop()
+        await original_merge(*args)
+
+    monkeypatch.setattr(svc, "_merge", _flaky_merge)
+
+    async def _run():
+        svc.mark_dirty(["000001", "000002"])
+        await asyncio.sleep(0.07)
+        assert svc.get_stats()["dirty"] == 2
+        await asyncio.sleep(0.1)
+
+    asyncio.run(_run())
+    assert [p[0]["$match"]["code"]["$in"] for p in db.pipelines] == [["000001", "000002"]]
+    stats = svc.get_stats()
+    assert stats["dirty"] == 0 and stats["failed_refreshes"] == 1
@@ -0,0 +1,221 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import mongomock
+
+
+class _AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _mongomock_compatible(value):
+    """把 mongomock 未实现的操作符换成等价写法（ASCII 日期前缀下 $substr 与 $substrCP 相同）"""
+    if isinstance(value, dict):
+        return {
+            ("$substr" if k == "$substrCP" else k): _mongomock_compatible(v)
+            for k, v in value.items()
+            if v != "$$NOW"
+        }
+    if isinstance(value, list):
+        return [_mongomock_compatible(v) for v in value]
+    return value
+
+
+class _AsyncList:
+    def __init__(self, docs):
+        self._docs = docs
+
+    async def to_list(self, length=None):
+        return self._docs
+
+
+class _AsyncColl:
+    """Minimal motor-like wrapper around a mongomock collection"""
+
+    def __init__(self, coll):
+        self._coll = coll
+        self.find_calls = 0
+
+    async def insert_one(self, doc):
+        return self._coll.insert_one(doc)
+
+    async def update_one(self, *args, **kwargs):
+        return self._coll.update_one(*args, **kwargs)
+
+    async def create_index(self, *args, **kwargs):
+        return self._coll.create_index(*args, **kwargs)
+
+    async def delete_many(self, query):
+        return self._coll.delete_many(query)
+
+    async def estimated_document_count(self):
+        return self._coll.estimated_document_count()
+
+    async def count_documents(self, query):
+        return self._coll.count_documents(query)
+
+    async def find_one(self, *args, **kwargs):
+        return self._coll.find_one(*args, **kwargs)
+
+    def aggregate(self, pipeline):
+        """mongomock 不支持 $merge：执行前置阶段后按 on 字段 replace upsert"""
+        merge = pipeline[-1].get("$merge")
+        stages = _mongomock_compatible(pipeline[:-1] if merge else pipeline)
+        docs = list(self._coll.aggregate(stages))
+        if merge:
+            target = self._coll.database[merge["into"]]
+            for doc in docs:
+                target.replace_one({k: doc[k] for k in merge["on"]}, doc, upsert=True)
+            docs = []
+        return _AsyncList(docs)
+
+    def find(self, *args, **kwargs):
+        self.find_calls += 1
+        return _AsyncCursor(iter(self._coll.find(*args, **kwargs)))
+
+
+class _AsyncDB:
+    def __init__(self):
+        self._db = mongomock.MongoClient().db
+        self._colls = {}
+
+    def __getitem__(self, name):
+        if name not in self._colls:
+            self._colls[name] = _AsyncColl(self._db[name])
+        return self._colls[name]
+
+
+def _record(ts: datetime, provider="deepseek", model="deepseek-chat", cost=0.5, currency="CNY"):
+    from app.models.config import UsageRecord
+
+    return UsageRecord(
+        timestamp=ts.isoformat(),
+        provider=provider,
+        model_name=model,
+        input_tokens=100,
+        output_tokens=50,
+        cost=cost,
+        currency=currency,
+        session_id="s1",
+    )
+
+
+def test_add_usage_record_increments_daily_rollup(monkeypatch):
+    import app.services.usage_statistics_service as mod
+
+    db = _AsyncDB()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: db)
+    svc = mod.UsageStatisticsService()
+
+    now = datetime.now()
+
+    async def _run():
+        for _ in range(3):
+            assert await svc.add_usage_record(_record(now))
+        assert await svc.add_usage_record(_record(now, currency="USD", cost=0.1))
+        assert await svc.add_usage_record(_record(now - timedelta(days=1), provider="qwen", model="qwen-plus"))
+
+    asyncio.run(_run())
+
+    rollups = list(db._db["token_usage_daily"].find({}, {"_id": 0, "updated_at": 0}))
+    assert len(rollups) == 3
+    today = next(r for r in rollups
+                 if r["date"] == now.strftime("%Y-%m-%d") and r["currency"] == "CNY")
+    assert today["requests"] == 3
+    assert today["input_tokens"] == 300
+    assert today["output_tokens"] == 150
+    assert abs(today["cost"] - 1.5) < 1e-9
+
+
+def test_get_usage_statistics_reads_rollups_only(monkeypatch):
+    import app.services.usage_statistics_service as mod
+
+    db = _AsyncDB()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: db)
+    svc = mod.UsageStatisticsService()
+
+    now = datetime.now()
+
+    async def _run():
+        for _ in range(4):
+            await svc.add_usage_record(_record(now))
+        await svc.add_usage_record(_record(now, currency="USD", cost=0.25))
+        await svc.add_usage_record(_record(now - timedelta(days=2), provider="qwen", model="qwen-plus"))
+        # 超出统计窗口
+        await svc.add_usage_record(_record(now - timedelta(days=30)))
+        return await svc.get_usage_statistics(days=7)
+
+    stats = asyncio.run(_run())
+
+    assert db["token_usage"].find_calls == 0
+    assert stats.total_requests == 6
+    assert stats.total_input_tokens == 600
+    assert stats.cost_by_currency == {"CNY": 2.5, "USD": 0.25}
+    assert stats.by_provider["deepseek"]["requests"] == 5
+    assert stats.by_provider["deepseek"]["cost_by_currency"] == {"CNY": 2.0, "USD": 0.25}
+    assert stats.by_model["qwen/qwen-plus"]["requests"] == 1
+    assert list(stats.by_date) == sorted(stats.by_date)
+    assert stats.by_date[now.strftime("%Y-%m-%d")]["requests"] == 5
+
+    filtered = asyncio.run(svc.get_usage_statistics(days=7, provider="qwen"))
+    assert filtered.total_requests == 1
+    assert list(filtered.by_provider) == ["qwen"]
+
+
+def test_delete_old_records_prunes_rollups(monkeypatch):
+    import app.services.usage_statistics_service as mod
+
+    db = _AsyncDB()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: db)
+    svc = mod.UsageStatisticsService()
+
+    now = datetime.now()
+
+    async def _run():
+        await svc.add_usage_record(_record(now))
+        await svc.add_usage_record(_record(now - timedelta(days=120)))
+        return await svc.delete_old_records(days=90)
+
+    assert asyncio.run(_run()) == 1
+    dates = [r["date"] for r in db._db["token_usage_daily"].find()]
+    assert dates == [now.strftime("%Y-%m-%d")]
+
+
+def test_backfill_runs_even_if_writer_created_rollups_first(monkeypatch):
+    import app.services.usage_statistics_service as mod
+
+    db = _AsyncDB()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: db)
+    now = datetime.now()
+
+    # 升级前的原始记录，没有对应汇总
+    for days_ago in (1, 2):
+        db._db["token_usage"].insert_one(_record(now - timedelta(days=days_ago)).model_dump())
+
+    async def _run():
+        svc = mod.UsageStatisticsService()
+        # 写入端在首次统计查询前已经 upsert 了一条今天的汇总
+        await svc.add_usage_record(_record(now))
+        stats = await svc.get_usage_statistics(days=7)
+        # 标记持久化后，新实例不再回填
+        fresh = mod.UsageStatisticsService()
+        await fresh.get_usage_statistics(days=7)
+        return stats, fresh
+
+    stats, fresh = asyncio.run(_run())
+
+    assert stats.total_requests == 3
+    marker = db._db["token_usage_rollup_meta"].find_one({"_id": mod.ROLLUP_BACKFILL_MARKER_ID})
+    assert marker["version"] == mod.ROLLUP_BACKFILL_VERSION
+    assert fresh._rollups_checked
+    assert db["token_usage"].find_calls == 0
@@ -0,0 +1,142 @@
+import pytest
+
+# tradingagents.agents 包导入时需要向量库依赖
+pytest.importorskip("chromadb")
+
+from tradingagents.agents.researchers.bear_researcher import create_bear_researcher  # noqa: E402
+from tradingagents.agents.researchers.bull_researcher import create_bull_researcher  # noqa: E402
+from tradingagents.agents.utils.debate_compaction import (  # noqa: E402
+    DebateCompactionPolicy,
+    DebateHistoryCompactor,
+    estimate_tokens,
+    split_turns,
+)
+
+
+def _turn(speaker: str, index: int) -> str:
+    stance = "买入" if speaker in ("Bull", "Risky") else "卖出"
+    filler = "从行业格局、管理层执行力和现金流质量等角度继续展开讨论，回应对方的质疑。" * 6
+    return (
+        f"{speaker} Analyst: 第{index}轮观点：营收同比增长{10 + index}%，毛利率{30 + index % 5}%。\n"
+        f"由于估值只有{15 + index}倍市盈率，关键风险在于需求波动。{filler}\n"
+        f"综合判断建议{stance}。"
+    )
+
+
+def _debate(rounds: int, speakers=("Bull", "Bear")) -> str:
+    history = ""
+    for index in range(rounds):
+        for speaker in speakers:
+            history += "\n" + _turn(speaker, index)
+    return history
+
+
+def test_split_turns_keeps_multiline_arguments():
+    turns = split_turns(_debate(2))
+    assert [t.speaker for t in turns] == ["Bull", "Bear", "Bull", "Bear"]
+    assert turns[0].text.endswith("建议买入。") and "\n" in turns[0].text
+
+
+def test_prompt_history_stays_bounded_as_rounds_increase():
+    compactor = DebateHistoryCompactor(DebateCompactionPolicy(keep_last_turns=4, max_history_tokens=2500))
+    raw, compacted = [], []
+    for rounds in (2, 5, 10, 20, 40):
+        history = _debate(rounds)
+        raw.append(estimate_tokens(history))
+        compacted.append(estimate_tokens(compactor.compact(history)))
+
+    assert raw[-1] > 15 * raw[0]
+    assert max(compacted) <= 2500
+    # 摘要大小与轮次无关：10 轮之后不再增长
+    assert compacted[-1] <= compacted[2] * 1.05
+
+
+def test_digest_keeps_positions_numbers_and_recent_turns_verbatim():
+    history = _debate(8)
+    compactor = DebateHistoryCompactor(DebateCompactionPolicy(keep_last_turns=2, max_history_tokens=3000))
+    result = compactor.compact(history)
+
+    digest, _, recent = result.partition("\n\n")
+    assert "已压缩前 14 次发言" in digest
+    assert "Bull Analyst（7 次发言）" in digest and "立场: 买入" in digest
+    assert "Bear Analyst（7 次发言）" in digest and "立场: 卖出" in digest
+    assert "营收同比增长16%" in digest  # 最近被折叠的一轮的数据
+    assert recent == "\n".join(t.text for t in split_turns(history)[-2:])
+    assert compactor.stats["compacted"] == 1 and compactor.stats["folded_turns"] == 14
+
+
+def test_short_history_is_returned_unchanged():
+    history = _debate(1, speakers=("Risky", "Safe", "Neutral"))
+    compactor = DebateHistoryCompactor.from_config({}, "aggressive_debator")
+    assert compactor.compact(history) == history
+    assert DebateHistoryCompactor.from_config({"debate_compaction_enabled": False}, "bull_researcher") is None
+
+
+def test_per_node_budget_and_judge_defaults():
+    config = {"debate_history_max_tokens": 1500, "debate_node_history_max_tokens": {"bear_researcher": 800}}
+    assert DebateHistoryCompactor.from_config(config, "bull_researcher").policy.max_history_tokens == 1500
+    assert DebateHistoryCompactor.from_config(config, "bear_researcher").policy.max_history_tokens == 800
+    judge = DebateHistoryCompactor.from_config(config, "research_manager").policy
+    assert (judge.keep_last_turns, judge.max_history_tokens) == (6, 12000)
+
+    # 单次发言超出预算时截断
+    compactor = DebateHistoryCompactor.from_config(config, "bear_researcher")
+    assert estimate_tokens(compactor.compact(_debate(10))) <= 800
+
+
+class _SummaryLLM:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    def invoke(self, prompt):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("boom")
+        return type("Response", (), {"content": "多方坚持买入，空方坚持卖出。"})()
+
+
+def test_optional_llm_summary_is_memoized_and_falls_back():
+    policy = DebateCompactionPolicy(keep_last_turns=2, max_history_tokens=4000, llm_summary=True)
+    llm = _SummaryLLM()
+    compactor = DebateHistoryCompactor(policy, llm=llm)
+    history = _debate(6)
+    first = compactor.compact(history)
+    assert compactor.compact(history) == first and llm.calls == 1
+    assert "多方坚持买入" in first
+
+    fallback = DebateHistoryCompactor(policy, llm=_SummaryLLM(fail=True)).compact(history)
+    assert "Bull Analyst（5 次发言）" in fallback
+
+
+class _RecordingLLM:
+    def __init__(self):
+        self.prompt_tokens = []
+
+    def invoke(self, prompt):
+        self.prompt_tokens.append(estimate_tokens(prompt))
+        return type("Response", (), {"content": _turn("X", len(self.prompt_tokens)).split(": ", 1)[1]})()
+
+
+def test_researcher_prompts_stay_bounded_over_long_debate():
+    llm = _RecordingLLM()
+    config = {"debate_keep_last_turns": 4, "debate_history_max_tokens": 2000}
+    bull = create_bull_researcher(llm, None, DebateHistoryCompactor.from_config(config, "bull_researcher"))
+    bear = create_bear_researcher(llm, None, DebateHistoryCompactor.from_config(config, "bear_researcher"))
+
+    state = {
+        "company_of_interest": "AAPL",
+        "market_report": "市场报告", "sentiment_report": "情绪报告",
+        "news_report": "新闻报告", "fundamentals_report": "基本面报告",
+        "investment_debate_state": {"history": "", "bull_history": "", "bear_history": "",
+                                    "current_response": "", "count": 0},
+    }
+    for _ in range(15):
+        for node in (bull, bear):
+            state["investment_debate_state"] = node(state)["investment_debate_state"]
+
+    # 完整历史仍保留在状态中
+    assert state["investment_debate_state"]["history"].count("Bull Analyst:") == 15
+    # 压缩开始后提示词大小不再随轮次增长
+    assert max(llm.prompt_tokens[10:]) <= max(llm.prompt_tokens[:10]) * 1.1
+    assert max(llm.prompt_tokens) < estimate_tokens(state["investment_debate_state"]["history"]) / 3
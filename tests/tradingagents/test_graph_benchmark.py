@@ -0,0 +1,70 @@
+import logging
+import tempfile
+
+import pytest
+
+# tradingagents.graph 导入时需要完整的 LLM / 向量库依赖
+for _module in ("langchain_anthropic", "langchain_google_genai", "chromadb", "dashscope"):
+    pytest.importorskip(_module)
+
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage  # noqa: E402
+from langchain_core.tools import tool  # noqa: E402
+
+from tradingagents.graph.benchmark import StubChatModel, run_propagate_benchmark  # noqa: E402
+
+
+@tool
+def get_quote(ticker: str, curr_date: str, limit: int) -> str:
+    """获取行情"""
+    return ticker
+
+
+def test_stub_model_calls_bound_tool_then_answers():
+    llm = StubChatModel(ticker="AAPL", trade_date="2025-01-02", response_tokens=200)
+    bound = llm.bind_tools([get_quote])
+
+    first = bound.invoke([HumanMessage(content="分析 AAPL")])
+    assert first.tool_calls[0]["name"] == "get_quote"
+    assert first.tool_calls[0]["args"] == {"ticker": "AAPL", "curr_date": "2025-01-02", "limit": 30}
+
+    tool_message = ToolMessage(content="数据", tool_call_id=first.tool_calls[0]["id"])
+    report = bound.invoke([HumanMessage(content="分析 AAPL"), first, tool_message])
+    assert not report.tool_calls and "最终交易建议: **持有**" in report.content
+
+    decision = llm.invoke([SystemMessage(content="请以JSON格式返回"), HumanMessage(content=report.content)])
+    assert '"action": "持有"' in decision.content
+    assert llm.stats["calls"] == 3 and llm.stats["tool_calls"] == 1
+
+
+def test_full_propagate_runs_offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    result = run_propagate_benchmark(runs=1, warmup=0, trace_memory=False, log_level=logging.CRITICAL)
+
+    assert result["decisions"] == ["持有"]
+    assert {"Market Analyst", "Trader", "Risk Judge"} <= set(result["nodes"])
+    assert result["tool_calls"]["get_stock_market_data_unified"] == 1
+    assert result["llm_calls"]["deep"] >= 2
+    # 运行结束后临时工作目录被清理
+    assert not list(tmp_path.glob("ta_bench_*"))
+
+
+def test_memory_tracing_stops_when_propagate_fails(monkeypatch):
+    import tracemalloc
+
+    from tradingagents.graph import benchmark
+
+    build_stub_graph = benchmark.build_stub_graph
+
+    def _failing_graph(*args, **kwargs):
+        graph = build_stub_graph(*args, **kwargs)
+
+        def _propagate(*args, **kwargs):
+            raise RuntimeError("propagate failed")
+
+        graph.propagate = _propagate
+        return graph
+
+    monkeypatch.setattr(benchmark, "build_stub_graph", _failing_graph)
+    with pytest.raises(RuntimeError):
+        run_propagate_benchmark(runs=1, warmup=0, trace_memory=True, log_level=logging.CRITICAL)
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,178 @@
+import json
+import uuid
+
+import pytest
+
+# tradingagents.llm_adapters 包导入时需要 Google 适配器依赖
+pytest.importorskip("langchain_google_genai")
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage, message_to_dict  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_core.tools import tool  # noqa: E402
+from langchain_openai import ChatOpenAI  # noqa: E402
+
+from tradingagents.llm_adapters import response_cache  # noqa: E402
+from tradingagents.llm_adapters.openai_compatible_base import OpenAICompatibleBase  # noqa: E402
+from tradingagents.llm_adapters.response_cache import (  # noqa: E402
+    LLMCacheMissError,
+    LLMResponseCache,
+    make_cache_key,
+)
+
+
+@tool
+def get_quote(ticker: str, curr_date: str) -> str:
+    """获取行情"""
+    return f"{ticker} 收盘价 10.00"
+
+
+class FakeUpstream:
+    """每次返回不同内容的上游，回放结果只可能来自缓存"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, llm, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        token = uuid.uuid4().hex
+        if kwargs.get("tools") and not any(isinstance(m, ToolMessage) for m in messages):
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": "get_quote", "args": {"ticker": "AAPL", "curr_date": "2025-01-02"},
+                             "id": f"call_{token[:8]}"}],
+            )
+        else:
+            message = AIMessage(
+                content=f"分析报告 {token}",
+                usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"model_name": llm.model_name})
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(ChatOpenAI, "_generate", lambda llm, *args, **kwargs: fake.generate(llm, *args, **kwargs))
+    yield fake
+    response_cache.set_llm_response_cache(None)
+
+
+def _llm(temperature=0.1):
+    return OpenAICompatibleBase(
+        provider_name="test", model="test-model", api_key_env_var="TEST_API_KEY",
+        base_url="http://localhost:1/v1", api_key="sk-test-0123456789", temperature=temperature,
+    )
+
+
+def _run(llm):
+    """一次带工具调用的多步分析：工具调用 -> 报告 -> 汇总，后续提示包含之前的 AI 消息"""
+    messages = [SystemMessage(content="你是市场分析师"), HumanMessage(content="分析 AAPL")]
+    bound = llm.bind_tools([get_quote])
+    call = bound.invoke(messages)
+    tool_call = call.tool_calls[0]
+    messages += [call, ToolMessage(content=get_quote.invoke(tool_call["args"]), tool_call_id=tool_call["id"])]
+    report = bound.invoke(messages)
+    summary = llm.invoke([HumanMessage(content=f"汇总: {report.content}")])
+    transcript = []
+    for message in (call, report, summary):
+        data = message_to_dict(message)
+        data["data"].pop("id")  # 运行 ID 每次调用都不同
+        transcript.append(data)
+    return json.dumps(transcript, ensure_ascii=False, sort_keys=True)
+
+
+def test_replay_is_byte_identical_to_recording(tmp_path, upstream):
+    db_path = str(tmp_path / "llm.sqlite3")
+    response_cache.set_llm_response_cache(LLMResponseCache(db_path, mode="record"))
+    recorded = _run(_llm())
+    assert upstream.calls == 3
+
+    cache = LLMResponseCache(db_path, mode="replay", strict=True)
+    response_cache.set_llm_response_cache(cache)
+    replayed = _run(_llm())
+
+    assert replayed == recorded
+    assert upstream.calls == 3
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["upstream_calls"], stats["entries"]) == (3, 0, 0, 3)
+
+
+def test_replay_reads_through_and_strict_replay_raises(tmp_path, upstream):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), mode="replay")
+    response_cache.set_llm_response_cache(cache)
+    first = _llm().invoke("你好")
+    second = _llm().invoke("你好")
+    assert first.content == second.content and upstream.calls == 1
+    assert cache.get_stats()["hit_rate"] == 0.5
+
+    cache.strict = True
+    with pytest.raises(LLMCacheMissError):
+        _llm().invoke("没有录制过的问题")
+    # 参数不同视为不同请求
+    with pytest.raises(LLMCacheMissError):
+        _llm(temperature=0.7).invoke("你好")
+
+
+def test_passthrough_does_not_touch_cache(tmp_path, upstream):
+    db_path = tmp_path / "llm.sqlite3"
+    response_cache.set_llm_response_cache(LLMResponseCache(str(db_path)))
+    _llm().invoke("你好")
+    _llm().invoke("你好")
+    assert upstream.calls == 2
+    assert not db_path.exists()
+
+
+def test_key_ignores_run_ids_but_not_content_or_tools():
+    identity = {"provider": "test", "model": "m", "temperature": 0.1}
+    base = [HumanMessage(content="hi"), AIMessage(content="ok", id="run-1")]
+    key = make_cache_key(identity, base)
+
+    assert make_cache_key(identity, [HumanMessage(content="hi"), AIMessage(content="ok", id="run-2")]) == key
+    assert make_cache_key(identity, [HumanMessage(content="hi"), AIMessage(content="ok!")]) != key
+    assert make_cache_key(dict(identity, tools=[{"name": "get_quote"}]), base) != key
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    def result(text):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    entry_size = len(response_cache.serialize_result(result("a" * 300)).encode("utf-8"))
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), mode="replay", max_bytes=int(entry_size * 2.5))
+    cache.put("a", result("a" * 300))
+    cache.put("b", result("b" * 300))
+    assert cache.get("a") is not None  # a 比 b 更近被使用
+    cache.put("c", result("c" * 300))
+
+    assert cache.get("b") is None
+    assert cache.get("a").generations[0].message.content == "a" * 300
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["bytes"] <= cache.max_bytes
+
+
+def test_async_calls_use_the_cache_and_input_budget(tmp_path, upstream, monkeypatch):
+    import asyncio
+
+    seen = []
+
+    async def fake_agenerate(llm, messages, *args, **kwargs):
+        seen.append(messages)
+        return upstream.generate(llm, messages, *args, **kwargs)
+
+    monkeypatch.setattr(ChatOpenAI, "_agenerate", fake_agenerate)
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), mode="replay")
+    response_cache.set_llm_response_cache(cache)
+    llm = OpenAICompatibleBase(
+        provider_name="test", model="test-model", api_key_env_var="TEST_API_KEY",
+        base_url="http://localhost:1/v1", api_key="sk-test-0123456789", max_input_tokens=200,
+    )
+    prompt = [SystemMessage(content="你是市场分析师"), HumanMessage(content="分析 AAPL " + "行情数据 " * 400)]
+
+    first = asyncio.run(llm.ainvoke(prompt))
+    second = asyncio.run(llm.ainvoke(prompt))
+    # 同步调用命中异步录制的响应
+    third = llm.invoke(prompt)
+
+    assert first.content == second.content == third.content and upstream.calls == 1
+    assert len(seen) == 1 and len(seen[0][-1].content) < len(prompt[-1].content)
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["upstream_calls"]) == (2, 1)
@@ -0,0 +1,155 @@
+import pytest
+
+# tradingagents.llm_adapters 包导入时需要 Google 适配器依赖
+pytest.importorskip("langchain_google_genai")
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_openai import ChatOpenAI  # noqa: E402
+
+from tradingagents.llm_adapters.message_budget import (  # noqa: E402
+    MessageBudgetAssembler,
+    clip_at_sections,
+    message_tokens,
+)
+from tradingagents.llm_adapters.openai_compatible_base import ChatQianfanOpenAI, OpenAICompatibleBase  # noqa: E402
+from tradingagents.utils.token_estimator import estimate_tokens  # noqa: E402
+
+
+def _report(title: str, sections: int = 6, section_chars: int = 400) -> str:
+    body = "营收与利润保持增长，现金流稳健。" * (section_chars // 16)
+    return "\n\n".join(f"## {title} 第{i}节\n{body}" for i in range(sections))
+
+
+def _tool_round(index: int, output_chars: int = 2000):
+    call_id = f"call_{index}"
+    return [
+        AIMessage(content="", tool_calls=[{"name": "get_stock_data", "args": {"ticker": "000001"}, "id": call_id}]),
+        ToolMessage(content="行情数据" * (output_chars // 4), tool_call_id=call_id),
+    ]
+
+
+def _stack(rounds: int = 5):
+    messages = [SystemMessage(content="你是一名专业的市场分析师。" * 20), HumanMessage(content="请分析 000001")]
+    for index in range(rounds):
+        messages += _tool_round(index)
+    return messages
+
+
+def _total(messages):
+    return sum(message_tokens(m) for m in messages)
+
+
+def test_within_budget_returns_messages_unchanged():
+    messages = _stack(2)
+    assembled, stats = MessageBudgetAssembler(_total(messages)).assemble(messages)
+    assert assembled == messages and not stats.trimmed
+
+
+def test_older_tool_outputs_are_elided_first_and_pairs_kept():
+    messages = _stack(5)
+    budget = _total(messages) - 3000
+    assembled, stats = MessageBudgetAssembler(budget).assemble(messages)
+
+    assert stats.tokens_after <= budget
+    assert _total(assembled) == stats.tokens_after
+    assert len(assembled) == len(messages) and stats.dropped == 0
+    assert stats.elided_tool_outputs >= 1
+    # 系统提示和最近一轮工具结果原样保留，较早的工具输出被替换为说明
+    assert assembled[0] is messages[0] and assembled[-1] is messages[-1]
+    assert assembled[3].content.startswith("[已省略较早的工具输出")
+    assert assembled[3].tool_call_id == "call_0"
+    # 不修改输入消息
+    assert messages[3].content.startswith("行情数据")
+
+
+@pytest.mark.parametrize("budget", [600, 1500, 3000, 6000])
+def test_budget_compliance_over_synthetic_stacks(budget):
+    messages = [SystemMessage(content="你是一名专业的研究员。"), HumanMessage(content=_report("市场报告", 10))]
+    for index in range(4):
+        messages += _tool_round(index, output_chars=1200)
+        messages.append(AIMessage(content=_report(f"阶段报告{index}", 4)))
+    messages.append(HumanMessage(content="请给出最终结论"))
+
+    assembled, stats = MessageBudgetAssembler(budget).assemble(messages)
+
+    assert _total(assembled) <= budget
+    assert isinstance(assembled[0], SystemMessage) and assembled[-1].content == "请给出最终结论"
+    # 每条工具结果前都有发起调用的 AI 消息
+    call_ids = set()
+    for message in assembled:
+        if isinstance(message, AIMessage):
+            call_ids |= {tc["id"] for tc in message.tool_calls}
+        if isinstance(message, ToolMessage):
+            assert message.tool_call_id in call_ids
+
+
+def test_long_report_is_clipped_at_section_boundary():
+    report = _report("基本面", sections=8)
+    clipped = clip_at_sections(report, estimate_tokens(report) // 2)
+
+    assert estimate_tokens(clipped) <= estimate_tokens(report) // 2
+    kept = clipped.rsplit("\n...(已省略后续", 1)[0]
+    assert report.startswith(kept) and report[len(kept):].startswith("\n\n## 基本面")
+    assert "已省略后续" in clipped
+
+
+def test_pinned_report_is_clipped_only_as_last_resort():
+    messages = [SystemMessage(content="系统提示"), HumanMessage(content=_report("综合报告", 10))]
+    budget = _total(messages) // 3
+    assembled, stats = MessageBudgetAssembler(budget).assemble(messages)
+
+    assert stats.clipped == 1 and _total(assembled) <= budget
+    assert assembled[0].content == "系统提示"
+    assert assembled[1].content.startswith("## 综合报告 第0节")
+
+
+def _capture_upstream(monkeypatch):
+    seen = []
+
+    def fake_generate(llm, messages, stop=None, run_manager=None, **kwargs):
+        seen.append(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+    monkeypatch.setattr(ChatOpenAI, "_generate", fake_generate)
+    return seen
+
+
+def test_adapter_applies_budget_before_calling_provider(monkeypatch):
+    seen = _capture_upstream(monkeypatch)
+    llm = OpenAICompatibleBase(
+        provider_name="test", model="test-model", api_key_env_var="TEST_API_KEY",
+        base_url="http://localhost:1/v1", api_key="sk-test-0123456789", max_input_tokens=2000,
+    )
+    llm.invoke(_stack(6))
+    assert _total(seen[-1]) <= 2000 and isinstance(seen[-1][0], SystemMessage)
+
+    # 未知模型且未配置预算时不做裁剪
+    unbounded = OpenAICompatibleBase(
+        provider_name="test", model="test-model", api_key_env_var="TEST_API_KEY",
+        base_url="http://localhost:1/v1", api_key="sk-test-0123456789",
+    )
+    unbounded.invoke(_stack(6))
+    assert _total(seen[-1]) == _total(_stack(6))
+
+
+def test_qianfan_keeps_system_prompt_within_its_limit(monkeypatch):
+    seen = _capture_upstream(monkeypatch)
+    llm = ChatQianfanOpenAI(model="ernie-3.5-8k", api_key="bce-v3/ALTAK-test/secret")
+    llm.invoke([SystemMessage(content="系统提示"), HumanMessage(content=_report("长报告", 40))])
+    assert _total(seen[-1]) <= 4500
+    assert seen[-1][0].content == "系统提示"
+
+
+def test_token_cache_is_bounded_and_does_not_hold_text():
+    from tradingagents.utils import token_estimator
+
+    token_estimator.clear_cache()
+    report = _report("长报告", sections=50)
+    assert estimate_tokens(report) == estimate_tokens(report[:-1] + report[-1])
+    for i in range(token_estimator.CACHE_SIZE + 10):
+        estimate_tokens(f"消息 {i}")
+
+    assert len(token_estimator._cache) == token_estimator.CACHE_SIZE
+    assert all(isinstance(h, int) and isinstance(n, int) for h, n in token_estimator._cache)
+    assert estimate_tokens("中文abcd") == 3
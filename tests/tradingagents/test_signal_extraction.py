@@ -0,0 +1,121 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+# tradingagents.graph 导入时需要完整的 LLM / 向量库依赖
+for _module in ("langchain_anthropic", "langchain_google_genai", "chromadb", "dashscope"):
+    pytest.importorskip(_module)
+
+from tradingagents.graph.decision_extractor import (  # noqa: E402
+    CURRENCY_BY_NAME,
+    DEFAULT_CONFIDENCE_THRESHOLD,
+    RuleBasedDecisionExtractor,
+)
+from tradingagents.graph.signal_processing import SignalProcessor  # noqa: E402
+from tradingagents.utils.stock_utils import StockUtils  # noqa: E402
+
+CORPUS = json.loads((Path(__file__).parent / "fixtures" / "signal_reports.json").read_text(encoding="utf-8"))["reports"]
+
+
+def _extract(case):
+    currency = CURRENCY_BY_NAME.get(StockUtils.get_market_info(case["symbol"])["currency_name"])
+    return RuleBasedDecisionExtractor(currency).extract(case["report"])
+
+
+class _StubLLM:
+    def __init__(self, content='{"action": "持有", "target_price": 9.9, "confidence": 0.6, "risk_score": 0.4, '
+                               '"reasoning": "LLM 提取"}', fail=False):
+        self.content = content
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("llm unavailable")
+        return type("Response", (), {"content": self.content})()
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["id"] for c in CORPUS])
+def test_rule_extraction_matches_annotated_corpus(case):
+    extraction = _extract(case)
+    expected = case["expected"]
+
+    assert extraction.action == expected["action"]
+    assert extraction.target_price == expected["target_price"]
+    assert extraction.confidence == pytest.approx(expected["confidence"])
+    assert extraction.risk_score == pytest.approx(expected["risk_score"])
+    assert (extraction.extraction_confidence >= DEFAULT_CONFIDENCE_THRESHOLD) == expected["rule_only"]
+
+
+def test_score_is_calibrated_on_corpus():
+    scored = [(_extract(case).extraction_confidence, case) for case in CORPUS]
+    accepted = [case for score, case in scored if score >= DEFAULT_CONFIDENCE_THRESHOLD]
+    # 跳过 LLM 的报告全部提取正确，且覆盖大部分按提示词格式输出的报告
+    for case in accepted:
+        extraction = _extract(case)
+        assert (extraction.action, extraction.target_price) == (
+            case["expected"]["action"], case["expected"]["target_price"]
+        )
+    assert len(accepted) / len(CORPUS) >= 0.5
+    # 结构越不完整得分越低
+    by_id = dict((case["id"], score) for score, case in scored)
+    assert by_id["a_share_trader_buy"] > by_id["risk_manager_labeled"] > by_id["risk_manager_default_fallback"]
+    assert by_id["unstructured_text"] == 0.0
+
+
+def test_high_confidence_reports_skip_llm():
+    llm = _StubLLM()
+    processor = SignalProcessor(llm)
+    for case in CORPUS:
+        result = processor.process_signal(case["report"], case["symbol"])
+        if case["expected"]["rule_only"]:
+            assert result["action"] == case["expected"]["action"]
+            assert result["target_price"] == case["expected"]["target_price"]
+        else:
+            assert result["reasoning"] == "LLM 提取"
+
+    low = sum(1 for case in CORPUS if not case["expected"]["rule_only"])
+    assert llm.calls == low
+    assert processor.stats == {"rule": len(CORPUS) - low, "llm": low}
+
+
+def test_threshold_above_one_always_calls_llm():
+    llm = _StubLLM()
+    processor = SignalProcessor(llm, rule_confidence_threshold=1.01)
+    result = processor.process_signal(CORPUS[0]["report"], CORPUS[0]["symbol"])
+    assert llm.calls == 1 and result["target_price"] == 9.9
+
+
+def test_llm_failure_falls_back_to_rule_extraction():
+    case = next(c for c in CORPUS if c["id"] == "missing_target_price")
+    result = SignalProcessor(_StubLLM(fail=True)).process_signal(case["report"], case["symbol"])
+    assert result["action"] == "买入" and result["risk_score"] == 0.4
+
+
+def test_rule_extraction_latency_is_far_below_an_llm_round_trip():
+    llm_latency = 0.05
+    llm = _StubLLM()
+    original_invoke = llm.invoke
+
+    def slow_invoke(messages):
+        time.sleep(llm_latency)
+        return original_invoke(messages)
+
+    llm.invoke = slow_invoke
+    rule_only = [case for case in CORPUS if case["expected"]["rule_only"]]
+
+    start = time.perf_counter()
+    for case in rule_only:
+        SignalProcessor(llm).process_signal(case["report"], case["symbol"])
+    rule_elapsed = (time.perf_counter() - start) / len(rule_only)
+
+    start = time.perf_counter()
+    for case in rule_only:
+        SignalProcessor(llm, rule_confidence_threshold=1.01).process_signal(case["report"], case["symbol"])
+    llm_elapsed = (time.perf_counter() - start) / len(rule_only)
+
+    assert llm_elapsed >= llm_latency
+    assert rule_elapsed < llm_elapsed / 5
@@ -0,0 +1,157 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.utils.report_search import (
+    build_keyword_query,
+    build_report_search_terms,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def test_search_terms_cover_substrings_of_all_search_fields():
+    doc = {"stock_symbol": "000001", "analysis_id": "abc_20250101", "summary": "平安银行 基本面稳健"}
+    terms = set(build_report_search_terms(doc))
+
+    for keyword in ("0001", "ABC_2", "平安", "面稳健"):
+        grams = build_keyword_query(keyword)["$and"][0]["$or"][0]["search_terms"]["$all"]
+        assert set(grams) <= terms
+    # 单字关键词无法生成 n-gram，退回正则
+    assert "$and" not in build_keyword_query("平")
+
+
+def test_cursor_roundtrip():
+    oid = ObjectId()
+    created_at = datetime(2025, 1, 2, 3, 4, 5, 678000)
+    assert decode_cursor(encode_cursor(created_at, oid)) == (created_at, oid)
+    assert decode_cursor(encode_cursor(None, oid)) == (None, oid)
+
+
+class _Cursor:
+    def __init__(self, docs, calls):
+        self._docs = docs
+        self._calls = calls
+
+    def sort(self, keys):
+        self._calls[-1]["sort"] = keys
+        return self
+
+    def skip(self, n):
+        self._calls[-1]["skip"] = n
+        return self
+
+    def limit(self, n):
+        self._calls[-1]["limit"] = n
+        return self
+
+    def __aiter__(self):
+        call = self._calls[-1]
+        docs = self._docs[call["skip"]:call["skip"] + call["limit"]]
+
+        async def _gen():
+            for d in docs:
+                yield d
+        return _gen()
+
+
+class _Reports:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+        self.counts = 0
+
+    def find(self, query, projection=None):
+        self.calls.append({"query": query})
+        # 游标查询：从游标位置之后开始返回
+        docs = self.docs
+        if "$and" in query or "$or" in query:
+            keyset = query["$and"][-1] if "$and" in query else query
+            last_id = keyset["$or"][1]["_id"]["$lt"]
+            docs = self.docs[[d["_id"] for d in self.docs].index(last_id) + 1:]
+        return _Cursor(docs, self.calls)
+
+    async def count_documents(self, query):
+        self.counts += 1
+        return len(self.docs)
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+
+class _DB:
+    def __init__(self, docs):
+        self.analysis_reports = _Reports(docs)
+
+
+def test_page_uses_skip_and_explicit_cursor_uses_keyset(monkeypatch):
+    import app.routers.reports as reports
+
+    base = datetime(2025, 1, 1)
+    docs = [
+        {"_id": ObjectId(), "stock_symbol": "000001", "stock_name": "平安银行", "market_type": "A股",
+         "created_at": base - timedelta(minutes=i)}
+        for i in range(5)
+    ]
+    db = _DB(docs)
+    monkeypatch.setattr(reports, "get_mongo_db", lambda: db)
+    reports.invalidate_report_list_cache()
+    user = {"id": "u1"}
+
+    async def _page(page, cursor=None):
+        return await reports.get_reports_list(
+            page=page, page_size=2, search_keyword=None, market_filter="A股",
+            start_date=None, end_date=None, stock_code=None, cursor=cursor, user=user
+        )
+
+    first = asyncio.run(_page(1))
+    # 只传页码：按 skip 分页，不复用任何进程内的游标
+    second = asyncio.run(_page(2))
+    # 显式游标：keyset 条件，不 skip
+    by_cursor = asyncio.run(_page(2, cursor=first["data"]["next_cursor"]))
+
+    expected = [str(d["_id"]) for d in docs[2:4]]
+    assert [r["id"] for r in first["data"]["reports"]] == [str(d["_id"]) for d in docs[:2]]
+    assert [r["id"] for r in second["data"]["reports"]] == expected
+    assert [r["id"] for r in by_cursor["data"]["reports"]] == expected
+    assert db.analysis_reports.calls[1] == {"query": {"market_type": "A股"}, "sort": [("created_at", -1), ("_id", -1)],
+                                            "skip": 2, "limit": 2}
+    assert db.analysis_reports.calls[2]["skip"] == 0 and "$and" in db.analysis_reports.calls[2]["query"]
+    assert second["data"]["total"] == 5 and db.analysis_reports.counts == 1
+    assert set(first["data"]) == {"reports", "total", "page", "page_size", "next_cursor"}
+
+    # 新报告写入后总数缓存失效
+    reports.invalidate_report_list_cache()
+    asyncio.run(_page(1))
+    assert db.analysis_reports.counts == 2
+
+
+def test_long_summary_is_fully_indexed():
+    from app.utils.report_search import SEARCH_TERMS_VERSION, build_report_search_fields
+
+    doc = {"stock_symbol": "000001", "summary": "前言" * 400 + "结论：估值修复"}
+    fields = build_report_search_fields(doc)
+    grams = build_keyword_query("估值修复")["$and"][0]["$or"][0]["search_terms"]["$all"]
+    assert set(grams) <= set(fields["search_terms"])
+    assert fields["search_terms_version"] == SEARCH_TERMS_VERSION
+
+
+def test_streamlit_report_writes_include_search_terms():
+    import mongomock
+
+    from app.utils.report_search import SEARCH_TERMS_VERSION
+    from web.utils.mongodb_report_manager import MongoDBReportManager
+
+    manager = MongoDBReportManager.__new__(MongoDBReportManager)
+    manager.collection = mongomock.MongoClient().db.analysis_reports
+    manager.connected = True
+
+    assert manager.save_analysis_report("AAPL", {"summary": "估值修复，维持买入"}, {"market_report": "行情"})
+    doc = manager.collection.find_one({"stock_symbol": "AAPL"})
+    assert doc["search_terms_version"] == SEARCH_TERMS_VERSION
+    assert manager.collection.count_documents(build_keyword_query("估值修复")) == 1
+
+    assert manager.save_report({"analysis_id": doc["analysis_id"], "stock_symbol": "AAPL", "summary": "下调评级"})
+    assert manager.collection.count_documents(build_keyword_query("下调评级")) == 1
+    assert manager.collection.count_documents(build_keyword_query("估值修复")) == 0
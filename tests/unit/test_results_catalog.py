@@ -0,0 +1,188 @@
+import json
+from datetime import date, datetime
+
+from web.utils.results_catalog import ResultsCatalog
+
+
+def _entry(i, symbol, day, analysts):
+    return {
+        "analysis_id": f"a{i}",
+        "timestamp": datetime(2025, 1, day, 10, i).timestamp(),
+        "stock_symbol": symbol,
+        "analysts": analysts,
+        "research_depth": 2,
+        "summary": f"{symbol} 摘要 {i}",
+    }
+
+
+def _catalog(tmp_path):
+    catalog = ResultsCatalog(str(tmp_path / "catalog.db"))
+    catalog.upsert_many([
+        (_entry(1, "000001", 1, ["market_analyst"]), str(tmp_path / "a1.json"), "file_system"),
+        (_entry(2, "000001", 2, ["news_analyst"]), str(tmp_path / "a2.json"), "file_system"),
+        (_entry(3, "AAPL", 3, ["market_analyst", "news_analyst"]), None, "file_system"),
+        (_entry(4, "600000", 4, ["fundamental_analyst"]), None, "file_system"),
+    ])
+    return catalog
+
+
+def test_filters_and_pagination_are_answered_by_the_catalog(tmp_path):
+    catalog = _catalog(tmp_path)
+
+    page1 = catalog.query(limit=2, offset=0)
+    page2 = catalog.query(limit=2, offset=2)
+    assert [r["analysis_id"] for r in page1 + page2] == ["a4", "a3", "a2", "a1"]
+    assert catalog.count() == 4
+
+    assert [r["analysis_id"] for r in catalog.query(analyst_type="market_analyst")] == ["a3", "a1"]
+    assert [r["analysis_id"] for r in catalog.query(stock_symbol="00001")] == ["a2", "a1"]
+    assert [r["analysis_id"] for r in catalog.query(search_text="aapl")] == ["a3"]
+    # 结束日期包含当天
+    assert catalog.count(start_date=date(2025, 1, 2), end_date=date(2025, 1, 3)) == 2
+    assert set(catalog.path_index()) == {str(tmp_path / "a1.json"), str(tmp_path / "a2.json")}
+
+    # 重复写入同一结果覆盖旧的分析师索引
+    catalog.upsert(_entry(1, "000001", 1, ["news_analyst"]))
+    assert catalog.count(analyst_type="market_analyst") == 1
+
+
+def test_tags_and_favorites_are_row_level(tmp_path):
+    catalog = _catalog(tmp_path)
+
+    catalog.add_tag("a1", "长线")
+    catalog.add_tag("a2", "长线")
+    catalog.add_tag("a2", "观察")
+    catalog.remove_tag("a2", "观察")
+    assert catalog.toggle_favorite("a2") is True
+    assert catalog.toggle_favorite("a1") is True
+    assert catalog.toggle_favorite("a1") is False
+
+    assert catalog.tag_counts() == {"长线": 2}
+    assert [r["analysis_id"] for r in catalog.query(tags_filter=["长线"], favorites_only=True)] == ["a2"]
+    row = catalog.query(limit=1, offset=2)[0]
+    assert row["analysis_id"] == "a2" and row["tags"] == ["长线"] and row["is_favorite"]
+
+
+def test_legacy_json_files_are_imported_once(tmp_path):
+    favorites_file = tmp_path / "favorites.json"
+    tags_file = tmp_path / "tags.json"
+    favorites_file.write_text(json.dumps(["a3"]), encoding="utf-8")
+    tags_file.write_text(json.dumps({"a4": ["银行"]}), encoding="utf-8")
+
+    catalog = _catalog(tmp_path)
+    catalog.import_legacy_files(favorites_file, tags_file)
+    catalog.set_favorite("a3", False)
+    catalog.import_legacy_files(favorites_file, tags_file)
+
+    assert catalog.get_favorites() == []
+    assert catalog.get_tags("a4") == ["银行"]
+
+
+def test_path_index_records_mtime_and_migrates_old_schema(tmp_path):
+    import sqlite3
+
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE results (analysis_id TEXT PRIMARY KEY, timestamp REAL NOT NULL, stock_symbol TEXT NOT NULL,"
+        " analysts TEXT NOT NULL, research_depth INTEGER, status TEXT, summary TEXT, source TEXT, path TEXT)"
+    )
+    conn.execute("INSERT INTO results VALUES ('a1', 1.0, '000001', '[]', 1, 'completed', '', 'file_system', '/x')")
+    conn.commit()
+    conn.close()
+
+    catalog = ResultsCatalog(str(db_path))
+    assert catalog.path_index() == {"/x": ("a1", None)}
+
+    catalog.upsert(_entry(2, "000002", 2, []), path="/y", mtime=123.0)
+    assert catalog.path_index()["/y"] == ("a2", 123.0)
+
+    catalog.add_tag("a2", "观察")
+    catalog.delete("a2")
+    assert "/y" not in catalog.path_index() and catalog.get_tags("a2") == []
+
+
+def test_sync_is_throttled_recatalogs_changed_dirs_and_prunes_deleted(tmp_path, monkeypatch):
+    import os
+
+    import pytest
+
+    pytest.importorskip("streamlit")
+    import web.components.analysis_results as mod
+
+    catalog = ResultsCatalog(str(tmp_path / "catalog.db"))
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    detailed = tmp_path / "detailed"
+    reports = detailed / "000001" / "2025-01-02" / "reports"
+    reports.mkdir(parents=True)
+    (reports / "final_trade_decision.md").write_text("写入中", encoding="utf-8")
+    monkeypatch.setattr(mod, "get_analysis_results_dir", lambda: results_dir)
+    monkeypatch.setattr(mod, "get_detailed_results_dir", lambda: detailed)
+
+    assert mod.sync_results_catalog(catalog, force=True) == 1
+    # 节流窗口内不重新扫描
+    assert mod.sync_results_catalog(catalog) == 0
+
+    (reports / "market_report.md").write_text("市场", encoding="utf-8")
+    (reports / "final_trade_decision.md").write_text("最终决策：买入", encoding="utf-8")
+    stat = reports.stat()
+    os.utime(reports, (stat.st_atime + 5, stat.st_mtime + 5))
+    assert mod.sync_results_catalog(catalog, force=True) == 1
+    assert catalog.query()[0]["summary"] == "最终决策：买入"
+    assert mod.sync_results_catalog(catalog, force=True) == 0
+
+    for f in reports.iterdir():
+        f.unlink()
+    reports.rmdir()
+    reports.parent.rmdir()
+    mod.sync_results_catalog(catalog, force=True)
+    assert catalog.count() == 0
+
+
+def test_mongodb_results_are_filtered_and_paged_in_the_query(tmp_path, monkeypatch):
+    import pytest
+
+    mongomock = pytest.importorskip("mongomock")
+    pytest.importorskip("streamlit")
+    import web.components.analysis_results as mod
+    from web.utils.mongodb_report_manager import MongoDBReportManager
+
+    manager = MongoDBReportManager.__new__(MongoDBReportManager)
+    manager.collection = mongomock.MongoClient().db.analysis_reports
+    manager.connected = True
+    for i, symbol, day, analysts in [
+        (1, "000001", 1, ["market_analyst"]),
+        (2, "000001", 2, ["news_analyst"]),
+        (3, "AAPL", 3, ["market_analyst", "news_analyst"]),
+        (4, "600000", 4, ["fundamental_analyst"]),
+    ]:
+        entry = _entry(i, symbol, day, analysts)
+        entry["timestamp"] = datetime.fromtimestamp(entry["timestamp"])
+        entry["reports"] = {"final_trade_decision": f"决策 {i}"}
+        manager.collection.insert_one(entry)
+
+    def _no_full_scan(*args, **kwargs):
+        raise AssertionError("历史页面不应全量加载MongoDB报告")
+
+    monkeypatch.setattr(manager, "get_all_reports", _no_full_scan)
+    catalog = ResultsCatalog(str(tmp_path / "catalog.db"))
+    catalog.add_tag("a1", "观察")
+    catalog.add_tag("a3", "观察")
+    catalog.set_favorite("a3", True)
+    monkeypatch.setattr(mod, "_get_mongodb_manager", lambda: manager)
+    monkeypatch.setattr(mod, "_get_catalog", lambda: catalog)
+
+    page, total = mod.query_analysis_results(limit=2, offset=2)
+    assert [r["analysis_id"] for r in page] == ["a2", "a1"] and total == 4
+    assert page[1]["tags"] == ["观察"] and page[1]["reports"] == {"final_trade_decision": "决策 1"}
+
+    page, total = mod.query_analysis_results(analyst_type="market_analyst", stock_symbol="aapl")
+    assert [r["analysis_id"] for r in page] == ["a3"] and page[0]["is_favorite"]
+    page, total = mod.query_analysis_results(start_date=date(2025, 1, 2), end_date=date(2025, 1, 3))
+    assert [r["analysis_id"] for r in page] == ["a3", "a2"]
+    assert mod.query_analysis_results(search_text="摘要 4")[1] == 1
+
+    page, total = mod.query_analysis_results(tags_filter=["观察"], favorites_only=True)
+    assert [r["analysis_id"] for r in page] == ["a3"] and total == 1
+    assert mod.query_analysis_results(tags_filter=["不存在"]) == ([], 0)
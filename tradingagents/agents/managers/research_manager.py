@@ -1,14 +1,18 @@
 import time
 import json
 
+from tradingagents.agents.utils.debate_compaction import compact_history
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
-def create_research_manager(llm, memory):
+def create_research_manager(llm, memory, compactor=None):
     def research_manager_node(state) -> dict:
         history = state["investment_debate_state"].get("history", "")
+        # 提示词中的辩论历史按预算压缩，状态中保留完整历史
+        prompt_history = compact_history(compactor, history)
         market_research_report = state["market_report"]
         sentiment_report = state["sentiment_report"]
         news_report = state["news_report"]
@@ -63,7 +67,7 @@ def create_research_manager(llm, memory):
 
 以下是辩论：
 辩论历史：
-{history}
+{prompt_history}
 
 请用中文撰写所有分析内容和建议。"""
 
@@ -72,7 +76,7 @@ def create_research_manager(llm, memory):
         estimated_tokens = int(prompt_length / 1.8)
 
         logger.info(f"📊 [Research Manager] Prompt 统计:")
-        logger.info(f"   - 辩论历史长度: {len(history)} 字符")
+        logger.info(f"   - 辩论历史长度: {len(prompt_history)} 字符")
         logger.info(f"   - 总 Prompt 长度: {prompt_length} 字符")
         logger.info(f"   - 估算输入 Token: ~{estimated_tokens} tokens")
 
@@ -1,17 +1,21 @@
 import time
 import json
 
+from tradingagents.agents.utils.debate_compaction import compact_history
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
-def create_risk_manager(llm, memory):
+def create_risk_manager(llm, memory, compactor=None):
     def risk_manager_node(state) -> dict:
 
         company_name = state["company_of_interest"]
 
         history = state["risk_debate_state"]["history"]
+        # 提示词中的辩论历史按预算压缩，状态中保留完整历史
+        prompt_history = compact_history(compactor, history)
         risk_debate_state = state["risk_debate_state"]
         market_research_report = state["market_report"]
         news_report = state["news_report"]
@@ -47,7 +51,7 @@ def create_risk_manager(llm, memory):
 ---
 
 **分析师辩论历史：**
-{history}
+{prompt_history}
 
 ---
 
@@ -59,7 +63,7 @@ def create_risk_manager(llm, memory):
         estimated_tokens = int(prompt_length / 1.8)  # 保守估计
 
         logger.info(f"📊 [Risk Manager] Prompt 统计:")
-        logger.info(f"   - 辩论历史长度: {len(history)} 字符")
+        logger.info(f"   - 辩论历史长度: {len(prompt_history)} 字符")
         logger.info(f"   - 交易员计划长度: {len(trader_plan)} 字符")
         logger.info(f"   - 历史记忆长度: {len(past_memory_str)} 字符")
         logger.info(f"   - 总 Prompt 长度: {prompt_length} 字符")
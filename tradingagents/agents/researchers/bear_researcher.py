@@ -2,12 +2,14 @@ from langchain_core.messages import AIMessage
 import time
 import json
 
+from tradingagents.agents.utils.debate_compaction import compact_history
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
-def create_bear_researcher(llm, memory):
+def create_bear_researcher(llm, memory, compactor=None):
     def bear_node(state) -> dict:
         investment_debate_state = state["investment_debate_state"]
         history = investment_debate_state.get("history", "")
@@ -73,6 +75,9 @@ def create_bear_researcher(llm, memory):
         currency = market_info['currency_name']
         currency_symbol = market_info['currency_symbol']
 
+        # 提示词中的辩论历史按预算压缩，状态中保留完整历史
+        prompt_history = compact_history(compactor, history)
+
         curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
 
         # 安全检查：确保memory不为None
@@ -107,7 +112,7 @@ def create_bear_researcher(llm, memory):
 社交媒体情绪报告：{sentiment_report}
 最新世界事务新闻：{news_report}
 公司基本面报告：{fundamentals_report}
-辩论对话历史：{history}
+辩论对话历史：{prompt_history}
 最后的看涨论点：{current_response}
 类似情况的反思和经验教训：{past_memory_str}
 
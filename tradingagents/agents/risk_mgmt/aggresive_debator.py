@@ -1,12 +1,14 @@
 import time
 import json
 
+from tradingagents.agents.utils.debate_compaction import compact_history
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
-def create_risky_debator(llm):
+def create_risky_debator(llm, compactor=None):
     def risky_node(state) -> dict:
         risk_debate_state = state["risk_debate_state"]
         history = risk_debate_state.get("history", "")
@@ -22,6 +24,9 @@ def create_risky_debator(llm):
 
         trader_decision = state["trader_investment_plan"]
 
+        # 提示词中的辩论历史按预算压缩，状态中保留完整历史
+        prompt_history = compact_history(compactor, history)
+
         # 📊 记录输入数据长度
         logger.info(f"📊 [Risky Analyst] 输入数据长度统计:")
         logger.info(f"  - market_report: {len(market_research_report):,} 字符")
@@ -29,10 +34,10 @@ def create_risky_debator(llm):
         logger.info(f"  - news_report: {len(news_report):,} 字符")
         logger.info(f"  - fundamentals_report: {len(fundamentals_report):,} 字符")
         logger.info(f"  - trader_decision: {len(trader_decision):,} 字符")
-        logger.info(f"  - history: {len(history):,} 字符")
+        logger.info(f"  - history: {len(prompt_history):,} 字符")
         total_length = (len(market_research_report) + len(sentiment_report) +
                        len(news_report) + len(fundamentals_report) +
-                       len(trader_decision) + len(history) +
+                       len(trader_decision) + len(prompt_history) +
                        len(current_safe_response) + len(current_neutral_response))
         logger.info(f"  - 总Prompt长度: {total_length:,} 字符 (~{total_length//4:,} tokens)")
 
@@ -46,7 +51,7 @@ def create_risky_debator(llm):
 社交媒体情绪报告：{sentiment_report}
 最新世界事务报告：{news_report}
 公司基本面报告：{fundamentals_report}
-以下是当前对话历史：{history} 以下是保守分析师的最后论点：{current_safe_response} 以下是中性分析师的最后论点：{current_neutral_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。
+以下是当前对话历史：{prompt_history} 以下是保守分析师的最后论点：{current_safe_response} 以下是中性分析师的最后论点：{current_neutral_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。
 
 积极参与，解决提出的任何具体担忧，反驳他们逻辑中的弱点，并断言承担风险的好处以超越市场常规。专注于辩论和说服，而不仅仅是呈现数据。挑战每个反驳点，强调为什么高风险方法是最优的。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
 
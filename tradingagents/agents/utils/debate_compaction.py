@@ -0,0 +1,258 @@
+"""
+辩论历史压缩
+投资辩论和风险辩论的 history 每轮通过字符串拼接增长，提示词长度和 LLM 耗时随轮次线性上升。
+构建提示词时保留最近 K 次发言原文，更早的发言折叠为有上限的结构化摘要（按发言人汇总的立场、
+论点和关键数据，确定性提取；可选用 LLM 生成摘要），并对每个节点施加 token 预算。
+
+只影响提示词中的辩论历史，状态中的完整 history 不变（报告展示和记忆反思仍使用完整内容）。
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from tradingagents.utils.token_estimator import estimate_tokens
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+# 发言前缀，如 "Bull Analyst: "（见各研究员/风险分析师节点）
+TURN_PATTERN = re.compile(r"^(Bull|Bear|Risky|Safe|Neutral) Analyst: ", re.MULTILINE)
+
+# 裁判节点读取完整辩论，使用更宽松的预算
+JUDGE_NODES = ("research_manager", "risk_manager")
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[。！？!?；;])|\n+")
+_NUMBER_PATTERN = re.compile(
+    r"[-+]?\d+(?:,\d{3})*(?:\.\d+)?\s*(?:%|％|倍|亿元|万元|亿|万|元|美元|港元|港币|个百分点|x|X)"
+    r"|[¥$]\s*\d+(?:,\d{3})*(?:\.\d+)?"
+)
+_NUMBER_CONTEXT = re.compile(r"[\u4e00-\u9fffA-Za-z/（）()]{1,10}\s*[:：为约达至在于]?\s*$")
+_LEADING_CONNECTIVES = re.compile(r"^(由于|因为|但是|然而|而且|其中|只有|仅有|且|而|和|与|及|其)+")
+_STANCE_PATTERN = re.compile(r"(买入|增持|卖出|减持|持有|观望|看涨|看跌)")
+_CLAIM_MARKERS = ("因为", "由于", "因此", "所以", "然而", "但是", "风险", "增长", "估值", "关键", "核心", "优势", "劣势", "担忧")
+_STANCE_LABELS = {
+    "买入": "买入", "增持": "买入", "看涨": "买入",
+    "卖出": "卖出", "减持": "卖出", "看跌": "卖出",
+    "持有": "持有", "观望": "持有",
+}
+
+
+@dataclass
+class DebateTurn:
+    """一次发言"""
+    speaker: str
+    text: str
+
+    @property
+    def body(self) -> str:
+        prefix = f"{self.speaker} Analyst: "
+        return self.text[len(prefix):] if self.text.startswith(prefix) else self.text
+
+
+def split_turns(history: str) -> List[DebateTurn]:
+    """按发言前缀把 history 拆分为发言列表（发言内容本身可以包含换行）"""
+    matches = list(TURN_PATTERN.finditer(history or ""))
+    if not matches:
+        text = (history or "").strip()
+        return [DebateTurn("", text)] if text else []
+
+    turns = []
+    preamble = history[:matches[0].start()].strip()
+    if preamble:
+        turns.append(DebateTurn("", preamble))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(history)
+        turns.append(DebateTurn(match.group(1), history[match.start():end].strip()))
+    return turns
+
+
+def extract_numbers(text: str) -> List[str]:
+    """提取带单位的关键数据及其前面的指标名，如 "毛利率35%"、"PE 20倍" """
+    results = []
+    for match in _NUMBER_PATTERN.finditer(text):
+        prefix = text[max(0, match.start() - 12):match.start()]
+        context = _NUMBER_CONTEXT.search(prefix)
+        label = _LEADING_CONNECTIVES.sub("", context.group(0).strip()) if context else ""
+        results.append(f"{label}{match.group(0).strip()}")
+    return results
+
+
+def extract_stance(text: str) -> Optional[str]:
+    """发言中最后一次明确表态（买入/卖出/持有）"""
+    stances = _STANCE_PATTERN.findall(text)
+    return _STANCE_LABELS[stances[-1]] if stances else None
+
+
+def extract_claims(text: str, max_claims: int, max_chars: int) -> List[str]:
+    """选出包含数据或论证标志词的句子作为论点，保持原有顺序"""
+    scored = []
+    for index, sentence in enumerate(_SENTENCE_SPLIT.split(text)):
+        sentence = (sentence or "").strip(" \t-*#>•")
+        if len(sentence) < 8:
+            continue
+        score = 2 if _NUMBER_PATTERN.search(sentence) else 0
+        score += sum(1 for marker in _CLAIM_MARKERS if marker in sentence)
+        if score:
+            if len(sentence) > max_chars:
+                sentence = sentence[:max_chars] + "…"
+            scored.append((score, index, sentence))
+    best = sorted(scored, key=lambda item: (-item[0], item[1]))[:max_claims]
+    return [sentence for _, _, sentence in sorted(best, key=lambda item: item[1])]
+
+
+@dataclass
+class DebateCompactionPolicy:
+    """辩论历史压缩策略"""
+    keep_last_turns: int = 4  # 原文保留的最近发言数
+    max_history_tokens: int = 4000  # 提示词中辩论历史的 token 预算
+    max_claims_per_speaker: int = 4  # 摘要中每位发言人保留的论点数
+    max_numbers_per_speaker: int = 8  # 摘要中每位发言人保留的关键数据数
+    max_claim_chars: int = 120
+    llm_summary: bool = False  # 使用 LLM 生成摘要（失败时回退到确定性摘要）
+
+
+@dataclass
+class _SpeakerDigest:
+    turns: int = 0
+    stances: List[str] = field(default_factory=list)
+    claims: List[str] = field(default_factory=list)
+    numbers: List[str] = field(default_factory=list)
+
+
+class DebateHistoryCompactor:
+    """按策略压缩提示词中的辩论历史"""
+
+    def __init__(self, policy: Optional[DebateCompactionPolicy] = None, node: str = "", llm=None):
+        self.policy = policy or DebateCompactionPolicy()
+        self.node = node
+        self.llm = llm
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {"calls": 0, "compacted": 0, "folded_turns": 0, "tokens_in": 0, "tokens_out": 0}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], node: str, llm=None) -> Optional["DebateHistoryCompactor"]:
+        """根据图配置创建压缩器；未启用时返回 None（节点直接使用完整历史）"""
+        if not config.get("debate_compaction_enabled", True):
+            return None
+        judge = node in JUDGE_NODES
+        budget = config.get("debate_judge_history_max_tokens", 12000) if judge \
+            else config.get("debate_history_max_tokens", 4000)
+        budget = (config.get("debate_node_history_max_tokens") or {}).get(node, budget)
+        keep = config.get("debate_judge_keep_last_turns", 6) if judge else config.get("debate_keep_last_turns", 4)
+        policy = DebateCompactionPolicy(
+            keep_last_turns=keep,
+            max_history_tokens=budget,
+            llm_summary=config.get("debate_llm_summary", False),
+        )
+        return cls(policy, node=node, llm=llm)
+
+    def compact(self, history: str) -> str:
+        """返回放入提示词的辩论历史：早期发言摘要 + 最近 K 次发言原文，且不超过 token 预算"""
+        self.stats["calls"] += 1
+        tokens_in = estimate_tokens(history)
+        turns = split_turns(history)
+        keep = max(1, self.policy.keep_last_turns)
+        if len(turns) <= keep and tokens_in <= self.policy.max_history_tokens:
+            return history
+
+        keep = min(keep, len(turns))
+        while True:
+            folded, recent = turns[:-keep], turns[-keep:]
+            digest = self._digest(folded) if folded else ""
+            text = "\n\n".join(part for part in [digest, "\n".join(t.text for t in recent)] if part)
+            if estimate_tokens(text) <= self.policy.max_history_tokens or keep == 1:
+                break
+            keep -= 1
+        text = self._truncate(text, self.policy.max_history_tokens)
+
+        tokens_out = estimate_tokens(text)
+        self.stats["compacted"] += 1
+        self.stats["folded_turns"] += len(folded)
+        self.stats["tokens_in"] += tokens_in
+        self.stats["tokens_out"] += tokens_out
+        logger.info(
+            f"🗜️ [{self.node or '辩论'}] 辩论历史压缩: {len(turns)} 次发言 -> 摘要 {len(folded)} 次 + 原文 {keep} 次, "
+            f"~{tokens_in:,} -> ~{tokens_out:,} tokens"
+        )
+        return text
+
+    def _digest(self, turns: List[DebateTurn]) -> str:
+        header = f"【早期辩论摘要：已压缩前 {len(turns)} 次发言，以下为各方立场、论点和关键数据】"
+        if self.policy.llm_summary and self.llm is not None:
+            summary = self._llm_summary(turns)
+            if summary:
+                return f"{header}\n{summary}"
+        return f"{header}\n{self._structured_digest(turns)}"
+
+    def _structured_digest(self, turns: List[DebateTurn]) -> str:
+        speakers: "OrderedDict[str, _SpeakerDigest]" = OrderedDict()
+        policy = self.policy
+        for turn in turns:
+            digest = speakers.setdefault(turn.speaker or "其他", _SpeakerDigest())
+            digest.turns += 1
+            stance = extract_stance(turn.body)
+            if stance and (not digest.stances or digest.stances[-1] != stance):
+                digest.stances.append(stance)
+            digest.claims.extend(extract_claims(turn.body, policy.max_claims_per_speaker, policy.max_claim_chars))
+            for number in extract_numbers(turn.body):
+                if number in digest.numbers:
+                    digest.numbers.remove(number)
+                digest.numbers.append(number)
+
+        lines = []
+        for speaker, digest in speakers.items():
+            name = f"{speaker} Analyst" if speaker != "其他" else speaker
+            lines.append(f"- {name}（{digest.turns} 次发言）")
+            if digest.stances:
+                lines.append(f"  立场: {' -> '.join(digest.stances[-3:])}")
+            # 保留最近的论点和数据，摘要大小与轮次无关
+            claims = digest.claims[-policy.max_claims_per_speaker:]
+            if claims:
+                lines.append(f"  论点: {'；'.join(claims)}")
+            numbers = digest.numbers[-policy.max_numbers_per_speaker:]
+            if numbers:
+                lines.append(f"  数据: {'、'.join(numbers)}")
+        return "\n".join(lines)
+
+    def _llm_summary(self, turns: List[DebateTurn]) -> Optional[str]:
+        folded = "\n".join(t.text for t in turns)
+        key = hashlib.sha1(folded.encode("utf-8")).hexdigest()
+        if key in self._summaries:
+            self._summaries.move_to_end(key)
+            return self._summaries[key]
+
+        budget = max(200, self.policy.max_history_tokens // 3)
+        prompt = (
+            f"请将以下辩论发言压缩为不超过 {budget} 字的中文摘要，按发言人列出立场、核心论点和关键数据，"
+            f"不要添加原文中没有的信息：\n\n{folded}"
+        )
+        try:
+            summary = self._truncate(str(self.llm.invoke(prompt).content).strip(), budget)
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.node or '辩论'}] LLM 摘要失败，使用确定性摘要: {e}")
+            return None
+        self._summaries[key] = summary
+        if len(self._summaries) > 32:
+            self._summaries.popitem(last=False)
+        return summary
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        """超出预算时保留开头部分（摘要和最近发言的开头）"""
+        tokens = estimate_tokens(text)
+        if tokens <= max_tokens:
+            return text
+        marker = "...(内容已截断)"
+        limit = max(0, int(len(text) * max_tokens / tokens) - len(marker))
+        while limit > 0 and estimate_tokens(text[:limit] + marker) > max_tokens:
+            limit = int(limit * 0.95)
+        return text[:limit] + marker
+
+
+def compact_history(compactor: Optional[DebateHistoryCompactor], history: str) -> str:
+    """节点内使用：未配置压缩器时原样返回"""
+    return compactor.compact(history) if compactor is not None else history
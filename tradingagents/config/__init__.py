@@ -2,11 +2,12 @@
 配置管理模块
 """
 
-from .config_manager import config_manager, token_tracker, ModelConfig, PricingConfig, UsageRecord
+from .config_manager import config_manager, token_tracker, ConfigSnapshot, ModelConfig, PricingConfig, UsageRecord
 
 __all__ = [
     'config_manager',
     'token_tracker', 
+    'ConfigSnapshot',
     'ModelConfig',
     'PricingConfig',
     'UsageRecord'
@@ -9,13 +9,21 @@
    迁移脚本: scripts/migrate_config_to_db.py
 """
 
+import atexit
+import copy
 import json
 import os
+import queue
 import re
+import threading
+import time
 import warnings
+import weakref
+from collections import OrderedDict
 from datetime import datetime
+from types import MappingProxyType
 from zoneinfo import ZoneInfo
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Mapping, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from dotenv import load_dotenv
@@ -58,8 +66,32 @@ except Exception as e:
     MongoDBStorage = None
 
 
+# load_settings 中合并的环境变量（用于判断合并结果是否需要重算）
+_SETTINGS_ENV_VARS = (
+    "FINNHUB_API_KEY", "REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET", "REDDIT_USER_AGENT",
+    "TRADINGAGENTS_RESULTS_DIR", "TRADINGAGENTS_LOG_LEVEL", "TRADINGAGENTS_DATA_DIR",
+    "TRADINGAGENTS_CACHE_DIR", "OPENAI_ENABLED",
+)
+# load_models 中合并的 API 密钥环境变量
+_MODEL_ENV_VARS = ("DASHSCOPE_API_KEY", "OPENAI_API_KEY", "GOOGLE_API_KEY", "ANTHROPIC_API_KEY", "DEEPSEEK_API_KEY")
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """不可变的配置快照，version 在任一配置来源变化时递增"""
+    version: int
+    settings: Mapping[str, Any]
+    pricing: Tuple[PricingConfig, ...]
+    models: Tuple[ModelConfig, ...]
+    pricing_index: Mapping[Tuple[str, str], PricingConfig]
+    mongo_config_version: Optional[int] = None
+
+
 class ConfigManager:
     """配置管理器"""
+
+    # 轮询 MongoDB system_configs 版本的最小间隔（秒）
+    MONGO_VERSION_CHECK_INTERVAL = 30.0
     
     def __init__(self, config_dir: str = "config"):
         self.config_dir = Path(config_dir)
@@ -70,6 +102,19 @@ class ConfigManager:
         self.usage_file = self.config_dir / "usage.json"
         self.settings_file = self.config_dir / "settings.json"
 
+        # 配置快照：各来源按 (文件签名, 环境变量签名) 缓存解析结果，变化时生成新版本并通知监听者
+        self._snapshot_lock = threading.RLock()
+        self._parsed: Dict[str, Tuple[Any, Any]] = {}
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._snapshot_sources: Optional[Tuple[Any, ...]] = None
+        # 绑定方法以 WeakMethod 保存，监听者对象被回收后自动移除
+        self._listeners: List[Callable[[], Optional[Callable]]] = []
+        self._mongo_config_version: Optional[int] = None
+        self._mongo_version_checked_at = 0.0
+        # 只用于节流 MongoDB 版本读取，不与快照锁嵌套
+        self._mongo_version_lock = threading.Lock()
+        self._refreshing = False
+
         # 加载.env文件（保持向后兼容）
         self._load_env_file()
 
@@ -300,14 +345,16 @@ class ConfigManager:
             self.save_settings(default_settings)
     
     def load_models(self) -> List[ModelConfig]:
-        """加载模型配置，优先使用.env中的API密钥"""
+        """加载模型配置，优先使用.env中的API密钥（返回快照的副本）"""
+        return [copy.copy(model) for model in self.get_snapshot().models]
+
+    def _read_models(self, settings: Mapping[str, Any]) -> List[ModelConfig]:
+        """读取 models.json 并合并.env中的API密钥"""
         try:
             with open(self.models_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 models = [ModelConfig(**item) for item in data]
 
-                # 获取设置
-                settings = self.load_settings()
                 openai_enabled = settings.get("openai_enabled", False)
 
                 # 合并.env中的API密钥（优先级更高）
@@ -341,11 +388,16 @@ class ConfigManager:
             data = [asdict(model) for model in models]
             with open(self.models_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
+            self._invalidate("models")
         except Exception as e:
             logger.error(f"保存模型配置失败: {e}")
     
     def load_pricing(self) -> List[PricingConfig]:
-        """加载定价配置"""
+        """加载定价配置（返回快照的副本）"""
+        return [copy.copy(price) for price in self.get_snapshot().pricing]
+
+    def _read_pricing(self) -> List[PricingConfig]:
+        """读取 pricing.json"""
         try:
             with open(self.pricing_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -360,6 +412,7 @@ class ConfigManager:
             data = [asdict(price) for price in pricing]
             with open(self.pricing_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
+            self._invalidate("pricing")
         except Exception as e:
             logger.error(f"保存定价配置失败: {e}")
     
@@ -384,13 +437,12 @@ class ConfigManager:
         except Exception as e:
             logger.error(f"保存使用记录失败: {e}")
     
-    def add_usage_record(self, provider: str, model_name: str, input_tokens: int,
-                        output_tokens: int, session_id: str, analysis_type: str = "stock_analysis"):
-        """添加使用记录"""
-        # 计算成本和货币单位
+    def build_usage_record(self, provider: str, model_name: str, input_tokens: int,
+                           output_tokens: int, session_id: str, analysis_type: str = "stock_analysis") -> UsageRecord:
+        """构造使用记录（计算成本，不落盘）"""
         cost, currency = self.calculate_cost(provider, model_name, input_tokens, output_tokens)
 
-        record = UsageRecord(
+        return UsageRecord(
             timestamp=datetime.now(ZoneInfo(get_timezone_name())).isoformat(),
             provider=provider,
             model_name=model_name,
@@ -402,18 +454,33 @@ class ConfigManager:
             analysis_type=analysis_type
         )
 
+    def add_usage_record(self, provider: str, model_name: str, input_tokens: int,
+                        output_tokens: int, session_id: str, analysis_type: str = "stock_analysis"):
+        """添加使用记录（同步落盘）"""
+        record = self.build_usage_record(provider, model_name, input_tokens, output_tokens,
+                                         session_id, analysis_type)
+
         # 🔍 详细日志：记录保存位置
-        logger.info(f"💾 [Token记录] 准备保存: {provider}/{model_name}, 输入={input_tokens}, 输出={output_tokens}, 成本=¥{cost:.4f}, session={session_id}")
+        logger.info(f"💾 [Token记录] 准备保存: {provider}/{model_name}, 输入={input_tokens}, 输出={output_tokens}, 成本=¥{record.cost:.4f}, session={session_id}")
+
+        self.persist_usage_records([record])
+        return record
+
+    def persist_usage_records(self, records: List[UsageRecord]) -> bool:
+        """批量落盘使用记录：优先 MongoDB（insert_many），否则一次性追加到 JSON 文件"""
+        if not records:
+            return True
 
         # 优先使用MongoDB存储
         if self.mongodb_storage and self.mongodb_storage.is_connected():
             logger.info(f"📊 [Token记录] 使用 MongoDB 存储 (数据库: {self.mongodb_storage.database_name}, 集合: {self.mongodb_storage.collection_name})")
-            success = self.mongodb_storage.save_usage_record(record)
-            if success:
-                logger.info(f"✅ [Token记录] MongoDB 保存成功: {provider}/{model_name}")
-                return record
-            else:
-                logger.error(f"⚠️ [Token记录] MongoDB保存失败，回退到JSON文件存储")
+            failed = self.mongodb_storage.save_usage_records(records)
+            if not failed:
+                logger.info(f"✅ [Token记录] MongoDB 保存成功: {len(records)} 条")
+                return True
+            # 只回退写入失败的记录，已写入 MongoDB 的不再重复追加
+            logger.error(f"⚠️ [Token记录] MongoDB保存失败 {len(failed)}/{len(records)} 条，回退到JSON文件存储")
+            records = failed
         else:
             # 🔍 详细日志：为什么没有使用MongoDB
             if self.mongodb_storage is None:
@@ -425,18 +492,18 @@ class ConfigManager:
             logger.info(f"📄 [Token记录] 使用 JSON 文件存储: {self.usage_file}")
 
         # 回退到JSON文件存储
-        records = self.load_usage_records()
-        records.append(record)
+        all_records = self.load_usage_records()
+        all_records.extend(records)
 
         # 限制记录数量
         settings = self.load_settings()
         max_records = settings.get("max_usage_records", 10000)
-        if len(records) > max_records:
-            records = records[-max_records:]
+        if len(all_records) > max_records:
+            all_records = all_records[-max_records:]
 
-        self.save_usage_records(records)
-        logger.info(f"✅ [Token记录] JSON 文件保存成功: {self.usage_file}")
-        return record
+        self.save_usage_records(all_records)
+        logger.info(f"✅ [Token记录] JSON 文件保存成功: {self.usage_file} (+{len(records)} 条)")
+        return True
     
     def calculate_cost(self, provider: str, model_name: str, input_tokens: int, output_tokens: int) -> tuple[float, str]:
         """
@@ -445,25 +512,33 @@ class ConfigManager:
         Returns:
             tuple[float, str]: (成本, 货币单位)
         """
-        pricing_configs = self.load_pricing()
+        pricing_index = self.get_snapshot().pricing_index
 
-        for pricing in pricing_configs:
-            if pricing.provider == provider and pricing.model_name == model_name:
-                input_cost = (input_tokens / 1000) * pricing.input_price_per_1k
-                output_cost = (output_tokens / 1000) * pricing.output_price_per_1k
-                total_cost = input_cost + output_cost
-                return round(total_cost, 6), pricing.currency
+        pricing = pricing_index.get((provider, model_name))
+        if pricing is not None:
+            input_cost = (input_tokens / 1000) * pricing.input_price_per_1k
+            output_cost = (output_tokens / 1000) * pricing.output_price_per_1k
+            total_cost = input_cost + output_cost
+            return round(total_cost, 6), pricing.currency
 
         # 只在找不到配置时输出调试信息
         logger.warning(f"⚠️ [calculate_cost] 未找到匹配的定价配置: {provider}/{model_name}")
         logger.debug(f"⚠️ [calculate_cost] 可用的配置:")
-        for pricing in pricing_configs:
-            logger.debug(f"⚠️ [calculate_cost]   - {pricing.provider}/{pricing.model_name}")
+        for provider_name, model in pricing_index:
+            logger.debug(f"⚠️ [calculate_cost]   - {provider_name}/{model}")
 
         return 0.0, "CNY"
-    
+
+    def get_pricing_index(self) -> Mapping[Tuple[str, str], PricingConfig]:
+        """获取定价哈希表 {(provider, model_name): PricingConfig}"""
+        return self.get_snapshot().pricing_index
+
     def load_settings(self) -> Dict[str, Any]:
-        """加载设置，合并.env中的配置"""
+        """加载设置，合并.env中的配置（返回快照的可修改副本）"""
+        return copy.deepcopy(dict(self.get_snapshot().settings))
+
+    def _read_settings(self) -> Dict[str, Any]:
+        """读取 settings.json 并合并.env中的配置"""
         try:
             if self.settings_file.exists():
                 with open(self.settings_file, 'r', encoding='utf-8') as f:
@@ -540,8 +615,156 @@ class ConfigManager:
         try:
             with open(self.settings_file, 'w', encoding='utf-8') as f:
                 json.dump(settings, f, ensure_ascii=False, indent=2)
+            self._invalidate("settings")
         except Exception as e:
             logger.error(f"保存设置失败: {e}")
+
+    # ==================== 配置快照 ====================
+
+    @staticmethod
+    def _file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = path.stat()
+            return st.st_mtime_ns, st.st_size, st.st_ino
+        except OSError:
+            return None
+
+    def _cached(self, name: str, key: Any, loader: Callable[[], Any]) -> Any:
+        """key 未变化时复用上次的解析结果"""
+        cached = self._parsed.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        value = loader()
+        self._parsed[name] = (key, value)
+        return value
+
+    def _invalidate(self, name: str):
+        """本进程写入配置文件后立即刷新快照（同一时间片内的多次写入 mtime 可能不变）"""
+        with self._snapshot_lock:
+            self._parsed.pop(name, None)
+            # 解析过程中写入默认配置时不递归刷新，下次访问会按新的文件签名重新解析
+            if self._snapshot is None or self._refreshing:
+                return
+        self.get_snapshot()
+
+    def _get_mongo_config_version(self) -> Optional[int]:
+        """节流读取 MongoDB 中激活的 system_configs 版本（仅在启用 MongoDB 存储时）
+
+        在快照锁之外调用；同一时刻只有一个线程发起查询，其他线程直接使用上次的结果。
+        """
+        storage = self.mongodb_storage
+        if not storage or not storage.is_connected():
+            return self._mongo_config_version
+        if time.monotonic() - self._mongo_version_checked_at < self.MONGO_VERSION_CHECK_INTERVAL:
+            return self._mongo_config_version
+        if not self._mongo_version_lock.acquire(blocking=False):
+            return self._mongo_config_version
+        try:
+            self._mongo_version_checked_at = time.monotonic()
+            doc = storage.db.system_configs.find_one(
+                {"is_active": True}, sort=[("version", -1)], projection={"version": 1}
+            )
+            self._mongo_config_version = doc.get("version") if doc else None
+        except Exception as e:
+            logger.debug(f"🔍 [ConfigManager] 读取配置版本失败: {e}")
+        finally:
+            self._mongo_version_lock.release()
+        return self._mongo_config_version
+
+    def notify_mongo_config_version(self, version: int):
+        """外部（ConfigService 保存 system_configs 后）主动告知新的 MongoDB 配置版本"""
+        with self._mongo_version_lock:
+            self._mongo_config_version = version
+            self._mongo_version_checked_at = time.monotonic()
+        self.get_snapshot()
+
+    def get_snapshot(self) -> ConfigSnapshot:
+        """获取当前配置快照；只有文件 mtime、相关环境变量或 MongoDB 配置版本变化时才重新解析"""
+        mongo_version = self._get_mongo_config_version()
+        with self._snapshot_lock:
+            self._refreshing = True
+            try:
+                settings, pricing, models = self._load_sources()
+            finally:
+                self._refreshing = False
+
+            sources = (id(settings), id(pricing), id(models), mongo_version)
+            previous = self._snapshot
+            if previous is not None and sources == self._snapshot_sources:
+                return previous
+
+            pricing_index: Dict[Tuple[str, str], PricingConfig] = {}
+            for price in pricing:
+                # 与原线性查找保持一致：重复配置以第一条为准
+                pricing_index.setdefault((price.provider, price.model_name), price)
+            snapshot = ConfigSnapshot(
+                version=(previous.version + 1) if previous else 1,
+                settings=MappingProxyType(settings),
+                pricing=pricing,
+                models=models,
+                pricing_index=MappingProxyType(pricing_index),
+                mongo_config_version=mongo_version,
+            )
+            self._snapshot = snapshot
+            self._snapshot_sources = sources
+            listeners = self._live_listeners() if previous is not None else []
+
+        for listener in listeners:
+            try:
+                listener(previous, snapshot)
+            except Exception as e:
+                logger.warning(f"⚠️ [ConfigManager] 配置变更回调失败: {e}")
+        if previous is not None:
+            logger.info(f"🔄 [ConfigManager] 配置已更新: 版本 {previous.version} -> {snapshot.version}")
+        return snapshot
+
+    def _load_sources(self):
+        """按签名复用 settings / pricing / models 的解析结果"""
+        settings = self._cached(
+            "settings",
+            (self._file_signature(self.settings_file), tuple(os.getenv(k) for k in _SETTINGS_ENV_VARS)),
+            self._read_settings,
+        )
+        pricing = self._cached("pricing", self._file_signature(self.pricing_file),
+                               lambda: tuple(self._read_pricing()))
+        models = self._cached(
+            "models",
+            (self._file_signature(self.models_file), settings.get("openai_enabled", False),
+             tuple(os.getenv(k) for k in _MODEL_ENV_VARS)),
+            lambda: tuple(self._read_models(settings)),
+        )
+        return settings, pricing, models
+
+    @staticmethod
+    def _listener_ref(listener: Callable) -> Callable[[], Optional[Callable]]:
+        """绑定方法用弱引用，避免监听者对象（如每次调用都新建的数据提供器）被永久持有"""
+        if hasattr(listener, "__self__") and hasattr(listener, "__func__"):
+            return weakref.WeakMethod(listener)
+        return lambda: listener
+
+    def _live_listeners(self) -> List[Callable]:
+        """返回仍存活的监听者，并清理已被回收的（调用方持有 _snapshot_lock）"""
+        live, refs = [], []
+        for ref in self._listeners:
+            listener = ref()
+            if listener is not None:
+                live.append(listener)
+                refs.append(ref)
+        self._listeners = refs
+        return live
+
+    def add_change_listener(self, listener: Callable[[Optional[ConfigSnapshot], ConfigSnapshot], None]):
+        """注册配置变更回调 listener(old_snapshot, new_snapshot)
+
+        绑定方法只保存弱引用，对象被回收后回调自动失效。
+        """
+        with self._snapshot_lock:
+            if listener not in self._live_listeners():
+                self._listeners.append(self._listener_ref(listener))
+
+    def remove_change_listener(self, listener: Callable[[Optional[ConfigSnapshot], ConfigSnapshot], None]):
+        with self._snapshot_lock:
+            self._listeners = [ref for ref in self._listeners if ref() not in (None, listener)]
     
     def get_enabled_models(self) -> List[ModelConfig]:
         """获取启用的模型"""
@@ -689,27 +912,144 @@ class ConfigManager:
         }
 
 
+class _UsageBatchWriter:
+    """使用记录后台批量写入器（守护线程，按条数/时间间隔合并落盘）"""
+
+    def __init__(self, config_manager: ConfigManager, batch_size: int = 100, flush_interval: float = 1.0):
+        self.config_manager = config_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[UsageRecord]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.stats = {"queued": 0, "flushed": 0, "failed": 0, "batches": 0}
+
+    def put(self, record: UsageRecord):
+        self._ensure_started()
+        self.stats["queued"] += 1
+        self._queue.put(record)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="token-usage-writer", daemon=True)
+                self._thread.start()
+
+    def _drain(self) -> List[UsageRecord]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # 在一个时间窗口内阻塞等待后续记录，让同一轮分析的记录合并写入
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[UsageRecord]):
+        if not batch:
+            return
+        with self._write_lock:
+            try:
+                self.config_manager.persist_usage_records(batch)
+                self.stats["flushed"] += len(batch)
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                logger.error(f"❌ [Token记录] 批量保存失败，丢弃 {len(batch)} 条: {e}")
+            self.stats["batches"] += 1
+        for _ in batch:
+            self._queue.task_done()
+
+    def flush(self, timeout: float = 10.0):
+        """同步写出队列中所有待写记录，并等待后台线程中正在进行的批次完成"""
+        while not self._queue.empty():
+            self._write(self._drain())
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"⚠️ [Token记录] 等待批量写入超时，仍有 {self._queue.unfinished_tasks} 条未落盘")
+                    break
+                self._queue.all_tasks_done.wait(remaining)
+
+
 class TokenTracker:
-    """Token使用跟踪器"""
+    """Token使用跟踪器
+
+    成本计算、每日/会话/供应商累计和成本告警都在内存中完成，
+    使用记录交给后台线程批量落盘。
+    会话累计只保留最近活跃的 SESSION_COST_CACHE_SIZE 个会话（LRU），更早的会话从存储中统计。
+    """
+
+    SESSION_COST_CACHE_SIZE = 1000
 
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
+        self._lock = threading.Lock()
+        # 今日累计（首次使用时从存储中初始化一次）
+        self._day: Optional[str] = None
+        self._day_totals = self._empty_totals()
+        self._provider_totals: Dict[str, Dict[str, Any]] = {}
+        self._session_costs: "OrderedDict[str, float]" = OrderedDict()
+        self._evicted_sessions: "OrderedDict[str, None]" = OrderedDict()
+        self.writer = _UsageBatchWriter(config_manager)
+        atexit.register(self.flush)
+
+    @staticmethod
+    def _empty_totals() -> Dict[str, Any]:
+        return {"cost": 0.0, "input_tokens": 0, "output_tokens": 0, "requests": 0}
+
+    def _get_tracking_settings(self) -> Dict[str, Any]:
+        settings = self.config_manager.get_snapshot().settings
+        return {
+            "enable_cost_tracking": settings.get("enable_cost_tracking", True),
+            "cost_alert_threshold": settings.get("cost_alert_threshold", 100.0),
+        }
+
+    def _roll_day(self, day: str):
+        """切换到新的一天，并从已落盘的记录初始化今日成本（调用方持有 self._lock）"""
+        self._day = day
+        self._day_totals = self._empty_totals()
+        self._provider_totals = {}
+        try:
+            self._day_totals["cost"] = self.config_manager.get_usage_statistics(1).get("total_cost", 0.0)
+        except Exception as e:
+            logger.warning(f"⚠️ [Token记录] 初始化今日成本失败: {e}")
 
     def track_usage(self, provider: str, model_name: str, input_tokens: int,
                    output_tokens: int, session_id: str = None, analysis_type: str = "stock_analysis"):
         """跟踪Token使用"""
+        now = datetime.now(ZoneInfo(get_timezone_name()))
         if session_id is None:
-            session_id = f"session_{datetime.now(ZoneInfo(get_timezone_name())).strftime('%Y%m%d_%H%M%S')}"
+            session_id = f"session_{now.strftime('%Y%m%d_%H%M%S')}"
 
         # 检查是否启用成本跟踪
-        settings = self.config_manager.load_settings()
-        cost_tracking_enabled = settings.get("enable_cost_tracking", True)
-
-        if not cost_tracking_enabled:
+        settings = self._get_tracking_settings()
+        if not settings["enable_cost_tracking"]:
             return None
 
-        # 添加使用记录
-        record = self.config_manager.add_usage_record(
+        record = self.config_manager.build_usage_record(
             provider=provider,
             model_name=model_name,
             input_tokens=input_tokens,
@@ -718,20 +1058,48 @@ class TokenTracker:
             analysis_type=analysis_type
         )
 
+        day = record.timestamp[:10]
+        if day != self._day:
+            # 换日前先在锁外写出待落盘记录，避免持锁等待后台批次
+            self.writer.flush()
+
+        with self._lock:
+            if day != self._day:
+                self._roll_day(day)
+            for totals in (self._day_totals,
+                           self._provider_totals.setdefault(provider, self._empty_totals())):
+                totals["cost"] += record.cost
+                totals["input_tokens"] += input_tokens
+                totals["output_tokens"] += output_tokens
+                totals["requests"] += 1
+            self._add_session_cost(session_id, record.cost)
+            total_today = self._day_totals["cost"]
+
+        # 后台批量落盘
+        self.writer.put(record)
+
         # 检查成本警告
-        if record:
-            self._check_cost_alert(record.cost)
+        self._check_cost_alert(total_today)
 
         return record
 
-    def _check_cost_alert(self, current_cost: float):
-        """检查成本警告"""
-        settings = self.config_manager.load_settings()
-        threshold = settings.get("cost_alert_threshold", 100.0)
-
-        # 获取今日总成本
-        today_stats = self.config_manager.get_usage_statistics(1)
-        total_today = today_stats["total_cost"]
+    def _add_session_cost(self, session_id: str, cost: float):
+        """累加会话成本并淘汰最久未活跃的会话（调用方持有 self._lock）"""
+        session_costs = self._session_costs
+        if session_id in self._evicted_sessions:
+            # 被淘汰后再次记账的会话在内存中只有部分累计，继续从存储统计
+            return
+        if session_id not in session_costs and len(session_costs) >= self.SESSION_COST_CACHE_SIZE:
+            evicted, _ = session_costs.popitem(last=False)
+            self._evicted_sessions[evicted] = None
+            if len(self._evicted_sessions) > self.SESSION_COST_CACHE_SIZE:
+                self._evicted_sessions.popitem(last=False)
+        session_costs[session_id] = session_costs.get(session_id, 0.0) + cost
+        session_costs.move_to_end(session_id)
+
+    def _check_cost_alert(self, total_today: float):
+        """检查成本警告（基于内存中的今日累计）"""
+        threshold = self._get_tracking_settings()["cost_alert_threshold"]
 
         if total_today >= threshold:
             logger.warning(f"⚠️ 成本警告: 今日成本已达到 ¥{total_today:.4f}，超过阈值 ¥{threshold}",
@@ -739,10 +1107,30 @@ class TokenTracker:
 
     def get_session_cost(self, session_id: str) -> float:
         """获取会话成本"""
+        with self._lock:
+            if session_id in self._session_costs:
+                return self._session_costs[session_id]
+
+        # 非本进程记录的会话：从存储中统计
+        self.writer.flush()
         records = self.config_manager.load_usage_records()
         session_cost = sum(record.cost for record in records if record.session_id == session_id)
         return session_cost
 
+    def get_today_summary(self) -> Dict[str, Any]:
+        """获取内存中的今日累计（总计和按供应商）"""
+        with self._lock:
+            return {
+                "date": self._day,
+                **self._day_totals,
+                "provider_stats": {k: dict(v) for k, v in self._provider_totals.items()},
+                "writer": dict(self.writer.stats),
+            }
+
+    def flush(self):
+        """立即写出所有待落盘的使用记录"""
+        self.writer.flush()
+
     def estimate_cost(self, provider: str, model_name: str, estimated_input_tokens: int,
                      estimated_output_tokens: int) -> tuple[float, str]:
         """
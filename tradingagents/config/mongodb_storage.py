@@ -17,12 +17,16 @@ from tradingagents.config.runtime_settings import get_timezone_name
 logger = get_logger('agents')
 
 try:
-    from pymongo import MongoClient
-    from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+    from pymongo import MongoClient, UpdateOne
+    from pymongo.errors import BulkWriteError, ConnectionFailure, ServerSelectionTimeoutError
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
     MongoClient = None
+    UpdateOne = None
+
+    class BulkWriteError(Exception):
+        """pymongo 未安装时的占位类型"""
 
 
 class MongoDBStorage:
@@ -44,10 +48,13 @@ class MongoDBStorage:
         
         self.database_name = database_name
         self.collection_name = "token_usage"
+        # 日汇总集合（与 app.services.usage_statistics_service 共用）
+        self.rollup_collection_name = "token_usage_daily"
         
         self.client = None
         self.db = None
         self.collection = None
+        self.rollup_collection = None
         self._connected = False
         
         # 尝试连接
@@ -73,6 +80,7 @@ class MongoDBStorage:
             
             self.db = self.client[self.database_name]
             self.collection = self.db[self.collection_name]
+            self.rollup_collection = self.db[self.rollup_collection_name]
             
             # 创建索引以提高查询性能
             self._create_indexes()
@@ -103,6 +111,14 @@ class MongoDBStorage:
             
             # 创建分析类型索引
             self.collection.create_index("analysis_type")
+
+            # 日汇总唯一键索引
+            self.rollup_collection.create_index([
+                ("date", 1),
+                ("provider", 1),
+                ("model_name", 1),
+                ("currency", 1)
+            ], unique=True, name="rollup_key_unique")
             
         except Exception as e:
             logger.error(f"创建MongoDB索引失败: {e}")
@@ -132,6 +148,7 @@ class MongoDBStorage:
             result = self.collection.insert_one(record_dict)
 
             if result.inserted_id:
+                self._inc_daily_rollup(record_dict)
                 logger.info(f"✅ [MongoDB存储] 记录已保存: ID={result.inserted_id}, {record.provider}/{record.model_name}, ¥{record.cost:.4f}")
                 return True
             else:
@@ -144,6 +161,101 @@ class MongoDBStorage:
             logger.error(f"   堆栈: {traceback.format_exc()}")
             return False
     
+    def save_usage_records(self, records: List[UsageRecord]) -> List[UsageRecord]:
+        """批量保存使用记录（一次无序 insert_many + 一次日汇总 bulk_write）
+
+        Returns:
+            未能写入的记录；部分失败时只返回失败的那部分，已写入的记录不会被重复回退
+        """
+        if not records:
+            return []
+        if not self._connected:
+            logger.warning(f"⚠️ [MongoDB存储] 未连接，无法保存记录")
+            return list(records)
+
+        created_at = datetime.now(ZoneInfo(get_timezone_name()))
+        record_dicts = []
+        for record in records:
+            record_dict = asdict(record)
+            record_dict['_created_at'] = created_at
+            record_dicts.append(record_dict)
+
+        failed_indexes = set()
+        try:
+            self.collection.insert_many(record_dicts, ordered=False)
+        except BulkWriteError as e:
+            failed_indexes = {error['index'] for error in e.details.get('writeErrors', [])}
+            logger.error(f"❌ [MongoDB存储] 批量保存部分失败: {len(failed_indexes)}/{len(record_dicts)} 条")
+        except Exception as e:
+            logger.error(f"❌ [MongoDB存储] 批量保存记录失败: {e}")
+            return list(records)
+
+        inserted = [d for i, d in enumerate(record_dicts) if i not in failed_indexes]
+        self._inc_daily_rollups(inserted)
+        logger.info(f"✅ [MongoDB存储] 批量保存 {len(inserted)} 条记录")
+        return [records[i] for i in sorted(failed_indexes)]
+
+    def _inc_daily_rollups(self, record_dicts: List[Dict[str, Any]]):
+        """按汇总键合并后一次性累加到日汇总"""
+        buckets: Dict[tuple, Dict[str, Any]] = {}
+        for record_dict in record_dicts:
+            date_key = (record_dict.get('timestamp') or '')[:10]
+            if not date_key:
+                continue
+            key = (
+                date_key,
+                record_dict.get('provider') or 'unknown',
+                record_dict.get('model_name') or 'unknown',
+                record_dict.get('currency') or 'CNY'
+            )
+            bucket = buckets.setdefault(key, {'requests': 0, 'input_tokens': 0, 'output_tokens': 0, 'cost': 0.0})
+            bucket['requests'] += 1
+            bucket['input_tokens'] += record_dict.get('input_tokens', 0) or 0
+            bucket['output_tokens'] += record_dict.get('output_tokens', 0) or 0
+            bucket['cost'] += record_dict.get('cost', 0.0) or 0.0
+
+        if not buckets:
+            return
+        try:
+            now = datetime.now()
+            self.rollup_collection.bulk_write([
+                UpdateOne(
+                    {'date': date_key, 'provider': provider, 'model_name': model_name, 'currency': currency},
+                    {'$inc': bucket, '$set': {'updated_at': now}},
+                    upsert=True
+                )
+                for (date_key, provider, model_name, currency), bucket in buckets.items()
+            ], ordered=False)
+        except Exception as e:
+            logger.warning(f"⚠️ [MongoDB存储] 批量更新日汇总失败: {e}")
+
+    def _inc_daily_rollup(self, record_dict: Dict[str, Any]):
+        """将记录累加到日汇总（日期×供应商×模型×货币），失败不影响原始记录"""
+        date_key = (record_dict.get('timestamp') or '')[:10]
+        if not date_key:
+            return
+        try:
+            self.rollup_collection.update_one(
+                {
+                    'date': date_key,
+                    'provider': record_dict.get('provider') or 'unknown',
+                    'model_name': record_dict.get('model_name') or 'unknown',
+                    'currency': record_dict.get('currency') or 'CNY'
+                },
+                {
+                    '$inc': {
+                        'requests': 1,
+                        'input_tokens': record_dict.get('input_tokens', 0) or 0,
+                        'output_tokens': record_dict.get('output_tokens', 0) or 0,
+                        'cost': record_dict.get('cost', 0.0) or 0.0
+                    },
+                    '$set': {'updated_at': datetime.now()}
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [MongoDB存储] 更新日汇总失败: {e}")
+
     def load_usage_records(self, limit: int = 10000, days: int = None) -> List[UsageRecord]:
         """从MongoDB加载使用记录"""
         if not self._connected:
@@ -291,6 +403,11 @@ class MongoDBStorage:
             })
             
             deleted_count = result.deleted_count
+
+            self.rollup_collection.delete_many({
+                'date': {'$lt': cutoff_date.strftime('%Y-%m-%d')}
+            })
+
             if deleted_count > 0:
                 logger.info(f"清理了 {deleted_count} 条超过 {days} 天的记录")
             
@@ -1,90 +1,35 @@
-# 导入基础模块
-# Finnhub 工具（支持新旧路径）
-try:
-    from .providers.us import get_data_in_range
-except ImportError:
-    try:
-        from .finnhub_utils import get_data_in_range
-    except ImportError:
-        get_data_in_range = None
-
-# 导入新闻模块（新路径）
-try:
-    from .news import getNewsData, fetch_top_from_category
-except ImportError:
-    # 向后兼容：尝试从旧路径导入
-    try:
-        from .news.google_news import getNewsData
-    except ImportError:
-        getNewsData = None
-    try:
-        from .news.reddit import fetch_top_from_category
-    except ImportError:
-        fetch_top_from_category = None
+# 数据流模块
+#
+# 按需加载（PEP 562）：导入 tradingagents.dataflows 或其任意子模块时，不再立即加载
+# Finnhub / Google / Reddit 新闻、yfinance、stockstats 以及 interface（pandas、
+# 各数据提供器、数据库管理器），只有在第一次访问对应属性时才导入。
+import importlib
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
-# 尝试导入yfinance相关模块（支持新旧路径）
-try:
-    from .providers.us import YFinanceUtils, YFINANCE_AVAILABLE
-except ImportError:
-    try:
-        from .yfin_utils import YFinanceUtils
-        YFINANCE_AVAILABLE = True
-    except ImportError as e:
-        logger.warning(f"⚠️ yfinance模块不可用: {e}")
-        YFinanceUtils = None
-        YFINANCE_AVAILABLE = False
-
-# 导入技术指标模块（新路径）
-try:
-    from .technical import StockstatsUtils, STOCKSTATS_AVAILABLE
-except ImportError as e:
-    # 向后兼容：尝试从旧路径导入
-    try:
-        from .technical.stockstats import StockstatsUtils
-        STOCKSTATS_AVAILABLE = True
-    except ImportError as e:
-        logger.warning(f"⚠️ stockstats模块不可用: {e}")
-        StockstatsUtils = None
-        STOCKSTATS_AVAILABLE = False
-
-from .interface import (
+# 属性名 -> 候选来源列表 [(模块, 属性名)]，按顺序尝试（新路径优先，旧路径兼容）
+_LAZY_OPTIONAL = {
+    # Finnhub 工具（支持新旧路径）
+    "get_data_in_range": [(".providers.us", "get_data_in_range"), (".finnhub_utils", "get_data_in_range")],
+    # 新闻模块
+    "getNewsData": [(".news", "getNewsData"), (".news.google_news", "getNewsData")],
+    "fetch_top_from_category": [(".news", "fetch_top_from_category"), (".news.reddit", "fetch_top_from_category")],
+    # yfinance 相关模块
+    "YFinanceUtils": [(".providers.us", "YFinanceUtils"), (".yfin_utils", "YFinanceUtils")],
+    # 技术指标模块
+    "StockstatsUtils": [(".technical", "StockstatsUtils"), (".technical.stockstats", "StockstatsUtils")],
+}
 
-    # News and sentiment functions
-    get_finnhub_news,
-    get_finnhub_company_insider_sentiment,
-    get_finnhub_company_insider_transactions,
-    get_google_news,
-    get_reddit_global_news,
-    get_reddit_company_news,
-    # Financial statements functions
-    get_simfin_balance_sheet,
-    get_simfin_cashflow,
-    get_simfin_income_statements,
-    # Technical analysis functions
-    get_stock_stats_indicators_window,
-    get_stockstats_indicator,
-    # Market data functions
-    get_YFin_data_window,
-    get_YFin_data,
-    # Tushare data functions
-    get_china_stock_data_tushare,
-    get_china_stock_fundamentals_tushare,
-    # Unified China data functions (recommended)
-    get_china_stock_data_unified,
-    get_china_stock_info_unified,
-    switch_china_data_source,
-    get_current_china_data_source,
-    # Hong Kong stock functions
-    get_hk_stock_data_unified,
-    get_hk_stock_info_unified,
-    get_stock_data_by_market,
-)
+# 可用性标志 -> 依赖的可选属性
+_AVAILABILITY_FLAGS = {
+    "YFINANCE_AVAILABLE": "YFinanceUtils",
+    "STOCKSTATS_AVAILABLE": "StockstatsUtils",
+}
 
-__all__ = [
+# 统一数据接口（均来自 interface 模块）
+_INTERFACE_EXPORTS = (
     # News and sentiment functions
     "get_finnhub_news",
     "get_finnhub_company_insider_sentiment",
@@ -105,7 +50,7 @@ __all__ = [
     # Tushare data functions
     "get_china_stock_data_tushare",
     "get_china_stock_fundamentals_tushare",
-    # Unified China data functions
+    # Unified China data functions (recommended)
     "get_china_stock_data_unified",
     "get_china_stock_info_unified",
     "switch_china_data_source",
@@ -114,4 +59,38 @@ __all__ = [
     "get_hk_stock_data_unified",
     "get_hk_stock_info_unified",
     "get_stock_data_by_market",
-]
+)
+
+__all__ = list(_INTERFACE_EXPORTS)
+
+
+def _load_optional(name: str):
+    """依次尝试候选来源，全部失败时返回 None（与原先的 try/except 导入保持一致）"""
+    error = None
+    for module_name, attr in _LAZY_OPTIONAL[name]:
+        try:
+            return getattr(importlib.import_module(module_name, __name__), attr)
+        except (ImportError, AttributeError) as e:
+            error = e
+    if name in _AVAILABILITY_FLAGS.values():
+        logger.warning(f"⚠️ {name} 模块不可用: {error}")
+    return None
+
+
+def __getattr__(name: str):
+    if name in _INTERFACE_EXPORTS:
+        value = getattr(importlib.import_module(".interface", __name__), name)
+    elif name in _LAZY_OPTIONAL:
+        value = _load_optional(name)
+    elif name in _AVAILABILITY_FLAGS:
+        value = __getattr__(_AVAILABILITY_FLAGS[name]) is not None
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # 缓存到模块命名空间，后续访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_INTERFACE_EXPORTS) | set(_LAZY_OPTIONAL) | set(_AVAILABILITY_FLAGS))
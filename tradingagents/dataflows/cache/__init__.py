@@ -30,6 +30,9 @@ except ImportError:
     StockDataCache = None
     FILE_CACHE_AVAILABLE = False
 
+# 导入 SQLite 键值缓存（标准库实现，按条目存储，多进程共享）
+from .kv_store import SQLiteKVStore
+
 # 导入数据库缓存
 try:
     from .db_cache import DatabaseCacheManager
@@ -122,6 +125,7 @@ __all__ = [
     'IntegratedCacheManager',
     'DatabaseCacheManager',
     'AdaptiveCacheSystem',
+    'SQLiteKVStore',
 
     # 可用性标志
     'FILE_CACHE_AVAILABLE',
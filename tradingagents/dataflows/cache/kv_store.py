@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+SQLite 键值缓存
+按条目存储（每个键一行，带独立过期时间），写入先进入内存缓冲区，
+按条数/时间阈值批量落盘，API 与 Worker 多进程可安全共享同一个数据库文件。
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class SQLiteKVStore:
+    """基于 SQLite（WAL 模式）的分条目持久化键值缓存"""
+
+    def __init__(
+        self,
+        db_path: str,
+        namespace: str = "default",
+        default_ttl: Optional[float] = None,
+        flush_interval: float = 2.0,
+        flush_batch_size: int = 50,
+    ):
+        """
+        Args:
+            db_path: SQLite 数据库文件路径
+            namespace: 命名空间，同一文件可供多个缓存共用
+            default_ttl: 默认过期时间（秒），None 表示不过期
+            flush_interval: 延迟落盘的最长等待时间（秒）
+            flush_batch_size: 缓冲区达到该条数时立即落盘
+        """
+        self.db_path = db_path
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.flush_interval = flush_interval
+        self.flush_batch_size = max(1, flush_batch_size)
+
+        # 待写入: key -> (value_json, source, expires_at, updated_at)；value_json 为 None 表示删除
+        self._pending: Dict[str, Tuple[Optional[str], Optional[str], Optional[float], float]] = {}
+        # 读缓存: key -> (value, expires_at)
+        self._memory: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv_cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " source TEXT,"
+            " expires_at REAL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_kv_cache_expires ON kv_cache (namespace, expires_at)")
+
+        atexit.register(self.close)
+
+    @staticmethod
+    def _is_expired(expires_at: Optional[float], now: Optional[float] = None) -> bool:
+        return expires_at is not None and expires_at <= (now or time.time())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """读取未过期的条目"""
+        now = time.time()
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending[0] is None:
+                return default
+
+            cached = self._memory.get(key)
+            if cached is not None:
+                value, expires_at = cached
+                if not self._is_expired(expires_at, now):
+                    return value
+                self._memory.pop(key, None)
+                return default
+
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM kv_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.debug(f"📊 [KV缓存] 读取失败: {key} - {e}")
+                return default
+
+            if row is None or self._is_expired(row[1], now):
+                return default
+            value = json.loads(row[0])
+            self._memory[key] = (value, row[1])
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, source: Optional[str] = None) -> None:
+        """写入条目（延迟批量落盘）"""
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        value_json = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._pending[key] = (value_json, source, expires_at, now)
+            self._schedule_flush()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            self._pending[key] = (None, None, None, time.time())
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if len(self._pending) >= self.flush_batch_size:
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._timer_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timer_flush(self) -> None:
+        with self._lock:
+            self._timer = None
+            self.flush()
+
+    def flush(self) -> int:
+        """将缓冲区中的写入在一个事务内落盘，返回写入条数"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return 0
+
+            pending = self._pending
+            upserts = [
+                (self.namespace, key, value_json, source, expires_at, updated_at)
+                for key, (value_json, source, expires_at, updated_at) in pending.items()
+                if value_json is not None
+            ]
+            deletes = [(self.namespace, key) for key, item in pending.items() if item[0] is None]
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if upserts:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO kv_cache (namespace, key, value, source, expires_at, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        upserts,
+                    )
+                if deletes:
+                    self._conn.executemany("DELETE FROM kv_cache WHERE namespace = ? AND key = ?", deletes)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                try:
+                    self._conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                # 保留缓冲区，等待下次落盘重试
+                logger.debug(f"📊 [KV缓存] 落盘失败，稍后重试: {e}")
+                if self._timer is None:
+                    self._timer = threading.Timer(self.flush_interval, self._timer_flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return 0
+
+            self._pending = {}
+            return len(pending)
+
+    def purge_expired(self) -> int:
+        """删除已过期条目，返回删除条数"""
+        now = time.time()
+        with self._lock:
+            self.flush()
+            self._memory = {k: v for k, v in self._memory.items() if not self._is_expired(v[1], now)}
+            try:
+                cursor = self._conn.execute(
+                    "DELETE FROM kv_cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                    (self.namespace, now),
+                )
+                return cursor.rowcount
+            except sqlite3.Error as e:
+                logger.debug(f"📊 [KV缓存] 清理过期条目失败: {e}")
+                return 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.flush()
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM kv_cache WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (self.namespace, time.time()),
+            ).fetchone()
+            return row[0]
+
+    def close(self) -> None:
+        """落盘剩余写入并关闭连接"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self.flush()
+                self._conn.close()
+            except sqlite3.Error as e:
+                logger.debug(f"📊 [KV缓存] 关闭失败: {e}")
+            self._conn = None
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+共享 HTTP 客户端
+为 AKShare/东方财富、RSS 和新闻抓取提供统一的出站请求层：
+- 按主机复用连接池（keep-alive），东方财富等反爬站点使用 curl_cffi 模拟浏览器 TLS 指纹
+- 按主机令牌桶限速，替代全局固定间隔 sleep
+- 网络错误 / 429 / 5xx 按指数退避加随机抖动重试
+- 可选响应缓存：TTL 内直接返回，过期后带 ETag / Last-Modified 条件请求
+- 按主机统计请求数、延迟、重试、缓存命中和连接复用率
+
+AKShare 内部直接调用 requests.get，通过 install_akshare_http_client() 只替换 AKShare 模块内的
+requests 引用，不影响进程中的其他库。
+"""
+
+import random
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlencode, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _is_retryable_error(error: Exception) -> bool:
+    """连接、超时和 SSL 错误可重试（curl_cffi 的异常类型不同，按错误信息判断）"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    message = str(error)
+    return any(marker in message for marker in ('SSL', 'ssl', 'UNEXPECTED_EOF_WHILE_READING', 'timed out', 'Timeout'))
+
+
+@dataclass(frozen=True)
+class HostPolicy:
+    """主机访问策略"""
+    rate: float = 10.0  # 每秒请求数
+    burst: int = 5  # 令牌桶容量
+    impersonate: Optional[str] = None  # curl_cffi 模拟的浏览器，None 表示使用 requests
+    headers: Dict[str, str] = field(default_factory=dict)  # 调用方未提供时补充的请求头
+    max_retries: int = 3
+
+
+# 按域名后缀匹配，越具体的后缀优先
+DEFAULT_HOST_POLICIES: Dict[str, HostPolicy] = {
+    # 东方财富反爬较严格：每个主机每秒 2 次，并模拟 Chrome TLS 指纹
+    'eastmoney.com': HostPolicy(
+        rate=2.0, burst=2, impersonate='chrome120',
+        headers={**BROWSER_HEADERS, 'Referer': 'https://www.eastmoney.com/'},
+    ),
+    'news.google.com': HostPolicy(rate=1.0, burst=2, headers=BROWSER_HEADERS),
+    'www.google.com': HostPolicy(rate=1.0, burst=2, headers=BROWSER_HEADERS),
+}
+DEFAULT_POLICY = HostPolicy(headers={'User-Agent': BROWSER_HEADERS['User-Agent']})
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class _HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.throttled_seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=500)
+
+    def to_dict(self) -> Dict[str, Any]:
+        samples = sorted(self.latencies)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'cache_hits': self.cache_hits,
+            'not_modified': self.not_modified,
+            'throttled_seconds': round(self.throttled_seconds, 3),
+            'latency_ms_avg': round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+            'latency_ms_p95': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1) if samples else 0.0,
+        }
+
+
+@dataclass
+class _CacheEntry:
+    response: Any
+    expires_at: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class HttpClient:
+    """按主机池化、限速、重试和缓存的 HTTP 客户端"""
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, HostPolicy]] = None,
+        pool_maxsize: int = 10,
+        cache_max_entries: int = 256,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        """
+        Args:
+            policies: 域名后缀 -> 主机策略，默认 DEFAULT_HOST_POLICIES
+            pool_maxsize: 每个主机的最大连接数
+            cache_max_entries: 响应缓存条目上限（LRU）
+            backoff_base: 重试退避基数（秒）
+            backoff_max: 单次退避上限（秒）
+        """
+        self.policies = dict(DEFAULT_HOST_POLICIES if policies is None else policies)
+        self.pool_maxsize = pool_maxsize
+        self.cache_max_entries = cache_max_entries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._curl_sessions = threading.local()  # curl_cffi Session 非线程安全，每个线程一个
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, _HostStats] = {}
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._curl_requests = None
+        self._curl_checked = False
+
+    # ------------------------------------------------------------------
+    # 主机策略与会话
+    # ------------------------------------------------------------------
+
+    def policy_for(self, host: str) -> HostPolicy:
+        best = None
+        for suffix, policy in self.policies.items():
+            if host == suffix or host.endswith('.' + suffix):
+                if best is None or len(suffix) > len(best[0]):
+                    best = (suffix, policy)
+        return best[1] if best else DEFAULT_POLICY
+
+    def _get_session(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def _get_curl_session(self, host: str, impersonate: str):
+        if not self._curl_checked:
+            self._curl_checked = True
+            try:
+                from curl_cffi import requests as curl_requests
+                self._curl_requests = curl_requests
+            except ImportError:
+                logger.warning("⚠️ curl_cffi 未安装，将使用标准 requests（可能被反爬虫拦截）")
+        if self._curl_requests is None:
+            return None
+        sessions = getattr(self._curl_sessions, 'sessions', None)
+        if sessions is None:
+            sessions = self._curl_sessions.sessions = {}
+        session = sessions.get(host)
+        if session is None:
+            session = sessions[host] = self._curl_requests.Session(impersonate=impersonate)
+        return session
+
+    def _get_bucket(self, host: str, policy: HostPolicy) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(policy.rate, policy.burst)
+            return bucket
+
+    def _host_stats(self, host: str) -> _HostStats:
+        with self._lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = _HostStats()
+            return stats
+
+    # ------------------------------------------------------------------
+    # 请求
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cache_key(url: str, params: Any) -> str:
+        if not params:
+            return url
+        if isinstance(params, dict):
+            params = sorted(params.items())
+        return f"{url}?{urlencode(params, doseq=True)}"
+
+    def _cache_lookup(self, key: str) -> Optional[_CacheEntry]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cache_store(self, key: str, response: Any, ttl: float) -> None:
+        with self._lock:
+            self._cache[key] = _CacheEntry(
+                response=response,
+                expires_at=time.monotonic() + ttl,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+            )
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+
+    def _backoff(self, attempt: int) -> float:
+        # 全抖动：在 [0, min(上限, 基数 * 2^attempt)] 内随机
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _send(self, host: str, policy: HostPolicy, url: str, kwargs: Dict[str, Any]):
+        if policy.impersonate:
+            session = self._get_curl_session(host, policy.impersonate)
+            if session is not None:
+                # 模拟浏览器时由 curl_cffi 自动设置请求头
+                curl_kwargs = {k: v for k, v in kwargs.items() if k != 'headers'}
+                try:
+                    return session.get(url, **curl_kwargs)
+                except Exception as e:
+                    error_msg = str(e)
+                    # 忽略 TLS 库错误和 400 错误的详细日志（Docker 环境的已知问题）
+                    if 'invalid library' not in error_msg and '400' not in error_msg:
+                        logger.warning(f"⚠️ curl_cffi 请求失败，回退到标准 requests: {e}")
+
+        headers = dict(kwargs.get('headers') or {})
+        for key, value in policy.headers.items():
+            headers.setdefault(key, value)
+        return self._get_session(host).get(url, **{**kwargs, 'headers': headers})
+
+    def get(
+        self,
+        url: str,
+        params: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Any = 10,
+        cache_ttl: float = 0,
+        retries: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        发送 GET 请求
+
+        Args:
+            url: 请求地址
+            params: 查询参数
+            headers: 请求头（缺少的浏览器字段按主机策略补充）
+            timeout: 超时（秒，或 (连接, 读取) 元组）
+            cache_ttl: 响应缓存时间（秒），0 表示不缓存
+            retries: 最大重试次数，默认使用主机策略
+
+        Returns:
+            requests.Response（或兼容的 curl_cffi 响应）
+        """
+        host = urlparse(url).hostname or ''
+        policy = self.policy_for(host)
+        stats = self._host_stats(host)
+        max_retries = policy.max_retries if retries is None else retries
+
+        cache_key = self._cache_key(url, params) if cache_ttl > 0 else None
+        cached = self._cache_lookup(cache_key) if cache_key else None
+        if cached is not None and cached.expires_at > time.monotonic():
+            stats.cache_hits += 1
+            return cached.response
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if cached.etag:
+                request_headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                request_headers['If-Modified-Since'] = cached.last_modified
+
+        request_kwargs = dict(kwargs, params=params, timeout=timeout)
+        if request_headers:
+            request_kwargs['headers'] = request_headers
+
+        bucket = self._get_bucket(host, policy)
+        attempt = 0
+        while True:
+            stats.throttled_seconds += bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = self._send(host, policy, url, request_kwargs)
+            except Exception as e:
+                stats.requests += 1
+                stats.errors += 1
+                if attempt >= max_retries or not _is_retryable_error(e):
+                    raise
+                attempt += 1
+                stats.retries += 1
+                time.sleep(self._backoff(attempt))
+                continue
+
+            stats.requests += 1
+            stats.latencies.append(time.perf_counter() - start)
+            if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+                attempt += 1
+                stats.retries += 1
+                retry_after = response.headers.get('Retry-After')
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else self._backoff(attempt)
+                time.sleep(min(delay, self.backoff_max))
+                continue
+            break
+
+        if cached is not None and response.status_code == 304:
+            stats.not_modified += 1
+            self._cache_store(cache_key, cached.response, cache_ttl)
+            return cached.response
+        if cache_key and response.status_code == 200:
+            self._cache_store(cache_key, response, cache_ttl)
+        return response
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def _connections_opened(self, host: str) -> Optional[int]:
+        session = self._sessions.get(host)
+        if session is None:
+            return None
+        opened = 0
+        # http:// 与 https:// 挂载的是同一个适配器，去重后统计
+        for adapter in {id(a): a for a in session.adapters.values()}.values():
+            pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+            if pools is None:
+                continue
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is not None:
+                    opened += getattr(pool, 'num_connections', 0)
+        return opened
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """按主机返回请求统计；connection_reuse_rate 仅统计 requests 连接池"""
+        with self._lock:
+            hosts = list(self._stats.items())
+        result = {}
+        for host, stats in hosts:
+            item = stats.to_dict()
+            opened = self._connections_opened(host)
+            if opened is not None:
+                item['connections_opened'] = opened
+                item['connection_reuse_rate'] = round(1 - opened / stats.requests, 4) if stats.requests else 0.0
+            result[host] = item
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._cache.clear()
+
+
+class _RoutedRequests(types.ModuleType):
+    """替换第三方模块中的 requests 引用：get 走共享客户端，其余属性透传"""
+
+    def __init__(self, client: HttpClient):
+        super().__init__('requests')
+        self._client = client
+
+    def get(self, url, params=None, **kwargs):
+        return self._client.get(url, params=params, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+_http_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """获取共享 HTTP 客户端"""
+    global _http_client
+    with _client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+    return _http_client
+
+
+def install_akshare_http_client(package: str = 'akshare') -> int:
+    """让 AKShare 模块内的 requests.get 走共享客户端，返回替换的模块数"""
+    routed = _RoutedRequests(get_http_client())
+    count = 0
+    for name, module in list(sys.modules.items()):
+        if module is None or not (name == package or name.startswith(package + '.')):
+            continue
+        if getattr(module, 'requests', None) is requests:
+            module.requests = routed
+            count += 1
+    if count:
+        logger.info(f"🔧 AKShare 已接入共享 HTTP 客户端（{count} 个模块）")
+    return count
+
+
+def uninstall_akshare_http_client(package: str = 'akshare') -> int:
+    """恢复 AKShare 模块内原始的 requests 引用，返回恢复的模块数"""
+    count = 0
+    for name, module in list(sys.modules.items()):
+        if module is None or not (name == package or name.startswith(package + '.')):
+            continue
+        if isinstance(getattr(module, 'requests', None), _RoutedRequests):
+            module.requests = requests
+            count += 1
+    return count
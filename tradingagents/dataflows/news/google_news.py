@@ -14,6 +14,7 @@ from tenacity import (
 )
 
 from tradingagents.config.runtime_settings import get_float
+from tradingagents.dataflows.http_client import get_http_client
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
@@ -37,7 +38,8 @@ def make_request(url, headers):
     # Random delay before each request to avoid detection
     time.sleep(random.uniform(SLEEP_MIN, SLEEP_MAX))
     # 添加超时参数，设置连接超时和读取超时
-    response = requests.get(url, headers=headers, timeout=(10, 30))  # 连接超时10秒，读取超时30秒
+    # 通过共享 HTTP 客户端复用连接；重试由 tenacity 负责，客户端不再重试
+    response = get_http_client().get(url, headers=headers, timeout=(10, 30), retries=0)  # 连接超时10秒，读取超时30秒
     return response
 
 
@@ -17,9 +17,14 @@ from dataclasses import dataclass
 # 导入日志模块
 from tradingagents.config.runtime_settings import get_timezone_name
 
+from tradingagents.dataflows.http_client import get_http_client
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+# 同一查询短时间内重复请求直接复用响应
+NEWS_API_CACHE_TTL = 60
+RSS_CACHE_TTL = 300
+
 
 
 @dataclass
@@ -181,7 +186,7 @@ class RealtimeNewsAggregator:
                 'token': self.finnhub_key
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = get_http_client().get(url, params=params, headers=self.headers, cache_ttl=NEWS_API_CACHE_TTL)
             response.raise_for_status()
 
             news_data = response.json()
@@ -226,7 +231,7 @@ class RealtimeNewsAggregator:
                 'limit': 50
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = get_http_client().get(url, params=params, headers=self.headers, cache_ttl=NEWS_API_CACHE_TTL)
             response.raise_for_status()
 
             data = response.json()
@@ -286,7 +291,7 @@ class RealtimeNewsAggregator:
                 'apiKey': self.newsapi_key
             }
 
-            response = requests.get(url, params=params, headers=self.headers)
+            response = get_http_client().get(url, params=params, headers=self.headers, cache_ttl=NEWS_API_CACHE_TTL)
             response.raise_for_status()
 
             data = response.json()
@@ -460,7 +465,10 @@ class RealtimeNewsAggregator:
             import feedparser
 
             logger.info(f"[RSS解析] 尝试获取RSS源内容")
-            feed = feedparser.parse(rss_url)
+            # 通过共享 HTTP 客户端获取（连接复用，过期后按 ETag/Last-Modified 条件请求）
+            response = get_http_client().get(rss_url, timeout=10, cache_ttl=RSS_CACHE_TTL)
+            response.raise_for_status()
+            feed = feedparser.parse(response.content)
 
             if not feed or not feed.entries:
                 logger.warning(f"[RSS解析] RSS源未返回有效内容")
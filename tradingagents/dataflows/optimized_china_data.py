@@ -29,11 +29,17 @@ class OptimizedChinaDataProvider:
     def __init__(self):
         self.cache = get_cache()
         self.config = config_manager.load_settings()
+        # 配置文件变化时同步更新，无需轮询
+        config_manager.add_change_listener(self._on_config_changed)
         self.last_api_call = 0
         self.min_api_interval = get_float("TA_CHINA_MIN_API_INTERVAL_SECONDS", "ta_china_min_api_interval_seconds", 0.5)
 
         logger.info(f"📊 优化A股数据提供器初始化完成")
 
+    def _on_config_changed(self, old_snapshot, new_snapshot):
+        """配置快照更新回调"""
+        self.config = dict(new_snapshot.settings)
+
     def _wait_for_rate_limit(self):
         """等待API限制"""
         current_time = time.time()
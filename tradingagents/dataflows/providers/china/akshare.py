@@ -3,15 +3,82 @@ AKShare统一数据提供器
 基于AKShare SDK的统一数据同步方案，提供标准化的数据接口
 """
 import asyncio
+import json
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, List, Optional, Union
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Any, List, Optional, Union
 import pandas as pd
 
 from ..base_provider import BaseStockDataProvider
 
 logger = logging.getLogger(__name__)
 
+# 财务报表: 返回字段 -> (AKShare接口, 名称)
+FINANCIAL_STATEMENTS = {
+    'main_indicators': ('stock_financial_abstract', '主要财务指标'),
+    'balance_sheet': ('stock_balance_sheet_by_report_em', '资产负债表'),
+    'income_statement': ('stock_profit_sheet_by_report_em', '利润表'),
+    'cash_flow': ('stock_cash_flow_sheet_by_report_em', '现金流量表'),
+}
+
+# A股定期报告披露窗口（月, 日）: 年报/一季报 1-4月，半年报 7-8月，三季报 10月
+_DISCLOSURE_WINDOWS = (((1, 1), (4, 30)), ((7, 1), (8, 31)), ((10, 1), (10, 31)))
+DISCLOSURE_WINDOW_TTL = 6 * 3600
+
+
+def financial_statement_ttl(now: Optional[datetime] = None) -> float:
+    """
+    财务报表缓存时间
+
+    披露窗口内报表随时可能更新，只缓存较短时间；窗口外报表不会变化，缓存到下一个窗口开始。
+    """
+    now = now or datetime.now()
+    for (start_month, start_day), (end_month, end_day) in _DISCLOSURE_WINDOWS:
+        start = datetime(now.year, start_month, start_day)
+        end = datetime(now.year, end_month, end_day) + timedelta(days=1)
+        if start <= now < end:
+            return DISCLOSURE_WINDOW_TTL
+        if now < start:
+            return max((start - now).total_seconds(), DISCLOSURE_WINDOW_TTL)
+    next_start = datetime(now.year + 1, *_DISCLOSURE_WINDOWS[0][0])
+    return max((next_start - now).total_seconds(), DISCLOSURE_WINDOW_TTL)
+
+
+def _encode_statement(df: pd.DataFrame) -> Dict[str, Any]:
+    """报表转为可缓存的 JSON 形式，并记录日期列，读取时还原为原来的类型"""
+    datetime_columns, date_columns = [], []
+    for column in df.columns:
+        values = df[column].dropna()
+        if values.empty:
+            continue
+        if pd.api.types.is_datetime64_any_dtype(df[column]) or all(isinstance(v, datetime) for v in values):
+            datetime_columns.append(column)
+        elif all(isinstance(v, date) for v in values):
+            date_columns.append(column)
+    records = json.loads(json.dumps(
+        df.to_dict('records'), ensure_ascii=False,
+        default=lambda v: v.isoformat() if isinstance(v, (datetime, date)) else str(v)
+    ))
+    return {"records": records, "datetime_columns": datetime_columns, "date_columns": date_columns}
+
+
+def _decode_statement(payload: Any) -> List[Dict[str, Any]]:
+    """还原缓存的报表记录：日期列恢复为 pd.Timestamp / date（旧格式缓存直接返回）"""
+    if isinstance(payload, list):
+        return payload
+    records = payload.get("records") or []
+    for columns, convert in ((payload.get("datetime_columns") or [], pd.Timestamp),
+                             (payload.get("date_columns") or [], date.fromisoformat)):
+        for column in columns:
+            for record in records:
+                value = record.get(column)
+                if isinstance(value, str):
+                    try:
+                        record[column] = convert(value)
+                    except ValueError:
+                        pass
+    return records
+
 
 class AKShareProvider(BaseStockDataProvider):
     """
@@ -31,125 +98,20 @@ class AKShareProvider(BaseStockDataProvider):
         self.connected = False
         self._stock_list_cache = None  # 缓存股票列表，避免重复获取
         self._cache_time = None  # 缓存时间
+        self._financial_cache = None  # 财务报表缓存（首次使用时创建）
+        self._rate_limiter = None
         self._initialize_akshare()
     
     def _initialize_akshare(self):
         """初始化AKShare连接"""
         try:
             import akshare as ak
-            import requests
-            import time
+            from tradingagents.dataflows.http_client import install_akshare_http_client
 
-            # 尝试导入 curl_cffi，如果可用则使用它来绕过反爬虫
-            try:
-                from curl_cffi import requests as curl_requests
-                use_curl_cffi = True
-                logger.info("🔧 检测到 curl_cffi，将使用它来模拟真实浏览器 TLS 指纹")
-            except ImportError:
-                use_curl_cffi = False
-                logger.warning("⚠️ curl_cffi 未安装，将使用标准 requests（可能被反爬虫拦截）")
-                logger.warning("   建议安装: pip install curl-cffi")
-
-            # 修复AKShare的bug：设置requests的默认headers，并添加请求延迟
-            # AKShare的stock_news_em()函数没有设置必要的headers，导致API返回空响应
-            if not hasattr(requests, '_akshare_headers_patched'):
-                original_get = requests.get
-                last_request_time = {'time': 0}  # 使用字典以便在闭包中修改
-
-                def patched_get(url, **kwargs):
-                    """
-                    包装requests.get方法，自动添加必要的headers和请求延迟
-                    修复AKShare stock_news_em()函数缺少headers的问题
-                    如果可用，使用 curl_cffi 模拟真实浏览器 TLS 指纹
-                    """
-                    # 添加请求延迟，避免被反爬虫封禁
-                    # 只对东方财富网的请求添加延迟
-                    if 'eastmoney.com' in url:
-                        current_time = time.time()
-                        time_since_last_request = current_time - last_request_time['time']
-                        if time_since_last_request < 0.5:  # 至少间隔0.5秒
-                            time.sleep(0.5 - time_since_last_request)
-                        last_request_time['time'] = time.time()
-
-                    # 如果是东方财富网的请求，且 curl_cffi 可用，使用它来绕过反爬虫
-                    if use_curl_cffi and 'eastmoney.com' in url:
-                        try:
-                            # 使用 curl_cffi 模拟 Chrome 120 的 TLS 指纹
-                            # 注意：使用 impersonate 时，不要传递自定义 headers，让 curl_cffi 自动设置
-                            curl_kwargs = {
-                                'timeout': kwargs.get('timeout', 10),
-                                'impersonate': "chrome120"  # 模拟 Chrome 120
-                            }
-
-                            # 只传递非 headers 的参数
-                            if 'params' in kwargs:
-                                curl_kwargs['params'] = kwargs['params']
-                            # 不传递 headers，让 impersonate 自动设置
-                            if 'data' in kwargs:
-                                curl_kwargs['data'] = kwargs['data']
-                            if 'json' in kwargs:
-                                curl_kwargs['json'] = kwargs['json']
-
-                            response = curl_requests.get(url, **curl_kwargs)
-                            # curl_cffi 的响应对象已经兼容 requests.Response
-                            return response
-                        except Exception as e:
-                            # curl_cffi 失败，回退到标准 requests
-                            error_msg = str(e)
-                            # 忽略 TLS 库错误和 400 错误的详细日志（这是 Docker 环境的已知问题）
-                            if 'invalid library' not in error_msg and '400' not in error_msg:
-                                logger.warning(f"⚠️ curl_cffi 请求失败，回退到标准 requests: {e}")
-
-                    # 标准 requests 请求（非东方财富网，或 curl_cffi 不可用/失败）
-                    # 设置浏览器请求头
-                    if 'headers' not in kwargs or kwargs['headers'] is None:
-                        kwargs['headers'] = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                            'Accept-Encoding': 'gzip, deflate, br',
-                            'Referer': 'https://www.eastmoney.com/',
-                            'Connection': 'keep-alive',
-                        }
-                    elif isinstance(kwargs['headers'], dict):
-                        # 如果已有headers，确保包含必要的字段
-                        if 'User-Agent' not in kwargs['headers']:
-                            kwargs['headers']['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                        if 'Referer' not in kwargs['headers']:
-                            kwargs['headers']['Referer'] = 'https://www.eastmoney.com/'
-                        if 'Accept' not in kwargs['headers']:
-                            kwargs['headers']['Accept'] = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                        if 'Accept-Language' not in kwargs['headers']:
-                            kwargs['headers']['Accept-Language'] = 'zh-CN,zh;q=0.9,en;q=0.8'
-
-                    # 添加重试机制（最多3次）
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        try:
-                            return original_get(url, **kwargs)
-                        except Exception as e:
-                            # 检查是否是SSL错误
-                            error_str = str(e)
-                            is_ssl_error = ('SSL' in error_str or 'ssl' in error_str or
-                                          'UNEXPECTED_EOF_WHILE_READING' in error_str)
-
-                            if is_ssl_error and attempt < max_retries - 1:
-                                # SSL错误，等待后重试
-                                wait_time = 0.5 * (attempt + 1)  # 递增等待时间
-                                time.sleep(wait_time)
-                                continue
-                            else:
-                                # 非SSL错误或已达到最大重试次数，直接抛出
-                                raise
-
-                # 应用patch
-                requests.get = patched_get
-                requests._akshare_headers_patched = True
-
-                if use_curl_cffi:
-                    logger.info("🔧 已修复AKShare的headers问题，使用 curl_cffi 模拟真实浏览器（Chrome 120）")
-                else:
-                    logger.info("🔧 已修复AKShare的headers问题，并添加请求延迟（0.5秒）")
+            # AKShare 内部直接调用 requests.get（部分接口缺少必要的 headers，东方财富会拦截）
+            # 只将 AKShare 模块内的 requests.get 接入共享 HTTP 客户端：按主机复用连接、
+            # 令牌桶限速、补充浏览器请求头，东方财富请求使用 curl_cffi 模拟浏览器 TLS 指纹
+            install_akshare_http_client()
 
             self.ak = ak
             self.connected = True
@@ -178,10 +140,9 @@ class AKShareProvider(BaseStockDataProvider):
             新闻 DataFrame 或 None
         """
         try:
-            from curl_cffi import requests as curl_requests
+            from tradingagents.dataflows.http_client import get_http_client
             import json
             import time
-            import os
 
             # 标准化股票代码
             symbol_6 = symbol.zfill(6)
@@ -213,13 +174,8 @@ class AKShareProvider(BaseStockDataProvider):
                 "_": str(int(time.time() * 1000))
             }
 
-            # 使用 curl_cffi 发送请求
-            response = curl_requests.get(
-                url,
-                params=params,
-                timeout=10,
-                impersonate="chrome120"
-            )
+            # 通过共享 HTTP 客户端发送请求（东方财富主机使用 curl_cffi 模拟浏览器）
+            response = get_http_client().get(url, params=params, timeout=10)
 
             if response.status_code != 200:
                 self.logger.error(f"❌ {symbol} 东方财富网 API 返回错误: {response.status_code}")
@@ -997,10 +953,65 @@ class AKShareProvider(BaseStockDataProvider):
             logger.error(f"标准化{code}历史数据列名失败: {e}")
             return df
 
+    def _get_financial_cache(self):
+        """财务报表缓存（SQLite，按报表和股票分条目存储，API 与 Worker 进程共享）"""
+        if self._financial_cache is None:
+            import os
+            from tradingagents.dataflows.cache.kv_store import SQLiteKVStore
+            try:
+                from utils.data_config import get_cache_dir
+                cache_dir = str(get_cache_dir('akshare'))
+            except Exception:
+                cache_dir = os.path.join(
+                    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))),
+                    'data', 'cache', 'akshare'
+                )
+            self._financial_cache = SQLiteKVStore(
+                os.path.join(cache_dir, 'financial_statements.sqlite3'),
+                namespace='akshare_financial'
+            )
+        return self._financial_cache
+
+    def _get_rate_limiter(self):
+        """获取共享的AKShare速率限制器（脱离后端单独使用时不限流）"""
+        if self._rate_limiter is None:
+            try:
+                from app.core.rate_limiter import get_akshare_rate_limiter
+                self._rate_limiter = get_akshare_rate_limiter()
+            except Exception:
+                self._rate_limiter = False
+        return self._rate_limiter or None
+
+    async def _get_financial_statement(self, code: str, statement: str) -> Optional[List[Dict[str, Any]]]:
+        """获取单张财务报表（优先读缓存，未命中时限流后调用AKShare）"""
+        cache_key = f"{statement}:{code}"
+        cache = self._get_financial_cache()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"⚡ {code}{FINANCIAL_STATEMENTS[statement][1]}命中缓存")
+            return _decode_statement(cached)
+
+        limiter = self._get_rate_limiter()
+        if limiter is not None:
+            await limiter.acquire()
+
+        func = getattr(self.ak, FINANCIAL_STATEMENTS[statement][0])
+        df = await asyncio.to_thread(func, symbol=code)
+        if df is None or df.empty:
+            return None
+
+        # 缓存为 JSON 形式；缓存命中与否都经过同一次还原，返回的数据类型一致
+        payload = _encode_statement(df)
+        cache.set(cache_key, payload, ttl=financial_statement_ttl(), source='akshare')
+        logger.debug(f"✅ {code}{FINANCIAL_STATEMENTS[statement][1]}获取成功")
+        return _decode_statement(payload)
+
     async def get_financial_data(self, code: str) -> Dict[str, Any]:
         """
         获取财务数据
 
+        四张报表并发获取（共享AKShare速率限制），每张报表按报告期缓存。
+
         Args:
             code: 股票代码
 
@@ -1013,55 +1024,18 @@ class AKShareProvider(BaseStockDataProvider):
         try:
             logger.debug(f"💰 获取{code}财务数据...")
 
-            financial_data = {}
-
-            # 1. 获取主要财务指标
-            try:
-                def fetch_financial_abstract():
-                    return self.ak.stock_financial_abstract(symbol=code)
-
-                main_indicators = await asyncio.to_thread(fetch_financial_abstract)
-                if main_indicators is not None and not main_indicators.empty:
-                    financial_data['main_indicators'] = main_indicators.to_dict('records')
-                    logger.debug(f"✅ {code}主要财务指标获取成功")
-            except Exception as e:
-                logger.debug(f"获取{code}主要财务指标失败: {e}")
-
-            # 2. 获取资产负债表
-            try:
-                def fetch_balance_sheet():
-                    return self.ak.stock_balance_sheet_by_report_em(symbol=code)
-
-                balance_sheet = await asyncio.to_thread(fetch_balance_sheet)
-                if balance_sheet is not None and not balance_sheet.empty:
-                    financial_data['balance_sheet'] = balance_sheet.to_dict('records')
-                    logger.debug(f"✅ {code}资产负债表获取成功")
-            except Exception as e:
-                logger.debug(f"获取{code}资产负债表失败: {e}")
-
-            # 3. 获取利润表
-            try:
-                def fetch_income_statement():
-                    return self.ak.stock_profit_sheet_by_report_em(symbol=code)
-
-                income_statement = await asyncio.to_thread(fetch_income_statement)
-                if income_statement is not None and not income_statement.empty:
-                    financial_data['income_statement'] = income_statement.to_dict('records')
-                    logger.debug(f"✅ {code}利润表获取成功")
-            except Exception as e:
-                logger.debug(f"获取{code}利润表失败: {e}")
-
-            # 4. 获取现金流量表
-            try:
-                def fetch_cash_flow():
-                    return self.ak.stock_cash_flow_sheet_by_report_em(symbol=code)
+            statements = list(FINANCIAL_STATEMENTS)
+            results = await asyncio.gather(
+                *(self._get_financial_statement(code, statement) for statement in statements),
+                return_exceptions=True
+            )
 
-                cash_flow = await asyncio.to_thread(fetch_cash_flow)
-                if cash_flow is not None and not cash_flow.empty:
-                    financial_data['cash_flow'] = cash_flow.to_dict('records')
-                    logger.debug(f"✅ {code}现金流量表获取成功")
-            except Exception as e:
-                logger.debug(f"获取{code}现金流量表失败: {e}")
+            financial_data = {}
+            for statement, result in zip(statements, results):
+                if isinstance(result, Exception):
+                    logger.debug(f"获取{code}{FINANCIAL_STATEMENTS[statement][1]}失败: {result}")
+                elif result:
+                    financial_data[statement] = result
 
             if financial_data:
                 logger.debug(f"✅ {code}财务数据获取完成: {len(financial_data)}个数据集")
@@ -1074,6 +1048,45 @@ class AKShareProvider(BaseStockDataProvider):
             logger.error(f"❌ 获取{code}财务数据失败: {e}")
             return {}
 
+    async def get_financial_data_bulk(
+        self,
+        codes: List[str],
+        max_concurrency: int = 4,
+        progress_callback: Optional[Callable[[int, int, str], Any]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取财务数据
+
+        Args:
+            codes: 股票代码列表
+            max_concurrency: 同时获取的股票数量上限
+            progress_callback: 进度回调 (已完成数量, 总数, 当前股票代码)
+
+        Returns:
+            {股票代码: 财务数据字典}，未获取到数据的股票不包含在结果中
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        results: Dict[str, Dict[str, Any]] = {}
+        total = len(codes)
+        done = 0
+
+        async def fetch(code: str):
+            nonlocal done
+            async with semaphore:
+                data = await self.get_financial_data(code)
+            if data:
+                results[code] = data
+            done += 1
+            if progress_callback:
+                try:
+                    progress_callback(done, total, code)
+                except Exception as e:
+                    logger.debug(f"财务数据进度回调失败: {e}")
+
+        await asyncio.gather(*(fetch(code) for code in codes))
+        logger.info(f"✅ 批量获取财务数据完成: {len(results)}/{total} 只股票")
+        return results
+
     async def get_market_status(self) -> Dict[str, Any]:
         """
         获取市场状态信息
@@ -12,6 +12,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 
 from tradingagents.config.runtime_settings import get_int
+from tradingagents.dataflows.cache.kv_store import SQLiteKVStore
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
@@ -35,11 +36,10 @@ class ImprovedHKStockProvider:
     
     def __init__(self):
         # 将缓存文件写入到统一的数据缓存目录下，避免污染项目根目录
-        hk_cache_dir = get_cache_dir('hk')
-        if hasattr(hk_cache_dir, 'joinpath'):  # Path
-            self.cache_file = str(hk_cache_dir.joinpath('hk_stock_cache.json'))
-        else:  # str
-            self.cache_file = os.path.join(hk_cache_dir, 'hk_stock_cache.json')
+        hk_cache_dir = str(get_cache_dir('hk'))
+        # 旧版整文件 JSON 缓存（仅用于一次性迁移）
+        self.cache_file = os.path.join(hk_cache_dir, 'hk_stock_cache.json')
+        self.cache_db_file = os.path.join(hk_cache_dir, 'hk_stock_cache.sqlite3')
 
         self.cache_ttl = get_int("TA_HK_CACHE_TTL_SECONDS", "ta_hk_cache_ttl_seconds", 3600 * 24)
         self.rate_limit_wait = get_int("TA_HK_RATE_LIMIT_WAIT_SECONDS", "ta_hk_rate_limit_wait_seconds", 5)
@@ -104,37 +104,33 @@ class ImprovedHKStockProvider:
             '0991.HK': '大唐发电', '0991': '大唐发电', '00991': '大唐发电'
         }
         
-        self._load_cache()
-    
-    def _load_cache(self):
-        """加载缓存"""
+        # 按条目存储的持久化缓存（SQLite WAL，API 与 Worker 进程共享），写入批量延迟落盘
+        self.cache = SQLiteKVStore(self.cache_db_file, namespace='hk_stock', default_ttl=self.cache_ttl)
+        self._migrate_legacy_cache()
+        self.cache.purge_expired()
+
+    def _migrate_legacy_cache(self):
+        """将旧版 hk_stock_cache.json 中未过期的条目导入 SQLite 缓存（只执行一次）"""
+        if not os.path.exists(self.cache_file):
+            return
         try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
-            else:
-                self.cache = {}
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            now = time.time()
+            migrated = 0
+            for key, entry in legacy.items():
+                remaining = entry.get('timestamp', 0) + self.cache_ttl - now
+                if remaining > 0:
+                    self.cache.set(key, entry.get('data'), ttl=remaining, source=entry.get('source'))
+                    migrated += 1
+            self.cache.flush()
+            os.replace(self.cache_file, self.cache_file + '.migrated')
+            logger.info(f"📊 [港股缓存] 已迁移旧版JSON缓存: {migrated} 条")
+        except FileNotFoundError:
+            # 其他进程已完成迁移
+            pass
         except Exception as e:
-            logger.debug(f"📊 [港股缓存] 加载缓存失败: {e}")
-            self.cache = {}
-    
-    def _save_cache(self):
-        """保存缓存"""
-        try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.debug(f"📊 [港股缓存] 保存缓存失败: {e}")
-    
-    def _is_cache_valid(self, key: str) -> bool:
-        """检查缓存是否有效"""
-        if key not in self.cache:
-            return False
-
-        cache_time = self.cache[key].get('timestamp', 0)
-        return (time.time() - cache_time) < self.cache_ttl
+            logger.debug(f"📊 [港股缓存] 迁移旧版缓存失败: {e}")
 
     def _rate_limit(self):
         """速率限制：确保两次请求之间有足够的间隔"""
@@ -178,8 +174,8 @@ class ImprovedHKStockProvider:
         try:
             # 检查缓存
             cache_key = f"name_{symbol}"
-            if self._is_cache_valid(cache_key):
-                cached_name = self.cache[cache_key]['data']
+            cached_name = self.cache.get(cache_key)
+            if cached_name is not None:
                 logger.debug(f"📊 [港股缓存] 从缓存获取公司名称: {symbol} -> {cached_name}")
                 return cached_name
             
@@ -192,12 +188,7 @@ class ImprovedHKStockProvider:
                     company_name = self.hk_stock_names[format_symbol]
                     
                     # 缓存结果
-                    self.cache[cache_key] = {
-                        'data': company_name,
-                        'timestamp': time.time(),
-                        'source': 'builtin_mapping'
-                    }
-                    self._save_cache()
+                    self.cache.set(cache_key, company_name, source='builtin_mapping')
                     
                     logger.debug(f"📊 [港股映射] 获取公司名称: {symbol} -> {company_name}")
                     return company_name
@@ -234,12 +225,7 @@ class ImprovedHKStockProvider:
                                 akshare_name = matched.iloc[0]['中文名称']
                                 if akshare_name and not str(akshare_name).startswith('港股'):
                                     # 缓存AKShare结果
-                                    self.cache[cache_key] = {
-                                        'data': akshare_name,
-                                        'timestamp': time.time(),
-                                        'source': 'akshare_sina'
-                                    }
-                                    self._save_cache()
+                                    self.cache.set(cache_key, akshare_name, source='akshare_sina')
 
                                     logger.debug(f"📊 [港股AKShare-新浪] 获取公司名称: {symbol} -> {akshare_name}")
                                     return akshare_name
@@ -257,12 +243,7 @@ class ImprovedHKStockProvider:
                     api_name = hk_info['name']
                     if not api_name.startswith('港股'):
                         # 缓存API结果
-                        self.cache[cache_key] = {
-                            'data': api_name,
-                            'timestamp': time.time(),
-                            'source': 'unified_api'
-                        }
-                        self._save_cache()
+                        self.cache.set(cache_key, api_name, source='unified_api')
 
                         logger.debug(f"📊 [港股统一API] 获取公司名称: {symbol} -> {api_name}")
                         return api_name
@@ -275,12 +256,7 @@ class ImprovedHKStockProvider:
             default_name = f"港股{clean_symbol}"
             
             # 缓存默认结果（较短的TTL）
-            self.cache[cache_key] = {
-                'data': default_name,
-                'timestamp': time.time() - self.cache_ttl + 3600,  # 1小时后过期
-                'source': 'default'
-            }
-            self._save_cache()
+            self.cache.set(cache_key, default_name, ttl=min(3600, self.cache_ttl), source='default')  # 1小时后过期
             
             logger.debug(f"📊 [港股默认] 使用默认名称: {symbol} -> {default_name}")
             return default_name
@@ -311,9 +287,10 @@ class ImprovedHKStockProvider:
 
             # 检查缓存
             cache_key = f"financial_{normalized_symbol}"
-            if self._is_cache_valid(cache_key):
+            cached_indicators = self.cache.get(cache_key)
+            if cached_indicators is not None:
                 logger.debug(f"📊 [港股财务指标] 使用缓存: {normalized_symbol}")
-                return self.cache[cache_key]['data']
+                return cached_indicators
 
             # 速率限制
             self._rate_limit()
@@ -373,11 +350,7 @@ class ImprovedHKStockProvider:
             }
 
             # 缓存数据
-            self.cache[cache_key] = {
-                'data': indicators,
-                'timestamp': time.time()
-            }
-            self._save_cache()
+            self.cache.set(cache_key, indicators, source='akshare_eastmoney')
 
             logger.info(f"✅ [港股财务指标] 成功获取: {normalized_symbol}, 报告期: {indicators['report_date']}")
             return indicators
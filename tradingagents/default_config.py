@@ -17,6 +17,15 @@ DEFAULT_CONFIG = {
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 100,
+    # Debate history compaction: 提示词中保留最近 K 次发言原文，更早的发言折叠为摘要
+    "debate_compaction_enabled": True,
+    "debate_keep_last_turns": 4,
+    "debate_history_max_tokens": 4000,
+    "debate_judge_keep_last_turns": 6,
+    "debate_judge_history_max_tokens": 12000,
+    "debate_llm_summary": False,
+    # 最终决策提取：规则提取得分达到该阈值时不再调用 LLM（大于 1 表示总是调用 LLM）
+    "signal_rule_confidence_threshold": 0.75,
     # Tool settings - 从环境变量读取，提供默认值
     "online_tools": os.getenv("ONLINE_TOOLS_ENABLED", "false").lower() == "true",
     "online_news": os.getenv("ONLINE_NEWS_ENABLED", "true").lower() == "true", 
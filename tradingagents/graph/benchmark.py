@@ -0,0 +1,412 @@
+# TradingAgents/graph/benchmark.py
+"""
+离线基准测试工具：用确定性的假 LLM 和夹具数据工具运行完整的 TradingAgentsGraph.propagate
+
+不需要任何 LLM API Key 或数据源，用于度量图构建、状态复制、提示词构造等编排开销：
+- StubChatModel: 确定性的假聊天模型，支持工具调用，可配置每个 token 的生成延迟
+- FixtureToolkit: 与 Toolkit 工具同名、同参数结构的夹具工具，返回固定文本
+- run_propagate_benchmark: 执行 N 次完整分析，汇总各节点耗时（来自 propagate 的 node_timings）、
+  总耗时、内存峰值、LLM 调用次数和工具调用次数
+
+node_timings 按流式输出的到达时间计时：某节点的耗时是从它的输出到达到下一个节点输出到达的间隔。
+注意：美股代码（默认 AAPL）全程离线；A股/港股代码的公司名称查询仍会访问数据接口。
+命令行入口见 scripts/development/benchmark_graph_propagate.py。
+"""
+
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import BaseTool, StructuredTool
+from pydantic import PrivateAttr
+
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+DEFAULT_ANALYSTS = ["market_analyst", "social_media_analyst", "news_analyst", "fundamentals_analyst"]
+
+_REPORT_PARAGRAPH = (
+    "{ticker} 在 {date} 的离线基准分析段落：价格围绕均线窄幅震荡，成交量温和，"
+    "估值处于历史中位附近，基本面与情绪面没有出现明显背离。"
+)
+
+
+class StubChatModel(BaseChatModel):
+    """确定性的假聊天模型
+
+    - 绑定了工具且消息中还没有工具结果时，调用第一个工具（参数按工具的 JSON Schema 填充）
+    - 系统提示要求 JSON 时返回结构化决策（SignalProcessor）
+    - 其他情况返回固定长度的报告文本，包含"最终交易建议"
+    生成延迟为 token_latency × response_tokens 秒。
+    """
+
+    model_name: str = "stub-llm"
+    ticker: str = "AAPL"
+    trade_date: str = "2025-01-02"
+    decision: str = "持有"
+    response_tokens: int = 400
+    token_latency: float = 0.0
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _stats: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def _count(self, **deltas: int) -> int:
+        with self._lock:
+            for key, value in deltas.items():
+                self._stats[key] = self._stats.get(key, 0) + value
+            return self._stats.get("calls", 0)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tools = kwargs.get("tools") or []
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        call_index = self._count(calls=1, prompt_chars=prompt_chars)
+
+        if tools and not any(isinstance(m, ToolMessage) for m in messages):
+            function = tools[0]["function"]
+            tool_call = {
+                "name": function["name"],
+                "args": self._tool_args(function.get("parameters", {})),
+                "id": f"call_{call_index}",
+                "type": "tool_call",
+            }
+            self._count(tool_calls=1)
+            message = AIMessage(content="", tool_calls=[tool_call])
+            output_tokens = 20
+        else:
+            system_text = " ".join(str(m.content) for m in messages if isinstance(m, SystemMessage))
+            if "JSON" in system_text:
+                content = json.dumps({
+                    "action": self.decision,
+                    "target_price": 100.0,
+                    "confidence": 0.7,
+                    "risk_score": 0.5,
+                    "reasoning": f"{self.ticker} 离线基准决策",
+                }, ensure_ascii=False)
+            else:
+                content = self._report()
+            message = AIMessage(content=content)
+            output_tokens = self.response_tokens
+
+        self._count(completion_tokens=output_tokens)
+        message.usage_metadata = {
+            "input_tokens": prompt_chars // 2,
+            "output_tokens": output_tokens,
+            "total_tokens": prompt_chars // 2 + output_tokens,
+        }
+        if self.token_latency > 0:
+            time.sleep(self.token_latency * output_tokens)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _tool_args(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """按 JSON Schema 为必填参数及代码/日期类参数生成确定性的值"""
+        properties = parameters.get("properties", {})
+        required = set(parameters.get("required", []))
+        args: Dict[str, Any] = {}
+        for name, schema in properties.items():
+            lowered = name.lower()
+            if "date" in lowered:
+                args[name] = self.trade_date
+            elif lowered in ("ticker", "symbol", "stock_code", "query", "company"):
+                args[name] = self.ticker
+            elif name not in required:
+                continue
+            elif schema.get("type") == "integer":
+                args[name] = 30
+            elif schema.get("type") == "number":
+                args[name] = 1.0
+            elif schema.get("type") == "boolean":
+                args[name] = True
+            else:
+                args[name] = self.ticker
+        return args
+
+    def _report(self) -> str:
+        paragraph = _REPORT_PARAGRAPH.format(ticker=self.ticker, date=self.trade_date)
+        repeat = max(1, self.response_tokens // len(paragraph))
+        body = "\n\n".join(paragraph for _ in range(repeat))
+        return (
+            f"# {self.ticker} 离线基准报告\n\n{body}\n\n"
+            f"目标价位: 100.0\n最终交易建议: **{self.decision}**"
+        )
+
+
+def _default_fixture(tool_name: str, rows: int = 30) -> str:
+    lines = [f"## {tool_name} 夹具数据（{{ticker}}，截至 {{date}}）", "", "| 日期 | 开盘 | 最高 | 最低 | 收盘 | 成交量 |", "|---|---|---|---|---|---|"]
+    for i in range(rows):
+        base = 100 + (i % 7) - 3
+        lines.append(f"| D-{rows - i} | {base:.2f} | {base + 1.5:.2f} | {base - 1.2:.2f} | {base + 0.4:.2f} | {1_000_000 + i * 3_000} |")
+    return "\n".join(lines)
+
+
+class FixtureToolkit:
+    """与 Toolkit 同名同参数的夹具工具集合，返回固定文本并统计调用次数"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, fixtures: Optional[Dict[str, str]] = None,
+                 latency: float = 0.0):
+        """
+        Args:
+            config: 工具包配置（部分分析师会读取 toolkit.config）
+            fixtures: {工具名: 返回文本}，文本中的 {ticker}/{date} 会被替换；未指定的工具使用默认夹具
+            latency: 每次工具调用的模拟延迟（秒）
+        """
+        from tradingagents.agents.utils.agent_utils import Toolkit
+
+        self.config = dict(config or {})
+        self.fixtures = dict(fixtures or {})
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for name in dir(Toolkit):
+            original = getattr(Toolkit, name, None)
+            if isinstance(original, BaseTool):
+                setattr(self, name, self._make_tool(original))
+
+    def _make_tool(self, original: BaseTool) -> StructuredTool:
+        tool_name = original.name
+
+        def _run(**kwargs: Any) -> str:
+            return self._respond(tool_name, kwargs)
+
+        return StructuredTool.from_function(
+            func=_run,
+            name=tool_name,
+            description=original.description,
+            args_schema=original.args_schema,
+        )
+
+    def _respond(self, tool_name: str, kwargs: Dict[str, Any]) -> str:
+        with self._lock:
+            self.calls[tool_name] = self.calls.get(tool_name, 0) + 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        text = self.fixtures.get(tool_name) or _default_fixture(tool_name)
+        ticker = next((str(v) for k, v in kwargs.items() if k in ("ticker", "symbol", "stock_code")), "")
+        date = next((str(v) for k, v in kwargs.items() if "date" in k.lower() and v), "")
+        return text.replace("{ticker}", ticker).replace("{date}", date)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+
+def build_stub_config(project_dir: str, max_debate_rounds: int = 1, max_risk_discuss_rounds: int = 1,
+                      overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """离线基准使用的图配置（关闭记忆，使用 openai 分支构造 LLM 以便替换为假模型）"""
+    from tradingagents.default_config import DEFAULT_CONFIG
+
+    config = DEFAULT_CONFIG.copy()
+    config.update({
+        "project_dir": project_dir,
+        "llm_provider": "openai",
+        "backend_url": "http://stub.invalid/v1",
+        "quick_think_llm": "stub-quick",
+        "deep_think_llm": "stub-deep",
+        "quick_provider": None,
+        "deep_provider": None,
+        "memory_enabled": False,
+        "online_tools": False,
+        "max_debate_rounds": max_debate_rounds,
+        "max_risk_discuss_rounds": max_risk_discuss_rounds,
+    })
+    config.update(overrides or {})
+    return config
+
+
+def build_stub_graph(
+    quick_llm: StubChatModel,
+    deep_llm: StubChatModel,
+    toolkit: FixtureToolkit,
+    config: Dict[str, Any],
+    selected_analysts: Sequence[str] = DEFAULT_ANALYSTS,
+):
+    """用假模型和夹具工具构造 TradingAgentsGraph（只在构造期间替换 LLM 和 Toolkit 的创建）
+
+    与 API 服务一致，使用工作流配置构建图。
+    """
+    from unittest import mock
+
+    from tradingagents.graph import trading_graph
+    from tradingagents.graph.default_config import generate_default_config
+
+    def _llm_factory(**kwargs: Any) -> StubChatModel:
+        return deep_llm if kwargs.get("model") == config["deep_think_llm"] else quick_llm
+
+    with mock.patch.object(trading_graph, "ChatOpenAI", _llm_factory), \
+            mock.patch.object(trading_graph, "Toolkit", lambda config=None: toolkit):
+        return trading_graph.TradingAgentsGraph(
+            list(selected_analysts),
+            config=config,
+            workflow_config=generate_default_config(list(selected_analysts)),
+        )
+
+
+@contextmanager
+def _quiet_logging(level: Optional[int]) -> Iterator[None]:
+    if level is None:
+        yield
+        return
+    logging.disable(level)
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+@contextmanager
+def _working_directory(path: str) -> Iterator[None]:
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "median_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def run_propagate_benchmark(
+    runs: int = 5,
+    ticker: str = "AAPL",
+    trade_date: str = "2025-01-02",
+    selected_analysts: Sequence[str] = DEFAULT_ANALYSTS,
+    token_latency: float = 0.0,
+    response_tokens: int = 400,
+    tool_latency: float = 0.0,
+    fixtures: Optional[Dict[str, str]] = None,
+    max_debate_rounds: int = 1,
+    max_risk_discuss_rounds: int = 1,
+    warmup: int = 1,
+    trace_memory: bool = True,
+    log_level: Optional[int] = logging.INFO,
+    progress_callback: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    执行 N 次完整的 propagate 并汇总耗时
+
+    Args:
+        runs: 计入统计的运行次数
+        warmup: 预热次数（不计入统计，排除首次导入和编译开销）
+        trace_memory: 是否用 tracemalloc 统计 Python 内存分配峰值（会增加一定开销）
+        log_level: 运行期间屏蔽该级别及以下的日志（None 表示不屏蔽），避免日志 I/O 主导结果
+        progress_callback: 传给 propagate 的进度回调（使用与 Web/API 相同的 updates 流模式）
+
+    Returns:
+        包含 total/graph_build/node 统计、内存峰值、LLM 与工具调用次数的字典
+    """
+    # 运行期间生成的结果和缓存文件都写入临时目录，结束后随目录一起删除
+    with tempfile.TemporaryDirectory(prefix="ta_bench_") as work_dir:
+        quick_llm = StubChatModel(model_name="stub-quick", ticker=ticker, trade_date=trade_date,
+                                  token_latency=token_latency, response_tokens=response_tokens)
+        deep_llm = StubChatModel(model_name="stub-deep", ticker=ticker, trade_date=trade_date,
+                                 token_latency=token_latency, response_tokens=response_tokens)
+        config = build_stub_config(work_dir, max_debate_rounds, max_risk_discuss_rounds)
+        toolkit = FixtureToolkit(config=config, fixtures=fixtures, latency=tool_latency)
+        callback = progress_callback or (lambda message, *args, **kwargs: None)
+
+        totals: List[float] = []
+        node_samples: Dict[str, List[float]] = {}
+        peaks: List[int] = []
+        decisions: List[str] = []
+
+        with _quiet_logging(log_level), _working_directory(work_dir):
+            build_start = time.perf_counter()
+            graph = build_stub_graph(quick_llm, deep_llm, toolkit, config, selected_analysts)
+            graph_build = time.perf_counter() - build_start
+
+            # 截获 propagate 内部未取整的 node_timings
+            captured: Dict[str, Dict[str, float]] = {}
+            build_performance_data = graph._build_performance_data
+
+            def _capture(node_timings: Dict[str, float], total_elapsed: float) -> Dict[str, Any]:
+                captured["node_timings"] = dict(node_timings)
+                return build_performance_data(node_timings, total_elapsed)
+
+            graph._build_performance_data = _capture
+
+            for i in range(warmup + runs):
+                measured = i >= warmup
+                if measured and i == warmup:
+                    quick_llm.reset_stats()
+                    deep_llm.reset_stats()
+                    toolkit.reset_stats()
+                trace = measured and trace_memory
+                # 调用方已开启 tracemalloc 时沿用并保留，只停止本函数开启的跟踪
+                started = trace and not tracemalloc.is_tracing()
+                if started:
+                    tracemalloc.start()
+                if trace:
+                    tracemalloc.reset_peak()
+                try:
+                    start = time.perf_counter()
+                    _, decision = graph.propagate(ticker, trade_date, progress_callback=callback)
+                    elapsed = time.perf_counter() - start
+                    if trace:
+                        peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    if started:
+                        tracemalloc.stop()
+                if not measured:
+                    continue
+                totals.append(elapsed)
+                decisions.append(decision.get("action"))
+                for node, seconds in captured.get("node_timings", {}).items():
+                    node_samples.setdefault(node, []).append(seconds)
+
+    llm_stats: Dict[str, Dict[str, int]] = {"quick": quick_llm.stats, "deep": deep_llm.stats}
+    return {
+        "ticker": ticker,
+        "runs": runs,
+        "analysts": list(selected_analysts),
+        "token_latency": token_latency,
+        "response_tokens": response_tokens,
+        "graph_build_ms": round(graph_build * 1000, 2),
+        "total": _summarize(totals) if totals else {},
+        "nodes": {node: _summarize(samples) for node, samples in node_samples.items()},
+        "peak_memory_mb": round(max(peaks) / 1024 / 1024, 2) if peaks else None,
+        "llm_calls": {name: stats.get("calls", 0) for name, stats in llm_stats.items()},
+        "llm_tool_calls": sum(stats.get("tool_calls", 0) for stats in llm_stats.values()),
+        "prompt_chars": sum(stats.get("prompt_chars", 0) for stats in llm_stats.values()),
+        "tool_calls": dict(sorted(toolkit.calls.items())),
+        "decisions": sorted(set(filter(None, decisions))),
+    }
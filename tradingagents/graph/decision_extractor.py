@@ -0,0 +1,321 @@
+# TradingAgents/graph/decision_extractor.py
+"""
+基于规则的交易决策提取
+交易员和风险经理的提示词要求报告以固定格式给出结论（'最终交易建议: **买入/持有/卖出**'、
+'**目标价位**: ¥XX'、'置信度'、'风险评分' 等），这类报告可以直接用规则解析，不必再调用 LLM。
+每次提取给出 extraction_confidence（0-1），只有得分低于阈值时 SignalProcessor 才调用 LLM。
+
+得分由各字段的证据强度加权得到，权重按 tests/tradingagents/fixtures/signal_reports.json
+中的报告语料校准：得分达到默认阈值的报告，动作和目标价均与人工标注一致。
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# 默认阈值：动作来自最终建议标记且有带货币（或与当前价量级一致）的目标价（0.5 + 0.3）即可跳过 LLM
+DEFAULT_CONFIDENCE_THRESHOLD = 0.75
+
+# 各类证据的权重
+WEIGHT_FINAL_MARKER = 0.5
+WEIGHT_LABELED_ACTION = 0.4
+WEIGHT_CONFLICTING_ACTION = 0.15
+WEIGHT_TARGET_PRICE = 0.3
+WEIGHT_BARE_TARGET_PRICE = 0.0
+WEIGHT_AMBIGUOUS_TARGET_PRICE = 0.0
+WEIGHT_CURRENCY_MATCH = 0.05
+PENALTY_CURRENCY_MISMATCH = 0.3
+WEIGHT_CONFIDENCE = 0.075
+WEIGHT_RISK = 0.075
+
+DEFAULT_CONFIDENCE = 0.7
+DEFAULT_RISK_SCORE = 0.5
+
+# 没有货币符号的目标价与报告中当前价的比值在该范围内才视为可信
+TARGET_PRICE_RATIO_RANGE = (0.5, 2.0)
+
+_ACTION_WORD = r"(买入|增持|持有|观望|减持|卖出|BUY|HOLD|SELL)"
+_ACTION_MAP = {
+    "买入": "买入", "增持": "买入", "BUY": "买入",
+    "持有": "持有", "观望": "持有", "HOLD": "持有",
+    "卖出": "卖出", "减持": "卖出", "SELL": "卖出",
+}
+_OPEN = r"[\s*【\[「]*"
+
+_FINAL_MARKER = re.compile(
+    rf"(?:最终(?:交易|投资|操作)?(?:建议|决策)|FINAL\s+TRANSACTION\s+PROPOSAL)\s*\**\s*[:：]?{_OPEN}{_ACTION_WORD}",
+    re.IGNORECASE,
+)
+_LABELED_ACTION = re.compile(
+    rf"(?:投资建议|交易建议|操作建议|投资决策|交易决策|决策|建议|评级|recommendation)\s*\**\s*[:：]{_OPEN}{_ACTION_WORD}",
+    re.IGNORECASE,
+)
+
+_NUM = r"(\d+(?:,\d{3})*(?:\.\d+)?)"
+_CUR_PREFIX = r"(HK\$|HKD|US\$|USD|CNY|RMB|[¥￥$])"
+_CUR_SUFFIX = r"(港元|港币|美元|人民币|元|HKD|USD|CNY|RMB)"
+# 后面跟着时间单位的数字是期限（'2025年底'、'6个月内'），不是价格
+_TIME_UNIT = r"(?:年|个?月|周|天|日)"
+# 单个价格：可选货币前缀 + 数字 + 可选货币后缀；百分数和期限不算价格
+_PRICE_TOKEN = re.compile(
+    rf"(?:{_CUR_PREFIX}\s*)?(?<![\d.,]){_NUM}(?![\d.,%]|\s*%|\s*{_TIME_UNIT})(?:\s*{_CUR_SUFFIX})?",
+    re.IGNORECASE,
+)
+_TARGET_LABEL = re.compile(
+    r"(?:目标(?:卖出|买入)?价(?:位|格)?(?:区间|范围)?|合理价(?:位|格)?(?:区间|范围)?|target\s+price|price\s+target)"
+    r"(?:[（(][^）)\n]{0,15}[）)])?",
+    re.IGNORECASE,
+)
+# 标签后在同一句内寻找价格
+_TARGET_SEGMENT_END = re.compile(r"[。；;\n]")
+TARGET_SEGMENT_CHARS = 40
+_RANGE_SEPARATOR = re.compile(r"\s*(?:-|~|～|–|—|至|到)\s*")
+# '上调至 ¥15'：转折词之后的数字才是目标价
+_TRANSITION = re.compile(r"至|到")
+# '由12元'、'从当前 ¥12'、'较当前价上涨15元'：起点价、当前价或涨跌额，不是目标价
+_REFERENCE = re.compile(r"当前|现价|由|从|较|涨|跌")
+_CURRENT_PRICE = re.compile(
+    rf"(?:当前(?:股)?价(?:格|位)?|现价|最新价|收盘价|current\s+price)\s*\**\s*[:：为是]?\s*(?:{_CUR_PREFIX}\s*)?{_NUM}",
+    re.IGNORECASE,
+)
+
+_CURRENCY_CODES = {
+    "¥": "CNY", "￥": "CNY", "元": "CNY", "人民币": "CNY", "CNY": "CNY", "RMB": "CNY",
+    "HK$": "HKD", "HKD": "HKD", "港元": "HKD", "港币": "HKD",
+    "$": "USD", "US$": "USD", "USD": "USD", "美元": "USD",
+}
+# StockUtils.get_currency_info 返回的货币名称
+CURRENCY_BY_NAME = {"人民币": "CNY", "港币": "HKD", "美元": "USD"}
+
+_LEVEL = r"(\d+(?:\.\d+)?\s*(?:%|/\s*10)?|较高|较低|中等|中|高|低)"
+_CONFIDENCE = re.compile(rf"(?:置信度|信心(?:程度|水平)?|confidence)\s*\**\s*[:：]\s*\**\s*{_LEVEL}", re.IGNORECASE)
+_RISK = re.compile(
+    rf"(?:风险评分|风险等级|风险水平|风险评级|risk\s*score)\s*\**\s*[:：]\s*\**\s*{_LEVEL}", re.IGNORECASE
+)
+_CONFIDENCE_LEVELS = {"高": 0.8, "较高": 0.75, "中": 0.6, "中等": 0.6, "较低": 0.45, "低": 0.4}
+_RISK_LEVELS = {"高": 0.8, "较高": 0.7, "中": 0.5, "中等": 0.5, "较低": 0.35, "低": 0.3}
+
+_REASONING = re.compile(
+    r"(?:详细推理|决策理由|核心理由|理由|推理|核心逻辑|reasoning|rationale)\s*\**\s*[:：]\s*\**\s*([^\n]*)",
+    re.IGNORECASE,
+)
+_LABEL_LINE = re.compile(r"^[\s\d.、*-]*[^\s:：]{1,12}\s*\**\s*[:：]")
+_MARKDOWN = re.compile(r"[*#>`]+")
+
+
+@dataclass
+class DecisionExtraction:
+    """规则提取结果"""
+    action: str = "持有"
+    target_price: Optional[float] = None
+    target_range: Optional[Tuple[float, float]] = None
+    currency: Optional[str] = None
+    confidence: float = DEFAULT_CONFIDENCE
+    risk_score: float = DEFAULT_RISK_SCORE
+    reasoning: str = "基于综合分析的投资建议"
+    extraction_confidence: float = 0.0
+    evidence: Dict[str, str] = field(default_factory=dict)
+
+    def to_decision(self) -> dict:
+        """转换为 SignalProcessor.process_signal 的返回格式"""
+        return {
+            "action": self.action,
+            "target_price": self.target_price,
+            "confidence": self.confidence,
+            "risk_score": self.risk_score,
+            "reasoning": self.reasoning,
+        }
+
+
+def _to_float(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _currency_code(token: str) -> Optional[str]:
+    return _CURRENCY_CODES.get(token.upper() if token.isascii() else token)
+
+
+def _same_unit(left: re.Match, right: re.Match) -> bool:
+    """区间两端的货币一致（只有一端标注货币视为一致）"""
+    units = {_currency_code(t) for t in (left.group(1), left.group(3), right.group(1), right.group(3)) if t}
+    return len(units) <= 1
+
+
+def _level(value: str, levels: Dict[str, float]) -> Optional[float]:
+    """把 '0.75' / '75%' / '7/10' / '高' 统一换算为 0-1"""
+    value = value.strip()
+    if value in levels:
+        return levels[value]
+    try:
+        if value.endswith("%"):
+            number = float(value[:-1]) / 100
+        elif "/" in value:
+            number = float(value.split("/")[0]) / 10
+        else:
+            number = float(value)
+            if number > 1:
+                number /= 100 if number > 10 else 10
+    except ValueError:
+        return None
+    return number if 0 <= number <= 1 else None
+
+
+class RuleBasedDecisionExtractor:
+    """从交易员/风险经理的最终报告中按规则提取决策"""
+
+    def __init__(self, currency: Optional[str] = None):
+        """
+        Args:
+            currency: 股票的交易货币（CNY/HKD/USD），用于校验目标价的货币
+        """
+        self.currency = currency
+
+    def extract(self, text: str) -> DecisionExtraction:
+        result = DecisionExtraction()
+        score = 0.0
+
+        score += self._extract_action(text, result)
+        score += self._extract_target(text, result)
+
+        match = self._last(_CONFIDENCE, text)
+        if match and _level(match.group(1), _CONFIDENCE_LEVELS) is not None:
+            result.confidence = round(_level(match.group(1), _CONFIDENCE_LEVELS), 4)
+            result.evidence["confidence"] = match.group(0)
+            score += WEIGHT_CONFIDENCE
+
+        match = self._last(_RISK, text)
+        if match and _level(match.group(1), _RISK_LEVELS) is not None:
+            result.risk_score = round(_level(match.group(1), _RISK_LEVELS), 4)
+            result.evidence["risk_score"] = match.group(0)
+            score += WEIGHT_RISK
+
+        result.reasoning = self._extract_reasoning(text) or result.reasoning
+        result.extraction_confidence = round(max(0.0, min(1.0, score)), 4)
+        return result
+
+    @staticmethod
+    def _last(pattern: re.Pattern, text: str) -> Optional[re.Match]:
+        match = None
+        for match in pattern.finditer(text):
+            pass
+        return match
+
+    @staticmethod
+    def _extract_action(text: str, result: DecisionExtraction) -> float:
+        """最终建议标记优先于一般的 '建议：' 标注；多处标注不一致时取最后一处并降低得分"""
+        for pattern, weight in ((_FINAL_MARKER, WEIGHT_FINAL_MARKER), (_LABELED_ACTION, WEIGHT_LABELED_ACTION)):
+            matches: List[re.Match] = list(pattern.finditer(text))
+            if not matches:
+                continue
+            actions = [_ACTION_MAP[m.group(1).upper()] for m in matches]
+            result.action = actions[-1]
+            result.evidence["action"] = matches[-1].group(0).strip()
+            return weight if len(set(actions)) == 1 else WEIGHT_CONFLICTING_ACTION
+
+        # 没有任何标注：只看关键词，不计分
+        found = re.search(r"卖出|SELL", text, re.IGNORECASE), re.search(r"买入|BUY", text, re.IGNORECASE)
+        if found[0] and not found[1]:
+            result.action = "卖出"
+        elif found[1] and not found[0]:
+            result.action = "买入"
+        return 0.0
+
+    def _extract_target(self, text: str, result: DecisionExtraction) -> float:
+        """取最后一个能解析出价格的目标价标注；同一句里有多个无法区分的价格时不计分，交给 LLM"""
+        for label in reversed(list(_TARGET_LABEL.finditer(text))):
+            start = label.end()
+            end = _TARGET_SEGMENT_END.search(text, start)
+            end = min(end.start() if end else len(text), start + TARGET_SEGMENT_CHARS)
+            picked = self._pick_target_prices(text, start, end)
+            if picked:
+                break
+        else:
+            return 0.0
+
+        prices, ambiguous = picked
+        values = [_to_float(token.group(2)) for token in prices]
+        if len(values) == 2:
+            low, high = min(values), max(values)
+            result.target_range = (low, high)
+            result.target_price = round((low + high) / 2, 2)
+        else:
+            result.target_price = values[0]
+        result.evidence["target_price"] = text[label.start():prices[-1].end()].strip()
+        if ambiguous:
+            return WEIGHT_AMBIGUOUS_TARGET_PRICE
+
+        token = next((t for price in prices for t in (price.group(1), price.group(3)) if t), None)
+        if not token:
+            # 没有货币符号的裸数字只有和报告中的当前价量级一致时才计分
+            return WEIGHT_TARGET_PRICE if self._near_current_price(text, result.target_price) else WEIGHT_BARE_TARGET_PRICE
+
+        score = WEIGHT_TARGET_PRICE
+        result.currency = _currency_code(token)
+        if self.currency and result.currency:
+            score += WEIGHT_CURRENCY_MATCH if result.currency == self.currency else -PENALTY_CURRENCY_MISMATCH
+        return score
+
+    @staticmethod
+    def _pick_target_prices(text: str, start: int, end: int) -> Optional[Tuple[List[re.Match], bool]]:
+        """
+        在 text[start:end] 中选出目标价
+
+        Returns:
+            (价格列表, 是否有歧义)：区间为两个价格；没有可用价格时返回 None
+        """
+        candidates: List[Tuple[re.Match, bool]] = []
+        previous: Optional[re.Match] = None
+        previous_is_reference = True
+        for token in _PRICE_TOKEN.finditer(text, start, end):
+            gap = text[previous.end() if previous else start:token.start()]
+            transitions = list(_TRANSITION.finditer(gap))
+            tail = gap[transitions[-1].end():] if transitions else gap
+            is_reference = bool(_REFERENCE.search(tail[-8:]))
+            if (
+                previous is not None and not previous_is_reference and not is_reference
+                and _RANGE_SEPARATOR.fullmatch(gap) and _same_unit(previous, token)
+            ):
+                # 两端都是同一单位的价格，且只用区间符号相连
+                return [previous, token], False
+            if not is_reference:
+                candidates.append((token, bool(transitions)))
+            previous, previous_is_reference = token, is_reference
+
+        if not candidates:
+            return None
+        after_transition = [token for token, transitioned in candidates if transitioned]
+        if after_transition:
+            return [after_transition[-1]], False
+        return [candidates[0][0]], len(candidates) > 1
+
+    @staticmethod
+    def _near_current_price(text: str, price: float) -> bool:
+        match = _CURRENT_PRICE.search(text)
+        if not match:
+            return False
+        current = _to_float(match.group(2))
+        low, high = TARGET_PRICE_RATIO_RANGE
+        return current > 0 and low <= price / current <= high
+
+    @staticmethod
+    def _extract_reasoning(text: str) -> Optional[str]:
+        lines = text.splitlines()
+        for index, line in enumerate(lines):
+            match = _REASONING.search(line)
+            if not match:
+                continue
+            # '理由：' 后为空时取下一条非空行
+            candidate = match.group(1).strip() or next((l for l in lines[index + 1:] if l.strip()), "")
+            candidate = _MARKDOWN.sub("", candidate).strip(" -：:")
+            if candidate:
+                return candidate[:200]
+
+        # 没有标注理由：取第一条正文句子（跳过标题、引用和 '字段：值' 行）
+        for line in lines:
+            line = line.strip()
+            if len(line) < 10 or line.startswith(("#", ">")) or _LABEL_LINE.match(line):
+                continue
+            sentence = _MARKDOWN.sub("", line).split("。")[0].strip()
+            if sentence:
+                return sentence[:200]
+        return None
@@ -106,12 +106,14 @@ class NodeRegistry:
         if agent_type == "bull_researcher" or agent_type == "bull":
             return create_bull_researcher(
                 self.graph_setup.quick_thinking_llm,
-                self.graph_setup.bull_memory
+                self.graph_setup.bull_memory,
+                self.graph_setup.debate_compactor("bull_researcher")
             )
         elif agent_type == "bear_researcher" or agent_type == "bear":
             return create_bear_researcher(
                 self.graph_setup.quick_thinking_llm,
-                self.graph_setup.bear_memory
+                self.graph_setup.bear_memory,
+                self.graph_setup.debate_compactor("bear_researcher")
             )
         else:
             raise ValueError(f"Unknown researcher type: {agent_type}")
@@ -125,12 +127,14 @@ class NodeRegistry:
         if agent_type == "research_manager" or agent_type == "research":
             return create_research_manager(
                 self.graph_setup.deep_thinking_llm,
-                self.graph_setup.invest_judge_memory
+                self.graph_setup.invest_judge_memory,
+                self.graph_setup.debate_compactor("research_manager")
             )
         elif agent_type == "risk_manager" or agent_type == "risk":
             return create_risk_manager(
                 self.graph_setup.deep_thinking_llm,
-                self.graph_setup.risk_manager_memory
+                self.graph_setup.risk_manager_memory,
+                self.graph_setup.debate_compactor("risk_manager")
             )
         else:
             raise ValueError(f"Unknown manager type: {agent_type}")
@@ -149,11 +153,20 @@ class NodeRegistry:
         
         # 支持完整形式和简短形式（向后兼容）
         if agent_type == "aggressive_debator" or agent_type == "risky":
-            return create_risky_debator(self.graph_setup.quick_thinking_llm)
+            return create_risky_debator(
+                self.graph_setup.quick_thinking_llm,
+                self.graph_setup.debate_compactor("aggressive_debator")
+            )
         elif agent_type == "conservative_debator" or agent_type == "safe":
-            return create_safe_debator(self.graph_setup.quick_thinking_llm)
+            return create_safe_debator(
+                self.graph_setup.quick_thinking_llm,
+                self.graph_setup.debate_compactor("conservative_debator")
+            )
         elif agent_type == "neutral_debator" or agent_type == "neutral":
-            return create_neutral_debator(self.graph_setup.quick_thinking_llm)
+            return create_neutral_debator(
+                self.graph_setup.quick_thinking_llm,
+                self.graph_setup.debate_compactor("neutral_debator")
+            )
         else:
             raise ValueError(f"Unknown risk analyst type: {agent_type}")
     
@@ -8,6 +8,7 @@ from langgraph.prebuilt import ToolNode
 from tradingagents.agents import *
 from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
+from tradingagents.agents.utils.debate_compaction import DebateHistoryCompactor
 
 from .conditional_logic import ConditionalLogic
 
@@ -48,6 +49,10 @@ class GraphSetup:
         self.config = config or {}
         self.react_llm = react_llm
 
+    def debate_compactor(self, node: str):
+        """创建辩论节点的历史压缩器（每个节点独立的 token 预算，未启用时为 None）"""
+        return DebateHistoryCompactor.from_config(self.config, node, llm=self.quick_thinking_llm)
+
     def setup_graph(
         self, selected_analysts=["market_analyst", "social_media_analyst", "news_analyst", "fundamentals_analyst"]
     ):
@@ -138,22 +143,22 @@ class GraphSetup:
 
         # Create researcher and manager nodes
         bull_researcher_node = create_bull_researcher(
-            self.quick_thinking_llm, self.bull_memory
+            self.quick_thinking_llm, self.bull_memory, self.debate_compactor("bull_researcher")
         )
         bear_researcher_node = create_bear_researcher(
-            self.quick_thinking_llm, self.bear_memory
+            self.quick_thinking_llm, self.bear_memory, self.debate_compactor("bear_researcher")
         )
         research_manager_node = create_research_manager(
-            self.deep_thinking_llm, self.invest_judge_memory
+            self.deep_thinking_llm, self.invest_judge_memory, self.debate_compactor("research_manager")
         )
         trader_node = create_trader(self.quick_thinking_llm, self.trader_memory)
 
         # Create risk analysis nodes
-        risky_analyst = create_risky_debator(self.quick_thinking_llm)
-        neutral_analyst = create_neutral_debator(self.quick_thinking_llm)
-        safe_analyst = create_safe_debator(self.quick_thinking_llm)
+        risky_analyst = create_risky_debator(self.quick_thinking_llm, self.debate_compactor("aggressive_debator"))
+        neutral_analyst = create_neutral_debator(self.quick_thinking_llm, self.debate_compactor("neutral_debator"))
+        safe_analyst = create_safe_debator(self.quick_thinking_llm, self.debate_compactor("conservative_debator"))
         risk_manager_node = create_risk_manager(
-            self.deep_thinking_llm, self.risk_manager_memory
+            self.deep_thinking_llm, self.risk_manager_memory, self.debate_compactor("risk_manager")
         )
 
         # Create workflow
@@ -1,7 +1,15 @@
 # TradingAgents/graph/signal_processing.py
 
+import time
+
 from langchain_openai import ChatOpenAI
 
+from tradingagents.graph.decision_extractor import (
+    CURRENCY_BY_NAME,
+    DEFAULT_CONFIDENCE_THRESHOLD,
+    RuleBasedDecisionExtractor,
+)
+
 # 导入统一日志系统和图处理模块日志装饰器
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_graph_module
@@ -11,9 +19,17 @@ logger = get_logger("graph.signal_processing")
 class SignalProcessor:
     """Processes trading signals to extract actionable decisions."""
 
-    def __init__(self, quick_thinking_llm: ChatOpenAI):
-        """Initialize with an LLM for processing."""
+    def __init__(self, quick_thinking_llm: ChatOpenAI, rule_confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD):
+        """
+        Initialize with an LLM for processing.
+
+        Args:
+            quick_thinking_llm: 规则提取置信度不足时用于提取决策的 LLM
+            rule_confidence_threshold: 规则提取得分达到该值时直接采用规则结果（大于 1 时总是调用 LLM）
+        """
         self.quick_thinking_llm = quick_thinking_llm
+        self.rule_confidence_threshold = rule_confidence_threshold
+        self.stats = {"rule": 0, "llm": 0}
 
     @log_graph_module("signal_processing")
     def process_signal(self, full_signal: str, stock_symbol: str = None) -> dict:
@@ -63,6 +79,22 @@ class SignalProcessor:
         logger.info(f"🔍 [SignalProcessor] 处理信号: 股票={stock_symbol}, 市场={market_info['market_name']}, 货币={currency}",
                    extra={'stock_symbol': stock_symbol, 'market': market_info['market_name'], 'currency': currency})
 
+        # 先按规则提取，得分足够时不再调用 LLM
+        start = time.perf_counter()
+        extraction = RuleBasedDecisionExtractor(CURRENCY_BY_NAME.get(currency)).extract(full_signal)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if extraction.extraction_confidence >= self.rule_confidence_threshold:
+            self.stats["rule"] += 1
+            result = extraction.to_decision()
+            logger.info(f"⚡ [SignalProcessor] 规则提取成功(得分{extraction.extraction_confidence:.2f}, "
+                        f"{elapsed_ms:.1f}ms)，跳过LLM: {result}",
+                        extra={'action': result['action'], 'target_price': result['target_price'],
+                               'confidence': result['confidence'], 'stock_symbol': stock_symbol})
+            return result
+        logger.debug(f"🔍 [SignalProcessor] 规则提取得分{extraction.extraction_confidence:.2f}低于阈值"
+                     f"{self.rule_confidence_threshold}，调用LLM提取")
+        self.stats["llm"] += 1
+
         messages = [
             (
                 "system",
@@ -210,8 +242,11 @@ class SignalProcessor:
 
         except Exception as e:
             logger.error(f"信号处理错误: {e}", exc_info=True, extra={'stock_symbol': stock_symbol})
-            # 回退到简单提取
-            return self._extract_simple_decision(full_signal)
+            # 回退到规则提取结果，缺少目标价时按文本推算
+            decision = extraction.to_decision()
+            if decision['target_price'] is None:
+                decision['target_price'] = self._smart_price_estimation(full_signal, decision['action'], is_china)
+            return decision
 
     def _smart_price_estimation(self, text: str, action: str, is_china: bool) -> float:
         """智能价格推算方法"""
@@ -36,6 +36,7 @@ from .setup import GraphSetup
 from .propagation import Propagator
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
+from .decision_extractor import DEFAULT_CONFIDENCE_THRESHOLD
 
 
 def create_llm_by_provider(provider: str, model: str, backend_url: str, temperature: float, max_tokens: int, timeout: int, api_key: str = None):
@@ -804,7 +805,10 @@ class TradingAgentsGraph:
 
         self.propagator = Propagator()
         self.reflector = Reflector(self.quick_thinking_llm)
-        self.signal_processor = SignalProcessor(self.quick_thinking_llm)
+        self.signal_processor = SignalProcessor(
+            self.quick_thinking_llm,
+            rule_confidence_threshold=self.config.get("signal_rule_confidence_threshold", DEFAULT_CONFIDENCE_THRESHOLD),
+        )
 
         # State tracking
         self.curr_state = None
@@ -0,0 +1,235 @@
+"""
+按 token 预算组装输入消息
+消息总量超出模型输入预算时按优先级裁剪，而不是从末尾向前保留到放不下为止：
+1. 系统提示、最近一轮工具调用及其结果、最后一条用户消息固定保留
+2. 先把较早的工具输出替换为省略说明（保留消息本身，工具调用配对不被破坏）
+3. 再在章节边界处截断较长的未固定消息（报告保留前面的章节）
+4. 仍超出时整轮丢弃最早的未固定消息
+5. 最后才在章节边界截断固定的非系统消息
+输入消息不会被修改，裁剪时生成副本。
+"""
+
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from tradingagents.utils.token_estimator import estimate_tokens
+
+# 每条消息的格式开销（角色、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_HEADING_BOUNDARY = re.compile(r"(?m)^(?=#{1,6}\s)")
+_PARAGRAPH_BOUNDARY = re.compile(r"\n\s*\n")
+
+
+def content_text(message: BaseMessage) -> str:
+    """消息文本内容（多模态内容只计文本部分）"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return "\n".join(parts)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """估算单条消息的 token 数（文本按内容缓存）"""
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(content_text(message))
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(tool_call.get("name") or "")
+        tokens += estimate_tokens(json.dumps(tool_call.get("args") or {}, ensure_ascii=False, sort_keys=True))
+    return tokens
+
+
+def clip_at_sections(text: str, max_tokens: int) -> str:
+    """
+    在章节边界处截断文本：优先按 Markdown 标题分节，没有标题时按空行分段，
+    保留前面能放下的完整章节；第一节本身就超出时按行截断。
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sections = [s for s in _HEADING_BOUNDARY.split(text) if s]
+    if len(sections) <= 1:
+        sections = [s + "\n\n" for s in _PARAGRAPH_BOUNDARY.split(text)]
+
+    def marker(omitted: int) -> str:
+        return f"\n...(已省略后续 {omitted} 个章节)"
+
+    kept, used = [], 0
+    for index, section in enumerate(sections):
+        section_tokens = estimate_tokens(section)
+        if used + section_tokens + estimate_tokens(marker(len(sections) - index - 1)) > max_tokens:
+            break
+        kept.append(section)
+        used += section_tokens
+    omitted = len(sections) - len(kept)
+    if kept:
+        return "".join(kept).rstrip() + marker(omitted)
+
+    # 第一节就放不下：按行截断
+    suffix = "\n...(内容已截断)"
+    budget = max(0, max_tokens - estimate_tokens(suffix))
+    lines, used = [], 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = estimate_tokens(line)
+        if used + line_tokens > budget:
+            if not lines:
+                # 单行超长：按比例截取字符
+                lines.append(line[:max(0, int(len(line) * budget / max(1, line_tokens)))])
+            break
+        lines.append(line)
+        used += line_tokens
+    return "".join(lines).rstrip() + suffix
+
+
+@dataclass
+class AssemblyStats:
+    """一次组装的统计"""
+    tokens_before: int = 0
+    tokens_after: int = 0
+    elided_tool_outputs: int = 0
+    clipped: int = 0
+    dropped: int = 0
+    elapsed_ms: float = 0.0
+
+    @property
+    def trimmed(self) -> bool:
+        return bool(self.elided_tool_outputs or self.clipped or self.dropped)
+
+
+class MessageBudgetAssembler:
+    """按 token 预算组装输入消息"""
+
+    def __init__(self, max_tokens: int, clip_threshold: int = 512, min_clip_tokens: int = 256):
+        """
+        Args:
+            max_tokens: 输入消息的 token 预算
+            clip_threshold: 超过该 token 数的消息才会被截断
+            min_clip_tokens: 截断后至少保留的 token 数
+        """
+        self.max_tokens = max_tokens
+        self.clip_threshold = clip_threshold
+        self.min_clip_tokens = min_clip_tokens
+
+    def assemble(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], AssemblyStats]:
+        start = time.perf_counter()
+        msgs = list(messages)
+        counts = [message_tokens(m) for m in msgs]
+        stats = AssemblyStats(tokens_before=sum(counts))
+        total = stats.tokens_before
+
+        if total > self.max_tokens:
+            pinned = self._pinned_indices(msgs)
+
+            # 1. 较早的工具输出替换为省略说明
+            for i, message in enumerate(msgs):
+                if total <= self.max_tokens:
+                    break
+                if i in pinned or not isinstance(message, ToolMessage):
+                    continue
+                text = content_text(message)
+                placeholder = f"[已省略较早的工具输出，约 {estimate_tokens(text)} tokens]"
+                if estimate_tokens(placeholder) >= estimate_tokens(text):
+                    continue
+                total += self._replace(msgs, counts, i, placeholder)
+                stats.elided_tool_outputs += 1
+
+            # 2. 在章节边界截断较长的未固定消息（最长的优先）
+            total = self._clip(msgs, counts, [i for i in range(len(msgs)) if i not in pinned], total, stats)
+
+            # 3. 整轮丢弃最早的未固定消息
+            if total > self.max_tokens:
+                drop = self._drop_oldest(msgs, counts, pinned, total)
+                stats.dropped = len(drop)
+                total -= sum(counts[i] for i in drop)
+                keep = [i for i in range(len(msgs)) if i not in drop]
+                msgs, counts = [msgs[i] for i in keep], [counts[i] for i in keep]
+                pinned = {keep.index(i) for i in pinned}
+
+            # 4. 截断固定的非系统消息
+            total = self._clip(
+                msgs, counts,
+                [i for i in pinned if not isinstance(msgs[i], SystemMessage)],
+                total, stats,
+            )
+
+        stats.tokens_after = total
+        stats.elapsed_ms = (time.perf_counter() - start) * 1000
+        return msgs, stats
+
+    @staticmethod
+    def _pinned_indices(msgs: List[BaseMessage]) -> Set[int]:
+        pinned = {i for i, m in enumerate(msgs) if isinstance(m, SystemMessage)}
+        if msgs:
+            pinned.add(len(msgs) - 1)
+        for i in range(len(msgs) - 1, -1, -1):
+            if isinstance(msgs[i], HumanMessage):
+                pinned.add(i)
+                break
+        # 最近一轮工具调用：发起调用的 AI 消息及其后的工具结果
+        for i in range(len(msgs) - 1, -1, -1):
+            if isinstance(msgs[i], AIMessage) and msgs[i].tool_calls:
+                pinned.add(i)
+                pinned.update(j for j in range(i + 1, len(msgs)) if isinstance(msgs[j], ToolMessage))
+                break
+        return pinned
+
+    def _clip(self, msgs, counts, candidates: List[int], total: int, stats: AssemblyStats) -> int:
+        for i in sorted(candidates, key=lambda idx: counts[idx], reverse=True):
+            if total <= self.max_tokens:
+                break
+            if counts[i] <= self.clip_threshold:
+                continue
+            target = max(self.min_clip_tokens, counts[i] - (total - self.max_tokens)) - MESSAGE_OVERHEAD_TOKENS
+            text = content_text(msgs[i])
+            clipped = clip_at_sections(text, target)
+            if estimate_tokens(clipped) >= estimate_tokens(text):
+                continue
+            total += self._replace(msgs, counts, i, clipped)
+            stats.clipped += 1
+        return total
+
+    @staticmethod
+    def _replace(msgs, counts, i: int, text: str) -> int:
+        """用新内容替换第 i 条消息（生成副本），返回 token 变化量"""
+        msgs[i] = msgs[i].model_copy(update={"content": text})
+        new_count = message_tokens(msgs[i])
+        delta = new_count - counts[i]
+        counts[i] = new_count
+        return delta
+
+    def _drop_oldest(self, msgs, counts, pinned: Set[int], total: int) -> Set[int]:
+        """按时间顺序选出要丢弃的消息；带工具调用的 AI 消息与其工具结果一起丢弃"""
+        drop: Set[int] = set()
+        for i, message in enumerate(msgs):
+            if total <= self.max_tokens:
+                break
+            if i in pinned or i in drop:
+                continue
+            group = {i}
+            if isinstance(message, AIMessage) and message.tool_calls:
+                ids = {tc.get("id") for tc in message.tool_calls}
+                group.update(
+                    j for j in range(i + 1, len(msgs))
+                    if isinstance(msgs[j], ToolMessage) and msgs[j].tool_call_id in ids
+                )
+            if group & pinned:
+                continue
+            drop |= group
+            total -= sum(counts[j] for j in group)
+        return drop
+
+
+def fit_messages(messages: List[BaseMessage], max_tokens: Optional[int]) -> Tuple[List[BaseMessage], Optional[AssemblyStats]]:
+    """按预算组装消息；max_tokens 为空时原样返回"""
+    if not max_tokens:
+        return messages, None
+    return MessageBudgetAssembler(max_tokens).assemble(messages)
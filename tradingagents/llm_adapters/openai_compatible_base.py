@@ -3,13 +3,22 @@ OpenAI兼容适配器基类
 为所有支持OpenAI接口的LLM提供商提供统一的基础实现
 """
 
+import asyncio
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from langchain_core.messages import BaseMessage
 from langchain_core.outputs import ChatResult
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+
+from tradingagents.llm_adapters.message_budget import fit_messages
+from tradingagents.llm_adapters.response_cache import (
+    MODE_REPLAY,
+    LLMCacheMissError,
+    get_llm_response_cache,
+    make_cache_key,
+)
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
@@ -44,6 +53,7 @@ class OpenAICompatibleBase(ChatOpenAI):
         api_key: Optional[str] = None,
         temperature: float = 0.1,
         max_tokens: Optional[int] = None,
+        max_input_tokens: Optional[int] = None,
         **kwargs
     ):
         """
@@ -57,6 +67,7 @@ class OpenAICompatibleBase(ChatOpenAI):
             api_key: API密钥，如果不提供则从环境变量获取
             temperature: 温度参数
             max_tokens: 最大token数
+            max_input_tokens: 输入消息的token预算，不提供时按模型上下文长度推算（未知模型不限制）
             **kwargs: 其他参数
         """
         
@@ -69,6 +80,7 @@ class OpenAICompatibleBase(ChatOpenAI):
         # 在父类初始化前先缓存元信息到私有属性（避免Pydantic字段限制）
         object.__setattr__(self, "_provider_name", provider_name)
         object.__setattr__(self, "_model_name_alias", model)
+        object.__setattr__(self, "_max_input_tokens", max_input_tokens)
 
         # 获取API密钥
         if api_key is None:
@@ -140,6 +152,7 @@ class OpenAICompatibleBase(ChatOpenAI):
         # 再次确保元信息存在（有些实现会在super()中重置__dict__）
         object.__setattr__(self, "_provider_name", provider_name)
         object.__setattr__(self, "_model_name_alias", model)
+        object.__setattr__(self, "_max_input_tokens", max_input_tokens)
 
         logger.info(f"✅ {provider_name} OpenAI兼容适配器初始化成功")
         logger.info(f"   模型: {model}")
@@ -161,7 +174,85 @@ class OpenAICompatibleBase(ChatOpenAI):
     ) -> ChatResult:
         """
         生成聊天响应，并记录token使用量
+
+        输入消息先按 token 预算组装（超出时按优先级裁剪）。
+        启用 LLM 响应缓存（TA_LLM_CACHE_MODE）时，按模型、参数、消息和工具 schema 的哈希
+        读取/写入缓存，回放模式下命中的响应不再调用上游 API。
         """
+        messages = self._fit_input_budget(messages)
+
+        cache = get_llm_response_cache()
+        if not cache.enabled:
+            return self._generate_upstream(messages, stop, run_manager, **kwargs)
+
+        key, cached = self._cache_lookup(cache, messages, stop, kwargs)
+        if cached is not None:
+            return cached
+        result = self._generate_upstream(messages, stop, run_manager, **kwargs)
+        self._cache_store(cache, key, result)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """异步生成：与 _generate 一样经过输入预算和响应缓存（缓存读写在线程中执行，不阻塞事件循环）"""
+        messages = self._fit_input_budget(messages)
+
+        cache = get_llm_response_cache()
+        if cache.enabled:
+            key, cached = await asyncio.to_thread(self._cache_lookup, cache, messages, stop, kwargs)
+            if cached is not None:
+                return cached
+
+        start_time = time.time()
+        result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        self._track_token_usage(result, kwargs, start_time)
+
+        if cache.enabled:
+            await asyncio.to_thread(self._cache_store, cache, key, result)
+        return result
+
+    def _cache_lookup(
+        self, cache, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict
+    ) -> Tuple[str, Optional[ChatResult]]:
+        """计算缓存键并在回放模式下读取缓存，返回 (缓存键, 命中的响应)；严格回放未命中时抛出 LLMCacheMissError"""
+        key = make_cache_key(self._cache_identity(stop, kwargs), messages)
+        if cache.mode != MODE_REPLAY:
+            return key, None
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ 读取LLM缓存失败，直接调用上游: {e}")
+            cached = None
+        if cached is not None:
+            logger.debug(f"💾 LLM缓存命中: {self.provider_name}/{self.model_name} ({key[:12]})")
+            return key, cached
+        if cache.strict:
+            raise LLMCacheMissError(
+                f"LLM缓存未命中（严格回放模式）: {self.provider_name}/{self.model_name}, key={key}"
+            )
+        return key, None
+
+    def _cache_store(self, cache, key: str, result: ChatResult) -> None:
+        """记录一次上游调用并写入缓存"""
+        cache.record_upstream_call()
+        try:
+            cache.put(key, result, model=self.model_name)
+        except Exception as e:
+            logger.warning(f"⚠️ 写入LLM缓存失败: {e}")
+
+    def _generate_upstream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """调用上游 API 生成响应，并记录token使用量"""
         
         # 记录开始时间
         start_time = time.time()
@@ -174,6 +265,34 @@ class OpenAICompatibleBase(ChatOpenAI):
         
         return result
 
+    def _input_token_budget(self) -> Optional[int]:
+        """输入消息的token预算：显式配置优先，否则按模型上下文长度扣除输出预留"""
+        explicit = getattr(self, "_max_input_tokens", None)
+        if explicit:
+            return explicit
+        provider_info = OPENAI_COMPATIBLE_PROVIDERS.get(self.provider_name) or {}
+        model_info = provider_info.get("models", {}).get(self.model_name)
+        if not model_info:
+            return None
+        context_length = model_info["context_length"]
+        reserve = self.max_tokens or context_length // 8
+        return max(1, context_length - reserve)
+
+    def _fit_input_budget(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """超出输入预算时按优先级裁剪消息（系统提示和最近的工具结果固定保留）"""
+        fitted, stats = fit_messages(messages, self._input_token_budget())
+        if stats is not None and stats.trimmed:
+            logger.warning(
+                f"✂️ [{self.provider_name}] 输入超出预算 {self._input_token_budget()} tokens: "
+                f"~{stats.tokens_before} -> ~{stats.tokens_after}, 省略工具输出 {stats.elided_tool_outputs} 条, "
+                f"截断 {stats.clipped} 条, 丢弃 {stats.dropped} 条 ({stats.elapsed_ms:.1f}ms)"
+            )
+        return fitted
+
+    def _cache_identity(self, stop: Optional[List[str]], kwargs: Dict) -> Dict[str, Any]:
+        """缓存键中的模型身份：提供商 + 调用参数（含 stop、tools、tool_choice 等）"""
+        return {"provider": self.provider_name, **self._get_invocation_params(stop=stop, **kwargs)}
+
     def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
         """记录token使用量并输出日志"""
         if not TOKEN_TRACKING_ENABLED:
@@ -291,6 +410,9 @@ class ChatQianfanOpenAI(OpenAICompatibleBase):
                 "QIANFAN_API_KEY格式错误，应为: bce-v3/ALTAK-xxx/xxx"
             )
         
+        # 千帆 8K 系列模型的输入上限约 5120 tokens，预留输出空间
+        kwargs.setdefault("max_input_tokens", 4500)
+
         super().__init__(
             provider_name="qianfan",
             model=model,
@@ -301,59 +423,6 @@ class ChatQianfanOpenAI(OpenAICompatibleBase):
             max_tokens=max_tokens,
             **kwargs
         )
-    
-    def _estimate_tokens(self, text: str) -> int:
-        """估算文本的token数量（千帆模型专用）"""
-        # 千帆模型的token估算：中文约1.5字符/token，英文约4字符/token
-        # 保守估算：2字符/token
-        return max(1, len(text) // 2)
-    
-    def _truncate_messages(self, messages: List[BaseMessage], max_tokens: int = 4500) -> List[BaseMessage]:
-        """截断消息以适应千帆模型的token限制"""
-        # 为千帆模型预留一些token空间，使用4500而不是5120
-        truncated_messages = []
-        total_tokens = 0
-        
-        # 从最后一条消息开始，向前保留消息
-        for message in reversed(messages):
-            content = str(message.content) if hasattr(message, 'content') else str(message)
-            message_tokens = self._estimate_tokens(content)
-            
-            if total_tokens + message_tokens <= max_tokens:
-                truncated_messages.insert(0, message)
-                total_tokens += message_tokens
-            else:
-                # 如果是第一条消息且超长，进行内容截断
-                if not truncated_messages:
-                    remaining_tokens = max_tokens - 100  # 预留100个token
-                    max_chars = remaining_tokens * 2  # 2字符/token
-                    truncated_content = content[:max_chars] + "...(内容已截断)"
-                    
-                    # 创建截断后的消息
-                    if hasattr(message, 'content'):
-                        message.content = truncated_content
-                    truncated_messages.insert(0, message)
-                break
-        
-        if len(truncated_messages) < len(messages):
-            logger.warning(f"⚠️ 千帆模型输入过长，已截断 {len(messages) - len(truncated_messages)} 条消息")
-        
-        return truncated_messages
-    
-    def _generate(
-        self,
-        messages: List[BaseMessage],
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> ChatResult:
-        """生成聊天响应，包含千帆模型的token截断逻辑"""
-        
-        # 对千帆模型进行输入token截断
-        truncated_messages = self._truncate_messages(messages)
-        
-        # 调用父类的_generate方法
-        return super()._generate(truncated_messages, stop, run_manager, **kwargs)
 
 
 class ChatZhipuOpenAI(OpenAICompatibleBase):
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+LLM 响应缓存（内容寻址）
+以模型、调用参数、消息和绑定的工具 schema 的规范化哈希为键，把 ChatResult 存入 SQLite，
+用于回测、回放和调试时重放同一次分析而不再调用上游 API。
+
+模式（环境变量 TA_LLM_CACHE_MODE）：
+- passthrough: 不读不写缓存（默认）
+- record: 总是调用上游，并写入/覆盖缓存（录制）
+- replay: 命中则直接返回缓存；未命中时调用上游并写入，
+  TA_LLM_CACHE_STRICT=true 时未命中直接抛出 LLMCacheMissError（完全离线回放）
+
+缓存按总字节数限制大小（TA_LLM_CACHE_MAX_MB），超出时按最近使用时间淘汰。
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tradingagents.config.runtime_settings import get_bool, get_int
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+MODE_PASSTHROUGH = "passthrough"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+CACHE_MODES = (MODE_PASSTHROUGH, MODE_RECORD, MODE_REPLAY)
+
+# 键格式版本，规范化规则变化时递增，使旧条目自然失效
+KEY_VERSION = 1
+
+# 每次运行都会变化、与模型输入语义无关的消息字段
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+class LLMCacheMissError(RuntimeError):
+    """严格回放模式下缓存未命中"""
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def canonical_message(message: BaseMessage) -> Dict[str, Any]:
+    """消息的规范化形式：去掉运行 ID、响应元数据等易变字段"""
+    data = message_to_dict(message)
+    payload = {k: v for k, v in data["data"].items() if k not in _VOLATILE_MESSAGE_FIELDS and v not in (None, [], {})}
+    return {"type": data["type"], "data": payload}
+
+
+def make_cache_key(identity: Dict[str, Any], messages: List[BaseMessage]) -> str:
+    """
+    计算缓存键
+
+    Args:
+        identity: 提供商、模型及调用参数（含 stop、tools、tool_choice 等）
+        messages: 输入消息
+    """
+    document = {
+        "v": KEY_VERSION,
+        "identity": identity,
+        "messages": [canonical_message(m) for m in messages],
+    }
+    return hashlib.sha256(_canonical_json(document).encode("utf-8")).hexdigest()
+
+
+def serialize_result(result: ChatResult) -> str:
+    generations = [
+        {"message": message_to_dict(g.message), "generation_info": g.generation_info}
+        for g in result.generations
+    ]
+    return _canonical_json({"generations": generations, "llm_output": result.llm_output})
+
+
+def deserialize_result(payload: str) -> ChatResult:
+    data = json.loads(payload)
+    generations = [
+        ChatGeneration(message=messages_from_dict([g["message"]])[0], generation_info=g.get("generation_info"))
+        for g in data["generations"]
+    ]
+    return ChatResult(generations=generations, llm_output=data.get("llm_output"))
+
+
+class LLMResponseCache:
+    """基于 SQLite（WAL 模式）的 LLM 响应缓存，按大小做 LRU 淘汰"""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        mode: str = MODE_PASSTHROUGH,
+        max_bytes: int = 256 * 1024 * 1024,
+        strict: bool = False,
+    ):
+        """
+        Args:
+            db_path: SQLite 数据库文件路径（passthrough 模式下不会打开）
+            mode: passthrough / record / replay
+            max_bytes: 缓存总大小上限（按响应 JSON 字节数计）
+            strict: replay 模式下未命中时抛出 LLMCacheMissError
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"不支持的 LLM 缓存模式: {mode}，可选: {', '.join(CACHE_MODES)}")
+        self.db_path = db_path
+        self.mode = mode
+        self.max_bytes = max(1, max_bytes)
+        self.strict = strict
+
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "upstream_calls": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != MODE_PASSTHROUGH
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if not self.db_path:
+                raise ValueError("LLM 缓存未配置数据库路径")
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " cache_key TEXT PRIMARY KEY,"
+                " model TEXT,"
+                " payload TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used_at)")
+            self._conn = conn
+            atexit.register(self.close)
+        return self._conn
+
+    def get(self, key: str) -> Optional[ChatResult]:
+        """读取缓存的响应，并刷新最近使用时间"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT payload FROM llm_responses WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            conn.execute("UPDATE llm_responses SET last_used_at = ? WHERE cache_key = ?", (time.time(), key))
+            self._stats["hits"] += 1
+        return deserialize_result(row[0])
+
+    def put(self, key: str, result: ChatResult, model: Optional[str] = None) -> None:
+        """写入响应（已存在则覆盖），超出大小上限时淘汰最久未使用的条目"""
+        payload = serialize_result(result)
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (cache_key, model, payload, size, created_at, last_used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, payload, size, now, now),
+            )
+            self._stats["writes"] += 1
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 淘汰到上限的 90%，避免每次写入都触发淘汰
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        rows = conn.execute("SELECT cache_key, size FROM llm_responses ORDER BY last_used_at").fetchall()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for cache_key, size in rows:
+                if total <= target:
+                    break
+                conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+                total -= size
+                evicted += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._stats["evictions"] += evicted
+        logger.debug(f"🧹 LLM 缓存淘汰 {evicted} 条，当前 {total} 字节")
+
+    def record_upstream_call(self) -> None:
+        with self._lock:
+            self._stats["upstream_calls"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats, mode=self.mode, strict=self.strict, max_bytes=self.max_bytes)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+            if self._conn is not None:
+                entries, total = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+                ).fetchone()
+                stats.update(entries=entries, bytes=total)
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM llm_responses")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+
+
+def _default_cache_path() -> str:
+    try:
+        from utils.data_config import get_cache_dir
+        cache_dir = str(get_cache_dir('llm'))
+    except Exception:
+        cache_dir = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'cache', 'llm'
+        )
+    return os.path.join(cache_dir, 'llm_responses.sqlite3')
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """获取全局 LLM 响应缓存（配置读取自环境变量）"""
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        mode = (os.getenv("TA_LLM_CACHE_MODE") or MODE_PASSTHROUGH).strip().lower()
+        if mode not in CACHE_MODES:
+            logger.warning(f"⚠️ 无效的 TA_LLM_CACHE_MODE={mode}，LLM 缓存已禁用")
+            mode = MODE_PASSTHROUGH
+        cache = LLMResponseCache(
+            db_path=os.getenv("TA_LLM_CACHE_PATH") or _default_cache_path(),
+            mode=mode,
+            max_bytes=get_int("TA_LLM_CACHE_MAX_MB", None, 256) * 1024 * 1024,
+            strict=get_bool("TA_LLM_CACHE_STRICT", None, False),
+        )
+        if cache.enabled:
+            logger.info(f"💾 LLM 响应缓存已启用: 模式={cache.mode}, 严格={cache.strict}, 路径={cache.db_path}")
+        _llm_response_cache = cache
+    return _llm_response_cache
+
+
+def set_llm_response_cache(cache: Optional[LLMResponseCache]) -> None:
+    """替换全局 LLM 响应缓存（None 表示下次按环境变量重新创建）"""
+    global _llm_response_cache
+    _llm_response_cache = cache
@@ -0,0 +1,48 @@
+"""
+本地 token 估算
+不依赖具体模型的分词器，按字符类别快速估算：中文字符约 1 token/字，其余约 4 字符/token。
+结果按 (文本哈希, 长度) 缓存，同一条消息/报告在多次 LLM 调用中只计算一次；
+缓存只保存整数键值，不持有文本本身，长报告不会因缓存而常驻内存。
+"""
+
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+CACHE_SIZE = 4096
+
+_cache: "OrderedDict[Tuple[int, int], int]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _count_tokens(text: str) -> int:
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文字符约 1 token/字，其余约 4 字符/token"""
+    if not text:
+        return 0
+    key = (hash(text), len(text))
+    with _cache_lock:
+        tokens = _cache.get(key)
+        if tokens is not None:
+            _cache.move_to_end(key)
+            return tokens
+    tokens = _count_tokens(text)
+    with _cache_lock:
+        _cache[key] = tokens
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return tokens
+
+
+def clear_cache() -> None:
+    """清空估算缓存"""
+    with _cache_lock:
+        _cache.clear()
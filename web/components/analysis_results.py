@@ -57,278 +57,329 @@ def get_tags_file():
     """获取标签文件路径"""
     return get_analysis_results_dir() / "tags.json"
 
+def _get_catalog():
+    """获取分析结果目录（首次使用时导入旧版收藏/标签文件）"""
+    from web.utils.results_catalog import get_results_catalog
+
+    catalog = get_results_catalog(str(get_analysis_results_dir() / "catalog.db"))
+    catalog.import_legacy_files(get_favorites_file(), get_tags_file())
+    return catalog
+
 def load_favorites():
     """加载收藏列表"""
-    favorites_file = get_favorites_file()
-    if favorites_file.exists():
-        try:
-            with open(favorites_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    try:
+        return _get_catalog().get_favorites()
+    except Exception as e:
+        logger.error(f"加载收藏列表失败: {e}")
+        return []
 
 def save_favorites(favorites):
     """保存收藏列表"""
-    favorites_file = get_favorites_file()
     try:
-        with open(favorites_file, 'w', encoding='utf-8') as f:
-            json.dump(favorites, f, ensure_ascii=False, indent=2)
+        _get_catalog().replace_favorites(favorites)
         return True
-    except:
+    except Exception:
         return False
 
 def load_tags():
     """加载标签数据"""
-    tags_file = get_tags_file()
-    if tags_file.exists():
-        try:
-            with open(tags_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    try:
+        return _get_catalog().get_tags_map()
+    except Exception as e:
+        logger.error(f"加载标签数据失败: {e}")
+        return {}
 
 def save_tags(tags):
     """保存标签数据"""
-    tags_file = get_tags_file()
     try:
-        with open(tags_file, 'w', encoding='utf-8') as f:
-            json.dump(tags, f, ensure_ascii=False, indent=2)
+        _get_catalog().replace_tags(tags)
         return True
-    except:
+    except Exception:
         return False
 
 def add_tag_to_analysis(analysis_id, tag):
     """为分析结果添加标签"""
-    tags = load_tags()
-    if analysis_id not in tags:
-        tags[analysis_id] = []
-    if tag not in tags[analysis_id]:
-        tags[analysis_id].append(tag)
-        save_tags(tags)
+    _get_catalog().add_tag(analysis_id, tag)
 
 def remove_tag_from_analysis(analysis_id, tag):
     """从分析结果移除标签"""
-    tags = load_tags()
-    if analysis_id in tags and tag in tags[analysis_id]:
-        tags[analysis_id].remove(tag)
-        if not tags[analysis_id]:  # 如果没有标签了，删除该条目
-            del tags[analysis_id]
-        save_tags(tags)
+    _get_catalog().remove_tag(analysis_id, tag)
 
 def get_analysis_tags(analysis_id):
     """获取分析结果的标签"""
-    tags = load_tags()
-    return tags.get(analysis_id, [])
+    return _get_catalog().get_tags(analysis_id)
 
-def load_analysis_results(start_date=None, end_date=None, stock_symbol=None, analyst_type=None,
-                         limit=100, search_text=None, tags_filter=None, favorites_only=False):
-    """加载分析结果 - 优先从MongoDB加载"""
-    all_results = []
-    favorites = load_favorites() if favorites_only else []
-    tags_data = load_tags()
-    mongodb_loaded = False
+def get_detailed_results_dir():
+    """获取分析流程保存的详细报告目录"""
+    return Path(__file__).parent.parent.parent / "data" / "analysis_results" / "detailed"
 
-    # 优先从MongoDB加载数据
-    if MONGODB_AVAILABLE:
+def _read_reports_dir(reports_dir):
+    """读取报告目录下的所有 Markdown 报告"""
+    reports = {}
+    for report_file in reports_dir.glob("*.md"):
         try:
-            print("🔍 [数据加载] 从MongoDB加载分析结果")
-            mongodb_manager = MongoDBReportManager()
-            mongodb_results = mongodb_manager.get_all_reports()
-            print(f"🔍 [数据加载] MongoDB返回 {len(mongodb_results)} 个结果")
-
-            for mongo_result in mongodb_results:
-                # 转换MongoDB结果格式
-                result = {
-                    'analysis_id': mongo_result.get('analysis_id', ''),
-                    'timestamp': mongo_result.get('timestamp', 0),
-                    'stock_symbol': mongo_result.get('stock_symbol', ''),
-                    'analysts': mongo_result.get('analysts', []),
-                    'research_depth': mongo_result.get('research_depth', 1),
-                    'status': mongo_result.get('status', 'completed'),
-                    'summary': mongo_result.get('summary', ''),
-                    'performance': mongo_result.get('performance', {}),
-                    'tags': tags_data.get(mongo_result.get('analysis_id', ''), []),
-                    'is_favorite': mongo_result.get('analysis_id', '') in favorites,
-                    'reports': mongo_result.get('reports', {}),
-                    'source': 'mongodb'  # 标记数据来源
-                }
-                all_results.append(result)
-
-            mongodb_loaded = True
-            print(f"✅ 从MongoDB加载了 {len(mongodb_results)} 个分析结果")
-
-        except Exception as e:
-            print(f"❌ MongoDB加载失败: {e}")
-            logger.error(f"MongoDB加载失败: {e}")
-            mongodb_loaded = False
-    else:
-        print("⚠️ MongoDB不可用，将使用文件系统数据")
-
-    # 只有在MongoDB加载失败或不可用时才从文件系统加载
-    if not mongodb_loaded:
-        print("🔄 [备用数据源] 从文件系统加载分析结果")
-
-        # 首先尝试从Web界面的保存位置读取
-        web_results_dir = get_analysis_results_dir()
-        for result_file in web_results_dir.glob("*.json"):
-            if result_file.name in ['favorites.json', 'tags.json']:
-                continue
+            with open(report_file, 'r', encoding='utf-8') as f:
+                reports[report_file.stem] = f.read()
+        except Exception:
+            continue
+    return reports
+
+def _build_detailed_entry(stock_code, date_dir):
+    """根据详细报告目录构建分析结果条目，没有报告时返回 None"""
+    date_str = date_dir.name
+    reports = _read_reports_dir(date_dir / "reports")
+    if not reports:
+        return None
+
+    # 如果是最终决策报告，提取前200个字符作为摘要
+    summary_content = ""
+    final_decision = reports.get("final_trade_decision")
+    if final_decision:
+        summary_content = final_decision[:200].replace('#', '').replace('*', '').strip()
+        if len(final_decision) > 200:
+            summary_content += "..."
+
+    # 解析日期
+    try:
+        analysis_date = datetime.strptime(date_str, '%Y-%m-%d')
+        timestamp = analysis_date.timestamp()
+    except:
+        timestamp = datetime.now().timestamp()
 
-            try:
-                with open(result_file, 'r', encoding='utf-8') as f:
-                    result = json.load(f)
+    # 尝试从元数据文件中读取真实的研究深度和分析师信息
+    research_depth = 1
+    analysts = ['market', 'fundamentals', 'trader']  # 默认值
 
-                    # 添加标签信息
-                    result['tags'] = tags_data.get(result.get('analysis_id', ''), [])
-                    result['is_favorite'] = result.get('analysis_id', '') in favorites
-                    result['source'] = 'file_system'  # 标记数据来源
+    metadata_file = date_dir / "analysis_metadata.json"
+    metadata = None
+    if metadata_file.exists():
+        try:
+            with open(metadata_file, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            research_depth = metadata.get('research_depth', 1)
+            analysts = metadata.get('analysts', analysts)
+        except Exception:
+            metadata = None
+
+    if metadata is None:
+        # 如果没有元数据文件或读取失败，使用推断逻辑
+        if len(reports) >= 5:
+            research_depth = 3
+        elif len(reports) >= 3:
+            research_depth = 2
+
+    return {
+        'analysis_id': f"{stock_code}_{date_str}_{int(timestamp)}",
+        'timestamp': timestamp,
+        'stock_symbol': stock_code,
+        'analysts': analysts,
+        'research_depth': research_depth,
+        'status': 'completed',
+        'summary': summary_content,
+    }
 
-                    all_results.append(result)
-            except Exception as e:
-                st.warning(f"读取分析结果文件 {result_file.name} 失败: {e}")
+# 结果目录同步间隔（秒）：页面每次交互都会重新渲染，无需每次都扫描结果目录
+CATALOG_SYNC_INTERVAL = 30
+_last_catalog_sync = 0.0
 
-        # 然后从实际的分析结果保存位置读取
-        project_results_dir = Path(__file__).parent.parent.parent / "data" / "analysis_results" / "detailed"
+def _result_path_mtime(path):
+    """结果文件的 mtime；详细报告目录取目录、reports 子目录和元数据文件中最新的 mtime"""
+    try:
+        if not path.is_dir():
+            return path.stat().st_mtime
+        mtimes = [path.stat().st_mtime]
+        for child in (path / "reports", path / "analysis_metadata.json"):
+            if child.exists():
+                mtimes.append(child.stat().st_mtime)
+        return max(mtimes)
+    except OSError:
+        return None
+
+def sync_results_catalog(catalog=None, force=False):
+    """将本地结果文件同步进目录，返回新增/更新条数
+
+    - 按 CATALOG_SYNC_INTERVAL 节流，force=True 时立即同步
+    - 未收录或 mtime 变化（例如收录时仍在写入）的结果重新读取
+    - 文件已被删除的结果从目录中移除
+    Web 界面保存的结果在 save_analysis_result 中直接写入目录。
+    """
+    global _last_catalog_sync
+    now = datetime.now().timestamp()
+    if not force and now - _last_catalog_sync < CATALOG_SYNC_INTERVAL:
+        return 0
+    _last_catalog_sync = now
+
+    catalog = catalog or _get_catalog()
+    path_index = catalog.path_index()
+    seen_paths = set()
+    items = []
+
+    def _changed(path):
+        seen_paths.add(str(path))
+        mtime = _result_path_mtime(path)
+        indexed = path_index.get(str(path))
+        return mtime, indexed is None or indexed[1] is None or mtime is None or mtime > indexed[1]
+
+    # Web界面的保存位置
+    for result_file in get_analysis_results_dir().glob("*.json"):
+        if result_file.name in ['favorites.json', 'tags.json']:
+            continue
+        mtime, changed = _changed(result_file)
+        if not changed:
+            continue
+        try:
+            with open(result_file, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            if result.get('analysis_id'):
+                items.append((result, str(result_file), 'file_system', mtime))
+        except Exception as e:
+            logger.warning(f"读取分析结果文件 {result_file.name} 失败: {e}")
 
-        if project_results_dir.exists():
-            # 遍历股票代码目录
-            for stock_dir in project_results_dir.iterdir():
-                if not stock_dir.is_dir():
+    # 分析流程保存的详细报告
+    project_results_dir = get_detailed_results_dir()
+    if project_results_dir.exists():
+        for stock_dir in project_results_dir.iterdir():
+            if not stock_dir.is_dir():
+                continue
+            for date_dir in stock_dir.iterdir():
+                if not date_dir.is_dir():
+                    continue
+                mtime, changed = _changed(date_dir)
+                if not changed:
                     continue
+                entry = _build_detailed_entry(stock_dir.name, date_dir)
+                if entry:
+                    items.append((entry, str(date_dir), 'file_system', mtime))
+
+    updated = catalog.upsert_many(items) if items else 0
+
+    removed = 0
+    for path, (analysis_id, _) in path_index.items():
+        if path not in seen_paths and not os.path.exists(path):
+            catalog.delete(analysis_id)
+            removed += 1
+
+    if updated or removed:
+        print(f"🗂️ [结果目录] 收录/更新 {updated} 个分析结果，移除 {removed} 个已删除的结果")
+    return updated
+
+def _hydrate_result(result):
+    """按需读取目录条目对应的完整结果（报告正文等）"""
+    path = result.pop('path', None)
+    if not path:
+        return result
+    path = Path(path)
+    try:
+        if path.is_dir():
+            result['reports'] = _read_reports_dir(path / "reports")
+        elif path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            for key, value in stored.items():
+                result.setdefault(key, value)
+    except Exception as e:
+        logger.warning(f"读取分析结果 {path} 失败: {e}")
+    result.setdefault('performance', {})
+    return result
+
+def _get_mongodb_manager():
+    """获取已连接的MongoDB报告管理器，不可用时返回 None"""
+    if not MONGODB_AVAILABLE:
+        return None
+    try:
+        mongodb_manager = MongoDBReportManager()
+        return mongodb_manager if mongodb_manager.connected else None
+    except Exception as e:
+        logger.error(f"MongoDB连接失败: {e}")
+        return None
+
+def _query_mongodb_results(mongodb_manager, start_date=None, end_date=None, stock_symbol=None,
+                           analyst_type=None, search_text=None, tags_filter=None, favorites_only=False,
+                           limit=100, offset=0):
+    """在MongoDB中按条件分页查询（标签和收藏来自本地结果目录，先解析成ID集合再下推）"""
+    catalog = _get_catalog()
+    favorites = set(catalog.get_favorites())
+    analysis_ids = set(favorites) if favorites_only else None
+    if tags_filter:
+        tagged = set(catalog.get_tagged_ids(tags_filter))
+        analysis_ids = tagged if analysis_ids is None else analysis_ids & tagged
+    if analysis_ids is not None and not analysis_ids:
+        return [], 0
+
+    mongodb_results, total = mongodb_manager.query_reports(
+        start_date=start_date,
+        end_date=end_date,
+        stock_symbol=stock_symbol,
+        analyst_type=analyst_type,
+        search_text=search_text,
+        analysis_ids=analysis_ids,
+        skip=offset,
+        limit=limit,
+    )
 
-                stock_code = stock_dir.name
+    ids = [r.get('analysis_id', '') for r in mongodb_results]
+    tags_data = catalog.get_tags_map(ids)
+    page_results = []
+    for mongo_result in mongodb_results:
+        analysis_id = mongo_result.get('analysis_id', '')
+        page_results.append({
+            'analysis_id': analysis_id,
+            'timestamp': mongo_result.get('timestamp', 0),
+            'stock_symbol': mongo_result.get('stock_symbol', ''),
+            'analysts': mongo_result.get('analysts', []),
+            'research_depth': mongo_result.get('research_depth', 1),
+            'status': mongo_result.get('status', 'completed'),
+            'summary': mongo_result.get('summary', ''),
+            'performance': mongo_result.get('performance', {}),
+            'tags': tags_data.get(analysis_id, []),
+            'is_favorite': analysis_id in favorites,
+            'reports': mongo_result.get('reports', {}),
+            'source': 'mongodb'  # 标记数据来源
+        })
+    return page_results, total
 
-                # 遍历日期目录
-                for date_dir in stock_dir.iterdir():
-                    if not date_dir.is_dir():
-                        continue
+def query_analysis_results(start_date=None, end_date=None, stock_symbol=None, analyst_type=None,
+                           limit=100, offset=0, search_text=None, tags_filter=None, favorites_only=False):
+    """分页查询分析结果 - 优先从MongoDB加载，否则查询本地结果目录
 
-                    date_str = date_dir.name
-                    reports_dir = date_dir / "reports"
+    Returns:
+        (当前页结果列表, 符合条件的总数)
+    """
+    filters = dict(
+        start_date=start_date,
+        end_date=end_date,
+        stock_symbol=stock_symbol,
+        analyst_type=analyst_type,
+        search_text=search_text,
+        tags_filter=tags_filter,
+        favorites_only=favorites_only,
+    )
 
-                    if not reports_dir.exists():
-                        continue
+    mongodb_manager = _get_mongodb_manager()
+    if mongodb_manager is not None:
+        return _query_mongodb_results(mongodb_manager, limit=limit, offset=offset, **filters)
 
-                    # 读取所有报告文件
-                    reports = {}
-                    summary_content = ""
-
-                    for report_file in reports_dir.glob("*.md"):
-                        try:
-                            with open(report_file, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                report_name = report_file.stem
-                                reports[report_name] = content
-
-                                # 如果是最终决策报告，提取摘要
-                                if report_name == "final_trade_decision":
-                                    # 提取前200个字符作为摘要
-                                    summary_content = content[:200].replace('#', '').replace('*', '').strip()
-                                    if len(content) > 200:
-                                        summary_content += "..."
-
-                        except Exception as e:
-                            continue
-
-                    if reports:
-                        # 解析日期
-                        try:
-                            analysis_date = datetime.strptime(date_str, '%Y-%m-%d')
-                            timestamp = analysis_date.timestamp()
-                        except:
-                            timestamp = datetime.now().timestamp()
-
-                        # 创建分析结果条目
-                        analysis_id = f"{stock_code}_{date_str}_{int(timestamp)}"
-
-                        # 尝试从元数据文件中读取真实的研究深度和分析师信息
-                        research_depth = 1
-                        analysts = ['market', 'fundamentals', 'trader']  # 默认值
-
-                        metadata_file = date_dir / "analysis_metadata.json"
-                        if metadata_file.exists():
-                            try:
-                                with open(metadata_file, 'r', encoding='utf-8') as f:
-                                    metadata = json.load(f)
-                                    research_depth = metadata.get('research_depth', 1)
-                                    analysts = metadata.get('analysts', analysts)
-                            except Exception as e:
-                                # 如果读取元数据失败，使用推断逻辑
-                                if len(reports) >= 5:
-                                    research_depth = 3
-                                elif len(reports) >= 3:
-                                    research_depth = 2
-                        else:
-                            # 如果没有元数据文件，使用推断逻辑
-                            if len(reports) >= 5:
-                                research_depth = 3
-                            elif len(reports) >= 3:
-                                research_depth = 2
-
-                        result = {
-                            'analysis_id': analysis_id,
-                            'timestamp': timestamp,
-                            'stock_symbol': stock_code,
-                            'analysts': analysts,
-                            'research_depth': research_depth,
-                            'status': 'completed',
-                            'summary': summary_content,
-                            'performance': {},
-                            'tags': tags_data.get(analysis_id, []),
-                            'is_favorite': analysis_id in favorites,
-                            'reports': reports,  # 保存所有报告内容
-                            'source': 'file_system'  # 标记数据来源
-                        }
-
-                        all_results.append(result)
-
-        print(f"🔄 [备用数据源] 从文件系统加载了 {len(all_results)} 个分析结果")
-    
-    # 过滤结果
-    filtered_results = []
-    for result in all_results:
-        # 收藏过滤
-        if favorites_only and not result.get('is_favorite', False):
-            continue
-            
-        # 时间过滤
-        if start_date or end_date:
-            result_time = safe_timestamp_to_datetime(result.get('timestamp', 0))
-            if start_date and result_time.date() < start_date:
-                continue
-            if end_date and result_time.date() > end_date:
-                continue
-        
-        # 股票代码过滤
-        if stock_symbol and stock_symbol.upper() not in result.get('stock_symbol', '').upper():
-            continue
-        
-        # 分析师类型过滤
-        if analyst_type and analyst_type not in result.get('analysts', []):
-            continue
-            
-        # 文本搜索过滤
-        if search_text:
-            search_text = search_text.lower()
-            searchable_text = f"{result.get('stock_symbol', '')} {result.get('summary', '')} {' '.join(result.get('analysts', []))}".lower()
-            if search_text not in searchable_text:
-                continue
-                
-        # 标签过滤
-        if tags_filter:
-            result_tags = result.get('tags', [])
-            if not any(tag in result_tags for tag in tags_filter):
-                continue
-        
-        filtered_results.append(result)
-    
-    # 按时间倒序排列 - 使用安全的时间戳转换函数确保类型一致
-    filtered_results.sort(key=lambda x: safe_timestamp_to_datetime(x.get('timestamp', 0)), reverse=True)
-    
-    # 限制数量
-    return filtered_results[:limit]
+    catalog = _get_catalog()
+    sync_results_catalog(catalog)
+    total = catalog.count(**filters)
+    page_results = [_hydrate_result(r) for r in catalog.query(limit=limit, offset=offset, **filters)]
+    return page_results, total
+
+def load_analysis_results(start_date=None, end_date=None, stock_symbol=None, analyst_type=None,
+                         limit=100, search_text=None, tags_filter=None, favorites_only=False, offset=0):
+    """加载分析结果 - 优先从MongoDB加载"""
+    results, _ = query_analysis_results(
+        start_date=start_date,
+        end_date=end_date,
+        stock_symbol=stock_symbol,
+        analyst_type=analyst_type,
+        limit=limit,
+        offset=offset,
+        search_text=search_text,
+        tags_filter=tags_filter,
+        favorites_only=favorites_only,
+    )
+    return results
 
 def render_analysis_results():
     """渲染分析结果管理界面"""
@@ -390,23 +441,25 @@ def render_analysis_results():
             analyst_filter = None
             
         # 标签过滤
-        all_tags = set()
-        tags_data = load_tags()
-        for tag_list in tags_data.values():
-            all_tags.update(tag_list)
+        all_tags = set(_get_catalog().tag_counts())
         
         if all_tags:
             selected_tags = st.multiselect("🏷️ 标签过滤", sorted(all_tags))
         else:
             selected_tags = []
+
+        # 结果分页（每页结果从目录按索引查询）
+        results_page_size = st.selectbox("📄 每次加载", [50, 100, 200], index=2)
+        results_page = st.number_input("📑 结果页", min_value=1, value=1, step=1)
     
     # 加载分析结果
-    results = load_analysis_results(
+    results, total_results = query_analysis_results(
         start_date=start_date,
         end_date=end_date,
         stock_symbol=stock_filter if stock_filter else None,
         analyst_type=analyst_filter,
-        limit=200,
+        limit=results_page_size,
+        offset=(results_page - 1) * results_page_size,
         search_text=search_text if search_text else None,
         tags_filter=selected_tags if selected_tags else None,
         favorites_only=favorites_only
@@ -415,12 +468,16 @@ def render_analysis_results():
     if not results:
         st.warning("📭 未找到符合条件的分析结果")
         return
+
+    total_result_pages = (total_results + results_page_size - 1) // results_page_size
+    if total_result_pages > 1:
+        st.caption(f"结果页 {results_page}/{total_result_pages}，共 {total_results} 条记录（统计与图表基于当前结果页）")
     
     # 显示统计概览
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("📊 总分析数", len(results))
+        st.metric("📊 总分析数", total_results)
     
     with col2:
         unique_stocks = len(set(result.get('stock_symbol', 'unknown') for result in results))
@@ -590,12 +647,7 @@ def render_results_cards(results: List[Dict[str, Any]]):
 
 def toggle_favorite(analysis_id):
     """切换收藏状态"""
-    favorites = load_favorites()
-    if analysis_id in favorites:
-        favorites.remove(analysis_id)
-    else:
-        favorites.append(analysis_id)
-    save_favorites(favorites)
+    _get_catalog().toggle_favorite(analysis_id)
 
 def render_results_comparison(results: List[Dict[str, Any]]):
     """渲染结果对比功能"""
@@ -785,13 +837,9 @@ def render_results_charts(results: List[Dict[str, Any]]):
         st.plotly_chart(fig_success, use_container_width=True)
     
     # 标签使用统计
-    tags_data = load_tags()
-    if tags_data:
+    tag_counts = _get_catalog().tag_counts()
+    if tag_counts:
         st.subheader("🏷️ 标签使用统计")
-        tag_counts = {}
-        for tag_list in tags_data.values():
-            for tag in tag_list:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
         
         if tag_counts:
             # 只显示前10个最常用的标签
@@ -816,18 +864,12 @@ def render_tags_management(results: List[Dict[str, Any]]):
     st.subheader("🏷️ 标签管理")
     
     # 获取所有标签
-    all_tags = set()
-    tags_data = load_tags()
-    for tag_list in tags_data.values():
-        all_tags.update(tag_list)
+    tag_counts = _get_catalog().tag_counts()
+    all_tags = set(tag_counts)
     
     # 标签统计
     if all_tags:
         st.write("**现有标签统计**")
-        tag_counts = {}
-        for tag_list in tags_data.values():
-            for tag in tag_list:
-                tag_counts[tag] = tag_counts.get(tag, 0) + 1
         
         # 显示标签云
         col1, col2 = st.columns([2, 1])
@@ -1616,6 +1658,12 @@ def save_analysis_result(analysis_id: str, stock_symbol: str, analysts: List[str
         with open(result_file, 'w', encoding='utf-8') as f:
             json.dump(result_entry, f, ensure_ascii=False, indent=2)
 
+        # 写入本地结果目录，历史页面无需重新扫描文件
+        try:
+            _get_catalog().upsert(result_entry, path=str(result_file), mtime=_result_path_mtime(result_file))
+        except Exception as e:
+            logger.warning(f"写入结果目录失败: {e}")
+
         # 2. 保存到MongoDB（如果可用）
         if MONGODB_AVAILABLE:
             try:
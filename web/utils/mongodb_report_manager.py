@@ -5,9 +5,10 @@ MongoDB报告管理器
 """
 
 import os
+import re
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -21,6 +22,16 @@ except ImportError:
     logger.warning("pymongo未安装，MongoDB功能不可用")
 
 
+def _add_search_fields(document: Dict[str, Any]) -> None:
+    """写入报告列表关键词搜索使用的 n-gram 搜索词（与后端保存报告时的规则一致）"""
+    try:
+        from app.utils.report_search import build_report_search_fields
+    except ImportError as e:
+        logger.warning(f"⚠️ 无法生成报告搜索词，将由后台任务补齐: {e}")
+        return
+    document.update(build_report_search_fields(document))
+
+
 class MongoDBReportManager:
     """MongoDB报告管理器"""
     
@@ -100,6 +111,8 @@ class MongoDBReportManager:
             # 创建单字段索引
             self.collection.create_index("analysis_id")
             self.collection.create_index("status")
+            # 历史页面按时间倒序分页
+            self.collection.create_index([("timestamp", -1)])
             
             logger.info("✅ MongoDB索引创建成功")
             
@@ -189,6 +202,7 @@ class MongoDBReportManager:
                 "created_at": timestamp,
                 "updated_at": timestamp
             }
+            _add_search_fields(document)
 
             # 插入文档
             result = self.collection.insert_one(document)
@@ -340,6 +354,63 @@ class MongoDBReportManager:
             logger.error(f"❌ 从MongoDB获取所有报告失败: {e}")
             return []
 
+    def query_reports(self, start_date=None, end_date=None, stock_symbol: str = None,
+                      analyst_type: str = None, search_text: str = None,
+                      analysis_ids: Optional[List[str]] = None,
+                      skip: int = 0, limit: int = 100) -> Tuple[List[Dict[str, Any]], int]:
+        """按条件分页查询分析报告（时间倒序），过滤和分页都在MongoDB中完成
+
+        Args:
+            start_date/end_date: 分析时间的起止日期（date），按天包含
+            analysis_ids: 限定的报告ID集合（收藏/标签过滤由调用方先解析成ID）
+
+        Returns:
+            (当前页报告列表, 符合条件的总数)
+        """
+        if not self.connected:
+            return [], 0
+
+        query: Dict[str, Any] = {}
+        if start_date or end_date:
+            time_query = {}
+            if start_date:
+                time_query["$gte"] = datetime.combine(start_date, datetime.min.time())
+            if end_date:
+                time_query["$lt"] = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+            query["timestamp"] = time_query
+
+        if stock_symbol:
+            # 与本地结果目录一致：股票代码子串匹配（不区分大小写）
+            query["stock_symbol"] = {"$regex": re.escape(stock_symbol), "$options": "i"}
+
+        if analyst_type:
+            query["analysts"] = analyst_type
+
+        if search_text:
+            pattern = {"$regex": re.escape(search_text), "$options": "i"}
+            query["$or"] = [{"stock_symbol": pattern}, {"summary": pattern}, {"analysts": pattern}]
+
+        if analysis_ids is not None:
+            query["analysis_id"] = {"$in": list(analysis_ids)}
+
+        try:
+            total = self.collection.count_documents(query)
+            cursor = (
+                self.collection.find(query)
+                .sort([("timestamp", -1), ("analysis_id", -1)])
+                .skip(max(0, int(skip)))
+                .limit(max(0, int(limit)))
+            )
+            reports = list(cursor)
+            for report in reports:
+                if '_id' in report:
+                    report['_id'] = str(report['_id'])
+            return reports, total
+
+        except Exception as e:
+            logger.error(f"❌ 从MongoDB分页查询分析报告失败: {e}")
+            return [], 0
+
     def fix_inconsistent_reports(self) -> bool:
         """修复不一致的报告数据结构"""
         if not self.connected:
@@ -409,6 +480,8 @@ class MongoDBReportManager:
 
             # 添加保存时间戳
             report_data['saved_at'] = datetime.now()
+            # replace_one 会整体替换文档，搜索词需要随之重新生成
+            _add_search_fields(report_data)
 
             # 使用upsert操作，如果存在则更新，不存在则插入
             result = self.collection.replace_one(
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+本地分析结果目录（SQLite 索引）
+分析结果保存时写入目录，历史页面按日期/股票/分析师/标签走索引分页查询，
+不再每次渲染都遍历结果文件；收藏和标签按行读写，不再整文件重写 JSON。
+报告正文仍保存在原结果文件中，目录只记录元数据、文件路径和收录时的 mtime，按页按需读取；
+mtime 变化的结果会被重新收录，文件已删除的结果会从目录中移除。
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, time as dt_time, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS results ("
+    " analysis_id TEXT PRIMARY KEY,"
+    " timestamp REAL NOT NULL,"
+    " stock_symbol TEXT NOT NULL,"
+    " analysts TEXT NOT NULL,"
+    " research_depth INTEGER,"
+    " status TEXT,"
+    " summary TEXT,"
+    " source TEXT,"
+    " path TEXT,"
+    " mtime REAL"
+    ")",
+    "CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_results_symbol ON results (stock_symbol, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_results_path ON results (path)",
+    "CREATE TABLE IF NOT EXISTS result_analysts ("
+    " analyst TEXT NOT NULL,"
+    " analysis_id TEXT NOT NULL,"
+    " PRIMARY KEY (analyst, analysis_id)"
+    ") WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS result_tags ("
+    " tag TEXT NOT NULL,"
+    " analysis_id TEXT NOT NULL,"
+    " PRIMARY KEY (tag, analysis_id)"
+    ") WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_result_tags_id ON result_tags (analysis_id)",
+    "CREATE TABLE IF NOT EXISTS favorites ("
+    " analysis_id TEXT PRIMARY KEY"
+    ") WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS catalog_meta ("
+    " key TEXT PRIMARY KEY,"
+    " value TEXT"
+    ") WITHOUT ROWID",
+)
+
+_RESULT_COLUMNS = "analysis_id, timestamp, stock_symbol, analysts, research_depth, status, summary, source, path"
+
+
+def _date_to_timestamp(value: Any, end_of_day: bool = False) -> Optional[float]:
+    """日期过滤条件转换为时间戳（结束日期取次日零点，区间为左闭右开）"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        if end_of_day:
+            value = value + timedelta(days=1)
+        return datetime.combine(value, dt_time.min).timestamp()
+    return float(value)
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class ResultsCatalog:
+    """基于 SQLite（WAL 模式）的分析结果目录"""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite 数据库文件路径
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        # Streamlit 每个会话在独立线程中运行脚本，共用一个连接并加锁
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """为旧版目录补充新增列"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)").fetchall()}
+        if "mtime" not in columns:
+            self._conn.execute("ALTER TABLE results ADD COLUMN mtime REAL")
+
+    # ------------------------------------------------------------------
+    # 结果条目
+    # ------------------------------------------------------------------
+
+    def upsert(
+        self,
+        entry: Dict[str, Any],
+        path: Optional[str] = None,
+        source: str = "file_system",
+        mtime: Optional[float] = None,
+    ) -> None:
+        """写入或更新一条分析结果
+
+        Args:
+            mtime: 收录时结果文件/目录的修改时间，同步时据此判断是否需要重新收录
+        """
+        self.upsert_many([(entry, path, source, mtime)])
+
+    def upsert_many(self, items: Iterable[Tuple]) -> int:
+        """批量写入分析结果 (entry, path, source[, mtime])，返回写入条数"""
+        count = 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for entry, path, source, *rest in items:
+                    self._upsert_row(entry, path, source, rest[0] if rest else None)
+                    count += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def _upsert_row(self, entry: Dict[str, Any], path: Optional[str], source: str, mtime: Optional[float]) -> None:
+        analysis_id = entry.get("analysis_id")
+        if not analysis_id:
+            raise ValueError("分析结果缺少 analysis_id")
+        analysts = [str(a) for a in (entry.get("analysts") or [])]
+        timestamp = entry.get("timestamp") or 0
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO results ({_RESULT_COLUMNS}, mtime) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                analysis_id,
+                float(timestamp),
+                str(entry.get("stock_symbol") or ""),
+                json.dumps(analysts, ensure_ascii=False),
+                entry.get("research_depth"),
+                entry.get("status") or "completed",
+                str(entry.get("summary") or ""),
+                source,
+                str(path) if path else None,
+                mtime,
+            ),
+        )
+        self._conn.execute("DELETE FROM result_analysts WHERE analysis_id = ?", (analysis_id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO result_analysts (analyst, analysis_id) VALUES (?, ?)",
+            [(analyst, analysis_id) for analyst in analysts],
+        )
+
+    def delete(self, analysis_id: str) -> None:
+        """删除分析结果（收藏和标签一并删除）"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for table in ("results", "result_analysts", "result_tags", "favorites"):
+                self._conn.execute(f"DELETE FROM {table} WHERE analysis_id = ?", (analysis_id,))
+            self._conn.execute("COMMIT")
+
+    def path_index(self) -> Dict[str, Tuple[str, Optional[float]]]:
+        """已收录的结果文件路径 -> (analysis_id, 收录时的 mtime)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, analysis_id, mtime FROM results WHERE path IS NOT NULL"
+            ).fetchall()
+        return {path: (analysis_id, mtime) for path, analysis_id, mtime in rows}
+
+    def _build_filters(
+        self,
+        start_date=None,
+        end_date=None,
+        stock_symbol: Optional[str] = None,
+        analyst_type: Optional[str] = None,
+        search_text: Optional[str] = None,
+        tags_filter: Optional[List[str]] = None,
+        favorites_only: bool = False,
+    ) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        start_ts = _date_to_timestamp(start_date)
+        if start_ts is not None:
+            clauses.append("r.timestamp >= ?")
+            params.append(start_ts)
+        end_ts = _date_to_timestamp(end_date, end_of_day=True)
+        if end_ts is not None:
+            clauses.append("r.timestamp < ?")
+            params.append(end_ts)
+
+        if stock_symbol:
+            # 与原有过滤语义一致：股票代码子串匹配（不区分大小写）
+            clauses.append("UPPER(r.stock_symbol) LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(stock_symbol.upper())}%")
+
+        if analyst_type:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM result_analysts a WHERE a.analyst = ? AND a.analysis_id = r.analysis_id)"
+            )
+            params.append(analyst_type)
+
+        if tags_filter:
+            placeholders = ", ".join("?" for _ in tags_filter)
+            clauses.append(
+                f"EXISTS (SELECT 1 FROM result_tags t WHERE t.tag IN ({placeholders}) AND t.analysis_id = r.analysis_id)"
+            )
+            params.extend(tags_filter)
+
+        if favorites_only:
+            clauses.append("EXISTS (SELECT 1 FROM favorites f WHERE f.analysis_id = r.analysis_id)")
+
+        if search_text:
+            pattern = f"%{_escape_like(search_text.lower())}%"
+            clauses.append(
+                "(LOWER(r.stock_symbol) LIKE ? ESCAPE '\\' OR LOWER(r.summary) LIKE ? ESCAPE '\\'"
+                " OR LOWER(r.analysts) LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern, pattern, pattern])
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(self, limit: int = 100, offset: int = 0, **filters) -> List[Dict[str, Any]]:
+        """按条件分页查询（时间倒序），返回不含报告正文的结果条目"""
+        where, params = self._build_filters(**filters)
+        columns = ", ".join(f"r.{c.strip()}" for c in _RESULT_COLUMNS.split(","))
+        sql = (
+            f"SELECT {columns} FROM results r{where}"
+            " ORDER BY r.timestamp DESC, r.analysis_id DESC LIMIT ? OFFSET ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params + [max(0, int(limit)), max(0, int(offset))]).fetchall()
+            ids = [row[0] for row in rows]
+            tags_map = self.get_tags_map(ids)
+            favorites = self._favorites_among(ids)
+
+        results = []
+        for row in rows:
+            analysis_id = row[0]
+            results.append({
+                "analysis_id": analysis_id,
+                "timestamp": row[1],
+                "stock_symbol": row[2],
+                "analysts": json.loads(row[3]),
+                "research_depth": row[4],
+                "status": row[5],
+                "summary": row[6],
+                "source": row[7],
+                "path": row[8],
+                "tags": tags_map.get(analysis_id, []),
+                "is_favorite": analysis_id in favorites,
+            })
+        return results
+
+    def count(self, **filters) -> int:
+        """统计符合条件的结果数量"""
+        where, params = self._build_filters(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM results r{where}", params).fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # 收藏
+    # ------------------------------------------------------------------
+
+    def set_favorite(self, analysis_id: str, favorite: bool) -> None:
+        with self._lock:
+            if favorite:
+                self._conn.execute("INSERT OR IGNORE INTO favorites (analysis_id) VALUES (?)", (analysis_id,))
+            else:
+                self._conn.execute("DELETE FROM favorites WHERE analysis_id = ?", (analysis_id,))
+
+    def toggle_favorite(self, analysis_id: str) -> bool:
+        """切换收藏状态，返回切换后的状态"""
+        with self._lock:
+            favorite = not self._favorites_among([analysis_id])
+            self.set_favorite(analysis_id, favorite)
+        return favorite
+
+    def get_favorites(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT analysis_id FROM favorites").fetchall()]
+
+    def replace_favorites(self, analysis_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM favorites")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO favorites (analysis_id) VALUES (?)", [(i,) for i in analysis_ids]
+            )
+            self._conn.execute("COMMIT")
+
+    def _favorites_among(self, ids: List[str]) -> set:
+        if not ids:
+            return set()
+        placeholders = ", ".join("?" for _ in ids)
+        rows = self._conn.execute(
+            f"SELECT analysis_id FROM favorites WHERE analysis_id IN ({placeholders})", ids
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    # ------------------------------------------------------------------
+    # 标签
+    # ------------------------------------------------------------------
+
+    def add_tag(self, analysis_id: str, tag: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO result_tags (tag, analysis_id) VALUES (?, ?)", (tag, analysis_id))
+
+    def remove_tag(self, analysis_id: str, tag: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM result_tags WHERE tag = ? AND analysis_id = ?", (tag, analysis_id))
+
+    def get_tags(self, analysis_id: str) -> List[str]:
+        return self.get_tags_map([analysis_id]).get(analysis_id, [])
+
+    def get_tags_map(self, analysis_ids: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """获取 {analysis_id: [标签]}，analysis_ids 为 None 时返回全部"""
+        if analysis_ids is not None and not analysis_ids:
+            return {}
+        sql = "SELECT analysis_id, tag FROM result_tags"
+        params: List[Any] = []
+        if analysis_ids is not None:
+            sql += f" WHERE analysis_id IN ({', '.join('?' for _ in analysis_ids)})"
+            params = list(analysis_ids)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY analysis_id, tag", params).fetchall()
+        tags_map: Dict[str, List[str]] = {}
+        for analysis_id, tag in rows:
+            tags_map.setdefault(analysis_id, []).append(tag)
+        return tags_map
+
+    def get_tagged_ids(self, tags: List[str]) -> List[str]:
+        """获取带有任一指定标签的 analysis_id"""
+        if not tags:
+            return []
+        placeholders = ", ".join("?" for _ in tags)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT analysis_id FROM result_tags WHERE tag IN ({placeholders})", list(tags)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def replace_tags(self, tags_map: Dict[str, List[str]]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM result_tags")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO result_tags (tag, analysis_id) VALUES (?, ?)",
+                [(tag, analysis_id) for analysis_id, tags in tags_map.items() for tag in tags],
+            )
+            self._conn.execute("COMMIT")
+
+    def tag_counts(self) -> Dict[str, int]:
+        """各标签的使用次数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT tag, COUNT(*) FROM result_tags GROUP BY tag").fetchall()
+        return dict(rows)
+
+    # ------------------------------------------------------------------
+    # 元数据
+    # ------------------------------------------------------------------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_legacy_files(self, favorites_file: Path, tags_file: Path) -> None:
+        """一次性导入旧版 favorites.json / tags.json"""
+        if self.get_meta("legacy_imported"):
+            return
+        try:
+            if favorites_file.exists():
+                with open(favorites_file, "r", encoding="utf-8") as f:
+                    for analysis_id in json.load(f) or []:
+                        self.set_favorite(analysis_id, True)
+            if tags_file.exists():
+                with open(tags_file, "r", encoding="utf-8") as f:
+                    for analysis_id, tags in (json.load(f) or {}).items():
+                        for tag in tags:
+                            self.add_tag(analysis_id, tag)
+        except Exception as e:
+            logger.warning(f"⚠️ [结果目录] 导入旧版收藏/标签失败: {e}")
+        self.set_meta("legacy_imported", datetime.now().isoformat())
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+
+
+_results_catalog: Optional[ResultsCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_results_catalog(db_path: Optional[str] = None) -> ResultsCatalog:
+    """获取分析结果目录实例"""
+    global _results_catalog
+    with _catalog_lock:
+        if _results_catalog is None:
+            if db_path is None:
+                db_path = str(Path(__file__).parent.parent / "data" / "analysis_results" / "catalog.db")
+            _results_catalog = ResultsCatalog(db_path)
+    return _results_catalog